@@ -7,7 +7,49 @@ import csv
 import os
 from decimal import Decimal, ROUND_HALF_UP
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from config import Config
+from pospal_services import (
+    PrintJobQueue,
+    OrderNumberAllocator,
+    OrderJournal,
+    OrderOffsetIndex,
+    OrderOutcomeOverlay,
+    TableSessionStore,
+    SQLiteOrderStore,
+    AnalyticsRollups,
+    EventBus,
+    SSEGateway,
+    create_printer_backend,
+    PrintJobMonitor,
+    SPOOL_JOB_COMPLETED,
+    SPOOL_JOB_GONE,
+    SPOOL_JOB_FATAL,
+    SPOOL_JOB_PRINTER_FATAL,
+    SPOOL_JOB_BLOCKED,
+    SPOOL_JOB_TIMEOUT,
+    SPOOL_JOB_UNAVAILABLE,
+    SPOOL_JOB_ERROR,
+    TicketBlobStore,
+    ReceiptTemplateCache,
+    CompiledReceiptTemplate,
+    register_greek_codec,
+    contains_greek,
+    greek_transliterate,
+    escpos_to_text,
+    PrinterHealthProber,
+    PrinterFailoverRouter,
+    KitchenStationRouter,
+    KITCHEN_DEFAULT_STATION,
+    AuditLog,
+    TableHistoryStore,
+    UsageCounters,
+    DeviceRegistry,
+    CentralizedState,
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_PARTIAL,
+    JOB_STATUS_FAILED,
+)
 try:
     from embedded_credentials import EMBEDDED_CLOUDFLARE_TOKEN  # type: ignore
 except Exception:
@@ -29,7 +71,7 @@ import logging
 import sys  # Added for auto-update functionality
 from collections import Counter, defaultdict # Added for analytics
 import copy
-from queue import Queue, Empty
+import io
 import atexit
 import socket
 import subprocess
@@ -116,22 +158,19 @@ def setup_signal_handlers():
     except Exception as e:
         app.logger.warning(f"Could not set up signal handlers: {e}")
 # --- Lightweight in-process pub-sub for server-sent events (SSE) ---
-_sse_subscribers: list[Queue] = []
+# Publishing never blocks; streams replay missed events from the ring on reconnect (Last-Event-ID)
+event_bus = EventBus(app.logger, buffer_size=512)
 
 # --- Global hardware ID cache (calculated once at startup to prevent blocking) ---
 _cached_hardware_id: str | None = None
 _business_identity_cache = None
+_business_identity_version = ""
 
 def _sse_broadcast(event_name: str, payload: dict):
     try:
-        data = json.dumps(payload, ensure_ascii=False)
+        event_bus.publish(event_name, payload)
     except Exception:
-        data = '{}'
-    for q in list(_sse_subscribers):
-        try:
-            q.put((event_name, data))
-        except Exception:
-            pass
+        pass
 
 
 def _is_license_state_menu_allowed(state: str | None) -> bool:
@@ -261,13 +300,14 @@ def save_business_profile_data(update_data):
 
 def get_business_identity():
     """Load business identity details for receipts from cache, JSON profile, or environment variables."""
-    global _business_identity_cache
+    global _business_identity_cache, _business_identity_version
     if _business_identity_cache is not None:
         return dict(_business_identity_cache)
 
     identity: dict[str, str] = {}
 
     profile_data = load_business_profile_data()
+    _business_identity_version = str(profile_data.get('updated_at') or '')
     if profile_data:
         for key in BUSINESS_PROFILE_FIELDS:
             value = profile_data.get(key)
@@ -285,11 +325,18 @@ def get_business_identity():
 
     _business_identity_cache = dict(identity)
     return dict(identity)
+
+
+def get_business_profile_version() -> str:
+    """updated_at of the business profile behind get_business_identity() (empty if never saved)."""
+    if _business_identity_cache is None:
+        get_business_identity()
+    return _business_identity_version
 # --- Cleanup handler for proper shutdown ---
 def _cleanup_on_exit():
     """Cleanup function called when the process exits normally or abnormally"""
     try:
-        _sse_subscribers.clear()
+        event_bus.close()
         # Ensure lock is released during cleanup
         release_single_instance_lock()
         app.logger.info("Application cleanup completed")
@@ -723,7 +770,9 @@ def get_license_status_unified(force_refresh=False, use_legacy=None):
 
 MENU_FILE = os.path.join(DATA_DIR, 'menu.json')
 ORDER_COUNTER_FILE = os.path.join(DATA_DIR, 'order_counter.json')
-ORDER_COUNTER_LOCK_FILE = os.path.join(DATA_DIR, 'order_counter.lock') # Lock file for order counter
+ORDER_COUNTER_JOURNAL_FILE = os.path.join(DATA_DIR, 'order_counter.journal') # Append-only sequence journal
+ORDER_COUNTER_LOCK_FILE = os.path.join(DATA_DIR, 'order_counter.lock') # Legacy lock file, removed on shutdown if left behind
+ORDER_DB_FILE = os.path.join(DATA_DIR, 'orders.db') # Optional SQLite order store (order_storage = "sqlite")
 CONFIG_FILE_OLD = os.path.join(BASE_DIR, 'config.json')
 CONFIG_FILE = os.path.join(DATA_DIR, 'config.json')
 BUSINESS_PROFILE_FILE = os.path.join(DATA_DIR, 'business_profile.json')
@@ -1539,27 +1588,9 @@ def log_table_operation(operation, table_id, user_info=None, details=None):
 
     app.logger.info(f"TABLE_AUDIT: {operation} - Table {table_id} - {log_entry}")
 
-    # Optional: Save to audit log file for compliance
+    # Appended to the rotating audit log for compliance (full history is kept)
     try:
-        audit_log_file = os.path.join(DATA_DIR, 'table_audit.json')
-        audit_entries = []
-
-        if os.path.exists(audit_log_file):
-            try:
-                with open(audit_log_file, 'r', encoding='utf-8') as f:
-                    audit_entries = json.load(f)
-            except:
-                audit_entries = []
-
-        audit_entries.append(log_entry)
-
-        # Keep only last 1000 entries to prevent file growth
-        if len(audit_entries) > 1000:
-            audit_entries = audit_entries[-1000:]
-
-        with open(audit_log_file, 'w', encoding='utf-8') as f:
-            json.dump(audit_entries, f, indent=2, ensure_ascii=False)
-
+        table_audit_log.append(log_entry)
     except Exception as e:
         app.logger.error(f"Failed to write audit log: {e}")
 
@@ -1967,171 +1998,73 @@ PDF fallback has been removed. Printing must succeed to submit an order.
 
 # --- NEW: Centralized State Management Functions ---
 def load_centralized_state():
-    """Load all centralized state from files"""
-    state = {
-        'current_order': [],
-        'order_line_counter': 0,
-        'universal_comment': "",
-        'selected_table': "",
-        'device_sessions': {}
-    }
+    """Copy of the centralized state (served from memory)"""
+    _, state = centralized_state.snapshot()
     
-    # Load current order
-    if os.path.exists(CURRENT_ORDER_FILE):
-        try:
-            with open(CURRENT_ORDER_FILE, 'r', encoding='utf-8') as f:
-                state['current_order'] = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            state['current_order'] = []
-    
-    # Load order line counter
-    if os.path.exists(ORDER_LINE_COUNTER_FILE):
-        try:
-            with open(ORDER_LINE_COUNTER_FILE, 'r', encoding='utf-8') as f:
-                state['order_line_counter'] = int(f.read().strip())
-        except (ValueError, FileNotFoundError):
-            state['order_line_counter'] = 0
-    
-    # Load universal comment
-    if os.path.exists(UNIVERSAL_COMMENT_FILE):
-        try:
-            with open(UNIVERSAL_COMMENT_FILE, 'r', encoding='utf-8') as f:
-                state['universal_comment'] = f.read().strip()
-        except FileNotFoundError:
-            state['universal_comment'] = ""
-    
-    # Load selected table
-    if os.path.exists(SELECTED_TABLE_FILE):
-        try:
-            with open(SELECTED_TABLE_FILE, 'r', encoding='utf-8') as f:
-                state['selected_table'] = f.read().strip()
-        except FileNotFoundError:
-            state['selected_table'] = ""
-    
-    # Load device sessions (tolerate legacy formats and migrate)
-    if os.path.exists(DEVICE_SESSIONS_FILE):
-        try:
-            with open(DEVICE_SESSIONS_FILE, 'r', encoding='utf-8') as f:
-                raw_sessions = json.load(f)
-
-            migrated = {}
-            if isinstance(raw_sessions, dict):
-                # Legacy shape: {"sessions": [...]} or correct dict mapping
-                if 'sessions' in raw_sessions and isinstance(raw_sessions['sessions'], list):
-                    for entry in raw_sessions['sessions']:
-                        if isinstance(entry, dict):
-                            device_id = entry.get('device_id') or entry.get('id') or entry.get('device')
-                            if device_id:
-                                migrated[device_id] = {k: v for k, v in entry.items() if k not in ('device_id','id','device')}
-                    # Persist migrated structure
-                    if save_centralized_state('device_sessions', migrated):
-                        state['device_sessions'] = migrated
-                    else:
-                        state['device_sessions'] = migrated
-                else:
-                    state['device_sessions'] = raw_sessions
-            elif isinstance(raw_sessions, list):
-                for entry in raw_sessions:
-                    if isinstance(entry, dict):
-                        device_id = entry.get('device_id') or entry.get('id') or entry.get('device')
-                        if device_id:
-                            migrated[device_id] = {k: v for k, v in entry.items() if k not in ('device_id','id','device')}
-                if save_centralized_state('device_sessions', migrated):
-                    state['device_sessions'] = migrated
-                else:
-                    state['device_sessions'] = migrated
-            else:
-                state['device_sessions'] = {}
-        except (json.JSONDecodeError, FileNotFoundError):
-            state['device_sessions'] = {}
-        except Exception as e:
-            app.logger.warning(f"Device sessions file in unexpected format: {e}")
-            state['device_sessions'] = {}
+    # Device sessions come from the in-memory registry (legacy file shapes are migrated on load)
+    try:
+        state['device_sessions'] = device_registry.sessions()
+    except Exception as e:
+        app.logger.warning(f"Device sessions unavailable: {e}")
+        state['device_sessions'] = {}
     
     return state
 
 def save_centralized_state(state_key, value):
-    """Save a specific state value to file"""
-    try:
-        if state_key == 'current_order':
-            with open(CURRENT_ORDER_FILE, 'w', encoding='utf-8') as f:
-                json.dump(value, f, indent=2)
-        elif state_key == 'order_line_counter':
-            with open(ORDER_LINE_COUNTER_FILE, 'w', encoding='utf-8') as f:
-                f.write(str(value))
-        elif state_key == 'universal_comment':
-            with open(UNIVERSAL_COMMENT_FILE, 'w', encoding='utf-8') as f:
-                f.write(str(value))
-        elif state_key == 'selected_table':
-            with open(SELECTED_TABLE_FILE, 'w', encoding='utf-8') as f:
-                f.write(str(value))
-        elif state_key == 'device_sessions':
-            with open(DEVICE_SESSIONS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(value, f, indent=2)
+    """Update a specific state value (files are written in the background)"""
+    try:
+        if state_key == 'device_sessions':
+            device_registry.replace_sessions(value)
+        else:
+            centralized_state.set(state_key, value)
         return True
     except Exception as e:
         app.logger.error(f"Error saving {state_key}: {str(e)}")
         return False
 
+def save_centralized_state_values(values: dict) -> bool:
+    """Update several state values as a single version step"""
+    try:
+        centralized_state.update(values)
+        return True
+    except Exception as e:
+        app.logger.error(f"Error saving {', '.join(values)}: {str(e)}")
+        return False
+
 def register_device_session(device_id, device_info):
     """Register a device session for tracking"""
-    state = load_centralized_state()
-    state['device_sessions'][device_id] = {
-        'info': device_info,
-        'last_seen': datetime.now().isoformat(),
-        'active': True
-    }
+    device_registry.register_session(device_id, device_info)
     update_device_profile_activity(device_id, context=device_info)
-    return save_centralized_state('device_sessions', state['device_sessions'])
+    return True
 
 def update_device_session(device_id):
     """Update device session timestamp"""
-    state = load_centralized_state()
-    if device_id in state['device_sessions']:
-        state['device_sessions'][device_id]['last_seen'] = datetime.now().isoformat()
+    if device_registry.touch_session(device_id):
         update_device_profile_activity(device_id)
-        return save_centralized_state('device_sessions', state['device_sessions'])
+        return True
     return False
 
 def cleanup_inactive_sessions():
     """Remove sessions older than 30 minutes"""
-    state = load_centralized_state()
-    cutoff_time = datetime.now() - timedelta(minutes=30)
-    active_sessions = {}
-    
-    for device_id, session in state['device_sessions'].items():
-        try:
-            last_seen = datetime.fromisoformat(session['last_seen'])
-            if last_seen > cutoff_time:
-                active_sessions[device_id] = session
-        except ValueError:
-            # Invalid timestamp, remove session
-            continue
-    
-    if len(active_sessions) != len(state['device_sessions']):
-        save_centralized_state('device_sessions', active_sessions)
-        app.logger.info(f"Cleaned up {len(state['device_sessions']) - len(active_sessions)} inactive sessions")
-    
-    return active_sessions
+    device_registry.cleanup_sessions()
+    return device_registry.sessions()
 
 def load_device_profiles():
-    """Load registered device profiles from disk."""
-    if not os.path.exists(DEVICE_PROFILES_FILE):
-        return {}
+    """Copy of the registered device profiles."""
     try:
-        with open(DEVICE_PROFILES_FILE, 'r', encoding='utf-8') as fp:
-            data = json.load(fp)
-            return data if isinstance(data, dict) else {}
+        return device_registry.profiles()
     except Exception as exc:
         app.logger.warning(f"Failed to load device profiles: {exc}")
         return {}
 
+def get_device_profile(device_id: str | None):
+    """One device's profile (a copy), or None."""
+    return device_registry.profile(device_id) if device_id else None
+
 def save_device_profiles(profiles: dict) -> bool:
-    """Persist device profile map to disk."""
+    """Replace the device profile map (written by the registry flusher)."""
     try:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        with open(DEVICE_PROFILES_FILE, 'w', encoding='utf-8') as fp:
-            json.dump(profiles, fp, indent=2)
+        device_registry.replace_profiles(profiles)
         return True
     except Exception as exc:
         app.logger.error(f"Unable to save device profiles: {exc}")
@@ -2149,40 +2082,37 @@ def upsert_device_profile(device_id: str, updates: dict | None = None):
     if not device_id:
         return None
 
-    profiles = load_device_profiles()
-    profile = profiles.get(device_id, {
-        "device_id": device_id,
-        "created_at": datetime.now().isoformat(),
-        "printers": {}
-    })
-
     updates = updates or {}
-    allowed_fields = {'device_name', 'print_behavior', 'role', 'first_seen_note'}
-    for field in allowed_fields:
-        if field in updates and updates[field] is not None:
-            profile[field] = str(updates[field]).strip()
-
-    if updates.get('printers'):
-        profile.setdefault('printers', {})
-        for role, printer in updates['printers'].items():
-            normalized_role = str(role or '').lower()
-            if normalized_role not in DEVICE_PROFILE_ROLES:
-                continue
-            sanitized_name = _sanitize_printer_name(printer)
-            if sanitized_name:
-                profile['printers'][normalized_role] = sanitized_name
-            elif normalized_role in profile['printers']:
-                # Allow clearing by sending empty value
-                profile['printers'].pop(normalized_role, None)
-
-    if 'last_context' in updates and isinstance(updates['last_context'], dict):
-        profile['last_context'] = updates['last_context']
-
-    profile['last_seen'] = updates.get('last_seen', datetime.now().isoformat())
-    profiles[device_id] = profile
-    if save_device_profiles(profiles):
-        return profile
-    return None
+
+    def _apply(profile):
+        allowed_fields = {'device_name', 'print_behavior', 'role', 'first_seen_note'}
+        for field in allowed_fields:
+            if field in updates and updates[field] is not None:
+                profile[field] = str(updates[field]).strip()
+
+        if updates.get('printers'):
+            profile.setdefault('printers', {})
+            for role, printer in updates['printers'].items():
+                normalized_role = str(role or '').lower()
+                if normalized_role not in DEVICE_PROFILE_ROLES:
+                    continue
+                sanitized_name = _sanitize_printer_name(printer)
+                if sanitized_name:
+                    profile['printers'][normalized_role] = sanitized_name
+                elif normalized_role in profile['printers']:
+                    # Allow clearing by sending empty value
+                    profile['printers'].pop(normalized_role, None)
+
+        if 'last_context' in updates and isinstance(updates['last_context'], dict):
+            profile['last_context'] = updates['last_context']
+
+        profile['last_seen'] = updates.get('last_seen', datetime.now().isoformat())
+
+    try:
+        return device_registry.update_profile(device_id, _apply)
+    except Exception as exc:
+        app.logger.error(f"Unable to update device profile {device_id}: {exc}")
+        return None
 
 def update_device_profile_activity(device_id: str, context: dict | None = None, extra_updates: dict | None = None):
     """Record that a device checked in."""
@@ -2209,7 +2139,7 @@ def resolve_printer_for_role(role: str, device_id: str | None = None) -> str:
         normalized_role = 'kitchen'
 
     if device_id:
-        profile = load_device_profiles().get(device_id)
+        profile = get_device_profile(device_id)
         if profile:
             printers = profile.get('printers') or {}
             device_specific = _sanitize_printer_name(printers.get(normalized_role))
@@ -2325,7 +2255,41 @@ def load_config():
         # Role-based printer overrides (Phase 5)
         "printer_kitchen": "",
         "printer_customer": "",
-        "printer_table": ""
+        "printer_table": "",
+        # Print kitchen tickets from a background queue instead of the order request
+        "print_queue_enabled": True,
+        # Order CSV durability: "none", "batched" (fsync once per commit window) or "every" order
+        "order_journal_fsync": "batched",
+        "order_journal_commit_window_ms": 50,
+        # Order read engine: "csv" (scan daily CSVs) or "sqlite" (indexed store; CSVs are still written)
+        "order_storage": "csv",
+        # Fold order_outcomes_YYYY-MM-DD.jsonl overlays of past days into their order CSVs at startup
+        "order_overlay_compaction": True,
+        # How long table session changes are coalesced before they are journaled
+        "table_sessions_flush_ms": 250,
+        # How long analytics rollup changes are coalesced before analytics_YYYY-MM-DD.json is rewritten
+        "analytics_rollup_flush_ms": 2000,
+        # Serve /api/events from a separate asyncio server so idle streams don't hold Waitress threads
+        "sse_gateway_enabled": True,
+        "sse_gateway_port": 5001,
+        # Send all kitchen copies of an order as one spool document instead of one job per copy
+        "kitchen_copies_single_job": True,
+        # Keep each order's rendered kitchen ticket (data/tickets) so reprints resend the original bytes
+        "ticket_store_enabled": True,
+        # Reuse pre-rendered receipt headers/footers until the business profile or language changes
+        "receipt_template_cache": True,
+        "printer_health_interval_seconds": 15,
+        "printer_health_failure_interval_seconds": 3,
+        "printer_failover": {"kitchen": [], "customer": [], "table": []},
+        "printer_breaker_failures": 2,
+        "printer_breaker_cooldown_seconds": 30,
+        "kitchen_stations": {},
+        "table_audit_segment_bytes": 1048576,
+        "usage_analytics_flush_seconds": 30,
+        "usage_analytics_retained_days": 90,
+        "device_registry_flush_seconds": 5,
+        "centralized_state_flush_seconds": 1,
+        "ticket_store_retained_days": 90
     }
     # Migrate legacy config.json (root) to data/config.json if needed
     try:
@@ -2364,6 +2328,26 @@ PRINTER_KITCHEN = str(config.get("printer_kitchen") or PRINTER_NAME)
 PRINTER_CUSTOMER = str(config.get("printer_customer") or PRINTER_NAME)
 PRINTER_TABLE = str(config.get("printer_table") or PRINTER_NAME)
 
+# Device sessions and profiles live in memory; their JSON files are written by a throttled flusher
+device_registry = DeviceRegistry(
+    app.logger,
+    DEVICE_SESSIONS_FILE,
+    DEVICE_PROFILES_FILE,
+    flush_interval=float(config.get('device_registry_flush_seconds', 5) or 5)
+)
+
+# Shared order state (current order, line counter, comment, table) lives in memory behind a version number
+centralized_state = CentralizedState(
+    app.logger,
+    {
+        'current_order': CURRENT_ORDER_FILE,
+        'order_line_counter': ORDER_LINE_COUNTER_FILE,
+        'universal_comment': UNIVERSAL_COMMENT_FILE,
+        'selected_table': SELECTED_TABLE_FILE,
+    },
+    flush_interval=float(config.get('centralized_state_flush_seconds', 1) or 1)
+)
+
 # Disable debug mode
 app.config['DEBUG'] = False
 
@@ -2401,18 +2385,17 @@ limiter = Limiter(
 )
 
 
+GREEK_CODEC = register_greek_codec()
+
+
 def to_bytes(s, encoding='cp858'): 
     """Convert string to bytes with Greek character transliteration for thermal printers and Euro support"""
     if isinstance(s, bytes):
         return s
     
-    # Check if string contains Greek characters
-    has_greek = any('\u0370' <= char <= '\u03FF' or '\u1F00' <= char <= '\u1FFF' for char in s)
-    
-    if has_greek:
-        # Always transliterate Greek characters to readable Latin
-        transliterated = transliterate_greek_enhanced(s)
-        return transliterated.encode('cp437', errors='replace')
+    if contains_greek(s):
+        # Always transliterate Greek characters to readable Latin (memoised codec)
+        return s.encode(GREEK_CODEC, errors='replace')
     else:
         # English/Latin text - use standard encoding
         return s.encode(encoding, errors='replace')
@@ -2434,100 +2417,12 @@ def format_currency(value) -> str:
 def transliterate_greek_enhanced(text):
     """
     Enhanced Greek transliteration with better readability for receipts.
-    Uses context-aware mapping and common Greek food/business terms.
+    Uses context-aware mapping and common Greek food/business terms
+    (see pospal_services.greek_codec for the tables).
     """
-    
-    # First handle common Greek food/business terms that customers will recognize
-    common_terms = {
-        'καφές': 'KAFES',           # Coffee
-        'καφέ': 'KAFE',
-        'τσάι': 'TSAI',             # Tea  
-        'νερό': 'NERO',             # Water
-        'τυρόπιτα': 'TYROPITA',     # Cheese pie
-        'σπανακόπιτα': 'SPANAKOPITA', # Spinach pie
-        'μουσακάς': 'MOUSAKAS',     # Moussaka
-        'σαλάτα': 'SALATA',         # Salad
-        'κρέας': 'KREAS',           # Meat
-        'ψάρι': 'PSARI',            # Fish
-        'πατάτες': 'PATATES',       # Potatoes
-        'κρεμμύδι': 'KREMMYDI',     # Onion
-        'ντομάτα': 'DOMATA',        # Tomato
-        'τυρί': 'TYRI',             # Cheese
-        'ψωμί': 'PSOMI',            # Bread
-        'κρασί': 'KRASI',           # Wine
-        'μπίρα': 'BIRA',            # Beer
-        'γάλα': 'GALA',             # Milk
-        'ζάχαρη': 'ZAHARI',         # Sugar
-        'αλάτι': 'ALATI',           # Salt
-        'πιπέρι': 'PIPERI',         # Pepper
-        'ελιές': 'ELIES',           # Olives
-        'φέτα': 'FETA',             # Feta cheese
-        'γιαούρτι': 'GIAOYRTI',     # Yogurt
-        'μέλι': 'MELI',             # Honey
-        'σοκολάτα': 'SOKOLATA',     # Chocolate
-        'παγωτό': 'PAGOTO',         # Ice cream
-    }
-    
-    # Check for whole word matches first (case insensitive)
-    text_lower = text.lower()
-    for greek_word, latin_word in common_terms.items():
-        if greek_word in text_lower:
-            text = text.replace(greek_word, latin_word)
-            text = text.replace(greek_word.upper(), latin_word)
-            text = text.replace(greek_word.capitalize(), latin_word)
-    
-    # Enhanced character-by-character mapping
-    enhanced_greek_to_latin = {
-        # Basic Greek alphabet with better phonetic mapping
-        'α': 'a', 'β': 'v', 'γ': 'g', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'i', 'θ': 'th',
-        'ι': 'i', 'κ': 'k', 'λ': 'l', 'μ': 'm', 'ν': 'n', 'ξ': 'ks', 'ο': 'o', 'π': 'p',
-        'ρ': 'r', 'σ': 's', 'ς': 's', 'τ': 't', 'υ': 'y', 'φ': 'f', 'χ': 'h', 'ψ': 'ps', 'ω': 'o',
-        
-        # Capital letters
-        'Α': 'A', 'Β': 'V', 'Γ': 'G', 'Δ': 'D', 'Ε': 'E', 'Ζ': 'Z', 'Η': 'I', 'Θ': 'TH',
-        'Ι': 'I', 'Κ': 'K', 'Λ': 'L', 'Μ': 'M', 'Ν': 'N', 'Ξ': 'KS', 'Ο': 'O', 'Π': 'P',
-        'Ρ': 'R', 'Σ': 'S', 'Τ': 'T', 'Υ': 'Y', 'Φ': 'F', 'Χ': 'H', 'Ψ': 'PS', 'Ω': 'O',
-        
-        # Accented characters (maintain vowel sounds)
-        'ά': 'a', 'έ': 'e', 'ή': 'i', 'ί': 'i', 'ό': 'o', 'ύ': 'y', 'ώ': 'o',
-        'ΐ': 'i', 'ΰ': 'y', 'ϊ': 'i', 'ϋ': 'y',
-        
-        # Common digraph patterns in Greek
-        'ου': 'ou', 'ΟΥ': 'OU', 'Ου': 'Ou',
-        'αι': 'ai', 'ΑΙ': 'AI', 'Αι': 'Ai',
-        'ει': 'ei', 'ΕΙ': 'EI', 'Ει': 'Ei',
-        'οι': 'oi', 'ΟΙ': 'OI', 'Οι': 'Oi',
-        'υι': 'yi', 'ΥΙ': 'YI', 'Υι': 'Yi',
-        'αυ': 'af', 'ΑΥ': 'AF', 'Αυ': 'Af',
-        'ευ': 'ef', 'ΕΥ': 'EF', 'Ευ': 'Ef',
-        
-        # Common prefixes and suffixes
-        'μπ': 'b', 'ΜΠ': 'B', 'Μπ': 'B',      # μπ -> b sound
-        'ντ': 'd', 'ΝΤ': 'D', 'Ντ': 'D',      # ντ -> d sound  
-        'γκ': 'g', 'ΓΚ': 'G', 'Γκ': 'G',      # γκ -> g sound
-        'τζ': 'tz', 'ΤΖ': 'TZ', 'Τζ': 'Tz',   # τζ -> tz sound
-        'τσ': 'ts', 'ΤΣ': 'TS', 'Τς': 'Ts',   # τσ -> ts sound
-    }
-    
-    # Apply character mapping
-    result = ''
-    i = 0
-    while i < len(text):
-        # Try two-character patterns first
-        if i < len(text) - 1:
-            two_char = text[i:i+2]
-            if two_char in enhanced_greek_to_latin:
-                result += enhanced_greek_to_latin[two_char]
-                i += 2
-                continue
-        
-        # Single character mapping
-        char = text[i]
-        result += enhanced_greek_to_latin.get(char, char)
-        i += 1
-    
-    return result
-    
+    return greek_transliterate(text)
+
+
 def save_config(updated_values: dict):
     """Merge-update CONFIG_FILE atomically and refresh globals."""
     global config, PRINTER_NAME, MANAGEMENT_PASSWORD, CUT_AFTER_PRINT, COPIES_PER_ORDER
@@ -3236,63 +3131,15 @@ def word_wrap_text(text, max_width, initial_indent="", subsequent_indent=""):
     return lines if lines else [initial_indent]
 
 
-def get_next_daily_order_number():
-    lock_acquired = False
-    for _ in range(10): 
-        try:
-            # Attempt to create and exclusively open the lock file
-            fd = os.open(ORDER_COUNTER_LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-            os.close(fd) # Close the file handle immediately, we just needed to create the file
-            lock_acquired = True
-            break
-        except FileExistsError:
-            time.sleep(0.1) 
-        except Exception as e_lock_create:
-            app.logger.error(f"Error creating lock file: {e_lock_create}")
-            time.sleep(0.1)
+order_number_allocator = OrderNumberAllocator(app.logger, ORDER_COUNTER_FILE, ORDER_COUNTER_JOURNAL_FILE)
 
-    if not lock_acquired:
-        app.logger.critical(f"CRITICAL LOCK FAILURE: {datetime.now()} - Could not acquire lock for order counter.")
-        raise Exception("System busy. Could not acquire lock for order counter. Please try again shortly.")
 
+def get_next_daily_order_number():
     try:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        current_counter_val = 0
-
-        if os.path.exists(ORDER_COUNTER_FILE):
-            try:
-                with open(ORDER_COUNTER_FILE, 'r') as f:
-                    data_from_file = json.load(f)
-                    if data_from_file.get('date') == today_str:
-                        current_counter_val = data_from_file.get('counter', 0)
-            except (json.JSONDecodeError, FileNotFoundError, IsADirectoryError) as e:
-                app.logger.warning(f"Warning: Error reading or parsing {ORDER_COUNTER_FILE} ({e}). Resetting counter for the day.")
-                current_counter_val = 0 
-            except Exception as e: 
-                 app.logger.error(f"Unexpected error reading {ORDER_COUNTER_FILE}: {e}. Resetting counter for the day.")
-                 current_counter_val = 0
-
-        next_counter_val = current_counter_val + 1
-        counter_data_to_save = {"date": today_str, "counter": next_counter_val}
-        
-        # Atomic write using a temporary file
-        temp_counter_file = ORDER_COUNTER_FILE + ".tmp"
-        with open(temp_counter_file, 'w') as f:
-            json.dump(counter_data_to_save, f)
-        os.replace(temp_counter_file, ORDER_COUNTER_FILE) 
-
-        return next_counter_val
+        return order_number_allocator.next_number()
     except Exception as e_update:
         app.logger.critical(f"CRITICAL COUNTER UPDATE FAILURE: {datetime.now()} - {e_update}")
         raise Exception(f"Failed to update order counter: {e_update}")
-    finally:
-        # Release the lock by deleting the lock file
-        if lock_acquired and os.path.exists(ORDER_COUNTER_LOCK_FILE):
-            try:
-                os.remove(ORDER_COUNTER_LOCK_FILE)
-            except Exception as e_rem:
-                app.logger.warning(f"WARNING: Failed to remove lock file {ORDER_COUNTER_LOCK_FILE}: {e_rem}")
 
 
 @app.route('/api/config')
@@ -3613,27 +3460,30 @@ def serve_locales(filename):
 @app.route('/api/events')
 def sse_stream():
     try:
+        # Browsers resend the last id they saw when reconnecting; replay what they missed
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+
         def gen():
-            q: Queue = Queue(maxsize=10)
-            _sse_subscribers.append(q)
+            # Subscribe on first iteration: a client that disconnects before the body
+            # starts never runs the finally below, so an earlier subscription would leak
+            subscription = event_bus.subscribe(last_event_id)
             try:
                 # Send initial state
                 init = json.dumps({"language": str(config.get('language', 'en'))})
                 yield f"event: settings\n"
                 yield f"data: {init}\n\n"
                 while True:
-                    try:
-                        event_name, data = q.get(timeout=30)
-                        yield f"event: {event_name}\n"
-                        yield f"data: {data}\n\n"
-                    except Empty:
+                    batch = subscription.next_batch(timeout=30)
+                    if batch is None:
+                        break
+                    if not batch:
                         # keep-alive
                         yield ": keep-alive\n\n"
+                        continue
+                    yield "".join(f"id: {event_id}\nevent: {event_name}\ndata: {data}\n\n"
+                                  for event_id, event_name, data in batch)
             finally:
-                try:
-                    _sse_subscribers.remove(q)
-                except ValueError:
-                    pass
+                subscription.close()
         headers = {
             'Content-Type': 'text/event-stream',
             'Cache-Control': 'no-cache',
@@ -3644,6 +3494,24 @@ def sse_stream():
         app.logger.error(f"SSE endpoint error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+def _sse_initial_events():
+    return [('settings', json.dumps({"language": str(config.get('language', 'en'))}))]
+
+
+# Asyncio event-stream server on sse_gateway_port; started from __main__ when enabled
+sse_gateway = SSEGateway(app.logger, event_bus, port=int(config.get('sse_gateway_port', 5001)),
+                         initial_events=_sse_initial_events, app_port=int(config.get('port', 5000)))
+
+
+@app.route('/api/events/gateway')
+def sse_gateway_info():
+    """Where clients should open their event stream; /api/events remains the fallback."""
+    return jsonify({
+        "enabled": sse_gateway.running,
+        "port": sse_gateway.port,
+        "path": "/api/events"
+    })
+
 @app.route('/test_centralized.html')
 def serve_test_centralized():
     return send_from_directory('.', 'test_centralized.html')
@@ -3944,9 +3812,7 @@ def get_printers():
         role: resolve_printer_for_role(role, device_id)
         for role in DEVICE_PROFILE_ROLES
     }
-    device_profile = None
-    if device_id:
-        device_profile = load_device_profiles().get(device_id)
+    device_profile = get_device_profile(device_id)
 
     return jsonify({
         "printers": printers_with_metadata,
@@ -3959,19 +3825,65 @@ def get_printers():
     })
 
 
+def _printer_snapshot_fields(entry):
+    """Freshness fields shared by the printer status/health responses."""
+    if not entry:
+        return {"status_pending": True, "checked_at": None, "status_age_seconds": None, "status_fresh": False}
+    return {
+        "status_pending": False,
+        "checked_at": entry.get("checked_at"),
+        "status_age_seconds": entry.get("age_seconds"),
+        "status_fresh": entry.get("fresh", False),
+    }
+
+
 @app.route('/api/printer/status', methods=['GET'])
 def printer_status():
+    """Cached printer status; names that are not role printers are probed in the background."""
     name = request.args.get('name', PRINTER_NAME)
-    try:
-        h = win32print.OpenPrinter(name)
-        try:
-            info = win32print.GetPrinter(h, 2)
-        finally:
-            win32print.ClosePrinter(h)
-        status_code = info.get('Status', 0)
-        return jsonify({"name": name, "status_code": status_code})
-    except Exception as e:
-        return jsonify({"name": name, "error": str(e)}), 200
+    entry = printer_health_prober.track(name)
+    payload = {"name": name, **_printer_snapshot_fields(entry)}
+    if entry is None:
+        payload["status_code"] = None
+    elif entry.get("error"):
+        payload["error"] = entry["error"]
+    else:
+        payload["status_code"] = entry.get("status_code")
+        payload["online"] = entry.get("online", False)
+    return jsonify(payload), 200
+
+
+@app.route('/api/printer/routing', methods=['GET'])
+def printer_routing():
+    """Failover order per role as the next job would see it, plus circuit-breaker state."""
+    device_id = (request.args.get('device_id') or request.args.get('deviceId') or '').strip() or None
+    roles = {}
+    for role in DEVICE_PROFILE_ROLES:
+        candidates = get_role_printer_candidates(role, device_id)
+        roles[role] = {
+            "candidates": candidates,
+            "route": printer_router.route(candidates),
+            "unhealthy": {name: printer_router.unhealthy_reason(name) for name in candidates
+                          if printer_router.unhealthy_reason(name)},
+        }
+    stations = {}
+    for station, settings in kitchen_stations.stations().items():
+        candidates = get_station_printer_candidates(settings, device_id)
+        stations[station] = {**settings, "candidates": candidates, "route": printer_router.route(candidates)}
+    return jsonify({"status": "success", "roles": roles, "stations": stations,
+                    "breakers": printer_router.snapshot(), "device_id": device_id})
+
+
+@app.route('/api/kitchen-stations', methods=['GET'])
+def kitchen_stations_info():
+    """Configured kitchen stations and which menu categories still print on the kitchen printer."""
+    return jsonify({"status": "success", **kitchen_stations.describe()})
+
+
+@app.route('/api/printer/health/snapshot', methods=['GET'])
+def printer_health_snapshot():
+    """Every probed printer with its last status and freshness."""
+    return jsonify({"status": "success", **printer_health_prober.snapshot()})
 
 
 @app.route('/api/printer/health', methods=['GET'])
@@ -3992,9 +3904,7 @@ def printer_health():
         placeholder_names = {"Your_Printer_Name_Here", "Microsoft Print to PDF", "", None}
         printer_configured = primary_printer not in placeholder_names
 
-        device_profile = None
-        if device_id:
-            device_profile = load_device_profiles().get(device_id)
+        device_profile = get_device_profile(device_id)
 
         if not printer_configured:
             return jsonify({
@@ -4010,20 +3920,10 @@ def printer_health():
                 "device_id": device_id
             })
 
-        # Check if printer is accessible (online)
-        printer_online = False
-        status_code = None
-        try:
-            h = win32print.OpenPrinter(primary_printer)
-            try:
-                info = win32print.GetPrinter(h, 2)
-                status_code = info.get('Status', 0)
-                printer_online = True
-            finally:
-                win32print.ClosePrinter(h)
-        except Exception as e:
-            app.logger.warning(f"Printer '{primary_printer}' not accessible: {e}")
-            printer_online = False
+        # Accessibility comes from the background prober's snapshot, never a live spooler call
+        health_entry = printer_health_prober.track(primary_printer)
+        printer_online = bool(health_entry and health_entry.get("online"))
+        status_code = health_entry.get("status_code") if health_entry else None
 
         # Get verification info from config
         verified_at = config.get('printer_verified_at')
@@ -4060,7 +3960,9 @@ def printer_health():
             "role_printers": get_role_printer_map(),
             "device_profile": device_profile,
             "device_id": device_id,
-            "last_failure": last_failure
+            "last_failure": last_failure,
+            **_printer_snapshot_fields(health_entry),
+            "printer_error": health_entry.get("error") if health_entry else None
         })
     except Exception as e:
         app.logger.error(f"Error in printer_health: {e}")
@@ -4078,6 +3980,7 @@ def select_printer():
     if not name:
         return jsonify({"success": False, "message": "printer_name is required"}), 400
     if save_config({"printer_name": name}):
+        printer_health_prober.refresh()
         return jsonify({"success": True, "printer_name": PRINTER_NAME})
     return jsonify({"success": False, "message": "Failed to save."}), 500
 
@@ -4090,12 +3993,15 @@ _printer_failure_state: dict[str, str | int | None] = {
     "timestamp": None
 }
 _win32timezone_warning_logged = False
+# Failure recorded by the current thread's print attempt (concurrent station prints must not see each other's)
+_printer_failure_local = threading.local()
 
 
 def record_printer_failure(message: str | None, status_code: int | str | None = None,
                            job_status: str | None = None, printer_status: str | None = None):
     """Capture printer failure context for later reporting."""
     global _printer_failure_state
+    _printer_failure_local.message = message or None
     if not message:
         _printer_failure_state = {
             "message": None,
@@ -4114,6 +4020,13 @@ def record_printer_failure(message: str | None, status_code: int | str | None =
     }
 
 
+def attempt_print(print_fn, printer_name) -> tuple[bool, str | None]:
+    """Run one print attempt; returns (ok, failure message recorded by this attempt, if any)."""
+    _printer_failure_local.message = None
+    ok = bool(print_fn(printer_name))
+    return ok, None if ok else getattr(_printer_failure_local, 'message', None)
+
+
 def get_last_printer_failure() -> dict[str, str | int | None] | None:
     """Return the most recent printer failure (if any)."""
     if _printer_failure_state.get("message"):
@@ -4212,7 +4125,8 @@ def test_print():
         ok = False
         if requested_role == 'customer':
             receipt_payload = build_simple_customer_receipt_payload(test_order, order_total=test_order_total)
-            ok = print_customer_receipt_ticket(receipt_payload, device_id=device_id, printer_role=requested_role)
+            ok = print_customer_receipt_ticket(receipt_payload, device_id=device_id, printer_role=requested_role,
+                                               printer_name=target_printer or "")
         elif requested_role == 'table':
             now = datetime.now()
             bill_total = test_order_total
@@ -4235,9 +4149,13 @@ def test_print():
                 "amount_remaining": bill_total,
                 "grand_total": bill_total
             }
-            ok = print_table_bill_ticket(bill_data, device_id=device_id)
+            ok = print_table_bill_ticket(bill_data, device_id=device_id, printer_name=target_printer or "")
         else:
-            ok = print_kitchen_ticket(test_order, copy_info="", device_id=device_id, printer_role=requested_role)
+            ok = print_kitchen_ticket(test_order, copy_info="", device_id=device_id, printer_role=requested_role,
+                                      printer_name=target_printer or "")
+        # A test print goes to the selected printer only (no failover); success closes its circuit
+        if ok and target_printer:
+            printer_router.record_success(target_printer)
 
         status_payload = {
             'printer_last_test_status': 'success' if ok else 'failed',
@@ -4310,7 +4228,10 @@ def printing_settings():
             "kitchen_copies": KITCHEN_COPIES_PER_ORDER,
             "customer_copies": CUSTOMER_RECEIPT_COPIES,
             "table_copies": TABLE_RECEIPT_COPIES,
-            "role_printers": get_role_printer_map()
+            "kitchen_copies_single_job": bool(config.get('kitchen_copies_single_job', True)),
+            "role_printers": get_role_printer_map(),
+            "printer_failover": {role: get_role_failover_printers(role) for role in DEVICE_PROFILE_ROLES},
+            "kitchen_stations": kitchen_stations.stations()
         })
     data = request.get_json() or {}
     values = {}
@@ -4324,16 +4245,27 @@ def printing_settings():
         "kitchen_copies": "kitchen_copies_per_order",
         "customer_copies": "customer_receipt_copies",
         "table_copies": "table_receipt_copies",
+        "kitchen_copies_single_job": "kitchen_copies_single_job",
         "printer_kitchen": "printer_kitchen",
         "printer_customer": "printer_customer",
-        "printer_table": "printer_table"
+        "printer_table": "printer_table",
+        "printer_failover": "printer_failover",
+        "kitchen_stations": "kitchen_stations"
     }
     for key, target in alias_map.items():
         if key in data:
             values[target] = data[key]
     if not values:
         return jsonify({"success": False, "message": "No settings provided."}), 400
+    try:
+        if 'printer_failover' in values:
+            values['printer_failover'] = normalize_printer_failover(values['printer_failover'])
+        if 'kitchen_stations' in values:
+            values['kitchen_stations'] = normalize_kitchen_stations(values['kitchen_stations'])
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     if save_config(values):
+        printer_health_prober.refresh()
         return jsonify({"success": True})
     return jsonify({"success": False, "message": "Failed to save settings."}), 500
 
@@ -4820,28 +4752,25 @@ def open_table(table_id):
         if table_id not in tables_config.get("tables", {}):
             return jsonify({"status": "error", "message": "Table not found"}), 404
 
-        sessions = load_table_sessions()
         current_time = datetime.now().isoformat()
 
         # Create or update session
-        sessions[table_id] = {
-            "status": "occupied",
-            "orders": [],
-            "total_amount": 0.0,
-            "opened_at": current_time,
-            "last_order_at": current_time,
-            "payment_status": "unpaid"
-        }
-
-        if save_table_sessions(sessions):
-            # Broadcast table opened via SSE
-            _sse_broadcast('table_opened', {
-                "table_id": table_id,
-                "opened_at": current_time
+        with table_session_store.lock(table_id):
+            table_session_store.put(table_id, {
+                "status": "occupied",
+                "orders": [],
+                "total_amount": 0.0,
+                "opened_at": current_time,
+                "last_order_at": current_time,
+                "payment_status": "unpaid"
             })
-            return jsonify({"status": "success", "message": "Table opened"})
-        else:
-            return jsonify({"status": "error", "message": "Failed to open table"}), 500
+
+        # Broadcast table opened via SSE
+        _sse_broadcast('table_opened', {
+            "table_id": table_id,
+            "opened_at": current_time
+        })
+        return jsonify({"status": "success", "message": "Table opened"})
     except Exception as e:
         app.logger.error(f"Failed to open table {table_id}: {e}")
         return jsonify({"status": "error", "message": f"Failed to open table: {str(e)}"}), 500
@@ -5044,56 +4973,56 @@ def add_table_payment(table_id):
         except (ValueError, TypeError):
             return jsonify({"status": "error", "message": "Invalid payment amount"}), 400
 
-        # Get current session
-        sessions = load_table_sessions()
-        if table_id not in sessions:
-            return jsonify({"status": "error", "message": "Table not found or not in use"}), 404
-
-        session = sessions[table_id]
-        current_total = session.get("total_amount", 0.0)
-        current_paid = session.get("amount_paid", 0.0)
-        current_remaining = max(0, current_total - current_paid)
-
-        # Validate payment amount doesn't exceed remaining balance
-        if amount > current_remaining + 0.01:  # Small tolerance for rounding
-            return jsonify({
-                "status": "error",
-                "message": f"Payment amount (€{amount:.2f}) exceeds remaining balance (€{current_remaining:.2f})"
-            }), 400
+        # Validate against the balance and record the payment atomically for this table
+        with table_session_store.lock(table_id):
+            # Get current session
+            session = table_session_store.get(table_id)
+            if session is None:
+                return jsonify({"status": "error", "message": "Table not found or not in use"}), 404
 
-        # Create payment record
-        payment_id = str(uuid.uuid4())
-        payment_record = {
-            "payment_id": payment_id,
-            "amount": round(amount, 2),
-            "method": payment_method,
-            "timestamp": datetime.now().isoformat(),
-            "note": data.get('note', ''),
-            "items": data.get('items', [])  # For split by items functionality
-        }
+            current_total = session.get("total_amount", 0.0)
+            current_paid = session.get("amount_paid", 0.0)
+            current_remaining = max(0, current_total - current_paid)
 
-        # Ensure payment arrays exist
-        if "payments" not in session:
-            session["payments"] = []
-        if "amount_paid" not in session:
-            session["amount_paid"] = 0.0
+            # Validate payment amount doesn't exceed remaining balance
+            if amount > current_remaining + 0.01:  # Small tolerance for rounding
+                return jsonify({
+                    "status": "error",
+                    "message": f"Payment amount (€{amount:.2f}) exceeds remaining balance (€{current_remaining:.2f})"
+                }), 400
 
-        # Add payment to session
-        session["payments"].append(payment_record)
-        session["amount_paid"] = round(session["amount_paid"] + amount, 2)
-        session["amount_remaining"] = round(max(0, current_total - session["amount_paid"]), 2)
+            # Create payment record
+            payment_id = str(uuid.uuid4())
+            payment_record = {
+                "payment_id": payment_id,
+                "amount": round(amount, 2),
+                "method": payment_method,
+                "timestamp": datetime.now().isoformat(),
+                "note": data.get('note', ''),
+                "items": data.get('items', [])  # For split by items functionality
+            }
 
-        # Update payment status
-        if session["amount_remaining"] <= 0.01:  # Tolerance for rounding
-            session["payment_status"] = "paid"
-        elif session["amount_paid"] > 0:
-            session["payment_status"] = "partial"
-        else:
-            session["payment_status"] = "unpaid"
+            # Ensure payment arrays exist
+            if "payments" not in session:
+                session["payments"] = []
+            if "amount_paid" not in session:
+                session["amount_paid"] = 0.0
+
+            # Add payment to session
+            session["payments"].append(payment_record)
+            session["amount_paid"] = round(session["amount_paid"] + amount, 2)
+            session["amount_remaining"] = round(max(0, current_total - session["amount_paid"]), 2)
+
+            # Update payment status
+            if session["amount_remaining"] <= 0.01:  # Tolerance for rounding
+                session["payment_status"] = "paid"
+            elif session["amount_paid"] > 0:
+                session["payment_status"] = "partial"
+            else:
+                session["payment_status"] = "unpaid"
 
-        # Save updated session
-        if not save_table_sessions(sessions):
-            return jsonify({"status": "error", "message": "Failed to save payment"}), 500
+            # Save updated session
+            table_session_store.put(table_id, session)
 
         app.logger.info(f"Payment recorded for table {table_id}: €{amount:.2f} via {payment_method}")
 
@@ -5413,6 +5342,34 @@ def split_table_bill(table_id):
         app.logger.error(f"Failed to generate split bill for table {table_id}: {e}")
         return jsonify({"status": "error", "message": f"Failed to generate split bill: {str(e)}"}), 500
 
+
+def build_table_customer_receipt_payload(table_id, session, payment, bill_data):
+    """Assemble the build_customer_receipt_content payload for one table payment."""
+    payments = session.get("payments", [])
+    language_code = str(config.get('language', 'en')).lower()
+    receipt_data = {
+        "table_id": table_id,
+        "table_name": bill_data.get("table_name") or f"{get_receipt_text('table_prefix', language_code)} {table_id}",
+        "payment": payment,
+        "total_payments": len(payments),
+        "bill_total": bill_data.get("grand_total", 0.0),
+        "amount_paid_total": session.get("amount_paid", 0.0),
+        "amount_remaining": bill_data.get("amount_remaining", session.get("amount_remaining", 0.0)),
+        "payment_status": bill_data.get("payment_status", session.get("payment_status", "unpaid")),
+        "payments": payments,
+        "orders": bill_data.get("orders", []),
+        "seats": bill_data.get("seats"),
+        "bill_date": bill_data.get("bill_date"),
+        "bill_time": bill_data.get("bill_time"),
+        "timestamp": datetime.now().isoformat(),
+        "mode": "table",
+        "channel_label": get_receipt_text('channel_table_service', language_code)
+    }
+    receipt_data["language"] = language_code
+    receipt_data["receipt_kind"] = 'customer'
+    return receipt_data
+
+
 @app.route('/api/tables/<table_id>/print-customer-receipt', methods=['POST'])
 def print_customer_receipt(table_id):
     """Print customer receipt for specific payment"""
@@ -5465,27 +5422,7 @@ def print_customer_receipt(table_id):
             return jsonify({"status": "error", "message": "Table data not found"}), 404
 
         # Prepare customer receipt data
-        language_code = str(config.get('language', 'en')).lower()
-        receipt_data = {
-            "table_id": table_id,
-            "table_name": bill_data.get("table_name") or f"{get_receipt_text('table_prefix', language_code)} {table_id}",
-            "payment": payment,
-            "total_payments": len(payments),
-            "bill_total": bill_data.get("grand_total", 0.0),
-            "amount_paid_total": session.get("amount_paid", 0.0),
-            "amount_remaining": bill_data.get("amount_remaining", session.get("amount_remaining", 0.0)),
-            "payment_status": bill_data.get("payment_status", session.get("payment_status", "unpaid")),
-            "payments": payments,
-            "orders": bill_data.get("orders", []),
-            "seats": bill_data.get("seats"),
-            "bill_date": bill_data.get("bill_date"),
-            "bill_time": bill_data.get("bill_time"),
-            "timestamp": datetime.now().isoformat(),
-            "mode": "table",
-            "channel_label": get_receipt_text('channel_table_service', language_code)
-        }
-        receipt_data["language"] = language_code
-        receipt_data["receipt_kind"] = 'customer'
+        receipt_data = build_table_customer_receipt_payload(table_id, session, payment, bill_data)
 
         # Print customer receipt
         print_success = print_customer_receipt_ticket(receipt_data, device_id=device_id)
@@ -5545,6 +5482,77 @@ def get_table_history(date):
         app.logger.error(f"Failed to get table history for {date}: {e}")
         return jsonify({"status": "error", "message": f"Failed to get table history: {str(e)}"}), 500
 
+@app.route('/api/tables/history', methods=['GET'])
+def get_table_history_range():
+    """Stream table sessions for ?from=YYYY-MM-DD&to=YYYY-MM-DD (optional &table_id=), oldest first"""
+    if not is_table_management_enabled():
+        return jsonify({"status": "error", "message": "Table management feature not enabled"}), 404
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    start = (request.args.get('from') or today).strip()
+    end = (request.args.get('to') or start).strip()
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d')
+        end_date = datetime.strptime(end, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if end_date < start_date:
+        return jsonify({"status": "error", "message": "'to' must not be before 'from'"}), 400
+    if (end_date - start_date).days > 366:
+        return jsonify({"status": "error", "message": "Date range is limited to 366 days"}), 400
+    table_id = (request.args.get('table_id') or '').strip() or None
+
+    def _generate():
+        # One session at a time, so long ranges are never held in memory
+        header = {"status": "success", "from": start, "to": end, "table_id": table_id}
+        yield json.dumps(header, ensure_ascii=False)[:-1] + ', "sessions": ['
+        count = 0
+        error = None
+        try:
+            for date_str, session in table_history_store.iter_range(start, end, table_id=table_id):
+                yield (', ' if count else '') + json.dumps(dict(session, date=date_str), ensure_ascii=False)
+                count += 1
+        except Exception as e:
+            app.logger.error(f"Failed to stream table history {start}..{end}: {e}")
+            error = str(e)
+        footer = {"count": count}
+        if error:
+            footer["error"] = error
+        yield '], ' + json.dumps(footer, ensure_ascii=False)[1:]
+
+    return Response(_generate(), mimetype='application/json')
+
+@app.route('/api/tables/audit', methods=['GET'])
+def get_table_audit():
+    """Query the table audit trail: ?table_id=&operation=&since=&until=&limit=&offset=&order=asc|desc"""
+    if not is_table_management_enabled():
+        return jsonify({"status": "error", "message": "Table management feature not enabled"}), 404
+
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError:
+            return jsonify({"status": "error", "message": "limit and offset must be integers"}), 400
+        order = (request.args.get('order') or 'desc').lower()
+        if order not in ('asc', 'desc'):
+            return jsonify({"status": "error", "message": "order must be 'asc' or 'desc'"}), 400
+
+        result = table_audit_log.query(
+            table_id=(request.args.get('table_id') or '').strip() or None,
+            operation=(request.args.get('operation') or '').strip() or None,
+            since=(request.args.get('since') or '').strip() or None,
+            until=(request.args.get('until') or '').strip() or None,
+            limit=limit,
+            offset=offset,
+            newest_first=order == 'desc'
+        )
+        return jsonify({"status": "success", "order": order, **result})
+
+    except Exception as e:
+        app.logger.error(f"Failed to query table audit log: {e}")
+        return jsonify({"status": "error", "message": f"Failed to query audit log: {str(e)}"}), 500
+
 @app.route('/api/tables/<table_id>/recalculate', methods=['POST'])
 def recalculate_table_total_endpoint(table_id):
     """Recalculate table total from actual order data"""
@@ -6359,8 +6367,7 @@ def get_table_performance_metrics():
         data_files = [
             'tables_config.json',
             'table_sessions.json',
-            'table_history.json',
-            'table_audit.json'
+            'table_history.json'
         ]
 
         for filename in data_files:
@@ -6369,6 +6376,7 @@ def get_table_performance_metrics():
                 metrics["file_sizes"][filename] = os.path.getsize(filepath)
             else:
                 metrics["file_sizes"][filename] = 0
+        metrics["file_sizes"]["table_audit"] = table_audit_log.stats()["bytes"]
 
         # Operation counts from rate limiter
         current_time = time.time()
@@ -6418,18 +6426,64 @@ def shutdown_server():
         # Step 1: Clean up SSE subscribers with timeout
         app.logger.info("Cleaning up SSE subscribers...")
         try:
-            # Notify all SSE clients that server is shutting down
-            for q in list(_sse_subscribers):
-                try:
-                    q.put(('shutdown', '{"message": "Server shutting down"}'))
-                except:
-                    pass
-            # Clear subscriber list
-            _sse_subscribers.clear()
+            # Notify all SSE clients that server is shutting down, then end their streams
+            event_bus.publish('shutdown', {"message": "Server shutting down"})
+            event_bus.close()
+            sse_gateway.stop(timeout=2.0)
             app.logger.info("SSE subscribers cleaned up successfully")
         except Exception as e:
             app.logger.error(f"Error cleaning SSE subscribers: {e}")
         
+        # Step 1.5: Stop print queue workers (unfinished jobs stay in the journal)
+        app.logger.info("Stopping print queue workers...")
+        try:
+            print_job_queue.stop()
+            print_job_monitor.close()
+            printer_health_prober.stop()
+            app.logger.info("Print queue stopped successfully")
+        except Exception as e:
+            app.logger.error(f"Error stopping print queue: {e}")
+
+        # Step 1.6: Fold the order number journal into order_counter.json
+        try:
+            order_number_allocator.close()
+        except Exception as e:
+            app.logger.error(f"Error closing order number allocator: {e}")
+
+        # Step 1.7: Sync and close the open order CSV
+        try:
+            order_journal.close()
+            if order_store is not None:
+                order_store.close()
+        except Exception as e:
+            app.logger.error(f"Error closing order journal: {e}")
+
+        # Step 1.8: Flush pending table session changes and write table_sessions.json
+        try:
+            table_session_store.close()
+            table_audit_log.close()
+            table_history_store.close()
+        except Exception as e:
+            app.logger.error(f"Error flushing table sessions: {e}")
+
+        # Step 1.9: Write pending order state, analytics rollups, usage counters and device presence
+        try:
+            centralized_state.close()
+        except Exception as e:
+            app.logger.error(f"Error flushing centralized state: {e}")
+        try:
+            analytics_rollups.close()
+        except Exception as e:
+            app.logger.error(f"Error flushing analytics rollups: {e}")
+        try:
+            usage_counters.close()
+        except Exception as e:
+            app.logger.error(f"Error flushing usage counters: {e}")
+        try:
+            device_registry.close()
+        except Exception as e:
+            app.logger.error(f"Error flushing device registry: {e}")
+
         # Step 2: Clean up HTTP session
         app.logger.info("Cleaning up HTTP session...")
         try:
@@ -6582,19 +6636,7 @@ def shutdown():
 @app.route('/api/order_status', methods=['GET'])
 def get_order_status():
     try:
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        current_counter_val = 0
-        if os.path.exists(ORDER_COUNTER_FILE):
-            try:
-                with open(ORDER_COUNTER_FILE, 'r') as f:
-                    data = json.load(f)
-                    if data.get('date') == today_str:
-                        current_counter_val = data.get('counter', 0)
-            except (json.JSONDecodeError, FileNotFoundError):
-                # File is corrupt or gone, will reset to 0
-                pass
-        
-        return jsonify({"next_order_number": current_counter_val + 1})
+        return jsonify({"next_order_number": order_number_allocator.peek_next()})
     except Exception as e:
         app.logger.error(f"Error getting order status: {str(e)}")
         return jsonify({"status": "error", "message": "Could not retrieve order status"}), 500
@@ -6734,6 +6776,9 @@ JOB_STATUS_TRANSIENT_FLAGS = (
 )
 PRINTER_FATAL_STATUS_THRESHOLD = 3
 JOB_TRANSIENT_FAILURE_THRESHOLD = 5
+# Minimum time a fatal/blocked state must persist, so fast early checks do not fail jobs sooner
+PRINTER_FATAL_STATUS_SECONDS = 1.0
+JOB_TRANSIENT_FAILURE_SECONDS = 2.0
 
 PRINTER_STATUS_PAUSED = 0x00000001
 PRINTER_STATUS_ERROR = 0x00000002
@@ -6832,9 +6877,23 @@ def _build_printer_failure_message(job_status_bits: int, printer_status_bits: in
     return base, job_desc, printer_desc
 
 
-def wait_for_printer_job_completion(hprinter, job_id, printer_name, timeout_seconds: float = 15.0, poll_interval: float = 0.5):
+print_job_monitor = PrintJobMonitor(
+    app.logger,
+    win32print,
+    status_reader=_get_printer_status_bits,
+    job_fatal_flags=JOB_STATUS_FATAL_FLAGS,
+    job_transient_flags=JOB_STATUS_TRANSIENT_FLAGS,
+    printer_fatal_flags=PRINTER_STATUS_FATAL_FLAGS,
+    fatal_checks=PRINTER_FATAL_STATUS_THRESHOLD,
+    fatal_seconds=PRINTER_FATAL_STATUS_SECONDS,
+    blocked_checks=JOB_TRANSIENT_FAILURE_THRESHOLD,
+    blocked_seconds=JOB_TRANSIENT_FAILURE_SECONDS
+)
+
+
+def wait_for_printer_job_completion(job_id, printer_name, timeout_seconds: float = 15.0):
     """
-    Poll the Windows print spooler until the specified job completes or fails.
+    Wait for the shared per-printer monitor to report the spooler job as done or failed.
     Returns (success: bool, failure_reason: Optional[str]).
     """
     if not job_id:
@@ -6852,72 +6911,55 @@ def wait_for_printer_job_completion(hprinter, job_id, printer_name, timeout_seco
         )
         return False, friendly_msg
 
-    deadline = time.time() + timeout_seconds
-    job_fatal_count = 0
-    printer_fatal_count = 0
-    blocked_count = 0
+    try:
+        outcome = print_job_monitor.watch(printer_name, job_id, timeout_seconds).result(timeout_seconds + 5.0)
+    except FuturesTimeoutError:
+        outcome = {"state": SPOOL_JOB_TIMEOUT, "job_status": 0, "printer_status": None, "error": None}
 
-    while time.time() < deadline:
-        try:
-            jobs = win32print.EnumJobs(hprinter, 0, -1, 1)
-        except ModuleNotFoundError as exc:
-            if exc.name == "win32timezone":
-                _warn_missing_win32timezone()
-                record_printer_failure(None)
-                return True, None
-            raise
-        except win32print.error as exc:
-            app.logger.warning(f"[PRINTER_MONITOR] Unable to enumerate jobs for '{printer_name}': {exc}. Assuming success.")
-            return True, None
+    state = outcome["state"]
+    status = outcome["job_status"]
+    printer_status_bits = outcome["printer_status"]
 
-        job_info = next((job for job in jobs if job.get('JobId') == job_id), None)
-        if not job_info:
-            app.logger.info(f"[PRINTER_MONITOR] Job {job_id} for '{printer_name}' no longer in queue; assuming success.")
-            record_printer_failure(None)
-            return True, None
+    if state == SPOOL_JOB_COMPLETED:
+        app.logger.info(
+            f"[PRINTER_MONITOR] Job {job_id} for '{printer_name}' completed with status {describe_job_status(status)} "
+            f"after {outcome['elapsed'] * 1000:.0f} ms."
+        )
+        record_printer_failure(None)
+        return True, None
 
-        status = int(job_info.get('Status', 0) or 0)
-        printer_status_bits = _get_printer_status_bits(hprinter, printer_name)
+    if state == SPOOL_JOB_GONE:
+        app.logger.info(f"[PRINTER_MONITOR] Job {job_id} for '{printer_name}' no longer in queue; assuming success.")
+        record_printer_failure(None)
+        return True, None
 
-        if status == 0 or status & 0x00000080 or status & 0x00001000:
-            app.logger.info(f"[PRINTER_MONITOR] Job {job_id} for '{printer_name}' completed with status {describe_job_status(status)}.")
+    if state == SPOOL_JOB_ERROR:
+        # Only an unreadable job list is taken as success; anything else fails the print so failover can run
+        exc = outcome["error"]
+        if isinstance(exc, ModuleNotFoundError) and exc.name == "win32timezone":
+            _warn_missing_win32timezone()
             record_printer_failure(None)
             return True, None
+        if isinstance(exc, win32print.error):
+            app.logger.warning(f"[PRINTER_MONITOR] Unable to enumerate jobs for '{printer_name}': {exc}. Assuming success.")
+            return True, None
+        return _finalize_failure(status, printer_status_bits, f"Could not monitor the print job: {exc}")
 
-        if status & JOB_STATUS_FATAL_FLAGS:
-            job_fatal_count += 1
-        else:
-            job_fatal_count = 0
-
-        if printer_status_bits & PRINTER_STATUS_FATAL_FLAGS:
-            printer_fatal_count += 1
-        else:
-            printer_fatal_count = 0
-
-        if status & JOB_STATUS_TRANSIENT_FLAGS:
-            blocked_count += 1
-            if blocked_count == 1:
-                app.logger.info(
-                    f"[PRINTER_MONITOR] Job {job_id} for '{printer_name}' reported transient status "
-                    f"{describe_job_status(status)}; continuing to monitor."
-                )
-        else:
-            blocked_count = 0
-
-        if job_fatal_count >= PRINTER_FATAL_STATUS_THRESHOLD:
-            return _finalize_failure(status, printer_status_bits, "Printer job reported a fatal status.")
+    if state == SPOOL_JOB_UNAVAILABLE:
+        return _finalize_failure(status, printer_status_bits, f"Could not open printer to monitor the job: {outcome['error']}")
 
-        if printer_fatal_count >= PRINTER_FATAL_STATUS_THRESHOLD:
-            return _finalize_failure(status, printer_status_bits, "Printer hardware reported an error.")
+    if state == SPOOL_JOB_FATAL:
+        return _finalize_failure(status, printer_status_bits, "Printer job reported a fatal status.")
 
-        if blocked_count >= JOB_TRANSIENT_FAILURE_THRESHOLD:
-            return _finalize_failure(status, printer_status_bits, "Printer queue appears to be blocked.")
+    if state == SPOOL_JOB_PRINTER_FATAL:
+        return _finalize_failure(status, printer_status_bits, "Printer hardware reported an error.")
 
-        time.sleep(poll_interval)
+    if state == SPOOL_JOB_BLOCKED:
+        return _finalize_failure(status, printer_status_bits, "Printer queue appears to be blocked.")
 
     timeout_msg = f"Timed out waiting for printer '{printer_name}' job {job_id} to finish."
     app.logger.error(f"[PRINTER_MONITOR] {timeout_msg}")
-    friendly_msg, job_desc, printer_desc = _build_printer_failure_message(0, _get_printer_status_bits(hprinter, printer_name), timeout_msg)
+    friendly_msg, job_desc, printer_desc = _build_printer_failure_message(0, printer_status_bits or 0, timeout_msg)
     record_printer_failure(
         friendly_msg,
         status_code='timeout',
@@ -6927,10 +6969,244 @@ def wait_for_printer_job_completion(hprinter, job_id, printer_name, timeout_seco
     return False, friendly_msg
 
 
-def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None, device_id=None, printer_role='kitchen'):
-    """
-    Builds and prints a kitchen ticket. This function is refactored to ensure
+def open_printer_backend(printer_name):
+    """Transport for a printer name: tcp://host[:port] (raw 9100), file://path, or a spooler printer."""
+    return create_printer_backend(
+        printer_name,
+        win32print_module=win32print,
+        status_reader=_get_printer_status_bits,
+        job_waiter=wait_for_printer_job_completion
+    )
+
+
+def _probe_printer_health(printer_name):
+    """One status read for the health prober (runs on its worker threads, never in a request)."""
+    with open_printer_backend(printer_name) as backend:
+        status_code = backend.status()
+        kind = backend.kind
+    return {
+        # A spooler printer counts as online once it opens; direct targets report reachability
+        "online": kind == "spooler" or not (status_code & PRINTER_STATUS_OFFLINE),
+        "status_code": status_code,
+        "status_message": describe_printer_status(status_code),
+        "backend": kind,
+    }
+
+
+def _printer_health_targets():
+    targets = {
+        role: name for role, name in get_role_printer_map().items()
+        if name and name != "Your_Printer_Name_Here"
+    }
+    for role in DEVICE_PROFILE_ROLES:
+        for index, name in enumerate(get_role_failover_printers(role), start=1):
+            targets[f"{role}_failover_{index}"] = name
+    for station, settings in kitchen_stations.stations().items():
+        for index, name in enumerate([settings["printer"]] + settings["failover"]):
+            name = _sanitize_printer_name(name)
+            if name and name != "Your_Printer_Name_Here":
+                targets[f"station_{station}" + (f"_failover_{index}" if index else "")] = name
+    return targets
+
+
+def _printer_name_list(value) -> list:
+    """A list of printer names from a list or a comma-separated string; anything else is empty."""
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        return []
+    names = [_sanitize_printer_name(name) for name in value if isinstance(name, (str, int, float))]
+    return [name for name in names if name and name != "Your_Printer_Name_Here"]
+
+
+def get_role_failover_printers(role: str) -> list:
+    """Configured backup printers for a role, in order (config "printer_failover")."""
+    configured = config.get('printer_failover')
+    if not isinstance(configured, dict):
+        return []
+    return _printer_name_list(configured.get(role))
+
+
+def normalize_printer_failover(value) -> dict:
+    """Validate a posted "printer_failover" setting: {role: [printer, ...]}. Raises ValueError."""
+    if not isinstance(value, dict):
+        raise ValueError("printer_failover must be an object mapping a role to a list of printers.")
+    normalized = {}
+    for role, printers in value.items():
+        role = str(role or '').strip().lower()
+        if role not in DEVICE_PROFILE_ROLES:
+            raise ValueError(f"printer_failover: unknown role '{role}'.")
+        if printers is not None and not isinstance(printers, (list, tuple, str)):
+            raise ValueError(f"printer_failover.{role} must be a list of printer names.")
+        normalized[role] = _printer_name_list(printers)
+    return normalized
+
+
+def normalize_kitchen_stations(value) -> dict:
+    """Validate a posted "kitchen_stations" setting: {station: {categories, printer, failover, label}}. Raises ValueError."""
+    if not isinstance(value, dict):
+        raise ValueError("kitchen_stations must be an object mapping a station name to its settings.")
+    normalized = {}
+    for name, station in value.items():
+        name = str(name or '').strip()
+        if not name:
+            raise ValueError("kitchen_stations: station names cannot be empty.")
+        if not isinstance(station, dict):
+            raise ValueError(f"kitchen_stations.{name} must be an object.")
+        categories = station.get('categories') or []
+        if isinstance(categories, str):
+            categories = categories.split(',')
+        if not isinstance(categories, (list, tuple)):
+            raise ValueError(f"kitchen_stations.{name}.categories must be a list of menu categories.")
+        failover = station.get('failover') or []
+        if not isinstance(failover, (list, tuple, str)):
+            raise ValueError(f"kitchen_stations.{name}.failover must be a list of printer names.")
+        normalized[name] = {
+            "categories": [str(c).strip() for c in categories if isinstance(c, (str, int)) and str(c).strip()],
+            "printer": _sanitize_printer_name(station.get('printer') if isinstance(station.get('printer'), str) else ''),
+            "failover": _printer_name_list(failover),
+            "label": str(station.get('label') or name).strip(),
+        }
+    return normalized
+
+
+def get_station_printer_candidates(station: dict, device_id: str | None = None) -> list:
+    """A kitchen station's printer and backups; stations without a printer use the kitchen printers."""
+    candidates = []
+    for name in [station.get("printer")] + list(station.get("failover") or []):
+        name = _sanitize_printer_name(name)
+        if name and name != "Your_Printer_Name_Here" and name not in candidates:
+            candidates.append(name)
+    return candidates or get_role_printer_candidates('kitchen', device_id)
+
+
+def get_role_printer_candidates(role: str, device_id: str | None = None) -> list:
+    """Primary printer for a role/device followed by the role's failover printers, without duplicates."""
+    primary = _sanitize_printer_name(resolve_printer_for_role(role, device_id) or PRINTER_NAME)
+    candidates = []
+    for name in [primary] + get_role_failover_printers(role):
+        if name and name != "Your_Printer_Name_Here" and name not in candidates:
+            candidates.append(name)
+    return candidates
+
+
+# Role printers are probed in the background; health/status endpoints only read the snapshot
+printer_health_prober = PrinterHealthProber(
+    app.logger,
+    _probe_printer_health,
+    _printer_health_targets,
+    publish_fn=lambda entry: _sse_broadcast("printer_status", entry),
+    interval_seconds=float(config.get("printer_health_interval_seconds", 15) or 15),
+    failure_interval_seconds=float(config.get("printer_health_failure_interval_seconds", 3) or 3),
+    failure_flags=PRINTER_STATUS_FATAL_FLAGS,
+)
+
+
+# Jobs go to the first printer of a role that is neither reported down nor failing repeatedly
+printer_router = PrinterFailoverRouter(
+    app.logger,
+    health_lookup=printer_health_prober.get,
+    fatal_flags=PRINTER_STATUS_FATAL_FLAGS,
+    failure_threshold=int(config.get("printer_breaker_failures", 2) or 2),
+    cooldown_seconds=float(config.get("printer_breaker_cooldown_seconds", 30) or 30),
+)
+
+
+def print_with_failover(role: str, device_id, print_fn, candidates: list | None = None) -> tuple[bool, str | None]:
+    """
+    Call print_fn(printer_name) for the role's printers (or the given
+    candidates) in routed order until one succeeds. Printers that are offline,
+    report a fatal status or have an open circuit are tried last instead of first.
+    Returns (ok, failure message of the last failed attempt, if any).
+    """
+    if candidates is None:
+        candidates = get_role_printer_candidates(role, device_id)
+    if not candidates:
+        return attempt_print(print_fn, "")  # logs the "no printer configured" error
+    primary = candidates[0]
+    last_failure = None
+    for printer_name in printer_router.route(candidates):
+        if printer_name != primary:
+            reason = printer_router.unhealthy_reason(primary) or f"circuit {printer_router.breaker_state(primary)}"
+            app.logger.warning(f"[PRINTER_FAILOVER] {role} job routed to '{printer_name}' (primary '{primary}': {reason})")
+        ok, failure_reason = attempt_print(print_fn, printer_name)
+        if ok:
+            printer_router.record_success(printer_name)
+            if printer_name != primary:
+                _sse_broadcast("printer_failover", {
+                    "role": role,
+                    "primary": primary,
+                    "printer_name": printer_name,
+                    "timestamp": datetime.now().isoformat()
+                })
+            return True, None
+        printer_router.record_failure(printer_name, failure_reason)
+        last_failure = failure_reason or last_failure
+    return False, last_failure
+
+
+def render_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None) -> bytes:
+    """Render one kitchen ticket copy as ESC/POS bytes (no printer involved)."""
+    order_total = Decimal('0')
+    for item in order_data.get('items', []):
+        price = to_decimal(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
+        quantity = to_decimal(item.get('quantity', 0) or 0)
+        order_total += price * quantity
+    order_total_value = float(order_total)
+
+    receipt_payload = build_simple_customer_receipt_payload(order_data, order_total_value)
+    if original_timestamp_str:
+        receipt_payload['timestamp'] = original_timestamp_str
+
+    table_number = (order_data.get('tableNumber') or '').strip() or None
+    if table_number:
+        receipt_payload['mode'] = 'table'
+        receipt_payload['table_id'] = table_number
+        receipt_payload['table_name'] = table_number
+
+    language_code = str(config.get('language', 'en')).lower()
+    receipt_payload['language'] = language_code
+    receipt_payload['receipt_kind'] = 'kitchen'
+    receipt_payload['header_title'] = receipt_payload.get('header_title') or get_receipt_text('title_kitchen', language_code)
+    receipt_payload['copy_label'] = copy_info or receipt_payload.get('copy_label') or get_receipt_text('copy_kitchen', language_code)
+    receipt_payload['include_payment_details'] = False
+    receipt_payload['payment_status'] = "unpaid"
+    receipt_payload['amount_paid_total'] = 0.0
+    receipt_payload['amount_remaining'] = receipt_payload.get('bill_total', order_total_value)
+    receipt_payload['payments'] = []
+    receipt_payload['total_payments'] = 0
+    receipt_payload['payment'] = {
+        "payment_id": "",
+        "amount": 0.0,
+        "method": (order_data.get('paymentMethod') or 'Pending').replace('_', ' ').title(),
+        "timestamp": receipt_payload['timestamp'],
+        "note": (order_data.get('universalComment') or '').strip()
+    }
+
+    channel_override = (
+        order_data.get('saleChannel')
+        or order_data.get('channel')
+        or order_data.get('orderType')
+        or receipt_payload.get('channel_label')
+    )
+    if channel_override:
+        receipt_payload['channel_label'] = channel_override
+
+    return bytes(build_customer_receipt_content(receipt_payload, cut_after=CUT_AFTER_KITCHEN))
+
+
+def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None, device_id=None, printer_role='kitchen',
+                         copies=1, ticket_bytes=None, printer_name=None, candidates=None, pdf_fallback=True):
+    """
+    Builds and prints a kitchen ticket. This function is refactored to ensure
     all printer resources are properly closed in all scenarios.
+    With copies > 1 the ticket is rendered once and repeated (each copy with
+    its own cut) inside a single RAW document, so all copies share one
+    spooler round-trip and one completion wait. ticket_bytes sends an
+    already rendered ticket (e.g. a stored one for reprints) as is.
+    Without printer_name the role's printers (or the given candidates, e.g. a
+    kitchen station's) are tried in failover order; the PDF fallback is only
+    used once every one of them has failed.
     """
     # 1. Pre-flight checks (no resources opened yet)
     global last_print_used_fallback
@@ -6940,8 +7216,22 @@ def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None,
         app.logger.warning("Printing blocked - trial expired")
         return False
 
-    target_printer = resolve_printer_for_role(printer_role, device_id) or PRINTER_NAME
-    target_printer = (target_printer or "").strip()
+    if printer_name is None:
+        ok, failure_reason = print_with_failover(printer_role, device_id, lambda target: print_kitchen_ticket(
+            order_data, copy_info, original_timestamp_str, device_id=device_id, printer_role=printer_role,
+            copies=copies, ticket_bytes=ticket_bytes, printer_name=target, pdf_fallback=False),
+            candidates=candidates)
+        if ok:
+            return True
+        if PDF_FALLBACK_ENABLED and generate_pdf_ticket(order_data, copy_info, original_timestamp_str):
+            app.logger.info("PDF fallback used after every printer candidate failed.")
+            last_print_used_fallback = True
+            return True
+        # Leave the routed failure for this thread's attempt_print() (the candidates' own attempts reset it)
+        _printer_failure_local.message = failure_reason
+        return False
+
+    target_printer = (printer_name or "").strip()
 
     if not target_printer or target_printer == "Your_Printer_Name_Here":
         app.logger.error(f"CRITICAL: No printer configured. Cannot print order #{order_data.get('number', 'N/A')}.")
@@ -6955,77 +7245,44 @@ def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None,
 
     # 2. Build the ticket content (can fail without opening resources)
     try:
-        order_total = Decimal('0')
-        for item in order_data.get('items', []):
-            price = to_decimal(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
-            quantity = to_decimal(item.get('quantity', 0) or 0)
-            order_total += price * quantity
-        order_total_value = float(order_total)
-
-        receipt_payload = build_simple_customer_receipt_payload(order_data, order_total_value)
-        if original_timestamp_str:
-            receipt_payload['timestamp'] = original_timestamp_str
-
-        table_number = (order_data.get('tableNumber') or '').strip() or None
-        if table_number:
-            receipt_payload['mode'] = 'table'
-            receipt_payload['table_id'] = table_number
-            receipt_payload['table_name'] = table_number
-
-        language_code = str(config.get('language', 'en')).lower()
-        receipt_payload['language'] = language_code
-        receipt_payload['receipt_kind'] = 'kitchen'
-        receipt_payload['header_title'] = receipt_payload.get('header_title') or get_receipt_text('title_kitchen', language_code)
-        receipt_payload['copy_label'] = copy_info or receipt_payload.get('copy_label') or get_receipt_text('copy_kitchen', language_code)
-        receipt_payload['include_payment_details'] = False
-        receipt_payload['payment_status'] = "unpaid"
-        receipt_payload['amount_paid_total'] = 0.0
-        receipt_payload['amount_remaining'] = receipt_payload.get('bill_total', order_total_value)
-        receipt_payload['payments'] = []
-        receipt_payload['total_payments'] = 0
-        receipt_payload['payment'] = {
-            "payment_id": "",
-            "amount": 0.0,
-            "method": (order_data.get('paymentMethod') or 'Pending').replace('_', ' ').title(),
-            "timestamp": receipt_payload['timestamp'],
-            "note": (order_data.get('universalComment') or '').strip()
-        }
-
-        channel_override = (
-            order_data.get('saleChannel')
-            or order_data.get('channel')
-            or order_data.get('orderType')
-            or receipt_payload.get('channel_label')
-        )
-        if channel_override:
-            receipt_payload['channel_label'] = channel_override
-
-        ticket_content = build_customer_receipt_content(receipt_payload, cut_after=CUT_AFTER_KITCHEN)
+        if ticket_bytes is not None:
+            ticket_content = bytes(ticket_bytes)
+        else:
+            ticket_content = render_kitchen_ticket(order_data, copy_info, original_timestamp_str)
+        copies = max(1, int(copies or 1))
+        if copies > 1:
+            ticket_content = bytes(ticket_content) * copies
 
     except Exception as e_build:
         app.logger.error(f"Error building ticket content for order #{order_data.get('number', 'N/A')}: {str(e_build)}")
         return False
 
     # 3. Handle the printing with a guaranteed resource cleanup
-    hprinter = None
-    doc_started = False
+    backend = None
     try:
         app.logger.info(
             f"Attempting to open printer '{target_printer}' "
             f"for order #{order_data.get('number', 'N/A')}{f' ({copy_info})' if copy_info else ''} "
             f"[role={printer_role}, device={device_id or 'n/a'}]"
         )
-        hprinter = win32print.OpenPrinter(target_printer)
+        backend = open_printer_backend(target_printer)
+        backend.open()
 
         # Check printer status
-        current_status = _get_printer_status_bits(hprinter, target_printer)
+        current_status = backend.status()
+        printer_health_prober.observe(target_printer, current_status)
         app.logger.info(f"Printer '{target_printer}' current status code: {hex(current_status)}")
 
         if current_status & PRINTER_STATUS_FATAL_FLAGS:
             problems_string = describe_printer_status(current_status)
             app.logger.error(f"Printer '{target_printer}' reported problem(s): {problems_string}. Order will not be printed.")
-            # Attempt PDF fallback if enabled
-            if PDF_FALLBACK_ENABLED:
+            record_printer_failure(
+                f"Printer '{target_printer}' reported problem(s): {problems_string}.",
+                status_code=hex(current_status),
+                printer_status=problems_string
+            )
+            # Attempt PDF fallback if enabled (routed attempts leave it to the caller, after failover)
+            if PDF_FALLBACK_ENABLED and pdf_fallback:
                 if generate_pdf_ticket(order_data, copy_info, original_timestamp_str):
                     app.logger.info("PDF fallback used due to printer status problems.")
                     last_print_used_fallback = True
@@ -7035,30 +7292,27 @@ def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None,
         app.logger.info(f"Printer '{target_printer}' status appears operational. Proceeding with print.")
         
         # Perform the print job
-        doc_name = f"Order_{order_data.get('number', 'N/A')}_Ticket{f'_{copy_info}'.replace(' ','_') if copy_info else ''}_ESCPOST"
-        job_id = win32print.StartDocPrinter(hprinter, 1, (doc_name, None, "RAW"))
-        doc_started = True
+        doc_name = f"Order_{order_data.get('number', 'N/A')}_Ticket{f'_{copy_info}'.replace(' ','_') if copy_info else ''}{f'_x{copies}' if copies > 1 else ''}_ESCPOST"
+        job_id = backend.submit(doc_name, bytes(ticket_content))
 
-        win32print.StartPagePrinter(hprinter)
-        win32print.WritePrinter(hprinter, bytes(ticket_content))
-        win32print.EndPagePrinter(hprinter)
-        win32print.EndDocPrinter(hprinter)
-        doc_started = False
-
-        job_completed, failure_reason = wait_for_printer_job_completion(hprinter, job_id, target_printer)
+        job_completed, failure_reason = backend.wait(job_id)
         if not job_completed:
             if failure_reason:
                 app.logger.error(f"[PRINTER_MONITOR] Kitchen ticket job did not complete: {failure_reason}")
             return False
 
-        app.logger.info(f"Order #{order_data.get('number', 'N/A')} data printed successfully on '{target_printer}'.")
+        app.logger.info(
+            f"Order #{order_data.get('number', 'N/A')} data printed successfully on '{target_printer}'"
+            f"{f' ({copies} copies in one job)' if copies > 1 else ''}."
+        )
         return True # Success
 
     except (win32print.error, Exception) as e:
         order_id_str = f"order #{order_data.get('number', 'N/A')}{f' ({copy_info})' if copy_info else ''}"
         app.logger.error(f"A printing error occurred for {order_id_str} with printer '{target_printer}'. Error: {str(e)}")
-        # Attempt PDF fallback if enabled
-        if PDF_FALLBACK_ENABLED:
+        record_printer_failure(f"Printing on '{target_printer}' failed: {e}")
+        # Attempt PDF fallback if enabled (routed attempts leave it to the caller, after failover)
+        if PDF_FALLBACK_ENABLED and pdf_fallback:
             if generate_pdf_ticket(order_data, copy_info, original_timestamp_str):
                 app.logger.info("PDF fallback used due to printing exception.")
                 last_print_used_fallback = True
@@ -7066,20 +7320,195 @@ def print_kitchen_ticket(order_data, copy_info="", original_timestamp_str=None,
         return False
         
     finally:
-        # This block ensures all opened resources are closed, in the correct order.
-        if doc_started:
-            try:
-                win32print.EndDocPrinter(hprinter)
-            except Exception as e_doc:
-                 app.logger.error(f"Error ending document on printer '{target_printer}': {str(e_doc)}")
-        if hprinter:
+        # This block ensures the printer handle or connection is always closed.
+        if backend is not None:
             try:
-                win32print.ClosePrinter(hprinter)
+                backend.close()
             except Exception as e_close:
                 app.logger.error(f"Error closing printer handle for '{target_printer}': {str(e_close)}")
 
 
-def print_table_bill_ticket(bill_data, device_id=None):
+def build_table_bill_content(bill_data, cut_after=None) -> bytearray:
+    """Render a table bill as ESC/POS bytes (no printer involved)."""
+    ticket_content = bytearray()
+    ticket_content += InitializePrinter
+    ticket_content += ESC + b't\x13'
+
+    NORMAL_FONT_LINE_WIDTH = 42
+    SMALL_FONT_LINE_WIDTH = 56
+
+    language_code = str(config.get('language', 'en')).lower()
+
+    def L(key: str, **fmt):
+        return get_receipt_text(key, language_code, **fmt)
+
+    profile_context = prepare_business_profile_for_receipts(bill_data.get('business_profile'))
+    restaurant_name = profile_context["name"]
+    address_lines = profile_context["address_lines"]
+    phone_value = profile_context["phone"]
+    email_value = profile_context["email"]
+    website_value = profile_context["website"]
+    tax_id_line = profile_context["tax_line"]
+    logo_lines = profile_context.get("logo_lines", [])
+    qr_payload = profile_context.get("qr_payload", "")
+    footers = profile_context.get("footers", {})
+    footer_lines = footers.get("table") or footers.get("default", [])
+
+    contact_lines = []
+    if phone_value:
+        contact_lines.append(f"{L('contact_phone')}: {phone_value}")
+    if email_value:
+        contact_lines.append(f"{L('contact_email')}: {email_value}")
+    if website_value:
+        contact_lines.append(f"{L('contact_web')}: {website_value}")
+
+    if logo_lines:
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        for raw_logo in logo_lines:
+            for wrapped_logo in word_wrap_text(raw_logo, SMALL_FONT_LINE_WIDTH):
+                ticket_content.extend(to_bytes(wrapped_logo + "\n"))
+        ticket_content += AlignLeft + SelectFontA + NormalText
+
+    ticket_content += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
+    ticket_content += to_bytes(restaurant_name + "\n")
+    ticket_content += BoldOff
+
+    details_printed = False
+    if address_lines:
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        for line in address_lines:
+            for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
+                ticket_content.extend(to_bytes(wrapped + "\n"))
+        details_printed = True
+    if contact_lines:
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        for line in contact_lines:
+            for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
+                ticket_content.extend(to_bytes(wrapped + "\n"))
+        details_printed = True
+    if tax_id_line:
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        for wrapped in word_wrap_text(f"{L('field_tax')}: {tax_id_line}", SMALL_FONT_LINE_WIDTH):
+            ticket_content.extend(to_bytes(wrapped + "\n"))
+        details_printed = True
+    if not details_printed:
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        ticket_content += to_bytes(f"{L('business_info_placeholder')}\n")
+    ticket_content += AlignLeft + SelectFontA + NormalText
+
+    table_label = bill_data.get('table_name') or f"{L('table_prefix')} {bill_data.get('table_id', L('label_unknown'))}"
+    seats = bill_data.get('seats')
+    seats_text = f" ({L('field_guests')}: {seats})" if seats else ""
+
+    ticket_content += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
+    ticket_content += to_bytes(f"{L('title_table_bill')} - {table_label}{seats_text}\n")
+    ticket_content += BoldOff
+    ticket_content += AlignLeft + SelectFontA + NormalText
+
+    current_time = datetime.now()
+    ticket_content += to_bytes(f"{L('field_date')}: {current_time.strftime('%d/%m/%Y')}  {L('field_time')}: {current_time.strftime('%H:%M')}\n")
+    ticket_content += to_bytes("=" * NORMAL_FONT_LINE_WIDTH + "\n")
+
+    grand_total = 0.0
+    order_count = 0
+    for order in bill_data.get('orders', []):
+        order_count += 1
+        order_number = order.get('order_number', 'N/A')
+        order_time = order.get('time', 'N/A')
+        ticket_content += SelectFontA + BoldOn
+        ticket_content += to_bytes(f"{L('table_bill_order_prefix', number=order_number)} - {order_time}\n")
+        ticket_content += BoldOff
+
+        for item in order.get('items', []):
+            item_name = item.get('name', 'Item')
+            item_quantity = item.get('quantity', 1)
+            item_price = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
+            line_total = item_quantity * item_price
+            grand_total += line_total
+
+            left_side = f"- {item_quantity}x {item_name}"
+            right_side = format_currency(line_total)
+            available_space = NORMAL_FONT_LINE_WIDTH - len(left_side) - len(right_side)
+            padding = " " * max(1, available_space)
+            ticket_content += to_bytes(f"{left_side}{padding}{right_side}\n")
+
+            general_options = item.get('generalSelectedOptions', [])
+            if general_options:
+                for opt in general_options:
+                    opt_name = opt.get('name', 'N/A')
+                    opt_price_change = float(opt.get('priceChange', 0.0))
+                    price_change_str = ""
+                    if opt_price_change != 0:
+                        price_change_str = f" ({'+' if opt_price_change > 0 else ''}{opt_price_change:.2f})"
+                    ticket_content += to_bytes(f"    + {opt_name}{price_change_str}\n")
+
+            item_comments = (item.get('comments') or '').strip()
+            if item_comments:
+                for comment_line in item_comments.split('\n'):
+                    if comment_line.strip():
+                        ticket_content += to_bytes(f"    {L('table_bill_note_prefix')}: {comment_line.strip()}\n")
+
+        ticket_content += to_bytes("\n")
+
+    ticket_content += to_bytes("-" * NORMAL_FONT_LINE_WIDTH + "\n")
+    ticket_content += SelectFontA + BoldOn
+    ticket_content += to_bytes(L('table_bill_total_orders', count=order_count) + "\n")
+    total_left = L('table_bill_total_label')
+    total_right = format_currency(grand_total)
+    total_padding = " " * max(1, NORMAL_FONT_LINE_WIDTH - len(total_left) - len(total_right))
+    ticket_content += to_bytes(f"{total_left}{total_padding}{total_right}\n")
+    ticket_content += BoldOff
+
+    ticket_content += to_bytes("\n")
+    payment_status = (bill_data.get('payment_status') or 'unpaid').lower()
+    amount_paid = bill_data.get('amount_paid', 0.0)
+    amount_remaining = bill_data.get('amount_remaining', grand_total)
+    if payment_status == 'paid':
+        status_display = L('table_bill_status_paid')
+    elif payment_status == 'partial':
+        status_display = L('table_bill_status_partial', paid=format_currency(amount_paid), remaining=format_currency(amount_remaining))
+    else:
+        status_display = L('table_bill_status_pending')
+
+    ticket_content += AlignCenter
+    ticket_content += to_bytes(L('table_bill_payment_prefix', status=status_display) + "\n")
+    ticket_content += AlignLeft
+    ticket_content += to_bytes("=" * NORMAL_FONT_LINE_WIDTH + "\n")
+
+    if qr_payload:
+        ticket_content += AlignCenter + SelectFontA + BoldOn
+        ticket_content += to_bytes(L('section_qr') + "\n")
+        ticket_content += BoldOff
+        qr_ok = render_receipt_qr(ticket_content, qr_payload)
+        ticket_content += AlignCenter + SelectFontB + NormalText
+        if qr_ok:
+            for hint_line in word_wrap_text(L('qr_hint'), SMALL_FONT_LINE_WIDTH):
+                ticket_content.extend(to_bytes(hint_line + "\n"))
+        else:
+            fallback = f"{L('qr_fallback_label')}: {qr_payload}"
+            for fallback_line in word_wrap_text(fallback, SMALL_FONT_LINE_WIDTH):
+                ticket_content.extend(to_bytes(fallback_line + "\n"))
+        ticket_content += AlignLeft + SelectFontA + NormalText
+
+    closing_lines = footer_lines[:] if footer_lines else []
+    if not closing_lines:
+        closing_lines = [L('closing_default')]
+    if website_value and website_value not in closing_lines:
+        closing_lines.append(website_value)
+
+    ticket_content += AlignCenter + SelectFontB + NormalText
+    for line in closing_lines:
+        for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
+            ticket_content.extend(to_bytes(wrapped + "\n"))
+    ticket_content += AlignLeft + SelectFontA + NormalText
+
+    should_cut = CUT_AFTER_TABLE if cut_after is None else bool(cut_after)
+    if should_cut:
+        ticket_content += PartialCut
+    return ticket_content
+
+
+def print_table_bill_ticket(bill_data, device_id=None, printer_name=None):
     """
     Print a formatted table bill using POSPal's existing printing infrastructure.
     Follows the same patterns as print_kitchen_ticket for Windows compatibility.
@@ -7092,8 +7521,12 @@ def print_table_bill_ticket(bill_data, device_id=None):
         app.logger.warning("Printing blocked - trial expired")
         return False
 
-    target_printer = resolve_printer_for_role('table', device_id) or PRINTER_NAME
-    target_printer = (target_printer or "").strip()
+    if printer_name is None:
+        ok, _failure_reason = print_with_failover('table', device_id, lambda target: print_table_bill_ticket(
+            bill_data, device_id=device_id, printer_name=target))
+        return ok
+
+    target_printer = (printer_name or "").strip()
 
     if not target_printer or target_printer == "Your_Printer_Name_Here":
         app.logger.error(f"CRITICAL: No printer configured. Cannot print table bill.")
@@ -7107,181 +7540,7 @@ def print_table_bill_ticket(bill_data, device_id=None):
 
     # Build the bill ticket content
     try:
-        ticket_content = bytearray()
-        ticket_content += InitializePrinter
-        ticket_content += ESC + b't\x13'
-
-        NORMAL_FONT_LINE_WIDTH = 42
-        SMALL_FONT_LINE_WIDTH = 56
-
-        language_code = str(config.get('language', 'en')).lower()
-
-        def L(key: str, **fmt):
-            return get_receipt_text(key, language_code, **fmt)
-
-        profile_context = prepare_business_profile_for_receipts(bill_data.get('business_profile'))
-        restaurant_name = profile_context["name"]
-        address_lines = profile_context["address_lines"]
-        phone_value = profile_context["phone"]
-        email_value = profile_context["email"]
-        website_value = profile_context["website"]
-        tax_id_line = profile_context["tax_line"]
-        logo_lines = profile_context.get("logo_lines", [])
-        qr_payload = profile_context.get("qr_payload", "")
-        footers = profile_context.get("footers", {})
-        footer_lines = footers.get("table") or footers.get("default", [])
-
-        contact_lines = []
-        if phone_value:
-            contact_lines.append(f"{L('contact_phone')}: {phone_value}")
-        if email_value:
-            contact_lines.append(f"{L('contact_email')}: {email_value}")
-        if website_value:
-            contact_lines.append(f"{L('contact_web')}: {website_value}")
-
-        if logo_lines:
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            for raw_logo in logo_lines:
-                for wrapped_logo in word_wrap_text(raw_logo, SMALL_FONT_LINE_WIDTH):
-                    ticket_content.extend(to_bytes(wrapped_logo + "\n"))
-            ticket_content += AlignLeft + SelectFontA + NormalText
-
-        ticket_content += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
-        ticket_content += to_bytes(restaurant_name + "\n")
-        ticket_content += BoldOff
-
-        details_printed = False
-        if address_lines:
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            for line in address_lines:
-                for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
-                    ticket_content.extend(to_bytes(wrapped + "\n"))
-            details_printed = True
-        if contact_lines:
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            for line in contact_lines:
-                for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
-                    ticket_content.extend(to_bytes(wrapped + "\n"))
-            details_printed = True
-        if tax_id_line:
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            for wrapped in word_wrap_text(f"{L('field_tax')}: {tax_id_line}", SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(wrapped + "\n"))
-            details_printed = True
-        if not details_printed:
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            ticket_content += to_bytes(f"{L('business_info_placeholder')}\n")
-        ticket_content += AlignLeft + SelectFontA + NormalText
-
-        table_label = bill_data.get('table_name') or f"{L('table_prefix')} {bill_data.get('table_id', L('label_unknown'))}"
-        seats = bill_data.get('seats')
-        seats_text = f" ({L('field_guests')}: {seats})" if seats else ""
-
-        ticket_content += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
-        ticket_content += to_bytes(f"{L('title_table_bill')} - {table_label}{seats_text}\n")
-        ticket_content += BoldOff
-        ticket_content += AlignLeft + SelectFontA + NormalText
-
-        current_time = datetime.now()
-        ticket_content += to_bytes(f"{L('field_date')}: {current_time.strftime('%d/%m/%Y')}  {L('field_time')}: {current_time.strftime('%H:%M')}\n")
-        ticket_content += to_bytes("=" * NORMAL_FONT_LINE_WIDTH + "\n")
-
-        grand_total = 0.0
-        order_count = 0
-        for order in bill_data.get('orders', []):
-            order_count += 1
-            order_number = order.get('order_number', 'N/A')
-            order_time = order.get('time', 'N/A')
-            ticket_content += SelectFontA + BoldOn
-            ticket_content += to_bytes(f"{L('table_bill_order_prefix', number=order_number)} - {order_time}\n")
-            ticket_content += BoldOff
-
-            for item in order.get('items', []):
-                item_name = item.get('name', 'Item')
-                item_quantity = item.get('quantity', 1)
-                item_price = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
-                line_total = item_quantity * item_price
-                grand_total += line_total
-
-                left_side = f"- {item_quantity}x {item_name}"
-                right_side = format_currency(line_total)
-                available_space = NORMAL_FONT_LINE_WIDTH - len(left_side) - len(right_side)
-                padding = " " * max(1, available_space)
-                ticket_content += to_bytes(f"{left_side}{padding}{right_side}\n")
-
-                general_options = item.get('generalSelectedOptions', [])
-                if general_options:
-                    for opt in general_options:
-                        opt_name = opt.get('name', 'N/A')
-                        opt_price_change = float(opt.get('priceChange', 0.0))
-                        price_change_str = ""
-                        if opt_price_change != 0:
-                            price_change_str = f" ({'+' if opt_price_change > 0 else ''}{opt_price_change:.2f})"
-                        ticket_content += to_bytes(f"    + {opt_name}{price_change_str}\n")
-
-                item_comments = (item.get('comments') or '').strip()
-                if item_comments:
-                    for comment_line in item_comments.split('\n'):
-                        if comment_line.strip():
-                            ticket_content += to_bytes(f"    {L('table_bill_note_prefix')}: {comment_line.strip()}\n")
-
-            ticket_content += to_bytes("\n")
-
-        ticket_content += to_bytes("-" * NORMAL_FONT_LINE_WIDTH + "\n")
-        ticket_content += SelectFontA + BoldOn
-        ticket_content += to_bytes(L('table_bill_total_orders', count=order_count) + "\n")
-        total_left = L('table_bill_total_label')
-        total_right = format_currency(grand_total)
-        total_padding = " " * max(1, NORMAL_FONT_LINE_WIDTH - len(total_left) - len(total_right))
-        ticket_content += to_bytes(f"{total_left}{total_padding}{total_right}\n")
-        ticket_content += BoldOff
-
-        ticket_content += to_bytes("\n")
-        payment_status = (bill_data.get('payment_status') or 'unpaid').lower()
-        amount_paid = bill_data.get('amount_paid', 0.0)
-        amount_remaining = bill_data.get('amount_remaining', grand_total)
-        if payment_status == 'paid':
-            status_display = L('table_bill_status_paid')
-        elif payment_status == 'partial':
-            status_display = L('table_bill_status_partial', paid=format_currency(amount_paid), remaining=format_currency(amount_remaining))
-        else:
-            status_display = L('table_bill_status_pending')
-
-        ticket_content += AlignCenter
-        ticket_content += to_bytes(L('table_bill_payment_prefix', status=status_display) + "\n")
-        ticket_content += AlignLeft
-        ticket_content += to_bytes("=" * NORMAL_FONT_LINE_WIDTH + "\n")
-
-        if qr_payload:
-            ticket_content += AlignCenter + SelectFontA + BoldOn
-            ticket_content += to_bytes(L('section_qr') + "\n")
-            ticket_content += BoldOff
-            qr_ok = render_receipt_qr(ticket_content, qr_payload)
-            ticket_content += AlignCenter + SelectFontB + NormalText
-            if qr_ok:
-                for hint_line in word_wrap_text(L('qr_hint'), SMALL_FONT_LINE_WIDTH):
-                    ticket_content.extend(to_bytes(hint_line + "\n"))
-            else:
-                fallback = f"{L('qr_fallback_label')}: {qr_payload}"
-                for fallback_line in word_wrap_text(fallback, SMALL_FONT_LINE_WIDTH):
-                    ticket_content.extend(to_bytes(fallback_line + "\n"))
-            ticket_content += AlignLeft + SelectFontA + NormalText
-
-        closing_lines = footer_lines[:] if footer_lines else []
-        if not closing_lines:
-            closing_lines = [L('closing_default')]
-        if website_value and website_value not in closing_lines:
-            closing_lines.append(website_value)
-
-        ticket_content += AlignCenter + SelectFontB + NormalText
-        for line in closing_lines:
-            for wrapped in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(wrapped + "\n"))
-        ticket_content += AlignLeft + SelectFontA + NormalText
-
-        if CUT_AFTER_TABLE:
-            ticket_content += PartialCut
-
+        ticket_content = build_table_bill_content(bill_data)
     except Exception as e:
         app.logger.error(f"Failed to build table bill content: {e}")
         return False
@@ -7309,18 +7568,19 @@ def print_table_bill_raw(ticket_content, bill_data, copy_info="", printer_name=N
     """
     target_printer = printer_name or resolve_printer_for_role('table', device_id) or PRINTER_NAME
     target_printer = (target_printer or "").strip()
-    hprinter = None
-    doc_started = False
+    backend = None
     try:
         table_id = bill_data.get('table_id', 'Unknown')
         app.logger.info(
             f"Attempting to open printer: '{target_printer}' for table {table_id} bill"
             f"{f' ({copy_info})' if copy_info else ''} [device={device_id or 'n/a'}]"
         )
-        hprinter = win32print.OpenPrinter(target_printer)
+        backend = open_printer_backend(target_printer)
+        backend.open()
 
         # Check printer status (same as print_kitchen_ticket)
-        current_status = _get_printer_status_bits(hprinter, target_printer)
+        current_status = backend.status()
+        printer_health_prober.observe(target_printer, current_status)
         app.logger.info(f"Printer '{target_printer}' current status code: {hex(current_status)}")
 
         if current_status & PRINTER_STATUS_FATAL_FLAGS:
@@ -7332,16 +7592,9 @@ def print_table_bill_raw(ticket_content, bill_data, copy_info="", printer_name=N
 
         # Print the document
         doc_name = f"POSPal Table {table_id} Bill"
-        job_id = win32print.StartDocPrinter(hprinter, 1, (doc_name, None, "RAW"))
-        doc_started = True
+        job_id = backend.submit(doc_name, bytes(ticket_content))
 
-        win32print.StartPagePrinter(hprinter)
-        win32print.WritePrinter(hprinter, bytes(ticket_content))
-        win32print.EndPagePrinter(hprinter)
-        win32print.EndDocPrinter(hprinter)
-        doc_started = False
-
-        job_completed, failure_reason = wait_for_printer_job_completion(hprinter, job_id, target_printer)
+        job_completed, failure_reason = backend.wait(job_id)
         if not job_completed:
             if failure_reason:
                 app.logger.error(f"[PRINTER_MONITOR] Table bill job did not complete: {failure_reason}")
@@ -7357,18 +7610,129 @@ def print_table_bill_raw(ticket_content, bill_data, copy_info="", printer_name=N
 
     finally:
         # Clean up printer resources
-        if doc_started and hprinter:
-            try:
-                win32print.EndDocPrinter(hprinter)
-            except Exception as e_doc:
-                app.logger.error(f"Error ending document on printer '{target_printer}': {str(e_doc)}")
-        if hprinter:
+        if backend is not None:
             try:
-                win32print.ClosePrinter(hprinter)
+                backend.close()
             except Exception as e_close:
                 app.logger.error(f"Error closing printer handle for '{target_printer}': {str(e_close)}")
 
 
+RECEIPT_NORMAL_LINE_WIDTH = 42
+RECEIPT_SMALL_LINE_WIDTH = 56
+RECEIPT_SECTION_KEYS = (
+    'section_order', 'section_items', 'section_totals',
+    'section_payment_details', 'section_payment_history', 'section_qr'
+)
+RECEIPT_FOOTER_KINDS = ('customer', 'kitchen', 'table')
+receipt_template_cache = ReceiptTemplateCache(max_entries=16)
+
+
+def _receipt_centered_block(lines) -> bytes:
+    filtered = [line.strip() for line in lines if isinstance(line, str) and line.strip()]
+    if not filtered:
+        return b""
+    block = bytearray(AlignCenter + SelectFontB + NormalText)
+    for line in filtered:
+        for wrapped_line in word_wrap_text(line, RECEIPT_SMALL_LINE_WIDTH):
+            block += to_bytes(wrapped_line + "\n")
+    block += AlignLeft + SelectFontA + NormalText
+    return bytes(block)
+
+
+def _receipt_heading_block(title: str) -> bytes:
+    if not title:
+        return b""
+    return (
+        to_bytes("-" * RECEIPT_NORMAL_LINE_WIDTH + "\n")
+        + SelectFontA + BoldOn + to_bytes(f"{title}\n") + BoldOff
+        + AlignLeft + SelectFontA + NormalText
+    )
+
+
+def compile_receipt_template(profile_override, language: str, key=None) -> CompiledReceiptTemplate:
+    """Pre-render the profile/language dependent parts of a receipt (see build_customer_receipt_content)."""
+    labels = {label_key: get_receipt_text(label_key, language) for label_key in DEFAULT_RECEIPT_LABELS}
+    profile_context = prepare_business_profile_for_receipts(profile_override)
+    website_value = profile_context["website"]
+    tax_id_line = profile_context["tax_line"]
+
+    contact_lines = []
+    if profile_context["phone"]:
+        contact_lines.append(f"{labels['contact_phone']}: {profile_context['phone']}")
+    if profile_context["email"]:
+        contact_lines.append(f"{labels['contact_email']}: {profile_context['email']}")
+    if website_value:
+        contact_lines.append(f"{labels['contact_web']}: {website_value}")
+
+    header = bytearray()
+    logo_lines = profile_context.get("logo_lines", [])
+    if logo_lines:
+        header += AlignCenter + SelectFontB + NormalText
+        for raw_logo in logo_lines:
+            for wrapped_logo in word_wrap_text(raw_logo, RECEIPT_SMALL_LINE_WIDTH):
+                header += to_bytes(wrapped_logo + "\n")
+        header += AlignLeft + SelectFontA + NormalText
+    header += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
+    header += to_bytes(profile_context["name"] + "\n")
+    header += BoldOff
+    details = (
+        _receipt_centered_block(profile_context["address_lines"])
+        + _receipt_centered_block(contact_lines)
+        + (_receipt_centered_block([f"Tax / ABN / VAT: {tax_id_line}"]) if tax_id_line else b"")
+    )
+    if details:
+        header += details
+    else:
+        header += AlignCenter + SelectFontB + NormalText
+        header += to_bytes(f"{labels['business_info_placeholder']}\n")
+        header += AlignLeft + SelectFontA + NormalText
+
+    headings = {section: _receipt_heading_block(labels[section]) for section in RECEIPT_SECTION_KEYS}
+
+    qr_block = bytearray()
+    qr_payload = profile_context.get("qr_payload", "")
+    if qr_payload:
+        qr_block += headings['section_qr']
+        qr_ok = render_receipt_qr(qr_block, qr_payload)
+        qr_block += AlignCenter + SelectFontB + NormalText
+        qr_text = labels['qr_hint'] if qr_ok else f"{labels['qr_fallback_label']}: {qr_payload}"
+        for qr_line in word_wrap_text(qr_text, RECEIPT_SMALL_LINE_WIDTH):
+            qr_block += to_bytes(qr_line + "\n")
+        qr_block += AlignLeft + SelectFontA + NormalText
+
+    footers = {}
+    footer_lines = profile_context.get("footers", {})
+    default_lines = footer_lines.get("default", [])
+    for kind in RECEIPT_FOOTER_KINDS:
+        closing_lines = (footer_lines.get(kind) or default_lines)[:]
+        if not closing_lines:
+            closing_lines = [labels['closing_default']]
+        if website_value and website_value not in closing_lines:
+            closing_lines.append(website_value)
+        footers[kind] = (
+            to_bytes("\n") + _receipt_centered_block(closing_lines)
+            + to_bytes("-" * RECEIPT_NORMAL_LINE_WIDTH + "\n") + to_bytes("\n\n")
+        )
+
+    return CompiledReceiptTemplate(
+        key, bytes(header), headings, bytes(qr_block), footers, labels,
+        tax_line=tax_id_line, website=website_value
+    )
+
+
+def get_receipt_template(profile_override, language: str) -> CompiledReceiptTemplate:
+    """Compiled template for a profile/language, cached by profile updated_at, language and line width."""
+    if not config.get('receipt_template_cache', True):
+        return compile_receipt_template(profile_override, language)
+    if isinstance(profile_override, dict):
+        # Previews pass unsaved profiles; key them by content instead of updated_at
+        version = ('override', json.dumps(profile_override, sort_keys=True, default=str))
+    else:
+        version = get_business_profile_version()
+    key = (version, language, RECEIPT_NORMAL_LINE_WIDTH, RECEIPT_SMALL_LINE_WIDTH)
+    return receipt_template_cache.get(key, lambda: compile_receipt_template(profile_override, language, key))
+
+
 def build_customer_receipt_content(receipt_data, cut_after=None):
     """Generate ESC/POS byte content for a customer receipt."""
     app.logger.info(
@@ -7379,60 +7743,23 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
     ticket_content += InitializePrinter
     ticket_content += ESC + b't\x13'
 
-    NORMAL_FONT_LINE_WIDTH = 42
-    SMALL_FONT_LINE_WIDTH = 56
+    NORMAL_FONT_LINE_WIDTH = RECEIPT_NORMAL_LINE_WIDTH
+    SMALL_FONT_LINE_WIDTH = RECEIPT_SMALL_LINE_WIDTH
 
     receipt_language = (receipt_data.get('language') or str(config.get('language', 'en'))).lower()
 
+    # Header, section headings, QR and footers come pre-rendered; only order lines and totals are built here
+    template = get_receipt_template(receipt_data.get('business_profile'), receipt_language)
+    labels = template.labels
+    tax_id_line = template.tax_line
+
     def L(key: str, **fmt):
+        if not fmt and key in labels:
+            return labels[key]
         return get_receipt_text(key, receipt_language, **fmt)
 
-    profile_context = prepare_business_profile_for_receipts(receipt_data.get('business_profile'))
-    business_profile = profile_context["profile"]
-    restaurant_name = profile_context["name"]
-
-    address_lines = profile_context["address_lines"]
-    phone_value = profile_context["phone"]
-    email_value = profile_context["email"]
-    website_value = profile_context["website"]
-    tax_id_line = profile_context["tax_line"]
-
-    contact_lines = []
-    if phone_value:
-        contact_lines.append(f"{L('contact_phone')}: {phone_value}")
-    if email_value:
-        contact_lines.append(f"{L('contact_email')}: {email_value}")
-    if website_value:
-        contact_lines.append(f"{L('contact_web')}: {website_value}")
-
-    footers = profile_context.get("footers", {})
-    footer_default_lines = footers.get("default", [])
-    footer_customer_lines = footers.get("customer", footer_default_lines)
-    footer_kitchen_lines = footers.get("kitchen", footer_default_lines)
-    footer_table_lines = footers.get("table", footer_default_lines)
-
-    logo_lines = profile_context.get("logo_lines", [])
-    qr_payload = profile_context.get("qr_payload", "")
-
-    def append_centered_lines(lines):
-        filtered = [line.strip() for line in lines if isinstance(line, str) and line.strip()]
-        if not filtered:
-            return False
-        ticket_content.extend(AlignCenter + SelectFontB + NormalText)
-        for line in filtered:
-            for wrapped_line in word_wrap_text(line, SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(wrapped_line + "\n"))
-        ticket_content.extend(AlignLeft + SelectFontA + NormalText)
-        return True
-
-    def append_section_heading(title: str):
-        if not title:
-            return
-        ticket_content.extend(to_bytes("-" * NORMAL_FONT_LINE_WIDTH + "\n"))
-        ticket_content.extend(SelectFontA + BoldOn)
-        ticket_content.extend(to_bytes(f"{title}\n"))
-        ticket_content.extend(BoldOff)
-        ticket_content.extend(AlignLeft + SelectFontA + NormalText)
+    def append_section_heading(section_key: str):
+        ticket_content.extend(template.heading(section_key))
 
     def append_wrapped(text: str, indent: int = 0, width: int = NORMAL_FONT_LINE_WIDTH):
         if not text:
@@ -7550,29 +7877,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
                 order_numbers.append(candidate_str)
                 break
 
-    if logo_lines:
-        ticket_content += AlignCenter + SelectFontB + NormalText
-        for raw_logo in logo_lines:
-            for wrapped_logo in word_wrap_text(raw_logo, SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(wrapped_logo + "\n"))
-        ticket_content += AlignLeft + SelectFontA + NormalText
-
-    ticket_content += AlignCenter + SelectFontA + DoubleHeightWidth + BoldOn
-    ticket_content += to_bytes(restaurant_name + "\n")
-    ticket_content += BoldOff
-
-    details_printed = False
-    if append_centered_lines(address_lines):
-        details_printed = True
-    if append_centered_lines(contact_lines):
-        details_printed = True
-    if tax_id_line:
-        if append_centered_lines([f"Tax / ABN / VAT: {tax_id_line}"]):
-            details_printed = True
-    if not details_printed:
-        ticket_content += AlignCenter + SelectFontB + NormalText
-        ticket_content += to_bytes(f"{L('business_info_placeholder')}\n")
-        ticket_content += AlignLeft + SelectFontA + NormalText
+    ticket_content += template.header
 
     ticket_content += AlignCenter + SelectFontA + DoubleWidth + BoldOn
     ticket_content += to_bytes(f"{header_title}\n")
@@ -7583,7 +7888,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
         ticket_content += to_bytes(copy_label.upper() + "\n")
         ticket_content += AlignLeft + SelectFontA + NormalText
 
-    append_section_heading(L('section_order'))
+    append_section_heading('section_order')
     append_wrapped(f"{L('field_date')}: {date_display}    {L('field_time')}: {time_display}")
     if isinstance(bill_date, str) and bill_date.strip():
         opened_line = f"{L('field_opened')}: {bill_date.strip()}"
@@ -7618,7 +7923,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
         if label_candidate not in ("takeaway", "counter", "pickup"):
             append_wrapped(f"{L('field_label')}: {table_name}")
 
-    append_section_heading(L('section_items'))
+    append_section_heading('section_items')
 
     items_subtotal = Decimal('0')
     item_lines_printed = False
@@ -7684,7 +7989,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
     if not item_lines_printed:
         append_wrapped(L('item_missing'))
 
-    append_section_heading(L('section_totals'))
+    append_section_heading('section_totals')
 
     bill_total = to_decimal(receipt_data.get('bill_total', 0.0))
     total_paid = to_decimal(receipt_data.get('amount_paid_total', 0.0))
@@ -7720,7 +8025,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
         append_label_value(L('field_tax'), tax_id_line)
 
     if include_payment_details:
-        append_section_heading(L('section_payment_details'))
+        append_section_heading('section_payment_details')
         append_label_value(L('field_method'), payment_method)
         payment_timestamp = payment.get('timestamp')
         if isinstance(payment_timestamp, str):
@@ -7738,51 +8043,25 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
             append_wrapped(f"{L('field_note')}: {payment_note}", indent=2)
 
     if include_payment_details and len(payments_history) > 1:
-        append_section_heading(L('section_payment_history'))
+        append_section_heading('section_payment_history')
         for entry in payments_history:
             entry_time = entry.get('timestamp')
             entry_dt = None
-            if isinstance(entry_time, str):
-                try:
-                    entry_dt = datetime.fromisoformat(entry_time)
-                except ValueError:
-                    try:
-                        entry_dt = datetime.fromisoformat(entry_time.replace('Z', '+00:00'))
-                    except Exception:
-                        entry_dt = None
-            entry_label_time = entry_dt.strftime('%d/%m %H:%M') if entry_dt else ''
-            entry_method = (entry.get('method') or 'Unknown').replace('_', ' ').title()
-            history_label = f"{entry_label_time} {entry_method}".strip()
-            append_amount_line(history_label or L('history_payment'), entry.get('amount', 0.0))
-
-    if qr_payload:
-        append_section_heading(L('section_qr'))
-        qr_ok = render_receipt_qr(ticket_content, qr_payload)
-        ticket_content += AlignCenter + SelectFontB + NormalText
-        if qr_ok:
-            for qr_hint_line in word_wrap_text(L('qr_hint'), SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(qr_hint_line + "\n"))
-        else:
-            fallback_line = f"{L('qr_fallback_label')}: {qr_payload}"
-            for wrapped_fallback in word_wrap_text(fallback_line, SMALL_FONT_LINE_WIDTH):
-                ticket_content.extend(to_bytes(wrapped_fallback + "\n"))
-        ticket_content += AlignLeft + SelectFontA + NormalText
-
-    ticket_content += to_bytes("\n")
-    if receipt_kind == 'kitchen':
-        closing_lines = footer_kitchen_lines[:] if footer_kitchen_lines else footer_default_lines[:]
-    elif receipt_kind == 'table':
-        closing_lines = footer_table_lines[:] if footer_table_lines else footer_default_lines[:]
-    else:
-        closing_lines = footer_customer_lines[:] if footer_customer_lines else footer_default_lines[:]
-    if not closing_lines:
-        closing_lines = [L('closing_default')]
-    if website_value and website_value not in closing_lines:
-        closing_lines.append(website_value)
-    append_centered_lines(closing_lines)
+            if isinstance(entry_time, str):
+                try:
+                    entry_dt = datetime.fromisoformat(entry_time)
+                except ValueError:
+                    try:
+                        entry_dt = datetime.fromisoformat(entry_time.replace('Z', '+00:00'))
+                    except Exception:
+                        entry_dt = None
+            entry_label_time = entry_dt.strftime('%d/%m %H:%M') if entry_dt else ''
+            entry_method = (entry.get('method') or 'Unknown').replace('_', ' ').title()
+            history_label = f"{entry_label_time} {entry_method}".strip()
+            append_amount_line(history_label or L('history_payment'), entry.get('amount', 0.0))
 
-    ticket_content += to_bytes("-" * NORMAL_FONT_LINE_WIDTH + "\n")
-    ticket_content += to_bytes("\n\n")
+    ticket_content += template.qr_block
+    ticket_content += template.footer(receipt_kind)
     should_cut = CUT_AFTER_CUSTOMER if cut_after is None else bool(cut_after)
     if should_cut:
         ticket_content += PartialCut
@@ -7790,7 +8069,7 @@ def build_customer_receipt_content(receipt_data, cut_after=None):
     return ticket_content
 
 
-def print_customer_receipt_ticket(receipt_data, device_id=None, printer_role='customer'):
+def print_customer_receipt_ticket(receipt_data, device_id=None, printer_role='customer', printer_name=None):
     """
     Print a customer receipt for a specific payment.
     """
@@ -7801,8 +8080,12 @@ def print_customer_receipt_ticket(receipt_data, device_id=None, printer_role='cu
         app.logger.warning("Printing blocked - trial expired")
         return False
 
-    target_printer = resolve_printer_for_role(printer_role, device_id) or PRINTER_NAME
-    target_printer = (target_printer or "").strip()
+    if printer_name is None:
+        ok, _failure_reason = print_with_failover(printer_role, device_id, lambda target: print_customer_receipt_ticket(
+            receipt_data, device_id=device_id, printer_role=printer_role, printer_name=target))
+        return ok
+
+    target_printer = (printer_name or "").strip()
 
     if not target_printer or target_printer == "Your_Printer_Name_Here":
         app.logger.error(f"CRITICAL: No printer configured. Cannot print customer receipt.")
@@ -7841,8 +8124,7 @@ def print_customer_receipt_raw(ticket_content, receipt_data, copy_info="", print
     """
     target_printer = printer_name or resolve_printer_for_role('customer', device_id) or PRINTER_NAME
     target_printer = (target_printer or "").strip()
-    hprinter = None
-    doc_started = False
+    backend = None
     try:
         table_id = receipt_data.get('table_id', 'Unknown')
         payment_id = receipt_data.get('payment', {}).get('payment_id', 'Unknown')
@@ -7850,10 +8132,12 @@ def print_customer_receipt_raw(ticket_content, receipt_data, copy_info="", print
             f"Attempting to open printer: '{target_printer}' for table {table_id} customer receipt"
             f"{f' ({copy_info})' if copy_info else ''} [device={device_id or 'n/a'}]"
         )
-        hprinter = win32print.OpenPrinter(target_printer)
+        backend = open_printer_backend(target_printer)
+        backend.open()
 
         # Check printer status (same as other print functions)
-        current_status = _get_printer_status_bits(hprinter, target_printer)
+        current_status = backend.status()
+        printer_health_prober.observe(target_printer, current_status)
         app.logger.info(f"Printer '{target_printer}' current status code: {hex(current_status)}")
 
         if current_status & PRINTER_STATUS_FATAL_FLAGS:
@@ -7865,16 +8149,9 @@ def print_customer_receipt_raw(ticket_content, receipt_data, copy_info="", print
 
         # Print the document
         doc_name = f"POSPal Table {table_id} Customer Receipt"
-        job_id = win32print.StartDocPrinter(hprinter, 1, (doc_name, None, "RAW"))
-        doc_started = True
-
-        win32print.StartPagePrinter(hprinter)
-        win32print.WritePrinter(hprinter, bytes(ticket_content))
-        win32print.EndPagePrinter(hprinter)
-        win32print.EndDocPrinter(hprinter)
-        doc_started = False
+        job_id = backend.submit(doc_name, bytes(ticket_content))
 
-        job_completed, failure_reason = wait_for_printer_job_completion(hprinter, job_id, target_printer)
+        job_completed, failure_reason = backend.wait(job_id)
         if not job_completed:
             if failure_reason:
                 app.logger.error(f"[PRINTER_MONITOR] Customer receipt job did not complete: {failure_reason}")
@@ -7890,14 +8167,9 @@ def print_customer_receipt_raw(ticket_content, receipt_data, copy_info="", print
 
     finally:
         # Clean up printer resources
-        if doc_started and hprinter:
+        if backend is not None:
             try:
-                win32print.EndDocPrinter(hprinter)
-            except Exception as e_doc:
-                app.logger.error(f"Error ending document on printer '{target_printer}': {str(e_doc)}")
-        if hprinter:
-            try:
-                win32print.ClosePrinter(hprinter)
+                backend.close()
             except Exception as e_close:
                 app.logger.error(f"Error closing printer handle for '{target_printer}': {str(e_close)}")
 
@@ -7951,68 +8223,121 @@ def build_simple_customer_receipt_payload(order_data_internal, order_total):
     }
 
 
-def record_order_in_csv(order_data, print_status_message):
+ORDER_CSV_FIELDNAMES = ['order_number', 'table_number', 'timestamp', 'items_summary',
+                        'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
+
+# orders_YYYY-MM-DD.idx sidecars: order_number -> byte range of its CSV row
+order_index = OrderOffsetIndex(app.logger, DATA_DIR)
+
+# order_outcomes_YYYY-MM-DD.jsonl: payment methods and print outcomes settled after the row was written, merged over CSV rows on read
+order_overlay = OrderOutcomeOverlay(app.logger, DATA_DIR)
+
+# Day CSVs stay open for appends; fsyncs are grouped per commit window (see pospal_services.order_journal)
+order_journal = OrderJournal(
+    app.logger,
+    DATA_DIR,
+    ORDER_CSV_FIELDNAMES,
+    fsync_policy=str(config.get('order_journal_fsync', 'batched')).lower(),
+    commit_window_ms=config.get('order_journal_commit_window_ms', 50),
+    index=order_index
+)
+
+# Indexed order store serving the order read paths when order_storage is "sqlite"
+order_store = SQLiteOrderStore(app.logger, ORDER_DB_FILE) if str(config.get('order_storage', 'csv')).lower() == 'sqlite' else None
+
+
+def _analytics_rollup_rows(date_str):
+    """Rows a day's analytics rollup is rebuilt from, falling back to the legacy install's data folder."""
+    rows = read_order_rows(date_str)
+    if rows is None:
+        alt_path = os.path.join(r'C:\POSPal\data', f"orders_{date_str}.csv")
+        if os.path.exists(alt_path):
+            with open(alt_path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+    return rows
+
+
+def _analytics_rollup_signature(date_str):
+    """Sizes of the files a day's rollup was derived from; a mismatch forces a rebuild."""
+    sizes = []
+    for path in (os.path.join(DATA_DIR, f"orders_{date_str}.csv"), order_overlay.path_for(date_str)):
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            sizes.append(-1)
+    return sizes
+
+
+# analytics_YYYY-MM-DD.json: per-day aggregates updated as orders and payments are recorded
+analytics_rollups = AnalyticsRollups(
+    app.logger,
+    DATA_DIR,
+    _analytics_rollup_rows,
+    signature=_analytics_rollup_signature,
+    flush_interval=float(config.get('analytics_rollup_flush_ms', 2000)) / 1000.0
+)
+
+
+def record_order_in_csv(order_data, print_status_message, received_at=None):
     try:
-        # Ensure data directory exists
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR, exist_ok=True)
         printed_status_for_csv = print_status_message
-        os.makedirs(DATA_DIR, exist_ok=True) 
-        date_str = datetime.now().strftime("%Y-%m-%d")
-        filename = os.path.abspath(os.path.join(DATA_DIR, f"orders_{date_str}.csv"))
-        fieldnames = ['order_number', 'table_number', 'timestamp', 'items_summary', 
-                      'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
 
-        file_exists = os.path.exists(filename)
-        
-        with open(filename, 'a', newline='', encoding='utf-8') as f_write:
-            writer = csv.DictWriter(f_write, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-
-            new_order_total = sum(
-                float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))) * int(item.get('quantity', 0))
-                for item in order_data.get('items', [])
-            )
-            
-            items_summary_parts = []
-            for item in order_data.get('items', []):
-                part = f"{item.get('quantity', 0)}x {item.get('name', 'N/A')}"
-                
-                general_options = item.get('generalSelectedOptions', [])
-                if general_options:
-                    opt_details = []
-                    for opt in general_options:
-                        opt_name = opt.get('name', 'N/A')
-                        opt_price_change = float(opt.get('priceChange', 0.0))
-                        price_str = ""
-                        if opt_price_change != 0:
-                            price_str = f" ({'+' if opt_price_change > 0 else ''}EUR {opt_price_change:.2f})"
-                        opt_details.append(f"{opt_name}{price_str}")
-                    if opt_details:
-                        part += f" (Options: {', '.join(opt_details)})"
-                
-                comment = item.get('comment','').strip()
-                if comment:
-                    part += f" (Note: {comment})"
-                
-                unit_price_final = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
-                part += f" [Unit EUR {unit_price_final:.2f}]"
-                items_summary_parts.append(part)
-
-            new_row_data = {
-                'order_number': order_data.get('number', 'N/A'),
-                'table_number': order_data.get('tableNumber', ''),
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'items_summary': " | ".join(items_summary_parts), 
-                'universal_comment': order_data.get('universalComment', '').strip(),
-                'order_total': f"{new_order_total:.2f}",
-                'payment_method': order_data.get('paymentMethod', 'Cash'),
-                'printed_status': printed_status_for_csv,
-                'items_json': json.dumps(order_data.get('items', [])) 
-            }
-            writer.writerow(new_row_data)
-            
+        new_order_total = sum(
+            float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))) * int(item.get('quantity', 0))
+            for item in order_data.get('items', [])
+        )
+
+        items_summary_parts = []
+        for item in order_data.get('items', []):
+            part = f"{item.get('quantity', 0)}x {item.get('name', 'N/A')}"
+
+            general_options = item.get('generalSelectedOptions', [])
+            if general_options:
+                opt_details = []
+                for opt in general_options:
+                    opt_name = opt.get('name', 'N/A')
+                    opt_price_change = float(opt.get('priceChange', 0.0))
+                    price_str = ""
+                    if opt_price_change != 0:
+                        price_str = f" ({'+' if opt_price_change > 0 else ''}EUR {opt_price_change:.2f})"
+                    opt_details.append(f"{opt_name}{price_str}")
+                if opt_details:
+                    part += f" (Options: {', '.join(opt_details)})"
+
+            comment = item.get('comment','').strip()
+            if comment:
+                part += f" (Note: {comment})"
+
+            unit_price_final = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
+            part += f" [Unit EUR {unit_price_final:.2f}]"
+            items_summary_parts.append(part)
+
+        # The caller's receipt time, so the row lands under the same date as its print outcome and ticket
+        now = received_at or datetime.now()
+        new_row_data = {
+            'order_number': order_data.get('number', 'N/A'),
+            'table_number': order_data.get('tableNumber', ''),
+            'timestamp': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'items_summary': " | ".join(items_summary_parts),
+            'universal_comment': order_data.get('universalComment', '').strip(),
+            'order_total': f"{new_order_total:.2f}",
+            'payment_method': order_data.get('paymentMethod', 'Cash'),
+            'printed_status': printed_status_for_csv,
+            'items_json': json.dumps(order_data.get('items', []))
+        }
+        order_date_str = now.strftime("%Y-%m-%d")
+        order_journal.append(new_row_data, date_str=order_date_str)
+        if order_store is not None:
+            try:
+                order_store.record_order(order_date_str, new_row_data)
+            except Exception as e:
+                # The CSV row is the record of truth; the next CSV import re-syncs it into the store
+                app.logger.error(f"[ORDER_STORE] Could not store order #{order_data.get('number', 'N/A')} in SQLite (saved to CSV): {e}")
+        try:
+            analytics_rollups.record_order(order_date_str, new_row_data)
+        except Exception as e:
+            app.logger.warning(f"[ANALYTICS_ROLLUP] Could not update rollup for order #{order_data.get('number', 'N/A')}: {e}")
+
         app.logger.info(f"Order #{order_data.get('number', 'N/A')} logged to CSV. Payment: {order_data.get('paymentMethod', 'Cash')}, Printed: {printed_status_for_csv}.")
         return True
     except Exception as e:
@@ -8020,6 +8345,70 @@ def record_order_in_csv(order_data, print_status_message):
         return False
 
 
+def read_order_rows(date_str):
+    """All order rows for a day as CSV-style dicts, or None when the day has no orders file."""
+    if order_store is not None:
+        return order_store.orders_for_date(date_str)
+    filename = os.path.join(DATA_DIR, f"orders_{date_str}.csv")
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        return order_overlay.apply(date_str, list(csv.DictReader(f)))
+
+
+def find_order_row(date_str, order_number):
+    """Look up a single order row by date and number; None if it does not exist."""
+    if order_store is not None:
+        return order_store.get_order(date_str, order_number)
+    return order_overlay.apply_row(date_str, order_index.find_row(date_str, order_number))
+
+
+def log_order_record(order_data, print_status_message, received_at=None):
+    """record_order_in_csv() that logs instead of raising; True when the order was saved."""
+    try:
+        return record_order_in_csv(order_data, print_status_message, received_at=received_at)
+    except Exception as e_csv_call:
+        app.logger.critical(f"CRITICAL CSV LOGGING EXCEPTION for order #{order_data.get('number', 'N/A')} (Print status: {print_status_message}): {str(e_csv_call)}")
+        return False
+
+
+def record_printed_status(date_str, order_number, printed_status):
+    """Store the final print outcome of an order in place of its 'Print Queued' placeholder."""
+    if order_store is not None:
+        if order_store.update_printed_status(date_str, order_number, printed_status):
+            return True
+        app.logger.warning(f"Could not store print outcome '{printed_status}' for order #{order_number} ({date_str}): order not found")
+        return False
+    order_overlay.record_printed_status(date_str, order_number, printed_status)
+    return True
+
+
+def find_recent_order_date(order_number, days=7):
+    """Date (YYYY-MM-DD) of the most recent order with this number within the last `days` days."""
+    for days_ago in range(days):
+        date_str = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+        if find_order_row(date_str, order_number) is not None:
+            return date_str
+    return None
+
+
+def compact_order_overlays():
+    """Fold order outcome overlays of past days into their order CSVs (end-of-day compaction)."""
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    compacted = 0
+    for date_str in order_overlay.pending_dates():
+        if date_str >= today_str:
+            continue
+        try:
+            with order_journal.locked():
+                order_overlay.compact(date_str, os.path.join(DATA_DIR, f"orders_{date_str}.csv"))
+            order_index.invalidate(date_str)
+            compacted += 1
+        except Exception as e:
+            app.logger.warning(f"[ORDER_OVERLAY] Compaction failed for {date_str}: {e}")
+    return compacted
+
+
 ## PDF ticket generation removed
 
 
@@ -8036,6 +8425,425 @@ def list_installed_printers():
     except Exception as e:
         app.logger.error(f"Failed to enumerate printers: {e}")
         return []
+# --- Background print queue (kitchen tickets & simple-mode receipts) ---
+PRINT_JOBS_FILE = os.path.join(DATA_DIR, 'print_jobs.jsonl')
+PRINT_STATUS_QUEUED = "Print Queued"
+
+
+def summarize_print_results(printed_any: bool, printed_all: bool) -> str:
+    if printed_any and printed_all:
+        return "All Copies Printed"
+    if printed_any:
+        return "Some Copies Printed, Some Failed"
+    return "All Print Attempts Failed"
+
+
+TICKETS_DIR = os.path.join(DATA_DIR, 'tickets')
+ticket_store = TicketBlobStore(app.logger, TICKETS_DIR)
+
+
+# Stored kind of a kitchen station's share of an order, e.g. "station:bar"
+STATION_TICKET_KIND = "station:"
+
+
+def render_and_store_kitchen_ticket(order_data, copy_info="", kind="kitchen"):
+    """
+    Render an order's kitchen ticket once and keep the exact bytes for reprints.
+    Returns None if rendering fails (the print path then reports the error).
+    """
+    try:
+        ticket_bytes = render_kitchen_ticket(order_data, copy_info=copy_info)
+    except Exception as e:
+        app.logger.error(f"Error building {kind} ticket content for order #{order_data.get('number', 'N/A')}: {str(e)}")
+        return None
+    if config.get('ticket_store_enabled', True) and order_data.get('number') is not None:
+        order_date = order_data.get('orderDate') or datetime.now().strftime("%Y-%m-%d")
+        try:
+            ticket_store.store(order_date, order_data.get('number'), ticket_bytes, kind=kind)
+        except Exception as e:
+            app.logger.warning(f"[TICKET_STORE] Could not store ticket for order #{order_data.get('number')}: {e}")
+    return ticket_bytes
+
+
+def load_station_tickets(date_str, order_number) -> list:
+    """Stored per-station tickets of an order as (station, bytes), in the order they were stored."""
+    tickets = []
+    for kind in ticket_store.kinds(date_str, order_number):
+        if kind.startswith(STATION_TICKET_KIND):
+            ticket_bytes = ticket_store.load(date_str, order_number, kind)
+            if ticket_bytes is not None:
+                tickets.append((kind[len(STATION_TICKET_KIND):], ticket_bytes))
+    return tickets
+
+
+# Orders whose items belong to different kitchen stations get one ticket per station
+kitchen_stations = KitchenStationRouter(
+    app.logger,
+    lambda: config.get('kitchen_stations') or {},
+    lambda: MENU_FILE,
+)
+
+
+def get_station_route(station_name, device_id=None):
+    """Printer candidates for a kitchen station; None (the kitchen role printers) for the default or a removed station."""
+    station = kitchen_stations.stations().get(station_name)
+    if station_name == KITCHEN_DEFAULT_STATION or not station:
+        return None
+    return get_station_printer_candidates(station, device_id)
+
+
+def print_kitchen_station_tickets(order_data, device_id=None, progress=None, station_results=None):
+    """
+    Split an order by kitchen station and print every station's ticket (all
+    configured copies each) at the same time, so a slow or retrying printer
+    does not hold up the others. Each station's ticket is stored as printed
+    (kind "station:<name>") for reprints. Returns (printed_any, printed_all,
+    failure) over all stations, failure naming each station that did not
+    print; station_results, if given, receives one outcome per station.
+    """
+    order_number = order_data.get('number', 'N/A')
+    splits = kitchen_stations.split(order_data)
+    shares = ', '.join(f"{split['station']} ({len(split['order']['items'])} items)" for split in splits)
+    app.logger.info(f"[KITCHEN_STATIONS] Order #{order_number} split into {shares}")
+
+    def _print_station(split):
+        station = split['station']
+        candidates = None if station == KITCHEN_DEFAULT_STATION else get_station_printer_candidates(split, device_id)
+
+        def _progress(message, **_extra):
+            if progress:
+                progress(f"{split['label'] or station}: {message}")
+
+        ticket_bytes = render_and_store_kitchen_ticket(split['order'], copy_info=split['label'],
+                                                       kind=f"{STATION_TICKET_KIND}{station}")
+        started = time.perf_counter()
+        printed = print_kitchen_copies(split['order'], device_id=device_id, progress=_progress,
+                                       ticket_bytes=ticket_bytes, candidates=candidates, copy_info=split['label'],
+                                       split_stations=False)
+        return printed, round((time.perf_counter() - started) * 1000, 1)
+
+    outcomes = []
+    if len(splits) == 1:
+        outcomes.append(_print_station(splits[0]))
+    else:
+        with ThreadPoolExecutor(max_workers=len(splits), thread_name_prefix="kitchen-station") as pool:
+            outcomes = list(pool.map(_print_station, splits))
+
+    printed_any, printed_all = False, True
+    failures = []
+    for split, ((station_any, station_all, station_failure), elapsed_ms) in zip(splits, outcomes):
+        printed_any = printed_any or station_any
+        printed_all = printed_all and station_all
+        if station_failure:
+            failures.append(f"{split['label'] or split['station']}: {station_failure}")
+        if station_results is not None:
+            station_results.append({
+                "station": split['station'],
+                "items": len(split['order']['items']),
+                "printed": summarize_print_results(station_any, station_all),
+                "error": station_failure,
+                "elapsed_ms": elapsed_ms,
+            })
+    return printed_any, printed_all, "; ".join(failures) or None
+
+
+def print_kitchen_copies(order_data, device_id=None, progress=None, ticket_bytes=None, candidates=None,
+                         copy_info="", station_results=None, split_stations=True):
+    """
+    Print every configured kitchen copy for an order, with the complexity-based
+    spacing and single retry per copy. Returns (printed_any, printed_all,
+    failure), failure being the last failure message of this call's attempts.
+    With kitchen stations configured the order is split and printed per
+    station instead; candidates/ticket_bytes/copy_info are used for one
+    station's share of an order.
+    """
+    if split_stations and kitchen_stations.enabled():
+        return print_kitchen_station_tickets(order_data, device_id=device_id, progress=progress,
+                                             station_results=station_results)
+
+    order_number = order_data.get('number', 'N/A')
+    copies_to_print = max(1, int(config.get('kitchen_copies_per_order', KITCHEN_COPIES_PER_ORDER)))
+    if ticket_bytes is None:
+        ticket_bytes = render_and_store_kitchen_ticket(order_data)
+    if copies_to_print > 1 and config.get('kitchen_copies_single_job', True):
+        return print_kitchen_copies_single_job(order_data, copies_to_print, device_id=device_id, progress=progress,
+                                               ticket_bytes=ticket_bytes, candidates=candidates, copy_info=copy_info)
+
+    # Calculate dynamic delay based on order complexity
+    total_items = sum(int(item.get('quantity', 1)) for item in order_data.get('items', []))
+    base_delay_between_copies = 0.5
+    item_based_delay = min(total_items * 0.3, 10.0)  # 0.3s per item, max 10s
+    dynamic_delay = base_delay_between_copies + item_based_delay
+
+    # Calculate retry delay based on order complexity
+    base_retry_delay = 1.0
+    retry_delay = base_retry_delay + item_based_delay
+
+    app.logger.info(f"Order #{order_number} has {total_items} items. Using {dynamic_delay:.1f}s delay between copies and {retry_delay:.1f}s retry delay.")
+
+    printed_any = False
+    printed_all = True
+    failure = None
+    for i in range(1, copies_to_print + 1):
+        if i > 1:
+            app.logger.info(f"Waiting {dynamic_delay:.1f}s before printing copy {i} (order complexity: {total_items} items)")
+            time.sleep(dynamic_delay)
+        app.logger.info(f"Attempting to print copy {i} for order #{order_number}")
+        def _print_copy(_target):
+            return print_kitchen_ticket(order_data, copy_info=copy_info, device_id=device_id, ticket_bytes=ticket_bytes,
+                                        candidates=candidates)
+        try:
+            ok, copy_failure = attempt_print(_print_copy, None)
+            if not ok:
+                app.logger.warning(f"Print failed, waiting {retry_delay:.1f}s before retry for copy {i} (order #{order_number})")
+                if progress:
+                    progress(f"Copy {i} failed, retrying", copies_total=copies_to_print)
+                time.sleep(retry_delay)
+                app.logger.warning(f"Retrying print for copy {i} (order #{order_number})")
+                ok, copy_failure = attempt_print(_print_copy, None)
+        except Exception as e_print:
+            app.logger.critical(f"CRITICAL PRINT EXCEPTION for order #{order_number} (copy {i}): {str(e_print)}")
+            ok, copy_failure = False, f"Print error: {e_print}"
+        if not ok:
+            failure = copy_failure or failure
+
+        printed_any = printed_any or ok
+
+        # Phase 6: Orders are ALWAYS saved, even if printing fails
+        if not ok:
+            printed_all = False
+            app.logger.warning(f"Order #{order_number} - Copy {i} FAILED to print, but order will still be saved.")
+        if progress:
+            progress(f"Copy {i} of {copies_to_print} {'printed' if ok else 'failed'}", copies_done=i, copies_total=copies_to_print)
+
+    return printed_any, printed_all, failure
+
+
+def print_kitchen_copies_single_job(order_data, copies_to_print, device_id=None, progress=None, ticket_bytes=None,
+                                    candidates=None, copy_info=""):
+    """
+    Print all kitchen copies as one spool document (one status check, one
+    completion wait, no delay between copies). Copies succeed or fail together.
+    Returns (ok, ok, failure message if they failed).
+    """
+    order_number = order_data.get('number', 'N/A')
+    total_items = sum(int(item.get('quantity', 1)) for item in order_data.get('items', []))
+    retry_delay = 1.0 + min(total_items * 0.3, 10.0)
+
+    app.logger.info(f"Attempting to print {copies_to_print} copies for order #{order_number} in one print job")
+    def _print_copies(_target):
+        return print_kitchen_ticket(order_data, copy_info=copy_info, device_id=device_id, copies=copies_to_print,
+                                    ticket_bytes=ticket_bytes, candidates=candidates)
+
+    try:
+        ok, failure = attempt_print(_print_copies, None)
+        if not ok:
+            app.logger.warning(f"Print failed, waiting {retry_delay:.1f}s before retry for order #{order_number}")
+            if progress:
+                progress("Copies failed, retrying", copies_total=copies_to_print)
+            time.sleep(retry_delay)
+            app.logger.warning(f"Retrying print of {copies_to_print} copies (order #{order_number})")
+            ok, failure = attempt_print(_print_copies, None)
+    except Exception as e_print:
+        app.logger.critical(f"CRITICAL PRINT EXCEPTION for order #{order_number}: {str(e_print)}")
+        ok, failure = False, f"Print error: {e_print}"
+
+    if not ok:
+        app.logger.warning(f"Order #{order_number} - copies FAILED to print, but order will still be saved.")
+    if progress:
+        progress(
+            f"{copies_to_print} copies {'printed' if ok else 'failed'}",
+            copies_done=copies_to_print if ok else 0, copies_total=copies_to_print
+        )
+    return ok, ok, failure
+
+
+def _run_print_job(job, progress):
+    """Print queue handler: performs the actual printing for a queued job."""
+    payload = job.get('payload') or {}
+    device_id = job.get('device_id')
+    kind = job.get('kind')
+
+    if kind == 'kitchen':
+        station_results = []
+        printed_any, printed_all, failure = print_kitchen_copies(payload.get('order') or {}, device_id=device_id,
+                                                                 progress=progress, station_results=station_results)
+        summary = summarize_print_results(printed_any, printed_all)
+        if printed_any and printed_all:
+            status = JOB_STATUS_COMPLETED
+        elif printed_any:
+            status = JOB_STATUS_PARTIAL
+        else:
+            status = JOB_STATUS_FAILED
+        result = {
+            "status": status,
+            "printed": summary,
+            "error": failure if status != JOB_STATUS_COMPLETED else None
+        }
+        if station_results:
+            result["stations"] = station_results
+        return result
+
+    if kind == 'customer_receipt':
+        ok = print_customer_receipt_ticket(payload.get('receipt') or {}, device_id=device_id)
+        return {
+            "status": JOB_STATUS_COMPLETED if ok else JOB_STATUS_FAILED,
+            "printed": "Customer Receipt Printed" if ok else "Customer Receipt Failed"
+        }
+
+    return {"status": JOB_STATUS_FAILED, "printed": "Not Printed", "error": f"Unknown print job kind '{kind}'"}
+
+
+def _record_print_outcome(job: dict):
+    """Persist a finished kitchen job's outcome with its order, so it outlives the job queue's retention."""
+    if job.get('kind') != 'kitchen' or job.get('order_number') in (None, '') or not job.get('printed'):
+        return
+    record_printed_status(job.get('order_date'), job['order_number'], job['printed'])
+
+
+print_job_queue = PrintJobQueue(app.logger, PRINT_JOBS_FILE, _run_print_job, publish=_sse_broadcast,
+                                on_finished=_record_print_outcome)
+
+
+def is_print_queue_enabled() -> bool:
+    return bool(config.get('print_queue_enabled', True))
+
+
+def submit_print_job(kind: str, payload: dict, order_number=None, device_id=None, printer_role: str = 'kitchen') -> dict:
+    print_job_queue.start()
+    printer_name = resolve_printer_for_role(printer_role, device_id) or PRINTER_NAME
+    return print_job_queue.submit(
+        (printer_name or '').strip(), kind, payload,
+        order_number=order_number, device_id=device_id
+    )
+
+
+def resolve_printed_status(date_str: str, order_number, recorded_status: str | None) -> str:
+    """Replace the 'Print Queued' placeholder stored with an order by the live job outcome."""
+    if recorded_status != PRINT_STATUS_QUEUED:
+        return recorded_status or ''
+    job = print_job_queue.find_for_order(date_str, order_number, 'kitchen')
+    if not job:
+        return recorded_status
+    return job.get('printed') or PRINT_STATUS_QUEUED
+
+
+@app.route('/api/print-jobs', methods=['GET'])
+def list_print_jobs():
+    include_finished = str(request.args.get('all', '')).lower() in ('1', 'true', 'yes')
+    return jsonify({
+        "status": "success",
+        "jobs": print_job_queue.list_jobs(include_finished=include_finished),
+        "stats": print_job_queue.stats()
+    })
+
+
+@app.route('/api/print-jobs/<job_id>', methods=['GET'])
+def get_print_job(job_id):
+    job = print_job_queue.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": f"Print job {job_id} not found."}), 404
+    return jsonify({"status": "success", "job": job})
+
+
+@app.route('/api/print-jobs/<job_id>/resolve', methods=['POST'])
+def resolve_print_job(job_id):
+    """Settle a job interrupted mid-print by a restart: {"action": "reprint"} or {"action": "printed"}."""
+    payload = request.get_json(silent=True) or {}
+    action = str(payload.get('action') or '').strip().lower()
+    if action not in ('reprint', 'printed'):
+        return jsonify({"status": "error", "message": "action must be 'reprint' or 'printed'."}), 400
+    job = print_job_queue.resolve(job_id, reprint=(action == 'reprint'))
+    if not job:
+        return jsonify({"status": "error", "message": f"Print job {job_id} is not waiting for confirmation."}), 404
+    return jsonify({"status": "success", "job": job})
+
+
+@app.route('/api/print/render', methods=['POST'])
+def render_print_preview():
+    """
+    Render a kitchen ticket, table bill or customer receipt without touching a
+    printer. Returns the ESC/POS bytes (base64) plus a plain-text preview;
+    ?format=raw returns the bytes themselves.
+    """
+    payload = request.get_json(silent=True) or {}
+    kind = str(payload.get('kind') or 'kitchen').strip().lower()
+    table_id = str(payload.get('table_id') or payload.get('tableId') or '').strip()
+
+    def _error(message, status):
+        return jsonify({"status": "error", "message": message}), status
+
+    started = time.perf_counter()
+    try:
+        if kind == 'kitchen':
+            order = payload.get('order')
+            if not isinstance(order, dict) or not order.get('items'):
+                return _error("An order with items is required.", 400)
+            data = render_kitchen_ticket(order, payload.get('copy_info') or "")
+        elif kind in ('table_bill', 'customer_receipt'):
+            source = payload.get('bill' if kind == 'table_bill' else 'receipt')
+            if isinstance(source, dict):
+                bill_data = source
+            elif not table_id:
+                return _error("Either an inline payload or table_id is required.", 400)
+            elif not is_table_management_enabled():
+                return _error("Table management feature not enabled", 404)
+            else:
+                bill_data = get_table_bill_data(table_id)
+                if bill_data is None:
+                    return _error("Table not found", 404)
+
+            if kind == 'table_bill':
+                data = build_table_bill_content(bill_data)
+            elif isinstance(source, dict):
+                data = build_customer_receipt_content(source)
+            else:
+                session = load_table_sessions().get(table_id) or {}
+                payments = session.get("payments", [])
+                payment_id = payload.get('payment_id')
+                payment = next((p for p in payments if p.get("payment_id") == payment_id), None) if payment_id \
+                    else (payments[-1] if payments else None)
+                if not payment:
+                    return _error("Payment not found", 404)
+                receipt_data = build_table_customer_receipt_payload(table_id, session, payment, bill_data)
+                data = build_customer_receipt_content(receipt_data)
+        else:
+            return _error(f"Unknown kind '{kind}'. Use kitchen, table_bill or customer_receipt.", 400)
+    except Exception as e:
+        app.logger.error(f"Failed to render {kind} preview: {e}")
+        return _error(f"Failed to render: {str(e)}", 500)
+
+    data = bytes(data)
+    render_ms = round((time.perf_counter() - started) * 1000, 3)
+    if str(request.args.get('format', '')).lower() == 'raw':
+        return Response(data, mimetype='application/octet-stream', headers={"X-Render-Ms": str(render_ms)})
+    return jsonify({
+        "status": "success",
+        "kind": kind,
+        "size": len(data),
+        "render_ms": render_ms,
+        "escpos_base64": base64.b64encode(data).decode('ascii'),
+        "preview": escpos_to_text(data)
+    })
+
+
+def calculate_order_total(order_data) -> float:
+    """Order total as charged: quantity x itemPriceWithModifiers (basePrice when absent)."""
+    order_total = 0.0
+    for item in order_data.get('items', []):
+        try:
+            quantity = int(item.get('quantity', 0) or 0)
+        except (ValueError, TypeError):
+            quantity = 0
+        price_source = item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))
+        try:
+            price = float(price_source or 0.0)
+        except (ValueError, TypeError):
+            price = 0.0
+        order_total += price * quantity
+    return order_total
+
+
 @app.route('/api/orders', methods=['POST'])
 def handle_order():
     # Check trial status
@@ -8063,26 +8871,18 @@ def handle_order():
             "message": f"System error: Could not assign order number. {str(e)}"
         }), 500
 
+    # One clock reading for the CSV row, its print outcome and stored ticket, so an order at midnight stays on one day
+    order_received_at = datetime.now()
     order_data_internal = {
         'number': authoritative_order_number,
+        'orderDate': order_received_at.strftime("%Y-%m-%d"),
         'tableNumber': (order_data_from_client.get('tableNumber') or '').strip() or 'N/A',
         'items': order_data_from_client.get('items', []),
         'universalComment': order_data_from_client.get('universalComment', ''),
         'paymentMethod': order_data_from_client.get('paymentMethod', 'Cash')
     }
 
-    order_total = 0.0
-    for item in order_data_internal.get('items', []):
-        try:
-            quantity = int(item.get('quantity', 0) or 0)
-        except (ValueError, TypeError):
-            quantity = 0
-        price_source = item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))
-        try:
-            price = float(price_source or 0.0)
-        except (ValueError, TypeError):
-            price = 0.0
-        order_total += price * quantity
+    order_total = calculate_order_total(order_data_internal)
 
     table_mgmt_enabled = is_table_management_enabled()
 
@@ -8114,70 +8914,43 @@ def handle_order():
     print_status_summary = "Not Printed"
     printed_all = True
     printed_any = False
+    print_job = None
+    print_queued = False
+    csv_log_succeeded = False
+    csv_logged = False
 
     # Phase 6: Skip printing if device behavior is 'disabled'
     if device_print_behavior == 'disabled':
         app.logger.info(f"Order #{authoritative_order_number} - Device '{device_name}' has printing disabled. Order will be saved without printing.")
         print_status_summary = "Print Disabled by Device"
-    else:
-        # Proceed with normal printing
-        copies_to_print = max(1, int(config.get('kitchen_copies_per_order', KITCHEN_COPIES_PER_ORDER)))
-
-        # Calculate dynamic delay based on order complexity
-        total_items = sum(int(item.get('quantity', 1)) for item in order_data_internal.get('items', []))
-        base_delay_between_copies = 0.5
-        item_based_delay = min(total_items * 0.3, 10.0)  # 0.3s per item, max 10s
-        dynamic_delay = base_delay_between_copies + item_based_delay
-
-        # Calculate retry delay based on order complexity
-        base_retry_delay = 1.0
-        retry_delay = base_retry_delay + item_based_delay
-
-        app.logger.info(f"Order #{authoritative_order_number} has {total_items} items. Using {dynamic_delay:.1f}s delay between copies and {retry_delay:.1f}s retry delay.")
-
-        for i in range(1, copies_to_print + 1):
-            if i > 1:
-                app.logger.info(f"Waiting {dynamic_delay:.1f}s before printing copy {i} (order complexity: {total_items} items)")
-                time.sleep(dynamic_delay)
-            app.logger.info(f"Attempting to print copy {i} for order #{authoritative_order_number}")
-            try:
-                ok = print_kitchen_ticket(order_data_internal, copy_info="", device_id=device_id)
-                if not ok:
-                    app.logger.warning(f"Print failed, waiting {retry_delay:.1f}s before retry for copy {i} (order #{authoritative_order_number})")
-                    time.sleep(retry_delay)
-                    app.logger.warning(f"Retrying print for copy {i} (order #{authoritative_order_number})")
-                    ok = print_kitchen_ticket(order_data_internal, copy_info="", device_id=device_id)
-            except Exception as e_print:
-                app.logger.critical(f"CRITICAL PRINT EXCEPTION for order #{authoritative_order_number} (copy {i}): {str(e_print)}")
-                ok = False
-
-            printed_any = printed_any or ok
-
-            # Phase 6: REMOVED hard rejection on first print failure
-            # Orders are now ALWAYS saved, even if printing fails
-            # This prevents data loss due to printer issues
-            if not ok:
-                printed_all = False
-                app.logger.warning(f"Order #{authoritative_order_number} - Copy {i} FAILED to print, but order will still be saved.")
-
-    # Phase 6: Update print status summary
-    if device_print_behavior != 'disabled':
+    elif is_print_queue_enabled():
+        # Record the order before queueing it, so a job that finishes straight away has a row to store its outcome in
+        csv_log_succeeded = log_order_record(order_data_internal, PRINT_STATUS_QUEUED, received_at=order_received_at)
+        csv_logged = True
+        # Hand the copies to the printer's background worker so this request thread is released immediately
+        try:
+            print_job = submit_print_job('kitchen', {"order": order_data_internal}, order_number=authoritative_order_number, device_id=device_id)
+            print_queued = True
+            print_status_summary = PRINT_STATUS_QUEUED
+            app.logger.info(f"Order #{authoritative_order_number} queued for printing as job {print_job['job_id']} on '{print_job['printer']}'.")
+        except Exception as e_queue:
+            app.logger.error(f"Could not queue order #{authoritative_order_number} for printing, printing inline instead: {e_queue}")
+
+    if device_print_behavior != 'disabled' and not print_queued:
+        printed_any, printed_all, _print_failure = print_kitchen_copies(order_data_internal, device_id=device_id)
+        print_status_summary = summarize_print_results(printed_any, printed_all)
         if printed_any and printed_all:
-            print_status_summary = "All Copies Printed"
             app.logger.info(f"Order #{authoritative_order_number} - All copies printed successfully.")
-        elif printed_any and not printed_all:
-            print_status_summary = "Some Copies Printed, Some Failed"
+        elif printed_any:
             app.logger.warning(f"Order #{authoritative_order_number} - Some copies printed, some failed.")
-        elif not printed_any:
-            print_status_summary = "All Print Attempts Failed"
+        else:
             app.logger.error(f"Order #{authoritative_order_number} - All print attempts failed, but order will be saved.")
+        if csv_logged and csv_log_succeeded:
+            # Queueing failed after the order was recorded as queued
+            record_printed_status(order_data_internal['orderDate'], authoritative_order_number, print_status_summary)
 
-    csv_log_succeeded = False
-    try:
-        csv_log_succeeded = record_order_in_csv(order_data_internal, print_status_summary)
-    except Exception as e_csv_call:
-        app.logger.critical(f"CRITICAL CSV LOGGING EXCEPTION for order #{authoritative_order_number} (Print status: {print_status_summary}): {str(e_csv_call)}")
-        csv_log_succeeded = False
+    if not csv_logged:
+        csv_log_succeeded = log_order_record(order_data_internal, print_status_summary, received_at=order_received_at)
 
     if not csv_log_succeeded:
         app.logger.error(f"Order #{authoritative_order_number} (Print status: {print_status_summary}) FAILED to log to CSV. This is a critical error.")
@@ -8197,6 +8970,10 @@ def handle_order():
         # Device has printing disabled - order saved successfully without printing
         message = f"Order #{authoritative_order_number} saved successfully (printing disabled on this device)"
         final_status_code = "success"
+    elif print_queued and csv_log_succeeded:
+        # Printing continues in the background; failures are reported over SSE (print_job_failed)
+        message = f"Order #{authoritative_order_number} saved and sent to the printer."
+        final_status_code = "success"
     elif printed_any and printed_all and csv_log_succeeded:
         # Normal success - all printed and saved
         message = f"Order #{authoritative_order_number} processed: all copies printed and logged successfully!"
@@ -8217,7 +8994,17 @@ def handle_order():
         device_print_behavior != 'disabled'
     )
 
-    if should_print_customer_receipt:
+    customer_receipt_job = None
+    if should_print_customer_receipt and print_queued:
+        try:
+            receipt_payload = build_simple_customer_receipt_payload(order_data_internal, order_total)
+            customer_receipt_job = submit_print_job(
+                'customer_receipt', {"receipt": receipt_payload},
+                order_number=authoritative_order_number, device_id=device_id, printer_role='customer'
+            )
+        except Exception as receipt_error:
+            app.logger.error(f"Unable to queue customer receipt for order #{authoritative_order_number}: {receipt_error}")
+    elif should_print_customer_receipt:
         try:
             receipt_payload = build_simple_customer_receipt_payload(order_data_internal, order_total)
             customer_receipt_printed = print_customer_receipt_ticket(receipt_payload, device_id=device_id)
@@ -8229,7 +9016,7 @@ def handle_order():
 
     # Track order analytics (regardless of print/log status)
     try:
-        track_order_analytics(order_data_internal)
+        track_order_analytics(order_data_internal, order_total)
     except Exception as e:
         app.logger.warning(f"Failed to track order analytics: {e}")
 
@@ -8273,7 +9060,9 @@ def handle_order():
         "printed": print_status_summary, 
         "logged": csv_log_succeeded,
         "message": message,
-        "customer_receipt_printed": customer_receipt_printed
+        "customer_receipt_printed": customer_receipt_printed,
+        "print_job_id": print_job['job_id'] if print_job else None,
+        "customer_receipt_job_id": customer_receipt_job['job_id'] if customer_receipt_job else None
     }), 200
 
 @app.route('/api/test/orders', methods=['POST'])
@@ -8686,56 +9475,33 @@ def check_trial_status():
     return get_license_status_safe(force_refresh=False, context="check_trial_status")
 
 # --- Usage Analytics Functions ---
-def track_order_analytics(order_data):
+# Counters live in memory; usage_analytics.json is written by a background flusher
+usage_counters = UsageCounters(
+    app.logger,
+    USAGE_ANALYTICS_FILE,
+    flush_interval=float(config.get('usage_analytics_flush_seconds', 30) or 30),
+    retained_days=int(config.get('usage_analytics_retained_days', 90) or 90)
+)
+
+
+def track_order_analytics(order_data, order_total=None):
     """Track order for usage analytics"""
     try:
-        # Calculate order total
-        total = 0
-        for item in order_data.get('items', []):
-            quantity = int(item.get('quantity', 1))
-            price = float(item.get('price', 0))
-            total += quantity * price
-        
-        # Load current analytics
-        analytics = get_usage_analytics()
-        
-        # Update totals
-        analytics['total_orders'] += 1
-        analytics['total_revenue'] += total
-        
-        # Update dates
-        today = datetime.now().strftime('%Y-%m-%d')
-        if not analytics['first_order_date']:
-            analytics['first_order_date'] = today
-        analytics['last_order_date'] = today
-        
-        # Update daily stats
-        if today not in analytics['orders_by_day']:
-            analytics['orders_by_day'][today] = 0
-            analytics['revenue_by_day'][today] = 0
-        
-        analytics['orders_by_day'][today] += 1
-        analytics['revenue_by_day'][today] += total
-        
-        # Save analytics
-        with open(USAGE_ANALYTICS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(analytics, f, indent=2, ensure_ascii=False)
-            
+        total = calculate_order_total(order_data) if order_total is None else float(order_total)
+        usage_counters.record_order(total)
         app.logger.info(f"Analytics updated: Order #{order_data.get('number')} worth €{total:.2f}")
-        
+
     except Exception as e:
         app.logger.warning(f"Failed to update analytics: {e}")
 
 def get_usage_analytics():
     """Get current usage analytics"""
     try:
-        if os.path.exists(USAGE_ANALYTICS_FILE):
-            with open(USAGE_ANALYTICS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return usage_counters.snapshot()
     except Exception as e:
         app.logger.warning(f"Failed to load analytics: {e}")
-    
-    # Return default analytics if file doesn't exist or can't be read
+
+    # Return default analytics if the counters can't be read
     return {
         "total_orders": 0,
         "total_revenue": 0,
@@ -8832,84 +9598,30 @@ def save_tables_config(config_data):
         app.logger.error(f"Failed to save tables config: {e}")
         return False
 
-def load_table_sessions():
-    """Load table sessions from table_sessions.json"""
-    table_sessions_file = os.path.join(DATA_DIR, 'table_sessions.json')
-
-    try:
-        if os.path.exists(table_sessions_file):
-            with open(table_sessions_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # Create empty sessions file if it doesn't exist
-            with open(table_sessions_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f, indent=2)
-            return {}
-    except Exception as e:
-        app.logger.error(f"Failed to load table sessions: {e}")
-        return {}
-
-def save_table_sessions(sessions_data):
-    """Save table sessions to table_sessions.json with enhanced safety"""
-    def _save_operation():
-        table_sessions_file = os.path.join(DATA_DIR, 'table_sessions.json')
-        app.logger.info(f"[SAVE_SESSIONS] Writing to file: {table_sessions_file}")
-        app.logger.info(f"[SAVE_SESSIONS] DATA_DIR is: {DATA_DIR}")
-        app.logger.info(f"[SAVE_SESSIONS] Sessions data has {len(sessions_data)} table(s)")
-
-        try:
-            with open(table_sessions_file, 'w', encoding='utf-8') as f:
-                json.dump(sessions_data, f, indent=2, ensure_ascii=False)
-            app.logger.info(f"[SAVE_SESSIONS] File write completed successfully")
-            return True
-        except Exception as write_error:
-            app.logger.error(f"[SAVE_SESSIONS] Failed to write file: {write_error}")
-            raise
-
-    try:
-        result = enhanced_safe_file_operation('save_table_sessions', _save_operation)
-        if not result:
-            app.logger.error(f"[SAVE_SESSIONS] enhanced_safe_file_operation returned False (verification likely failed)")
-
-            # FALLBACK: Try a simpler direct write without verification
-            app.logger.warning(f"[SAVE_SESSIONS] Attempting fallback: direct write without verification")
-            try:
-                table_sessions_file = os.path.join(DATA_DIR, 'table_sessions.json')
-
-                # Create a manual backup first
-                if os.path.exists(table_sessions_file):
-                    import shutil
-                    backup_file = os.path.join(DATA_DIR, 'table_sessions.json.backup_fallback')
-                    shutil.copy2(table_sessions_file, backup_file)
-                    app.logger.info(f"[SAVE_SESSIONS] Created fallback backup: {backup_file}")
-
-                # Direct write
-                with open(table_sessions_file, 'w', encoding='utf-8') as f:
-                    json.dump(sessions_data, f, indent=2, ensure_ascii=False)
+# Table operations are appended to size-rotated JSONL segments (replaces table_audit.json)
+table_audit_log = AuditLog(
+    app.logger,
+    os.path.join(DATA_DIR, 'table_audit'),
+    max_segment_bytes=int(config.get('table_audit_segment_bytes', 1048576) or 1048576),
+    legacy_file=os.path.join(DATA_DIR, 'table_audit.json')
+)
 
-                app.logger.info(f"[SAVE_SESSIONS] Fallback write succeeded")
-                return True
-            except Exception as fallback_error:
-                app.logger.error(f"[SAVE_SESSIONS] Fallback write also failed: {fallback_error}")
-                return False
+# Table sessions live in memory; table_sessions.json is the snapshot behind a mutation journal
+table_session_store = TableSessionStore(
+    app.logger,
+    os.path.join(DATA_DIR, 'table_sessions.json'),
+    os.path.join(DATA_DIR, 'table_sessions.journal'),
+    flush_interval=float(config.get('table_sessions_flush_ms', 250)) / 1000.0
+)
 
-        return result
-    except Exception as e:
-        import traceback
-        app.logger.error(f"[SAVE_SESSIONS] Exception in save_table_sessions: {e}")
-        app.logger.error(f"[SAVE_SESSIONS] Traceback: {traceback.format_exc()}")
 
-        # LAST RESORT FALLBACK: Try direct write even after exception
-        app.logger.warning(f"[SAVE_SESSIONS] Attempting last-resort fallback after exception")
-        try:
-            table_sessions_file = os.path.join(DATA_DIR, 'table_sessions.json')
-            with open(table_sessions_file, 'w', encoding='utf-8') as f:
-                json.dump(sessions_data, f, indent=2, ensure_ascii=False)
-            app.logger.info(f"[SAVE_SESSIONS] Last-resort fallback succeeded")
-            return True
-        except Exception as last_resort_error:
-            app.logger.error(f"[SAVE_SESSIONS] Last-resort fallback failed: {last_resort_error}")
-            return False
+def load_table_sessions():
+    """Copy of all table sessions (same shape as table_sessions.json)"""
+    try:
+        return table_session_store.snapshot()
+    except Exception as e:
+        app.logger.error(f"Failed to load table sessions: {e}")
+        return {}
 
 # --- Enhanced SSE Events for Table Management ---
 
@@ -9003,30 +9715,26 @@ def cleanup_old_table_sessions():
         current_time = datetime.now()
         cleanup_threshold = current_time - timedelta(days=30)  # 30 days old
 
-        sessions = load_table_sessions()
-        cleaned_sessions = {}
         cleaned_count = 0
 
-        for table_id, session in sessions.items():
+        for table_id in table_session_store.table_ids():
             try:
-                # Check if session has recent activity
-                session_time_str = session.get("created_at", "")
-                if session_time_str:
-                    session_time = datetime.fromisoformat(session_time_str.replace('Z', '+00:00'))
-                    if session_time > cleanup_threshold:
-                        cleaned_sessions[table_id] = session
-                    else:
-                        cleaned_count += 1
-                        app.logger.info(f"Cleaned up old session for table {table_id}")
-                else:
-                    # Keep sessions without timestamps (safer)
-                    cleaned_sessions[table_id] = session
+                with table_session_store.lock(table_id):
+                    session = table_session_store.get(table_id)
+                    if session is None:
+                        continue
+                    # Check if session has recent activity; keep sessions without timestamps (safer)
+                    session_time_str = session.get("created_at", "")
+                    if session_time_str:
+                        session_time = datetime.fromisoformat(session_time_str.replace('Z', '+00:00'))
+                        if session_time <= cleanup_threshold:
+                            table_session_store.delete(table_id)
+                            cleaned_count += 1
+                            app.logger.info(f"Cleaned up old session for table {table_id}")
             except Exception as e:
-                app.logger.warning(f"Error checking session age for table {table_id}: {e}")
-                cleaned_sessions[table_id] = session  # Keep on error
+                app.logger.warning(f"Error checking session age for table {table_id}: {e}")  # Keep on error
 
         if cleaned_count > 0:
-            save_table_sessions(cleaned_sessions)
             app.logger.info(f"Cleaned up {cleaned_count} old table sessions")
 
     except Exception as e:
@@ -9036,8 +9744,17 @@ def update_table_session(table_id, order_number, order_total):
     """Update table session with new order"""
     try:
         app.logger.info(f"[DIAGNOSTIC] Inside update_table_session() - Table ID: '{table_id}'")
-        sessions = load_table_sessions()
-        app.logger.info(f"[DIAGNOSTIC] Loaded sessions: {len(sessions)} table(s) currently in sessions")
+        with table_session_store.lock(table_id):
+            return _update_table_session_locked(table_id, order_number, order_total)
+    except Exception as e:
+        app.logger.error(f"Failed to update table session for table {table_id}: {e}")
+        return False
+
+def _update_table_session_locked(table_id, order_number, order_total):
+    """Body of update_table_session; caller holds the table's lock"""
+    try:
+        session = table_session_store.get(table_id)
+        sessions = {table_id: session} if session is not None else {}
         current_time = datetime.now().isoformat()
 
         if table_id not in sessions:
@@ -9091,9 +9808,8 @@ def update_table_session(table_id, order_number, order_total):
 
         app.logger.info(f"[DIAGNOSTIC] About to save sessions - Table '{table_id}' now has {len(sessions[table_id]['orders'])} order(s), Total: €{sessions[table_id]['total_amount']:.2f}")
 
-        result = save_table_sessions(sessions)
-        app.logger.info(f"[DIAGNOSTIC] save_table_sessions() returned: {result}")
-        return result
+        table_session_store.put(table_id, sessions[table_id])
+        return True
     except Exception as e:
         app.logger.error(f"Failed to update table session for table {table_id}: {e}")
         return False
@@ -9101,10 +9817,8 @@ def update_table_session(table_id, order_number, order_total):
 def get_table_orders(table_id):
     """Get all orders for a specific table"""
     try:
-        sessions = load_table_sessions()
-        if table_id in sessions:
-            return sessions[table_id].get("orders", [])
-        return []
+        session = table_session_store.get(table_id)
+        return list(session.get("orders") or []) if isinstance(session, dict) else []
     except Exception as e:
         app.logger.error(f"Failed to get table orders for table {table_id}: {e}")
         return []
@@ -9112,10 +9826,7 @@ def get_table_orders(table_id):
 def get_table_total(table_id):
     """Get total amount for a specific table"""
     try:
-        sessions = load_table_sessions()
-        if table_id in sessions:
-            return sessions[table_id].get("total_amount", 0.0)
-        return 0.0
+        return table_session_store.peek(table_id, "total_amount", 0.0)
     except Exception as e:
         app.logger.error(f"Failed to get table total for table {table_id}: {e}")
         return 0.0
@@ -9123,24 +9834,20 @@ def get_table_total(table_id):
 def recalculate_table_total(table_id):
     """Recalculate table total from actual order data for accuracy"""
     try:
-        sessions = load_table_sessions()
-        if table_id not in sessions:
-            return 0.0
+        with table_session_store.lock(table_id):
+            session = table_session_store.get(table_id)
+            if session is None:
+                return 0.0
 
-        # Get all orders for this table from CSV data
-        orders = get_orders_for_table(table_id)
-        calculated_total = calculate_table_total(orders)
-
-        # Update session with recalculated total
-        sessions[table_id]["total_amount"] = calculated_total
+            # Get all orders for this table from CSV data
+            orders = get_orders_for_table(table_id)
+            calculated_total = calculate_table_total(orders)
 
-        # Save updated session
-        if save_table_sessions(sessions):
-            app.logger.info(f"Recalculated total for table {table_id}: €{calculated_total:.2f}")
-            return calculated_total
-        else:
-            app.logger.error(f"Failed to save recalculated total for table {table_id}")
-            return sessions[table_id].get("total_amount", 0.0)
+            # Update session with recalculated total
+            session["total_amount"] = calculated_total
+            table_session_store.put(table_id, session)
+        app.logger.info(f"Recalculated total for table {table_id}: €{calculated_total:.2f}")
+        return calculated_total
 
     except Exception as e:
         app.logger.error(f"Failed to recalculate table total for table {table_id}: {e}")
@@ -9194,50 +9901,23 @@ def update_csv_payment_methods_for_table(order_numbers, payments, total_amount):
 
         app.logger.info(f"[CSV_UPDATE] Determined primary payment method: {primary_method} (Cash: €{cash_total:.2f}, Card: €{card_total:.2f})")
 
-        # Update CSV rows for each order
+        # Record the resolution in the order outcome overlay; readers merge it over the CSV rows
+        since_date = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
         updated_count = 0
         for order_number in order_numbers:
             try:
-                # Find CSV files that might contain this order (check last 7 days)
-                csv_files_to_check = []
-                for days_ago in range(7):
-                    date = datetime.now() - timedelta(days=days_ago)
-                    csv_path = os.path.join(DATA_DIR, f"orders_{date.strftime('%Y-%m-%d')}.csv")
-                    if os.path.exists(csv_path):
-                        csv_files_to_check.append(csv_path)
-
-                # Search for and update the order in CSV files
-                for csv_path in csv_files_to_check:
-                    try:
-                        # Read the CSV file
-                        rows = []
-                        order_found = False
-
-                        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-                            reader = csv.DictReader(csvfile)
-                            fieldnames = reader.fieldnames
-
-                            for row in reader:
-                                if row.get('order_number') == str(order_number):
-                                    # Update the payment method
-                                    row['payment_method'] = primary_method
-                                    order_found = True
-                                    app.logger.info(f"[CSV_UPDATE] Updated order #{order_number} in {os.path.basename(csv_path)} to {primary_method}")
-                                rows.append(row)
-
-                        # Write back if order was found
-                        if order_found:
-                            with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                                writer.writeheader()
-                                writer.writerows(rows)
-
-                            updated_count += 1
-                            break  # Found and updated, no need to check other files
+                if order_store is not None:
+                    order_date = order_store.update_payment_method(order_number, primary_method, since_date)
+                else:
+                    order_date = find_recent_order_date(order_number, days=7)
+                if not order_date:
+                    app.logger.warning(f"[CSV_UPDATE] Order #{order_number} not found in the last 7 days")
+                    continue
 
-                    except Exception as e:
-                        app.logger.warning(f"[CSV_UPDATE] Error processing {csv_path}: {e}")
-                        continue
+                order_overlay.record_payment(order_date, order_number, primary_method)
+                analytics_rollups.update_payment(order_date, order_number, primary_method)
+                updated_count += 1
+                app.logger.info(f"[CSV_UPDATE] Updated order #{order_number} ({order_date}) to {primary_method}")
 
             except Exception as e:
                 app.logger.warning(f"[CSV_UPDATE] Failed to update order #{order_number}: {e}")
@@ -9253,12 +9933,14 @@ def update_csv_payment_methods_for_table(order_numbers, payments, total_amount):
 def close_table_session(table_id):
     """Close table session and mark as paid"""
     try:
-        sessions = load_table_sessions()
-        if table_id in sessions:
-            sessions[table_id]["payment_status"] = "paid"
-            sessions[table_id]["status"] = "occupied"  # Still occupied until cleared
-            return save_table_sessions(sessions)
-        return False
+        with table_session_store.lock(table_id):
+            session = table_session_store.get(table_id)
+            if session is None:
+                return False
+            session["payment_status"] = "paid"
+            session["status"] = "occupied"  # Still occupied until cleared
+            table_session_store.put(table_id, session)
+            return True
     except Exception as e:
         app.logger.error(f"Failed to close table session for table {table_id}: {e}")
         return False
@@ -9266,82 +9948,78 @@ def close_table_session(table_id):
 def clear_table_session(table_id):
     """Clear table session and make table available"""
     try:
-        sessions = load_table_sessions()
-        if table_id in sessions:
-            session = sessions[table_id]
+        with table_session_store.lock(table_id):
+            return _clear_table_session_locked(table_id)
+    except Exception as e:
+        import traceback
+        app.logger.error(f"[CLEAR_TABLE] Exception while clearing table {table_id}: {e}")
+        app.logger.error(f"[CLEAR_TABLE] Traceback: {traceback.format_exc()}")
+        return False
 
-            # Log session to history before clearing
-            try:
-                opened_at = session.get("opened_at", "")
-                closed_at = datetime.now().isoformat()
+def _clear_table_session_locked(table_id):
+    """Body of clear_table_session; caller holds the table's lock, so no order can join the session mid-clear"""
+    session = table_session_store.get(table_id)
+    if session is not None:
+        # Log session to history before clearing
+        try:
+            opened_at = session.get("opened_at", "")
+            closed_at = datetime.now().isoformat()
 
-                # Calculate duration
-                duration_minutes = 0
-                if opened_at:
-                    try:
-                        opened_time = datetime.fromisoformat(opened_at.replace('Z', '+00:00') if opened_at.endswith('Z') else opened_at)
-                        closed_time = datetime.now()
-                        duration_minutes = int((closed_time - opened_time).total_seconds() / 60)
-                    except Exception as e:
-                        app.logger.warning(f"Failed to calculate session duration: {e}")
+            # Calculate duration
+            duration_minutes = 0
+            if opened_at:
+                try:
+                    opened_time = datetime.fromisoformat(opened_at.replace('Z', '+00:00') if opened_at.endswith('Z') else opened_at)
+                    closed_time = datetime.now()
+                    duration_minutes = int((closed_time - opened_time).total_seconds() / 60)
+                except Exception as e:
+                    app.logger.warning(f"Failed to calculate session duration: {e}")
 
-                # Create session history record
-                session_history = {
-                    "table_id": table_id,
-                    "opened_at": opened_at.split('T')[1][:8] if 'T' in opened_at else opened_at,
-                    "closed_at": closed_at.split('T')[1][:8],
-                    "orders": session.get("orders", []),
-                    "total": round(session.get("total_amount", 0.0), 2),
-                    "duration_minutes": duration_minutes,
-                    "payment_status": session.get("payment_status", "unpaid"),
-                    "amount_paid": round(session.get("amount_paid", 0.0), 2),
-                    "amount_remaining": round(max(0, session.get("total_amount", 0.0) - session.get("amount_paid", 0.0)), 2),
-                    "payments": session.get("payments", [])
-                }
+            # Create session history record
+            session_history = {
+                "table_id": table_id,
+                "opened_at": opened_at.split('T')[1][:8] if 'T' in opened_at else opened_at,
+                "closed_at": closed_at.split('T')[1][:8],
+                "orders": session.get("orders", []),
+                "total": round(session.get("total_amount", 0.0), 2),
+                "duration_minutes": duration_minutes,
+                "payment_status": session.get("payment_status", "unpaid"),
+                "amount_paid": round(session.get("amount_paid", 0.0), 2),
+                "amount_remaining": round(max(0, session.get("total_amount", 0.0) - session.get("amount_paid", 0.0)), 2),
+                "payments": session.get("payments", [])
+            }
 
-                # Log to history file
-                if not log_table_session_history(table_id, session_history):
-                    app.logger.warning(f"Failed to log session history for table {table_id}")
+            # Log to history file
+            if not log_table_session_history(table_id, session_history):
+                app.logger.warning(f"Failed to log session history for table {table_id}")
 
-            except Exception as e:
-                app.logger.error(f"Failed to process session history for table {table_id}: {e}")
+        except Exception as e:
+            app.logger.error(f"Failed to process session history for table {table_id}: {e}")
 
-            # Update CSV payment methods for all orders in this table session
-            try:
-                order_numbers = session.get("orders", [])
-                payments = session.get("payments", [])
-                total_amount = session.get("total_amount", 0.0)
+        # Update CSV payment methods for all orders in this table session
+        try:
+            order_numbers = session.get("orders", [])
+            payments = session.get("payments", [])
+            total_amount = session.get("total_amount", 0.0)
 
-                if order_numbers and payments:
-                    app.logger.info(f"[CLEAR_TABLE] Updating CSV payment methods for {len(order_numbers)} orders from table {table_id}")
-                    update_csv_payment_methods_for_table(order_numbers, payments, total_amount)
-                else:
-                    app.logger.info(f"[CLEAR_TABLE] No orders or payments to update for table {table_id}")
-            except Exception as e:
-                # Don't fail the entire clear operation if CSV update fails
-                app.logger.error(f"[CLEAR_TABLE] Failed to update CSV payment methods for table {table_id}: {e}")
-
-            # Clear the session
-            app.logger.info(f"[CLEAR_TABLE] Deleting session for table {table_id} and saving")
-            del sessions[table_id]
-
-            # Save updated sessions
-            save_result = save_table_sessions(sessions)
-            if not save_result:
-                app.logger.error(f"[CLEAR_TABLE] Failed to save table sessions after clearing table {table_id}")
-                app.logger.error(f"[CLEAR_TABLE] Sessions data: {len(sessions)} remaining tables")
-                return False
+            if order_numbers and payments:
+                app.logger.info(f"[CLEAR_TABLE] Updating CSV payment methods for {len(order_numbers)} orders from table {table_id}")
+                update_csv_payment_methods_for_table(order_numbers, payments, total_amount)
+            else:
+                app.logger.info(f"[CLEAR_TABLE] No orders or payments to update for table {table_id}")
+        except Exception as e:
+            # Don't fail the entire clear operation if CSV update fails
+            app.logger.error(f"[CLEAR_TABLE] Failed to update CSV payment methods for table {table_id}: {e}")
 
-            app.logger.info(f"[CLEAR_TABLE] Successfully cleared table {table_id}")
-            return True
+        # Clear the session
+        app.logger.info(f"[CLEAR_TABLE] Deleting session for table {table_id}")
+        table_session_store.delete(table_id)
 
-        app.logger.info(f"[CLEAR_TABLE] Table {table_id} already clear (not in sessions)")
-        return True  # Table already clear
-    except Exception as e:
-        import traceback
-        app.logger.error(f"[CLEAR_TABLE] Exception while clearing table {table_id}: {e}")
-        app.logger.error(f"[CLEAR_TABLE] Traceback: {traceback.format_exc()}")
-        return False
+        app.logger.info(f"[CLEAR_TABLE] Successfully cleared table {table_id}")
+        return True
+
+    app.logger.info(f"[CLEAR_TABLE] Table {table_id} already clear (not in sessions)")
+    return True  # Table already clear
 
 def is_table_management_enabled():
     """Check if table management is enabled in config"""
@@ -9380,71 +10058,84 @@ def get_orders_for_table(table_id, date_range=None):
         files_checked = 0
         files_found = 0
 
-        # Search through CSV files in date range
-        current_date = start_date
-        while current_date <= end_date:
-            filename = os.path.join(DATA_DIR, f"orders_{current_date.strftime('%Y-%m-%d')}.csv")
-            files_checked += 1
+        def _table_row_sources():
+            """Yield (source, rows) to search: the indexed order store, or each day's CSV in range."""
+            nonlocal files_checked, files_found
+            if order_store is not None:
+                files_checked = files_found = 1
+                yield ORDER_DB_FILE, order_store.orders_for_table(
+                    table_id, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+                return
+            current_date = start_date
+            while current_date <= end_date:
+                filename = os.path.join(DATA_DIR, f"orders_{current_date.strftime('%Y-%m-%d')}.csv")
+                files_checked += 1
+                if os.path.exists(filename):
+                    files_found += 1
+                    try:
+                        csvfile = open(filename, 'r', newline='', encoding='utf-8')
+                    except OSError as e:
+                        app.logger.error(f"Failed to read orders file {filename}: {e}")
+                    else:
+                        with csvfile:
+                            yield filename, csv.DictReader(csvfile)
+                current_date += timedelta(days=1)
 
-            if os.path.exists(filename):
-                files_found += 1
-                try:
-                    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
-                        reader = csv.DictReader(csvfile)
-                        row_count = 0
-
-                        for row in reader:
-                            row_count += 1
-                            # Check if this order belongs to our table
-                            table_number = row.get('table_number', '').strip()
-
-                            if table_number == str(table_id).strip():
-                                try:
-                                    # Parse order data
-                                    order_number = int(row.get('order_number', 0))
-                                    if order_number <= 0:
-                                        app.logger.warning(f"Invalid order number in file {filename}, row {row_count}")
-                                        continue
-
-                                    timestamp = row.get('timestamp', '')
-                                    order_total = float(row.get('order_total', 0.0))
-                                    items_json = row.get('items_json', '[]')
-
-                                    # Parse items
-                                    items = []
-                                    try:
-                                        items_list = json.loads(items_json)
-                                        if isinstance(items_list, list):
-                                            for item in items_list:
-                                                if isinstance(item, dict):
-                                                    items.append({
-                                                        'name': str(item.get('name', '')),
-                                                        'basePrice': float(item.get('basePrice', 0.0)),
-                                                        'price': float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))),
-                                                        'quantity': int(item.get('quantity', 1)),
-                                                        'generalSelectedOptions': item.get('generalSelectedOptions', []),
-                                                        'comment': str(item.get('comment', ''))
-                                                    })
-                                        else:
-                                            app.logger.warning(f"Items JSON is not a list for order {order_number}")
-                                    except (json.JSONDecodeError, TypeError, ValueError) as e:
-                                        app.logger.warning(f"Failed to parse items for order {order_number}: {e}")
-
-                                    orders.append({
-                                        'order_number': order_number,
-                                        'timestamp': timestamp,
-                                        'items': items,
-                                        'order_total': order_total
-                                    })
-
-                                except (ValueError, TypeError) as e:
-                                    app.logger.warning(f"Failed to parse order data from CSV {filename}, row {row_count}: {e}")
-                                    continue
+        # Search through orders in date range
+        for filename, reader in _table_row_sources():
+            try:
+                row_count = 0
 
-                except Exception as e:
-                    app.logger.error(f"Failed to read orders file {filename}: {e}")
+                for row in reader:
+                    row_count += 1
+                    # Check if this order belongs to our table
+                    table_number = row.get('table_number', '').strip()
 
-            current_date += timedelta(days=1)
+                    if table_number == str(table_id).strip():
+                        try:
+                            # Parse order data
+                            order_number = int(row.get('order_number', 0))
+                            if order_number <= 0:
+                                app.logger.warning(f"Invalid order number in file {filename}, row {row_count}")
+                                continue
+
+                            timestamp = row.get('timestamp', '')
+                            order_total = float(row.get('order_total', 0.0))
+                            items_json = row.get('items_json', '[]')
+
+                            # Parse items
+                            items = []
+                            try:
+                                items_list = json.loads(items_json)
+                                if isinstance(items_list, list):
+                                    for item in items_list:
+                                        if isinstance(item, dict):
+                                            items.append({
+                                                'name': str(item.get('name', '')),
+                                                'basePrice': float(item.get('basePrice', 0.0)),
+                                                'price': float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0))),
+                                                'quantity': int(item.get('quantity', 1)),
+                                                'generalSelectedOptions': item.get('generalSelectedOptions', []),
+                                                'comment': str(item.get('comment', ''))
+                                            })
+                                else:
+                                    app.logger.warning(f"Items JSON is not a list for order {order_number}")
+                            except (json.JSONDecodeError, TypeError, ValueError) as e:
+                                app.logger.warning(f"Failed to parse items for order {order_number}: {e}")
+
+                            orders.append({
+                                'order_number': order_number,
+                                'timestamp': timestamp,
+                                'items': items,
+                                'order_total': order_total
+                            })
+
+                        except (ValueError, TypeError) as e:
+                            app.logger.warning(f"Failed to parse order data from CSV {filename}, row {row_count}: {e}")
+                            continue
+
+            except Exception as e:
+                app.logger.error(f"Failed to read orders file {filename}: {e}")
 
         app.logger.debug(f"Searched {files_checked} files, found {files_found} files, retrieved {len(orders)} orders for table {table_id}")
 
@@ -9570,31 +10261,14 @@ def get_table_bill_data(table_id):
         app.logger.error(f"Failed to generate bill data for table {table_id}: {e}")
         return None
 
-def log_table_session_history(table_id, session_data):
-    """Save session to daily history file"""
-    try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        history_file = os.path.join(DATA_DIR, f"table_history_{today}.json")
-
-        # Load existing history or create new
-        history = {"date": today, "sessions": []}
-
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-                    if "sessions" not in history:
-                        history["sessions"] = []
-            except Exception as e:
-                app.logger.warning(f"Failed to load existing history file, creating new: {e}")
-
-        # Add session to history
-        history["sessions"].append(session_data)
+# Closed sessions are appended to table_history_YYYY-MM-DD.jsonl; finished days get a footer index
+table_history_store = TableHistoryStore(app.logger, DATA_DIR)
 
-        # Save updated history
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
 
+def log_table_session_history(table_id, session_data):
+    """Append session to the daily history file"""
+    try:
+        table_history_store.append(session_data)
         return True
 
     except Exception as e:
@@ -9609,13 +10283,7 @@ def load_table_history(date):
         else:
             date_str = date.strftime("%Y-%m-%d")
 
-        history_file = os.path.join(DATA_DIR, f"table_history_{date_str}.json")
-
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        return {"date": date_str, "sessions": []}
+        return {"date": date_str, "sessions": table_history_store.load_day(date_str)}
 
     except Exception as e:
         app.logger.error(f"Failed to load table history for {date}: {e}")
@@ -12256,21 +12924,19 @@ get_hardware_fingerprint = get_enhanced_hardware_id
 def get_todays_orders_for_reprint():
     try:
         today_date_str = datetime.now().strftime("%Y-%m-%d")
-        filename = os.path.join(DATA_DIR, f"orders_{today_date_str}.csv")
-        
-        if not os.path.exists(filename):
+        rows = read_order_rows(today_date_str)
+
+        if not rows:
             return jsonify([])
 
         orders_for_reprint = []
-        with open(filename, 'r', newline='', encoding='utf-8') as f_read:
-            reader = csv.DictReader(f_read)
-            for row in reader:
-                if row.get('order_number') and row.get('items_json'): 
-                    orders_for_reprint.append({
-                        'order_number': row.get('order_number'),
-                        'table_number': row.get('table_number'),
-                        'timestamp': row.get('timestamp')
-                    })
+        for row in rows:
+            if row.get('order_number') and row.get('items_json'):
+                orders_for_reprint.append({
+                    'order_number': row.get('order_number'),
+                    'table_number': row.get('table_number'),
+                    'timestamp': row.get('timestamp')
+                })
         orders_for_reprint.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         return jsonify(orders_for_reprint)
 
@@ -12284,58 +12950,100 @@ def reprint_order_endpoint():
     data = request.json
     order_number_to_reprint = data.get('order_number')
     device_id = str(data.get('deviceId') or data.get('device_id') or '').strip() or None
+    date_str = str(data.get('date') or '').strip() or datetime.now().strftime("%Y-%m-%d")
+    # rerender=true rebuilds the ticket with the current settings instead of resending the stored bytes
+    rerender = str(data.get('rerender', '')).strip().lower() in ('1', 'true', 'yes')
 
     if not order_number_to_reprint:
         return jsonify({"status": "error", "message": "Order number is required for reprint."}), 400
 
     try:
-        today_date_str = datetime.now().strftime("%Y-%m-%d")
-        filename = os.path.join(DATA_DIR, f"orders_{today_date_str}.csv")
-
-        if not os.path.exists(filename):
-            return jsonify({"status": "error", "message": f"No orders found for today to reprint order #{order_number_to_reprint}."}), 404
+        stored_ticket = None
+        station_tickets = []
+        if not rerender:
+            # Orders split by kitchen station are replayed station by station, as first printed
+            station_tickets = load_station_tickets(date_str, order_number_to_reprint)
+            if not station_tickets:
+                stored_ticket = ticket_store.load(date_str, order_number_to_reprint)
+
+        if station_tickets:
+            app.logger.info(f"Attempting to reprint order #{order_number_to_reprint} ({date_str}) from "
+                            f"{len(station_tickets)} stored station tickets")
+            reprint_copy1_success = True
+            for station, ticket_bytes in station_tickets:
+                station_ok = print_kitchen_ticket(
+                    {'number': order_number_to_reprint},
+                    copy_info="",
+                    device_id=device_id,
+                    ticket_bytes=ticket_bytes,
+                    candidates=get_station_route(station, device_id)
+                )
+                if not station_ok:
+                    app.logger.warning(f"Reprint of order #{order_number_to_reprint} FAILED for station '{station}'.")
+                reprint_copy1_success = reprint_copy1_success and station_ok
+        elif stored_ticket is not None:
+            app.logger.info(f"Attempting to reprint order #{order_number_to_reprint} ({date_str}) from its stored ticket")
+            reprint_copy1_success = print_kitchen_ticket(
+                {'number': order_number_to_reprint},
+                copy_info="",
+                device_id=device_id,
+                ticket_bytes=stored_ticket
+            )
+        else:
+            filename = os.path.join(DATA_DIR, f"orders_{date_str}.csv")
 
-        found_order_row = None
-        with open(filename, 'r', newline='', encoding='utf-8') as f_read:
-            reader = csv.DictReader(f_read)
-            for row in reader:
-                if row.get('order_number') == str(order_number_to_reprint) and row.get('items_json'):
-                    found_order_row = row
-                    break
-        
-        if not found_order_row:
-            return jsonify({"status": "error", "message": f"Order #{order_number_to_reprint} not found in today's records or is missing item data."}), 404
+            if order_store is None and not os.path.exists(filename):
+                return jsonify({"status": "error", "message": f"No orders found for {date_str} to reprint order #{order_number_to_reprint}."}), 404
 
-        items_list_str = found_order_row.get('items_json', '[]')
-        try:
-            items_list = json.loads(items_list_str)
-            if not isinstance(items_list, list):
-                 app.logger.error(f"Decoded items_json for order #{order_number_to_reprint} is not a list: {items_list_str}")
-                 raise json.JSONDecodeError("Items data is not a list", items_list_str, 0)
-        except json.JSONDecodeError as je:
-            app.logger.error(f"Error decoding items_json for order #{order_number_to_reprint} during reprint: {str(je)}. Data: '{items_list_str}'")
-            return jsonify({"status": "error", "message": f"Corrupted item data for order #{order_number_to_reprint}. Cannot reprint."}), 500
-
-
-        if not items_list:
-            app.logger.warning(f"Order #{order_number_to_reprint} has no item details for reprint (items_list is empty).")
-
-        reprint_order_data = {
-            'number': found_order_row.get('order_number'),
-            'tableNumber': found_order_row.get('table_number', 'N/A'),
-            'items': items_list,
-            'universalComment': found_order_row.get('universal_comment', '')
-        }
-        original_timestamp = found_order_row.get('timestamp')
+            found_order_row = find_order_row(date_str, order_number_to_reprint)
+            if found_order_row is not None and not found_order_row.get('items_json'):
+                found_order_row = None
 
-        app.logger.info(f"Attempting to reprint order #{order_number_to_reprint} (Original Timestamp: {original_timestamp})")
+            if not found_order_row:
+                return jsonify({"status": "error", "message": f"Order #{order_number_to_reprint} not found in the records for {date_str} or is missing item data."}), 404
 
-        reprint_copy1_success = print_kitchen_ticket(
-            reprint_order_data,
-            copy_info="",
-            original_timestamp_str=original_timestamp,
-            device_id=device_id
-        )
+            items_list_str = found_order_row.get('items_json', '[]')
+            try:
+                items_list = json.loads(items_list_str)
+                if not isinstance(items_list, list):
+                     app.logger.error(f"Decoded items_json for order #{order_number_to_reprint} is not a list: {items_list_str}")
+                     raise json.JSONDecodeError("Items data is not a list", items_list_str, 0)
+            except json.JSONDecodeError as je:
+                app.logger.error(f"Error decoding items_json for order #{order_number_to_reprint} during reprint: {str(je)}. Data: '{items_list_str}'")
+                return jsonify({"status": "error", "message": f"Corrupted item data for order #{order_number_to_reprint}. Cannot reprint."}), 500
+
+
+            if not items_list:
+                app.logger.warning(f"Order #{order_number_to_reprint} has no item details for reprint (items_list is empty).")
+
+            reprint_order_data = {
+                'number': found_order_row.get('order_number'),
+                'tableNumber': found_order_row.get('table_number', 'N/A'),
+                'items': items_list,
+                'universalComment': found_order_row.get('universal_comment', '')
+            }
+            original_timestamp = found_order_row.get('timestamp')
+
+            app.logger.info(f"Attempting to reprint order #{order_number_to_reprint} (Original Timestamp: {original_timestamp})")
+
+            if kitchen_stations.enabled():
+                reprint_copy1_success = True
+                for split in kitchen_stations.split(reprint_order_data):
+                    station_ok = print_kitchen_ticket(
+                        split['order'],
+                        copy_info=split['label'],
+                        original_timestamp_str=original_timestamp,
+                        device_id=device_id,
+                        candidates=get_station_route(split['station'], device_id)
+                    )
+                    reprint_copy1_success = reprint_copy1_success and station_ok
+            else:
+                reprint_copy1_success = print_kitchen_ticket(
+                    reprint_order_data,
+                    copy_info="",
+                    original_timestamp_str=original_timestamp,
+                    device_id=device_id
+                )
         
         if not reprint_copy1_success:
             app.logger.warning(f"Reprint (Kitchen Copy) FAILED for order #{order_number_to_reprint}.")
@@ -12348,7 +13056,8 @@ def reprint_order_endpoint():
         
         return jsonify({
             "status": "success", 
-            "message": f"Order #{order_number_to_reprint} REPRINTED successfully."
+            "message": f"Order #{order_number_to_reprint} REPRINTED successfully.",
+            "source": "stored_ticket" if (station_tickets or stored_ticket is not None) else "rerendered"
         }), 200
 
     except json.JSONDecodeError:
@@ -12364,6 +13073,10 @@ def get_daily_summary():
         today_date_str = datetime.now().strftime("%Y-%m-%d")
         filename = os.path.join(DATA_DIR, f"orders_{today_date_str}.csv")
 
+        if order_store is not None:
+            summary = order_store.daily_summary(today_date_str)
+            return jsonify({"status": "success", **summary})
+
         if not os.path.exists(filename):
             return jsonify({
                 "total_orders": 0,
@@ -12379,7 +13092,7 @@ def get_daily_summary():
 
         with open(filename, 'r', newline='', encoding='utf-8') as f_read:
             reader = csv.DictReader(f_read)
-            for row in reader:
+            for row in order_overlay.apply(today_date_str, list(reader)):
                 try:
                     order_total = float(row.get('order_total', 0.0))
                     payment_method = row.get('payment_method', 'Cash').strip().capitalize()
@@ -12417,8 +13130,8 @@ def api_orders_by_date():
         start_hhmm = request.args.get('start')  # HH:MM
         end_hhmm = request.args.get('end')      # HH:MM
 
-        filename = os.path.join(DATA_DIR, f"orders_{date_str}.csv")
-        if not os.path.exists(filename):
+        rows = read_order_rows(date_str)
+        if rows is None:
             return jsonify([])
 
         def _within_range(ts_str: str) -> bool:
@@ -12443,20 +13156,18 @@ def api_orders_by_date():
             return True
 
         orders_list = []
-        with open(filename, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                ts = row.get('timestamp') or ''
-                if not _within_range(ts):
-                    continue
-                orders_list.append({
-                    'order_number': row.get('order_number'),
-                    'table_number': row.get('table_number'),
-                    'timestamp': ts,
-                    'payment_method': row.get('payment_method', 'Cash'),
-                    'order_total': row.get('order_total', ''),
-                    'printed_status': row.get('printed_status', '')
-                })
+        for row in rows:
+            ts = row.get('timestamp') or ''
+            if not _within_range(ts):
+                continue
+            orders_list.append({
+                'order_number': row.get('order_number'),
+                'table_number': row.get('table_number'),
+                'timestamp': ts,
+                'payment_method': row.get('payment_method', 'Cash'),
+                'order_total': row.get('order_total', ''),
+                'printed_status': resolve_printed_status(date_str, row.get('order_number'), row.get('printed_status', ''))
+            })
 
         try:
             orders_list.sort(key=lambda r: r.get('timestamp') or '', reverse=True)
@@ -12477,30 +13188,29 @@ def api_order_details():
             return jsonify({"status": "error", "message": "order_number is required"}), 400
 
         filename = os.path.join(DATA_DIR, f"orders_{date_str}.csv")
-        if not os.path.exists(filename):
+        if order_store is None and not os.path.exists(filename):
             return jsonify({"status": "error", "message": "No orders file found for date."}), 404
 
-        with open(filename, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('order_number') == str(order_number):
-                    items_json_str = row.get('items_json', '[]')
-                    try:
-                        items_list = json.loads(items_json_str)
-                        if not isinstance(items_list, list):
-                            items_list = []
-                    except Exception:
-                        items_list = []
-                    return jsonify({
-                        'order_number': row.get('order_number'),
-                        'table_number': row.get('table_number'),
-                        'timestamp': row.get('timestamp'),
-                        'items': items_list,
-                        'universal_comment': row.get('universal_comment', ''),
-                        'order_total': row.get('order_total', ''),
-                        'payment_method': row.get('payment_method', 'Cash'),
-                        'printed_status': row.get('printed_status', '')
-                    })
+        row = find_order_row(date_str, order_number)
+        if row is not None:
+            items_json_str = row.get('items_json', '[]')
+            try:
+                items_list = json.loads(items_json_str)
+                if not isinstance(items_list, list):
+                    items_list = []
+            except Exception:
+                items_list = []
+            return jsonify({
+                'order_number': row.get('order_number'),
+                'table_number': row.get('table_number'),
+                'timestamp': row.get('timestamp'),
+                'items': items_list,
+                'universal_comment': row.get('universal_comment', ''),
+                'order_total': row.get('order_total', ''),
+                'payment_method': row.get('payment_method', 'Cash'),
+                'printed_status': resolve_printed_status(date_str, row.get('order_number'), row.get('printed_status', '')),
+                'ticket_stored': bool(ticket_store.kinds(date_str, row.get('order_number')))
+            })
         return jsonify({"status": "error", "message": "Order not found for date."}), 404
     except Exception as e:
         app.logger.error(f"Error in /api/order_details: {e}")
@@ -12508,6 +13218,36 @@ def api_order_details():
 
 
 
+@app.route('/api/orders/export', methods=['GET'])
+def api_orders_export():
+    """Download one day's orders in the orders_YYYY-MM-DD.csv format."""
+    try:
+        date_str = request.args.get('date') or datetime.now().strftime('%Y-%m-%d')
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"status": "error", "message": "date must be YYYY-MM-DD"}), 400
+
+        if order_store is not None:
+            content = order_store.export_csv(date_str)
+        else:
+            rows = read_order_rows(date_str)
+            if rows is None:
+                return jsonify({"status": "error", "message": "No orders file found for date."}), 404
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=ORDER_CSV_FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+            content = buffer.getvalue()
+
+        response = Response(content, mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename="orders_{date_str}.csv"'
+        return response
+    except Exception as e:
+        app.logger.error(f"Error in /api/orders/export: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 # --- ANALYTICS ENDPOINT (CORRECTED & ENHANCED) ---
 @app.route('/api/analytics', methods=['GET'])
 def get_analytics():
@@ -12520,13 +13260,11 @@ def get_analytics():
             # Custom date range
             start = datetime.strptime(start_date, '%Y-%m-%d')
             end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-            target_date = start
         elif range_type == 'week':
             # This week (Monday to Sunday)
             today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             start = today - timedelta(days=today.weekday())  # Monday
             end = start + timedelta(days=7)  # Next Monday
-            target_date = start
         elif range_type == 'month':
             # This month
             today = datetime.now()
@@ -12536,79 +13274,20 @@ def get_analytics():
                 end = start.replace(year=start.year + 1, month=1)
             else:
                 end = start.replace(month=start.month + 1)
-            target_date = start
         else:
             # Today's analytics
             start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             end = start + timedelta(days=1)
-            target_date = start
-        
-        # Read orders from CSV file
-        # Check for today's CSV file, then try alternative locations and dates
-        today_path = os.path.join(DATA_DIR, f"orders_{datetime.now().strftime('%Y-%m-%d')}.csv")
-        orders_csv = today_path
         
-        # If today's file doesn't exist, try looking for recent CSV files
-        if not os.path.exists(orders_csv):
-            app.logger.info(f"Today's CSV file not found: {orders_csv}")
-            
-            # Check alternative installation path
-            alt_today_path = os.path.join(r'C:\POSPal\data', f"orders_{datetime.now().strftime('%Y-%m-%d')}.csv")
-            if os.path.exists(alt_today_path):
-                orders_csv = alt_today_path
-                app.logger.info(f"Found CSV in alternative location: {alt_today_path}")
-            else:
-                # Look for any recent CSV files in both locations
-                csv_files = []
-                for data_dir in [DATA_DIR, r'C:\POSPal\data']:
-                    if os.path.exists(data_dir):
-                        try:
-                            for file in os.listdir(data_dir):
-                                if file.startswith('orders_') and file.endswith('.csv'):
-                                    csv_path = os.path.join(data_dir, file)
-                                    csv_files.append((csv_path, os.path.getmtime(csv_path)))
-                        except Exception as e:
-                            app.logger.warning(f"Error scanning directory {data_dir}: {e}")
-                
-                if csv_files:
-                    # For custom date range, try to find exact date first, then most recent
-                    if range_type == 'custom' and start_date:
-                        date_specific_files = [f for f in csv_files if start_date in f[0]]
-                        if date_specific_files:
-                            orders_csv = date_specific_files[0][0]
-                            app.logger.info(f"Using date-specific CSV file: {orders_csv}")
-                        else:
-                            csv_files.sort(key=lambda x: x[1], reverse=True)
-                            orders_csv = csv_files[0][0]
-                            app.logger.info(f"Date-specific file not found, using most recent: {orders_csv}")
-                    else:
-                        # Use the most recent CSV file
-                        csv_files.sort(key=lambda x: x[1], reverse=True)
-                        orders_csv = csv_files[0][0]
-                        app.logger.info(f"Using most recent CSV file: {orders_csv}")
-                else:
-                    app.logger.warning("No CSV files found in any location")
-        
-        # Prepare list of CSV files for the date range
-        csv_files_in_range = []
-        if range_type in ['custom', 'week', 'month'] or (range_type == 'today' and not os.path.exists(today_path)):
-            # For date ranges or when today's file doesn't exist, collect all CSV files in the range
-            current_date = start
-            while current_date < end:
-                date_csv_path = os.path.join(DATA_DIR, f"orders_{current_date.strftime('%Y-%m-%d')}.csv")
-                if os.path.exists(date_csv_path):
-                    csv_files_in_range.append(date_csv_path)
-                # Also check alternative path
-                alt_date_csv_path = os.path.join(r'C:\POSPal\data', f"orders_{current_date.strftime('%Y-%m-%d')}.csv")
-                if os.path.exists(alt_date_csv_path) and alt_date_csv_path not in csv_files_in_range:
-                    csv_files_in_range.append(alt_date_csv_path)
-                current_date += timedelta(days=1)
-        else:
-            # For today's analytics when file exists, use the single file we found
-            if 'orders_csv' in locals() and os.path.exists(orders_csv):
-                csv_files_in_range = [orders_csv]
-        
-        if not csv_files_in_range:
+        # Merge the per-day rollups covering the range instead of re-reading every order row
+        range_dates = []
+        current_date = start
+        while current_date < end:
+            range_dates.append(current_date.strftime('%Y-%m-%d'))
+            current_date += timedelta(days=1)
+        merged = analytics_rollups.merge(range_dates)
+
+        if not merged['orders']:
             return jsonify({
                 "grossRevenue": 0.0,
                 "totalOrders": 0,
@@ -12623,16 +13302,32 @@ def get_analytics():
                 "topAddons": [],
                 "totalItems": 0
             })
-        
-        total_sales = 0.0
-        total_orders = 0
-        sales_by_hour = defaultdict(float)
-        item_qty = Counter()
-        item_rev = defaultdict(float)
+
+        total_sales = merged['gross']
+        total_orders = merged['orders']
+        sales_by_hour = merged['hours']
+        item_qty = Counter({name: qty for name, (qty, _) in merged['items'].items()})
+        item_rev = {name: rev for name, (_, rev) in merged['items'].items()}
+        addon_rev = {name: rev for name, (rev, _) in merged['addons'].items() if rev > 0}
+        addon_orders = {name: count for name, (_, count) in merged['addons'].items()}
+
+        # Payment methods (skip 'Pending' for table orders not yet cleared)
         payment_methods = Counter()
-        daypart_totals = defaultdict(float)
-        addon_rev = defaultdict(float)
-        addon_order_set = defaultdict(set)  # addon_name -> set(order_number)
+        payment_amounts = { 'cash': 0.0, 'card': 0.0 }
+        for method, (count, amt) in merged['payments'].items():
+            if method != 'Pending':
+                payment_methods[method] += count
+            pm = (method or 'Cash').capitalize()
+            if pm == 'Pending':
+                continue
+            elif pm == 'Card':
+                payment_amounts['card'] += amt
+            elif pm == 'Mixed':
+                # For mixed payments, split 50/50 between cash and card for analytics
+                payment_amounts['cash'] += amt / 2
+                payment_amounts['card'] += amt / 2
+            else:
+                payment_amounts['cash'] += amt
 
         # Build item name -> category map from menu if available
         name_to_category = {}
@@ -12649,69 +13344,6 @@ def get_analytics():
         except Exception:
             pass
         
-        # Process all CSV files in the date range
-        for orders_csv in csv_files_in_range:
-            app.logger.info(f"Processing CSV file: {orders_csv}")
-            try:
-                with open(orders_csv, 'r', newline='', encoding='utf-8') as csvfile:
-                    reader = csv.DictReader(csvfile)
-                    for row in reader:
-                        try:
-                            order_date = datetime.strptime(row.get('timestamp') or row.get('Date'), '%Y-%m-%d %H:%M:%S')
-                            if start <= order_date < end:
-                                order_total = float(row.get('order_total') or row.get('Total') or 0.0)
-                                total_sales += order_total
-                                total_orders += 1
-                        
-                                # Sales by hour
-                                hour = order_date.hour
-                                sales_by_hour[hour] += order_total
-
-                                # Daypart removed per requirements
-                                
-                                # Payment methods (skip 'Pending' for table orders not yet cleared)
-                                payment_method = row.get('payment_method') or row.get('Payment Method', 'Cash')
-                                if payment_method != 'Pending':
-                                    payment_methods[payment_method] += 1
-                                
-                                # Top items (parse items JSON)
-                                try:
-                                    items = json.loads(row.get('items_json') or row.get('Items') or '[]')
-                                    order_no = row.get('order_number') or row.get('OrderNumber') or str(uuid.uuid4())
-                                    for item in items:
-                                        item_name = item.get('name', 'Unknown')
-                                        quantity = int(item.get('quantity', 1))
-                                        unit_price = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
-                                        item_qty[item_name] += quantity
-                                        item_rev[item_name] += unit_price * quantity
-
-                                        # Add-ons/options revenue and attach rate
-                                        try:
-                                            opts = item.get('generalSelectedOptions') or []
-                                            if isinstance(opts, list):
-                                                seen_addons_in_order = set()
-                                                for opt in opts:
-                                                    opt_name = opt.get('name')
-                                                    if not opt_name:
-                                                        continue
-                                                    price_change = float(opt.get('priceChange', 0.0))
-                                                    if price_change > 0:
-                                                        addon_rev[opt_name] += price_change * quantity
-                                                    seen_addons_in_order.add(opt_name)
-                                                for opt_name in seen_addons_in_order:
-                                                    addon_order_set[opt_name].add(order_no)
-                                        except Exception:
-                                            pass
-                                except (json.JSONDecodeError, KeyError):
-                                    pass
-                            
-                        except (ValueError, KeyError) as e:
-                            app.logger.warning(f"Error parsing order row: {e}")
-                            continue
-            except Exception as e:
-                app.logger.warning(f"Error processing CSV file {orders_csv}: {e}")
-                continue
-        
         average_order_value = total_sales / total_orders if total_orders > 0 else 0
         # Build best and worst sellers by quantity
         best_sellers = [{"name": name, "quantity": qty} for name, qty in item_qty.most_common(10)]
@@ -12745,37 +13377,11 @@ def get_analytics():
         # Top addons with attach rate
         top_addons = []
         for name, rev in sorted(addon_rev.items(), key=lambda x: x[1], reverse=True)[:10]:
-            attach_rate = (len(addon_order_set.get(name, set())) / total_orders) if total_orders > 0 else 0.0
+            attach_rate = (addon_orders.get(name, 0) / total_orders) if total_orders > 0 else 0.0
             top_addons.append({"name": name, "revenue": round(rev,2), "attachRate": attach_rate})
         
         # Build frontend-compatible structure
         sales_by_hour_list = [ {"hour": h, "total": round(v,2)} for h,v in sorted(sales_by_hour.items()) ]
-        payment_amounts = { 'cash': 0.0, 'card': 0.0 }
-        # Re-scan to sum payment amounts for fees/net revenue
-        try:
-            with open(orders_csv, 'r', newline='', encoding='utf-8') as csvfile2:
-                reader2 = csv.DictReader(csvfile2)
-                for row in reader2:
-                    try:
-                        order_date = datetime.strptime(row.get('timestamp') or row.get('Date'), '%Y-%m-%d %H:%M:%S')
-                        if start <= order_date < end:
-                            amt = float(row.get('order_total') or row.get('Total') or 0.0)
-                            pm = (row.get('payment_method') or row.get('Payment Method') or 'Cash').capitalize()
-                            # Skip 'Pending' orders (table orders not yet cleared)
-                            if pm == 'Pending':
-                                continue
-                            elif pm == 'Card':
-                                payment_amounts['card'] += amt
-                            elif pm == 'Mixed':
-                                # For mixed payments, split 50/50 between cash and card for analytics
-                                payment_amounts['cash'] += amt / 2
-                                payment_amounts['card'] += amt / 2
-                            else:
-                                payment_amounts['cash'] += amt
-                    except Exception:
-                        pass
-        except Exception:
-            pass
 
         resp = {
             "grossRevenue": round(total_sales, 2),
@@ -12813,10 +13419,10 @@ def get_analytics():
 
 @app.route('/api/state', methods=['GET'])
 def get_state():
-    """Get current centralized state"""
+    """Get current centralized state (304 when the client's ETag is still current)"""
     try:
         # Clean up inactive sessions first
-        cleanup_inactive_sessions()
+        device_registry.cleanup_sessions()
         
         # Get device ID from request
         device_id = request.args.get('device_id', 'unknown')
@@ -12830,17 +13436,26 @@ def get_state():
         if device_id != 'unknown':
             register_device_session(device_id, device_info)
         
-        state = load_centralized_state()
-        return jsonify({
-            "success": True,
-            "state": {
-                "current_order": state['current_order'],
-                "order_line_counter": state['order_line_counter'],
-                "universal_comment": state['universal_comment'],
-                "selected_table": state['selected_table'],
-                "active_devices": len(state['device_sessions'])
-            }
-        })
+        active_devices = device_registry.session_count()
+        etag = centralized_state.etag(centralized_state.version, active_devices)
+        if request.headers.get("If-None-Match") == etag:
+            response = Response(status=304)
+        else:
+            version, state = centralized_state.snapshot()
+            etag = centralized_state.etag(version, active_devices)
+            response = jsonify({
+                "success": True,
+                "state": {
+                    "current_order": state['current_order'],
+                    "order_line_counter": state['order_line_counter'],
+                    "universal_comment": state['universal_comment'],
+                    "selected_table": state['selected_table'],
+                    "active_devices": active_devices
+                }
+            })
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return response
     except Exception as e:
         app.logger.error(f"Error getting state: {str(e)}")
         return jsonify({"success": False, "message": f"Error getting state: {str(e)}"}), 500
@@ -12850,10 +13465,9 @@ def handle_current_order():
     """Get or update current order"""
     try:
         if request.method == 'GET':
-            state = load_centralized_state()
             return jsonify({
                 "success": True,
-                "current_order": state['current_order']
+                "current_order": centralized_state.get('current_order')
             })
         else:  # POST
             data = request.get_json()
@@ -12874,10 +13488,9 @@ def handle_order_line_counter():
     """Get or update order line counter"""
     try:
         if request.method == 'GET':
-            state = load_centralized_state()
             return jsonify({
                 "success": True,
-                "order_line_counter": state['order_line_counter']
+                "order_line_counter": centralized_state.get('order_line_counter')
             })
         else:  # POST
             data = request.get_json()
@@ -12898,10 +13511,9 @@ def handle_universal_comment():
     """Get or update universal comment"""
     try:
         if request.method == 'GET':
-            state = load_centralized_state()
             return jsonify({
                 "success": True,
-                "universal_comment": state['universal_comment']
+                "universal_comment": centralized_state.get('universal_comment')
             })
         else:  # POST
             data = request.get_json()
@@ -12922,10 +13534,9 @@ def handle_selected_table():
     """Get or update selected table"""
     try:
         if request.method == 'GET':
-            state = load_centralized_state()
             return jsonify({
                 "success": True,
-                "selected_table": state['selected_table']
+                "selected_table": centralized_state.get('selected_table')
             })
         else:  # POST
             data = request.get_json()
@@ -12945,7 +13556,7 @@ def handle_selected_table():
 def clear_current_order():
     """Clear current order and reset counter"""
     try:
-        if save_centralized_state('current_order', []) and save_centralized_state('order_line_counter', 0):
+        if save_centralized_state_values({'current_order': [], 'order_line_counter': 0}):
             return jsonify({"success": True, "message": "Current order cleared"})
         else:
             return jsonify({"success": False, "message": "Failed to clear current order"}), 500
@@ -12955,13 +13566,11 @@ def clear_current_order():
 
 @app.route('/api/devices', methods=['GET'])
 def get_active_devices():
-    """Get list of active devices"""
+    """Get list of active devices (served from the in-memory registry)"""
     try:
-        cleanup_inactive_sessions()
-        state = load_centralized_state()
         return jsonify({
             "success": True,
-            "active_devices": state['device_sessions']
+            "active_devices": cleanup_inactive_sessions()
         })
     except Exception as e:
         app.logger.error(f"Error getting active devices: {str(e)}")
@@ -13318,6 +13927,68 @@ if __name__ == '__main__':
                 # For now, we exit with an error code.
                 sys.exit(f"Error: Insufficient permissions to write to the data directory: {DATA_DIR}")
             
+            # End-of-day compaction: fold order outcome overlays of previous days into their CSVs
+            if config.get('order_overlay_compaction', True):
+                try:
+                    compacted = compact_order_overlays()
+                    if compacted:
+                        app.logger.info(f"Compacted order outcome overlays for {compacted} day(s)")
+                except Exception as e:
+                    app.logger.error(f"Order outcome overlay compaction failed: {e}")
+
+            # Stored tickets (for reprints) are kept for ticket_store_retained_days
+            try:
+                ticket_store.prune(int(config.get('ticket_store_retained_days', 90) or 90))
+            except Exception as e:
+                app.logger.error(f"Ticket store retention sweep failed: {e}")
+
+            # Import new or changed daily CSVs into the SQLite order store
+            if order_store is not None:
+                try:
+                    imported = order_store.import_csv_files(DATA_DIR)
+                    app.logger.info(f"Order store ready ({imported} orders imported from CSV)")
+                except Exception as e:
+                    app.logger.error(f"Order store CSV import failed: {e}")
+
+            # Load table sessions (snapshot + journal) and start the write-behind flusher
+            try:
+                table_session_store.start()
+            except Exception as e:
+                app.logger.error(f"Table session store failed to start: {e}")
+
+            try:
+                centralized_state.start()
+            except Exception as e:
+                app.logger.error(f"Centralized state flusher failed to start: {e}")
+
+            try:
+                analytics_rollups.start()
+            except Exception as e:
+                app.logger.error(f"Analytics rollup flusher failed to start: {e}")
+
+            try:
+                usage_counters.start()
+            except Exception as e:
+                app.logger.error(f"Usage counter flusher failed to start: {e}")
+
+            try:
+                device_registry.start()
+            except Exception as e:
+                app.logger.error(f"Device registry flusher failed to start: {e}")
+
+            # Resume any print jobs left unfinished by the previous run
+            try:
+                print_job_queue.start()
+                app.logger.info(f"Print queue started (journal: {PRINT_JOBS_FILE})")
+            except Exception as e:
+                app.logger.error(f"Print queue failed to start: {e}")
+
+            # Background status probes for the role printers (health endpoints read the snapshot)
+            try:
+                printer_health_prober.start()
+            except Exception as e:
+                app.logger.error(f"Printer health prober failed to start: {e}")
+
             # Setup Windows Firewall rule for network access
             firewall_success, firewall_msg = _setup_windows_firewall_rule()
             if firewall_success:
@@ -13325,6 +13996,15 @@ if __name__ == '__main__':
             else:
                 app.logger.warning(f"Firewall setup failed: {firewall_msg}")
                 app.logger.warning("Users on other devices may not be able to connect. Run as Administrator or manually create firewall rule.")
+
+            # Event streams get their own asyncio server (clients fall back to /api/events if unreachable)
+            if config.get('sse_gateway_enabled', True):
+                if os.name == 'nt':
+                    _setup_windows_firewall_rules_for_ports([sse_gateway.port])
+                if sse_gateway.start():
+                    app.logger.info(f"SSE gateway listening on port {sse_gateway.port}")
+                else:
+                    app.logger.warning(f"SSE gateway unavailable ({sse_gateway.error}); streams will use Waitress")
             
             startup_success = True
             break
@@ -0,0 +1,47 @@
+"""
+pywin32 stand-ins for benchmarks
+Lets benchmarks import app on machines without pywin32 (Linux, CI runners)
+"""
+
+import sys
+import types
+
+
+def install_standins():
+    """
+    Register minimal win32print/pywintypes modules when the real ones are
+    missing. Benchmarks only render tickets, so nothing here talks to a
+    printer: printer enumeration is empty and any other win32print call
+    raises win32print.error, as it would for a missing printer.
+    """
+    try:
+        import win32print  # type: ignore  # noqa: F401
+        import pywintypes  # type: ignore  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    pywintypes = types.ModuleType("pywintypes")
+
+    class error(Exception):
+        pass
+
+    pywintypes.error = error
+
+    win32print = types.ModuleType("win32print")
+    win32print.error = error
+    win32print.PRINTER_ENUM_LOCAL = 2
+    win32print.PRINTER_ENUM_CONNECTIONS = 4
+    win32print.EnumPrinters = lambda *args, **kwargs: []
+
+    def _unavailable(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            raise error(0, name, "pywin32 is not available")
+        return call
+
+    win32print.__getattr__ = _unavailable
+    sys.modules["pywintypes"] = pywintypes
+    sys.modules["win32print"] = win32print
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Greek receipt encoding micro-benchmark
+Strings per second through the original character loop ("before"), the
+registered codec with a cold memo, and the codec on repeated menu names.
+
+Run from the repository root:  python benchmarks/bench_greek_codec.py [--names 40] [--seconds 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add repository root to Python path
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from pospal_services import greek_codec  # noqa: E402
+
+MENU_WORDS = ["Καφές", "φρέντο", "Σουβλάκι", "χοιρινό", "Χωριάτικη", "σαλάτα", "Μπίρα", "Τζατζίκι",
+              "Γιαούρτι", "με", "μέλι", "Μπουγάτσα", "Ευχαριστούμε", "Ντομάτα", "Παγωτό", "βανίλια"]
+
+
+def original_loop(text: str) -> bytes:
+    """The pre-codec implementation: per-call dict build and a two-character scan."""
+    text_lower = text.lower()
+    for term, latin in greek_codec.COMMON_TERMS.items():
+        if term in text_lower:
+            text = text.replace(term, latin).replace(term.upper(), latin).replace(term.capitalize(), latin)
+    mapping = dict(greek_codec.LETTERS, **greek_codec.DIGRAPHS)
+    result, i = '', 0
+    while i < len(text):
+        if i < len(text) - 1 and text[i:i + 2] in mapping:
+            result += mapping[text[i:i + 2]]
+            i += 2
+            continue
+        result += mapping.get(text[i], text[i])
+        i += 1
+    return result.encode('cp437', errors='replace')
+
+
+def strings_per_second(encode, names, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for name in names:
+            encode(name)
+        count += len(names)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--names", type=int, default=40, help="distinct menu item names")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each run")
+    args = parser.parse_args()
+
+    codec_name = greek_codec.register_greek_codec()
+    names = [f"{n + 1}x {MENU_WORDS[n % len(MENU_WORDS)]} {MENU_WORDS[(n * 7) % len(MENU_WORDS)]}"
+             for n in range(args.names)]
+
+    def codec_uncached(text):
+        greek_codec.transliterate.cache_clear()
+        return text.encode(codec_name, errors='replace')
+
+    runs = (
+        ("before (character loop)", original_loop),
+        ("codec, cold memo", codec_uncached),
+        ("codec, repeated names", lambda text: text.encode(codec_name, errors='replace')),
+    )
+    results = {}
+    for label, encode in runs:
+        strings_per_second(encode, names, 0.2)  # warm-up
+        results[label] = strings_per_second(encode, names, args.seconds)
+        print(f"{label:<30} {results[label]:>12.0f} strings/s")
+    before = results["before (character loop)"]
+    print(f"{'speed-up (repeated names)':<30} {results['codec, repeated names'] / before:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Receipt template micro-benchmark
+Tickets per second from build_customer_receipt_content with the compiled
+header/footer cache off ("before") and on ("after").
+
+Run from the repository root:  python benchmarks/bench_receipt_templates.py [--lines 8] [--seconds 2]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+# Add repository root to Python path
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from _pywin32 import install_standins  # noqa: E402
+
+install_standins()  # rendering needs no printer, so run without pywin32 too
+
+import app as pospal_app  # noqa: E402
+
+
+def synthetic_receipt(lines: int, kind: str = "kitchen") -> dict:
+    items = [
+        {
+            "name": f"Item {n} with a reasonably long menu name",
+            "quantity": 1 + n % 3,
+            "itemPriceWithModifiers": 3.5 + n,
+            "generalSelectedOptions": [{"name": "Extra sauce", "priceChange": 0.5}] if n % 2 else [],
+            "comment": "no onions" if n % 4 == 0 else "",
+        }
+        for n in range(lines)
+    ]
+    return {
+        "table_id": "4",
+        "mode": "table",
+        "receipt_kind": kind,
+        "timestamp": "2026-10-16T12:30:00",
+        "bill_total": 100.0,
+        "payment": {"payment_id": "", "amount": 0.0, "method": "Pending"},
+        "payments": [],
+        "orders": [{"order_number": 12, "items": items}],
+        "include_payment_details": kind != "kitchen",
+    }
+
+
+def tickets_per_second(payload: dict, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        pospal_app.build_customer_receipt_content(payload, cut_after=True)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=8, help="item lines per ticket")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each run")
+    args = parser.parse_args()
+
+    pospal_app.app.logger.setLevel(logging.WARNING)
+    payload = synthetic_receipt(args.lines)
+    results = {}
+    for label, enabled in (("before (no template cache)", False), ("after (compiled templates)", True)):
+        pospal_app.config['receipt_template_cache'] = enabled
+        pospal_app.receipt_template_cache.clear()
+        tickets_per_second(payload, 0.2)  # warm-up
+        results[label] = tickets_per_second(payload, args.seconds)
+        print(f"{label:<30} {results[label]:>10.0f} tickets/s")
+    before, after = results.values()
+    print(f"{'speed-up':<30} {after / before:>10.2f}x   ({args.lines} item lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Ticket rendering benchmark
+Tickets per second and allocations for the customer receipt builder, the table
+bill builder and word_wrap_text on synthetic orders of 1-200 item lines. Only
+rendering is measured; no printer or spooler is involved.
+
+Run from the repository root:  python benchmarks/bench_render.py [--lines 1 10 50 200] [--seconds 1]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tracemalloc
+
+# Add repository root to Python path
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from _pywin32 import install_standins  # noqa: E402
+
+install_standins()  # rendering needs no printer, so run without pywin32 too
+
+import app as pospal_app  # noqa: E402
+
+NAMES = ["Chicken souvlaki with pita", "Χωριάτικη σαλάτα", "Club sandwich", "Freddo espresso",
+         "Μπίρα", "Pork gyros platter with fries and tzatziki on the side"]
+
+
+def synthetic_items(lines: int) -> list:
+    return [
+        {
+            "name": NAMES[n % len(NAMES)],
+            "quantity": 1 + n % 3,
+            "itemPriceWithModifiers": 3.5 + n % 7,
+            "generalSelectedOptions": [{"name": "Extra sauce", "priceChange": 0.5}] if n % 2 else [],
+            "comment": "no onions, well done" if n % 4 == 0 else "",
+            "comments": "no onions, well done" if n % 4 == 0 else "",
+        }
+        for n in range(lines)
+    ]
+
+
+def synthetic_receipt(lines: int) -> dict:
+    return {
+        "table_id": "4",
+        "mode": "table",
+        "receipt_kind": "customer",
+        "timestamp": "2026-10-16T12:30:00",
+        "bill_total": 100.0,
+        "payment": {"payment_id": "p1", "amount": 100.0, "method": "Cash"},
+        "payments": [{"payment_id": "p1", "amount": 100.0, "method": "cash"}],
+        "orders": [{"order_number": 12, "items": synthetic_items(lines)}],
+    }
+
+
+def synthetic_bill(lines: int) -> dict:
+    per_order = 10
+    orders = [
+        {"order_number": 100 + start // per_order, "time": "12:30",
+         "items": synthetic_items(lines)[start:start + per_order]}
+        for start in range(0, lines, per_order)
+    ]
+    return {"table_id": "4", "table_name": "Table 4", "seats": 4, "orders": orders,
+            "payment_status": "partial", "amount_paid": 20.0, "amount_remaining": 80.0}
+
+
+def synthetic_wrap_lines(lines: int) -> list:
+    return [f"{item['quantity']} x {item['name']} - {item['comment'] or 'as the menu says'}"
+            for item in synthetic_items(lines)]
+
+
+def calls_per_second(fn, seconds: float) -> float:
+    fn()  # warm-up
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def allocations(fn):
+    """(blocks still allocated afterwards, peak traced KiB) for a single call."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return blocks, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 50, 200], help="item lines per ticket")
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration of each run")
+    args = parser.parse_args()
+
+    pospal_app.app.logger.setLevel(logging.WARNING)
+    print(f"{'renderer':<18} {'lines':>5} {'tickets/s':>11} {'out KiB':>8} {'peak KiB':>9} {'retained':>9}")
+    for lines in args.lines:
+        receipt, bill, wrap_lines = synthetic_receipt(lines), synthetic_bill(lines), synthetic_wrap_lines(lines)
+        runs = (
+            ("customer_receipt", lambda: pospal_app.build_customer_receipt_content(receipt, cut_after=True)),
+            ("table_bill", lambda: pospal_app.build_table_bill_content(bill, cut_after=True)),
+            ("word_wrap_text", lambda: [pospal_app.word_wrap_text(line, 42, "", "    ") for line in wrap_lines]),
+        )
+        for label, fn in runs:
+            rate = calls_per_second(fn, args.seconds)
+            blocks, peak_kib = allocations(fn)
+            size_kib = len(fn()) / 1024 if label != "word_wrap_text" else 0.0
+            print(f"{label:<18} {lines:>5} {rate:>11.0f} {size_kib:>8.1f} {peak_kib:>9.1f} {blocks:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -151,12 +151,37 @@ pyinstaller ^
     --hidden-import license_controller.storage_manager ^
     --hidden-import license_controller.validation_flow ^
     --hidden-import license_controller.migration_manager ^
+    --hidden-import pospal_services ^
+    --hidden-import pospal_services.print_queue ^
+    --hidden-import pospal_services.write_behind ^
+    --hidden-import pospal_services.order_counter ^
+    --hidden-import pospal_services.order_journal ^
+    --hidden-import pospal_services.order_store ^
+    --hidden-import pospal_services.order_index ^
+    --hidden-import pospal_services.order_overlay ^
+    --hidden-import pospal_services.table_sessions ^
+    --hidden-import pospal_services.analytics_rollups ^
+    --hidden-import pospal_services.event_bus ^
+    --hidden-import pospal_services.sse_gateway ^
+    --hidden-import pospal_services.printer_backends ^
+    --hidden-import pospal_services.job_monitor ^
+    --hidden-import pospal_services.ticket_store ^
+    --hidden-import pospal_services.receipt_templates ^
+    --hidden-import pospal_services.greek_codec ^
+    --hidden-import pospal_services.escpos_preview ^
+    --hidden-import pospal_services.printer_health ^
+    --hidden-import pospal_services.printer_routing ^
+    --hidden-import pospal_services.kitchen_stations ^
+    --hidden-import pospal_services.audit_log ^
+    --hidden-import pospal_services.table_history ^
+    --hidden-import pospal_services.usage_counters ^
+    --hidden-import pospal_services.device_registry ^
+    --hidden-import pospal_services.centralized_state ^
     --hidden-import win32api ^
     --hidden-import win32con ^
-    --exclude-module asyncio.windows_events ^
-    --exclude-module asyncio.windows_utils ^
     --add-data "..\license_integration.py;." ^
     --add-data "..\license_controller;license_controller" ^
+    --add-data "..\pospal_services;pospal_services" ^
     --add-data "..\hook-limits.py;." ^
     --add-data "..\UISelect.html;." ^
     --add-data "..\POSPal.html;." ^
@@ -218,12 +243,37 @@ if defined BUILD_ONEDIR (
         --hidden-import license_controller.storage_manager ^
         --hidden-import license_controller.validation_flow ^
         --hidden-import license_controller.migration_manager ^
+        --hidden-import pospal_services ^
+        --hidden-import pospal_services.print_queue ^
+        --hidden-import pospal_services.write_behind ^
+        --hidden-import pospal_services.order_counter ^
+        --hidden-import pospal_services.order_journal ^
+        --hidden-import pospal_services.order_store ^
+        --hidden-import pospal_services.order_index ^
+        --hidden-import pospal_services.order_overlay ^
+        --hidden-import pospal_services.table_sessions ^
+        --hidden-import pospal_services.analytics_rollups ^
+        --hidden-import pospal_services.event_bus ^
+        --hidden-import pospal_services.sse_gateway ^
+        --hidden-import pospal_services.printer_backends ^
+        --hidden-import pospal_services.job_monitor ^
+        --hidden-import pospal_services.ticket_store ^
+        --hidden-import pospal_services.receipt_templates ^
+        --hidden-import pospal_services.greek_codec ^
+        --hidden-import pospal_services.escpos_preview ^
+        --hidden-import pospal_services.printer_health ^
+        --hidden-import pospal_services.printer_routing ^
+        --hidden-import pospal_services.kitchen_stations ^
+        --hidden-import pospal_services.audit_log ^
+        --hidden-import pospal_services.table_history ^
+        --hidden-import pospal_services.usage_counters ^
+        --hidden-import pospal_services.device_registry ^
+        --hidden-import pospal_services.centralized_state ^
         --hidden-import win32api ^
         --hidden-import win32con ^
-        --exclude-module asyncio.windows_events ^
-        --exclude-module asyncio.windows_utils ^
         --add-data "..\license_integration.py;." ^
         --add-data "..\license_controller;license_controller" ^
+        --add-data "..\pospal_services;pospal_services" ^
         --add-data "..\hook-limits.py;." ^
         --add-data "..\UISelect.html;." ^
         --add-data "..\POSPal.html;." ^
@@ -150,11 +150,33 @@ async function setLanguage(lang, options = {}) {
     }
 }
 
+// Prefer the server's dedicated event-stream port; fall back to /api/events if it is unreachable
+async function resolveEventStreamUrl() {
+    try {
+        const r = await fetch('/api/events/gateway', { cache: 'no-store' });
+        if (!r.ok) return '/api/events';
+        const info = await r.json();
+        if (!info || !info.enabled || location.protocol !== 'http:') return '/api/events';
+        const base = `${location.protocol}//${location.hostname}:${info.port}`;
+        const controller = new AbortController();
+        const timer = setTimeout(() => controller.abort(), 1500);
+        try {
+            const ping = await fetch(`${base}/ping`, { cache: 'no-store', signal: controller.signal });
+            if (ping.ok) return `${base}${info.path || '/api/events'}`;
+        } finally {
+            clearTimeout(timer);
+        }
+    } catch (e) {
+        console.warn('SSE gateway not reachable, using /api/events:', e.message);
+    }
+    return '/api/events';
+}
+
 document.addEventListener('DOMContentLoaded', async () => {
     const lang = await fetchCurrentLanguage();
     await syncLanguageFromServer(lang, { showToast: false });
     try {
-        window.evtSource = new EventSource('/api/events');
+        window.evtSource = new EventSource(await resolveEventStreamUrl());
         const es = window.evtSource;  // Keep local reference for this file
         es.addEventListener('settings', async (e) => {
             try {
@@ -176,6 +198,15 @@ document.addEventListener('DOMContentLoaded', async () => {
                 console.error('License status SSE handler error:', error);
             }
         });
+        es.addEventListener('print_job_failed', (event) => {
+            try {
+                if (typeof window.handlePrintJobSSE === 'function') {
+                    window.handlePrintJobSSE(event);
+                }
+            } catch (error) {
+                console.error('Print job SSE handler error:', error);
+            }
+        });
     } catch {}
     // Poll fallback every 30s in case SSE is blocked by network/proxy
     try {
@@ -4286,6 +4286,21 @@ function setupTableSSEUpdates() {
             }
         });
 
+        // A role printer went online/offline or changed status - re-read the cached health
+        window.evtSource.addEventListener('printer_status', function(e) {
+            lastSSEEventTime = Date.now(); // Track event receipt for connection health
+            if (window.PrinterMonitor && typeof PrinterMonitor.refresh === 'function') {
+                PrinterMonitor.refresh();
+            }
+        });
+
+        // Server could not replay everything missed while disconnected - reload once
+        window.evtSource.addEventListener('resync', function(e) {
+            lastSSEEventTime = Date.now(); // Track event receipt for connection health
+            console.log('[SSE-EVENT] Resync requested:', e.data);
+            loadTablesForSelection();
+        });
+
         // Listen for table cleared event
         window.evtSource.addEventListener('table_cleared', async function(e) {
             try {
@@ -9687,6 +9702,25 @@ function setPrintFailureSessionIndicator() {
     }
 }
 
+// Background print queue: the order response returns before printing finishes,
+// so failures for orders sent from this device arrive over SSE instead.
+window.handlePrintJobSSE = (event) => {
+    try {
+        const job = JSON.parse(event.data || '{}');
+        if (!job || (job.device_id && job.device_id !== DEVICE_ID)) return;
+        if (job.kind === 'customer_receipt') {
+            showToast(`Customer receipt for order #${job.order_number} FAILED to print. Check printer.`, 'warning', 7000);
+            return;
+        }
+        const alertMessage = `\u26A0\uFE0F ORDER #${job.order_number} SAVED BUT NOT PRINTED! Kitchen won't see it. Reprint now from Management -> Orders.`;
+        showToast(alertMessage, 'error', 15000);
+        playPrintFailureAlert();
+        setPrintFailureSessionIndicator();
+    } catch (e) {
+        console.warn('[Print Alert] Could not process print job event:', e);
+    }
+};
+
 function updateManagementButtonIndicator() {
     const hasPrintFailure = sessionStorage.getItem('pospal_print_failure_occurred') === 'true';
     const managementBtn = document.getElementById('managementBtn');
@@ -10761,6 +10795,11 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
+function getOrderHistoryDate() {
+    const dateEl = document.getElementById('ohDate');
+    return (dateEl && dateEl.value) ? dateEl.value : new Date().toISOString().slice(0,10);
+}
+
 async function toggleOrderDetails(orderNumber) {
     const container = document.getElementById(`order-details-${orderNumber}`);
     if (!container) return;
@@ -10773,8 +10812,7 @@ async function toggleOrderDetails(orderNumber) {
     container.classList.remove('hidden');
     container.innerHTML = '<p class="text-xs text-gray-500 italic">Loading details...</p>';
     try {
-        const todayStr = new Date().toISOString().slice(0,10);
-        const resp = await fetch(`/api/order_details?date=${todayStr}&order_number=${encodeURIComponent(orderNumber)}`);
+        const resp = await fetch(`/api/order_details?date=${getOrderHistoryDate()}&order_number=${encodeURIComponent(orderNumber)}`);
         const data = await resp.json();
         if (!resp.ok || data.status === 'error') {
             throw new Error(data.message || `HTTP ${resp.status}`);
@@ -10823,6 +10861,7 @@ async function reprintOrder(orderNumToReprint) {
             },
             body: JSON.stringify({
                 order_number: orderNumToReprint,
+                date: getOrderHistoryDate(),
                 deviceId: DEVICE_ID,
                 deviceName: DevicePreferences.getDeviceName()
             })
@@ -0,0 +1,114 @@
+"""
+POSPal Runtime Services
+Background subsystems (queues, journals, stores) used by the Flask app
+"""
+
+from .print_queue import (
+    PrintJobQueue,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_PRINTING,
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_PARTIAL,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_INTERRUPTED,
+    TERMINAL_JOB_STATUSES,
+)
+from .write_behind import WriteBehindFlusher, write_atomic
+from .order_counter import OrderNumberAllocator
+from .order_journal import OrderJournal, FSYNC_NONE, FSYNC_BATCHED, FSYNC_EVERY
+from .order_store import SQLiteOrderStore
+from .order_index import OrderOffsetIndex
+from .order_overlay import OrderOutcomeOverlay
+from .table_sessions import TableSessionStore
+from .analytics_rollups import AnalyticsRollups
+from .event_bus import EventBus, EventSubscription
+from .sse_gateway import SSEGateway
+from .printer_backends import (
+    PrinterBackend,
+    Win32SpoolerBackend,
+    RawSocketBackend,
+    FileBackend,
+    create_printer_backend,
+    is_direct_printer,
+)
+from .job_monitor import (
+    PrintJobMonitor,
+    SPOOL_JOB_COMPLETED,
+    SPOOL_JOB_GONE,
+    SPOOL_JOB_FATAL,
+    SPOOL_JOB_PRINTER_FATAL,
+    SPOOL_JOB_BLOCKED,
+    SPOOL_JOB_TIMEOUT,
+    SPOOL_JOB_UNAVAILABLE,
+    SPOOL_JOB_ERROR,
+)
+from .ticket_store import TicketBlobStore
+from .receipt_templates import ReceiptTemplateCache, CompiledReceiptTemplate
+from .greek_codec import register_greek_codec, contains_greek, transliterate as greek_transliterate, GREEK_CODEC_NAME
+from .escpos_preview import escpos_to_text
+from .printer_health import PrinterHealthProber
+from .printer_routing import PrinterFailoverRouter
+from .kitchen_stations import KitchenStationRouter, DEFAULT_STATION as KITCHEN_DEFAULT_STATION
+from .audit_log import AuditLog
+from .table_history import TableHistoryStore
+from .usage_counters import UsageCounters
+from .device_registry import DeviceRegistry
+from .centralized_state import CentralizedState
+
+__all__ = [
+    'PrintJobQueue',
+    'JOB_STATUS_QUEUED',
+    'JOB_STATUS_PRINTING',
+    'JOB_STATUS_COMPLETED',
+    'JOB_STATUS_PARTIAL',
+    'JOB_STATUS_FAILED',
+    'JOB_STATUS_INTERRUPTED',
+    'TERMINAL_JOB_STATUSES',
+    'WriteBehindFlusher',
+    'write_atomic',
+    'OrderNumberAllocator',
+    'OrderJournal',
+    'FSYNC_NONE',
+    'FSYNC_BATCHED',
+    'FSYNC_EVERY',
+    'SQLiteOrderStore',
+    'OrderOffsetIndex',
+    'OrderOutcomeOverlay',
+    'TableSessionStore',
+    'AnalyticsRollups',
+    'EventBus',
+    'EventSubscription',
+    'SSEGateway',
+    'PrinterBackend',
+    'Win32SpoolerBackend',
+    'RawSocketBackend',
+    'FileBackend',
+    'create_printer_backend',
+    'is_direct_printer',
+    'PrintJobMonitor',
+    'SPOOL_JOB_COMPLETED',
+    'SPOOL_JOB_GONE',
+    'SPOOL_JOB_FATAL',
+    'SPOOL_JOB_PRINTER_FATAL',
+    'SPOOL_JOB_BLOCKED',
+    'SPOOL_JOB_TIMEOUT',
+    'SPOOL_JOB_UNAVAILABLE',
+    'SPOOL_JOB_ERROR',
+    'TicketBlobStore',
+    'ReceiptTemplateCache',
+    'CompiledReceiptTemplate',
+    'register_greek_codec',
+    'contains_greek',
+    'greek_transliterate',
+    'GREEK_CODEC_NAME',
+    'escpos_to_text',
+    'PrinterHealthProber',
+    'PrinterFailoverRouter',
+    'KitchenStationRouter',
+    'KITCHEN_DEFAULT_STATION',
+    'AuditLog',
+    'TableHistoryStore',
+    'UsageCounters',
+    'DeviceRegistry',
+    'CentralizedState',
+]
@@ -0,0 +1,282 @@
+"""
+Analytics Rollups
+Per-day sales aggregates kept up to date at order-write time and merged for analytics ranges
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+from .write_behind import WriteBehindFlusher, write_atomic
+
+ROLLUP_VERSION = 1
+
+
+def new_rollup(date_str: str) -> Dict[str, Any]:
+    return {
+        "version": ROLLUP_VERSION,
+        "date": date_str,
+        "signature": None,
+        "orders": 0,
+        "gross": 0.0,
+        "hours": {},       # "13" -> sales
+        "payments": {},    # method -> [orders, amount]
+        "items": {},       # name -> [quantity, revenue]
+        "addons": {},      # name -> [revenue, orders carrying it]
+        "order_payments": {},  # order_number -> [method, total], to move amounts on payment changes
+    }
+
+
+def add_order_row(rollup: Dict[str, Any], row: Dict[str, str]) -> bool:
+    """Fold one order row (CSV shape) into a rollup. Returns False if the row was skipped."""
+    try:
+        order_time = datetime.strptime(row.get('timestamp') or row.get('Date'), '%Y-%m-%d %H:%M:%S')
+        order_total = float(row.get('order_total') or row.get('Total') or 0.0)
+    except (ValueError, TypeError):
+        return False
+    order_no = str(row.get('order_number') or row.get('OrderNumber') or '')
+    if order_no and order_no in rollup["order_payments"]:
+        return False  # already counted
+    payment_method = row.get('payment_method') or row.get('Payment Method', 'Cash')
+
+    rollup["orders"] += 1
+    rollup["gross"] += order_total
+    hour = str(order_time.hour)
+    rollup["hours"][hour] = rollup["hours"].get(hour, 0.0) + order_total
+    payment = rollup["payments"].setdefault(payment_method, [0, 0.0])
+    payment[0] += 1
+    payment[1] += order_total
+    if order_no:
+        rollup["order_payments"][order_no] = [payment_method, order_total]
+
+    try:
+        items = json.loads(row.get('items_json') or row.get('Items') or '[]')
+    except ValueError:
+        return True
+    addons_in_order = set()
+    for item in items if isinstance(items, list) else []:
+        try:
+            item_name = item.get('name', 'Unknown')
+            quantity = int(item.get('quantity', 1))
+            unit_price = float(item.get('itemPriceWithModifiers', item.get('basePrice', 0.0)))
+        except (AttributeError, ValueError, TypeError):
+            continue
+        entry = rollup["items"].setdefault(item_name, [0, 0.0])
+        entry[0] += quantity
+        entry[1] += unit_price * quantity
+
+        opts = item.get('generalSelectedOptions') or []
+        if not isinstance(opts, list):
+            continue
+        for opt in opts:
+            try:
+                opt_name = opt.get('name')
+                if not opt_name:
+                    continue
+                price_change = float(opt.get('priceChange', 0.0))
+            except (AttributeError, ValueError, TypeError):
+                continue
+            addon = rollup["addons"].setdefault(opt_name, [0.0, 0])
+            if price_change > 0:
+                addon[0] += price_change * quantity
+            addons_in_order.add(opt_name)
+    for opt_name in addons_in_order:
+        rollup["addons"][opt_name][1] += 1
+    return True
+
+
+def merge_rollups(rollups: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum day rollups into one aggregate (hours keyed by int; no per-order detail)."""
+    merged = {"orders": 0, "gross": 0.0, "hours": {}, "payments": {}, "items": {}, "addons": {}}
+    for rollup in rollups:
+        merged["orders"] += rollup["orders"]
+        merged["gross"] += rollup["gross"]
+        for hour, total in rollup["hours"].items():
+            merged["hours"][int(hour)] = merged["hours"].get(int(hour), 0.0) + total
+        for key in ("payments", "items", "addons"):
+            target = merged[key]
+            for name, (a, b) in rollup[key].items():
+                current = target.get(name)
+                target[name] = [current[0] + a, current[1] + b] if current else [a, b]
+    return merged
+
+
+class AnalyticsRollups:
+    """
+    One analytics_YYYY-MM-DD.json per day holding the aggregates the
+    analytics view needs: order count, gross, payment split, hourly sales,
+    per-item quantity/revenue and per-addon revenue/attach counts.
+
+    record_order() and update_payment() update the in-memory rollup; dirty
+    days are written atomically by a flusher thread every flush_interval
+    seconds and on close(). A day is (re)built from row_source(date) the
+    first time it is needed if it has no rollup file or if the file's
+    stored signature(date) no longer matches, e.g. after a crash before the
+    last flush or when the CSV was rewritten.
+    """
+
+    def __init__(self, app_logger, data_dir: str,
+                 row_source: Callable[[str], Optional[Iterable[Dict[str, str]]]],
+                 signature: Optional[Callable[[str], Any]] = None,
+                 flush_interval: float = 2.0, file_prefix: str = "analytics_",
+                 max_cached_days: int = 120):
+        self.logger = app_logger
+        self.data_dir = data_dir
+        self.row_source = row_source
+        self.signature = signature
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.file_prefix = file_prefix
+        self.max_cached_days = max(1, int(max_cached_days))
+
+        self._lock = threading.RLock()
+        self._days: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty = set()
+
+        self._flush_lock = threading.Lock()
+        self._flusher = WriteBehindFlusher(app_logger, self.flush, self.flush_interval,
+                                           name="AnalyticsRollupFlusher", log_tag="ANALYTICS_ROLLUP")
+
+    def path_for(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.json")
+
+    # --- Updates ---
+    def record_order(self, date_str: str, row: Dict[str, str]):
+        with self._lock:
+            if add_order_row(self._day(date_str), row):
+                self._dirty.add(date_str)
+        self._schedule()
+
+    def update_payment(self, date_str: str, order_number, payment_method: str) -> bool:
+        """Move an already counted order to a new payment method."""
+        with self._lock:
+            rollup = self._day(date_str)
+            counted = rollup["order_payments"].get(str(order_number))
+            if counted is None or counted[0] == payment_method:
+                return False
+            old_method, total = counted
+            old = rollup["payments"].get(old_method)
+            if old:
+                old[0] -= 1
+                old[1] -= total
+                if old[0] <= 0:
+                    del rollup["payments"][old_method]
+            new = rollup["payments"].setdefault(payment_method, [0, 0.0])
+            new[0] += 1
+            new[1] += total
+            counted[0] = payment_method
+            self._dirty.add(date_str)
+        self._schedule()
+        return True
+
+    def invalidate(self, date_str: str):
+        """Forget a day so it is rebuilt from its rows on next use."""
+        with self._lock:
+            self._days.pop(date_str, None)
+            self._dirty.discard(date_str)
+            try:
+                os.remove(self.path_for(date_str))
+            except FileNotFoundError:
+                pass
+
+    # --- Reads ---
+    def get(self, date_str: str) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._day(date_str)))
+
+    def merge(self, dates: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            return merge_rollups([self._day(d) for d in dates])
+
+    def _day(self, date_str: str) -> Dict[str, Any]:
+        """Loaded rollup for a day. Caller holds _lock."""
+        rollup = self._days.get(date_str)
+        if rollup is None:
+            rollup = self._load(date_str)
+            self._days[date_str] = rollup
+            self._evict()
+        else:
+            self._days.move_to_end(date_str)
+        return rollup
+
+    def _evict(self):
+        while len(self._days) > self.max_cached_days:
+            for date_str in self._days:
+                if date_str not in self._dirty:
+                    del self._days[date_str]
+                    break
+            else:
+                return
+
+    def _current_signature(self, date_str: str):
+        if self.signature is None:
+            return None
+        try:
+            return self.signature(date_str)
+        except Exception as exc:
+            self.logger.warning(f"[ANALYTICS_ROLLUP] Signature failed for {date_str}: {exc}")
+            return None
+
+    def _load(self, date_str: str) -> Dict[str, Any]:
+        signature = self._current_signature(date_str)
+        path = self.path_for(date_str)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rollup = json.load(f)
+            if rollup.get("version") == ROLLUP_VERSION and rollup.get("signature") == signature:
+                return rollup
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[ANALYTICS_ROLLUP] Discarding unreadable {path}: {exc}")
+        return self._rebuild(date_str, signature)
+
+    def _rebuild(self, date_str: str, signature) -> Dict[str, Any]:
+        rollup = new_rollup(date_str)
+        try:
+            rows = self.row_source(date_str)
+        except Exception as exc:
+            self.logger.warning(f"[ANALYTICS_ROLLUP] Could not read orders for {date_str}: {exc}")
+            return rollup
+        if rows is None:
+            return rollup  # no orders that day; nothing worth persisting
+        for row in rows:
+            add_order_row(rollup, row)
+        rollup["signature"] = signature
+        self._dirty.add(date_str)
+        self.logger.info(f"[ANALYTICS_ROLLUP] Rebuilt {date_str} from {rollup['orders']} orders")
+        return rollup
+
+    # --- Persistence ---
+    def start(self):
+        self._flusher.start()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending = []
+                for date_str in sorted(self._dirty):
+                    rollup = self._days.get(date_str)
+                    if rollup is None:
+                        continue
+                    rollup["signature"] = self._current_signature(date_str)
+                    pending.append((date_str, json.dumps(rollup, ensure_ascii=False)))
+                self._dirty.clear()
+            for date_str, text in pending:
+                path = self.path_for(date_str)
+                try:
+                    write_atomic(path, text, fsync=False)
+                except OSError as exc:
+                    self.logger.error(f"[ANALYTICS_ROLLUP] Could not write {path}: {exc}")
+                    with self._lock:
+                        if date_str in self._days:
+                            self._dirty.add(date_str)
+
+    def close(self):
+        self._flusher.stop()
+        self.flush()
+
+    def _schedule(self):
+        self._flusher.schedule()
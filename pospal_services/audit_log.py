@@ -0,0 +1,349 @@
+"""
+Audit Log
+Append-only, size-rotated JSONL audit trail with a per-segment index for filtered queries
+"""
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+# offset, length, timestamp, table_id, operation
+IndexRow = Tuple[int, int, str, str, str]
+
+_SEGMENT_RE = re.compile(r"^(?P<prefix>.+)\.(?P<seq>\d{6})\.jsonl$")
+
+
+class AuditLog:
+    """
+    Writes audit entries as one JSON line each to <prefix>.NNNNNN.jsonl
+    segments in log_dir, starting a new segment once the current one reaches
+    max_segment_bytes. Nothing is ever rewritten, so an append costs one
+    write no matter how much history there is, and no history is dropped.
+
+    Every segment has a <prefix>.NNNNNN.idx sidecar with one tab-separated
+    line per entry: offset, length, timestamp, table_id and operation.
+    query() filters on the sidecars and only reads (by seeking) the entries
+    it returns. A sidecar that is missing or behind its segment is caught up
+    by scanning the segment; a torn last line from a crash is skipped.
+
+    legacy_file (the old whole-file JSON list) is imported into the first
+    segment once and then renamed to <legacy_file>.migrated.
+    """
+
+    def __init__(self, app_logger, log_dir: str, file_prefix: str = "table_audit",
+                 max_segment_bytes: int = 1024 * 1024, legacy_file: Optional[str] = None,
+                 cached_segments: int = 8):
+        self.logger = app_logger
+        self.log_dir = log_dir
+        self.file_prefix = file_prefix
+        self.max_segment_bytes = max(4096, int(max_segment_bytes))
+        self.legacy_file = legacy_file
+        self.cached_segments = max(1, int(cached_segments))
+
+        self._lock = threading.RLock()
+        self._opened = False
+        self._active_seq = 0
+        self._active_rows: List[IndexRow] = []
+        self._active_size = 0
+        self._segment = None
+        self._sidecar = None
+        self._sealed_cache: "OrderedDict[int, List[IndexRow]]" = OrderedDict()
+
+    # --- Paths ---
+    def segment_path(self, seq: int) -> str:
+        return os.path.join(self.log_dir, f"{self.file_prefix}.{seq:06d}.jsonl")
+
+    def index_path(self, seq: int) -> str:
+        return os.path.join(self.log_dir, f"{self.file_prefix}.{seq:06d}.idx")
+
+    def segments(self) -> List[int]:
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError:
+            return []
+        seqs = []
+        for name in names:
+            match = _SEGMENT_RE.match(name)
+            if match and match.group("prefix") == self.file_prefix:
+                seqs.append(int(match.group("seq")))
+        return sorted(seqs)
+
+    # --- Writes ---
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self._open()
+            if self._active_size and self._active_size + len(line) > self.max_segment_bytes:
+                self._rotate()
+            offset = self._active_size
+            self._segment.write(line)
+            self._segment.flush()
+            self._active_size += len(line)
+            row = self._index_row(offset, len(line), entry)
+            self._active_rows.append(row)
+            self._write_index_rows(self._sidecar, [row])
+            self._sidecar.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+            self._opened = False
+
+    # --- Reads ---
+    def query(self, table_id: Optional[str] = None, operation: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: int = 100, offset: int = 0, newest_first: bool = True) -> Dict[str, Any]:
+        """
+        Entries matching every given filter (since/until compare ISO timestamps,
+        until is inclusive of the whole given prefix), paged with limit/offset.
+        """
+        limit = max(0, int(limit))
+        offset = max(0, int(offset))
+        table_id = None if table_id in (None, "") else str(table_id)
+        until_key = until + "\uffff" if until else None
+
+        def _matches(row: IndexRow) -> bool:
+            _, _, timestamp, row_table, row_operation = row
+            return ((table_id is None or row_table == table_id)
+                    and (not operation or row_operation == operation)
+                    and (not since or timestamp >= since)
+                    and (until_key is None or timestamp <= until_key))
+
+        with self._lock:
+            self._open()
+            seqs = self.segments()
+        if newest_first:
+            seqs.reverse()
+
+        entries: List[Dict[str, Any]] = []
+        skipped = 0
+        has_more = False
+        for seq in seqs:
+            rows = self._rows_for(seq)
+            if newest_first:
+                rows = list(reversed(rows))
+            wanted = []
+            for row in rows:
+                if not _matches(row):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if len(entries) + len(wanted) >= limit:
+                    has_more = True
+                    break
+                wanted.append(row)
+            entries.extend(self._read_entries(seq, wanted))
+            if has_more:
+                break
+        return {
+            "entries": entries,
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more,
+            "next_offset": offset + len(entries) if has_more else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            seqs = self.segments()
+            total_bytes = 0
+            for seq in seqs:
+                try:
+                    total_bytes += os.path.getsize(self.segment_path(seq))
+                except OSError:
+                    pass
+            return {
+                "segments": len(seqs),
+                "active_segment": self._active_seq,
+                "active_entries": len(self._active_rows),
+                "bytes": total_bytes,
+                "max_segment_bytes": self.max_segment_bytes,
+            }
+
+    # --- Internals ---
+    @staticmethod
+    def _clean(value: Any) -> str:
+        return str(value if value is not None else "").replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+    def _index_row(self, offset: int, length: int, entry: Dict[str, Any]) -> IndexRow:
+        return (offset, length, self._clean(entry.get("timestamp")),
+                self._clean(entry.get("table_id")), self._clean(entry.get("operation")))
+
+    @staticmethod
+    def _write_index_rows(handle, rows: List[IndexRow]):
+        handle.writelines(f"{off}\t{length}\t{ts}\t{table}\t{op}\n" for off, length, ts, table, op in rows)
+
+    def _open(self):
+        """Open (creating or catching up) the newest segment for appends. Caller holds _lock."""
+        if self._opened:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        seqs = self.segments()
+        self._active_seq = seqs[-1] if seqs else 1
+        path = self.segment_path(self._active_seq)
+        self._active_rows = self._load_rows(self._active_seq)
+        self._segment = open(path, "ab")
+        self._active_size = self._segment.tell()
+        if self._active_size and not self._ends_with_newline(path):
+            # Torn write from a crash: terminate it so the next entry starts on its own line
+            self._segment.write(b"\n")
+            self._segment.flush()
+            self._active_size += 1
+        self._sidecar = open(self.index_path(self._active_seq), "a", encoding="utf-8")
+        self._opened = True
+        if not seqs:
+            self._import_legacy()
+
+    def _rotate(self):
+        """Seal the active segment and start the next one. Caller holds _lock."""
+        sealed_seq, sealed_rows = self._active_seq, self._active_rows
+        self._close_files()
+        self._remember_sealed(sealed_seq, sealed_rows)
+        self._active_seq += 1
+        self._active_rows = []
+        self._segment = open(self.segment_path(self._active_seq), "ab")
+        self._active_size = self._segment.tell()
+        self._sidecar = open(self.index_path(self._active_seq), "a", encoding="utf-8")
+        self.logger.info(f"[AUDIT_LOG] Sealed {os.path.basename(self.segment_path(sealed_seq))} "
+                         f"({len(sealed_rows)} entries); writing to segment {self._active_seq:06d}")
+
+    def _close_files(self):
+        for handle in (self._segment, self._sidecar):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+        self._segment = None
+        self._sidecar = None
+
+    def _remember_sealed(self, seq: int, rows: List[IndexRow]):
+        self._sealed_cache[seq] = rows
+        self._sealed_cache.move_to_end(seq)
+        while len(self._sealed_cache) > self.cached_segments:
+            self._sealed_cache.popitem(last=False)
+
+    def _rows_for(self, seq: int) -> List[IndexRow]:
+        with self._lock:
+            if seq == self._active_seq and self._opened:
+                return list(self._active_rows)
+            rows = self._sealed_cache.get(seq)
+            if rows is None:
+                rows = self._load_rows(seq)
+            self._remember_sealed(seq, rows)
+            return rows
+
+    def _load_rows(self, seq: int) -> List[IndexRow]:
+        """Read a segment's sidecar, scanning whatever part of the segment it does not cover yet."""
+        rows: List[IndexRow] = []
+        covered = 0
+        try:
+            with open(self.index_path(seq), "r", encoding="utf-8") as f:
+                for raw in f:
+                    parts = raw.rstrip("\n").split("\t")
+                    if len(parts) != 5:
+                        continue
+                    try:
+                        off, length = int(parts[0]), int(parts[1])
+                    except ValueError:
+                        continue
+                    if off != covered:
+                        break
+                    rows.append((off, length, parts[2], parts[3], parts[4]))
+                    covered = off + length
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not read {self.index_path(seq)}: {exc}")
+
+        try:
+            size = os.path.getsize(self.segment_path(seq))
+        except OSError:
+            return []
+        if covered > size:
+            rows, covered = [], 0
+        if covered == size:
+            return rows
+        scanned = self._scan(seq, covered)
+        rows.extend(scanned)
+        temp_path = self.index_path(seq) + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                self._write_index_rows(f, rows)
+            os.replace(temp_path, self.index_path(seq))
+        except OSError as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not write {self.index_path(seq)}: {exc}")
+        if scanned:
+            self.logger.info(f"[AUDIT_LOG] Indexed {len(scanned)} entries of segment {seq:06d} from the log")
+        return rows
+
+    def _scan(self, seq: int, start: int) -> List[IndexRow]:
+        rows: List[IndexRow] = []
+        pos = start
+        try:
+            with open(self.segment_path(seq), "rb") as f:
+                f.seek(start)
+                for line in f:
+                    line_start, pos = pos, pos + len(line)
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line.decode("utf-8"))
+                    except (UnicodeDecodeError, ValueError):
+                        continue
+                    if isinstance(entry, dict):
+                        rows.append(self._index_row(line_start, len(line), entry))
+        except OSError as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not scan {self.segment_path(seq)}: {exc}")
+        return rows
+
+    def _read_entries(self, seq: int, rows: List[IndexRow]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        entries = []
+        try:
+            with open(self.segment_path(seq), "rb") as f:
+                for off, length, *_ in rows:
+                    f.seek(off)
+                    try:
+                        entries.append(json.loads(f.read(length).decode("utf-8")))
+                    except (UnicodeDecodeError, ValueError):
+                        continue
+        except OSError as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not read {self.segment_path(seq)}: {exc}")
+        return entries
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def _import_legacy(self):
+        """Carry the old JSON-list audit file over into the first segment. Caller holds _lock."""
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        try:
+            with open(self.legacy_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not read legacy audit file {self.legacy_file}: {exc}")
+            legacy = []
+        imported = 0
+        for entry in legacy if isinstance(legacy, list) else []:
+            if isinstance(entry, dict):
+                self.append(entry)
+                imported += 1
+        try:
+            os.replace(self.legacy_file, self.legacy_file + ".migrated")
+        except OSError as exc:
+            self.logger.warning(f"[AUDIT_LOG] Could not rename legacy audit file: {exc}")
+        self.logger.info(f"[AUDIT_LOG] Imported {imported} entries from {os.path.basename(self.legacy_file)}")
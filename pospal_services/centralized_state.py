@@ -0,0 +1,169 @@
+"""
+Centralized State
+Versioned in-memory order state shared by all devices, persisted atomically in the background
+"""
+
+import copy
+import json
+import uuid
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+from .write_behind import WriteBehindFlusher, write_atomic
+
+STATE_DEFAULTS = {
+    "current_order": [],
+    "order_line_counter": 0,
+    "universal_comment": "",
+    "selected_table": "",
+}
+
+
+class CentralizedState:
+    """
+    Holds current_order, order_line_counter, universal_comment and
+    selected_table in memory behind a version number that goes up on every
+    change, so device polls can be answered from memory (or with a 304 when
+    the client already has the current version).
+
+    Each key keeps its own file in the existing format (JSON for the order,
+    plain text for the rest). Changes mark the key dirty and a flusher
+    thread writes dirty keys atomically (temp file + replace) at most every
+    flush_interval seconds; close() writes whatever is left.
+    """
+
+    def __init__(self, app_logger, paths: Dict[str, str], flush_interval: float = 1.0):
+        self.logger = app_logger
+        self.paths = dict(paths)
+        self.flush_interval = max(0.01, float(flush_interval))
+        # Distinguishes ETags across restarts, when the version starts again from 0
+        self.instance = uuid.uuid4().hex[:8]
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._version = 0
+        self._dirty = set()
+        self._writes = 0
+
+        self._flusher = WriteBehindFlusher(app_logger, self.flush, self.flush_interval,
+                                           name="CentralizedStateFlusher", log_tag="CENTRAL_STATE")
+
+    # --- Reads ---
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return copy.deepcopy(self._loaded()[key])
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """(version, copy of every key) taken under one lock."""
+        with self._lock:
+            return self._version, copy.deepcopy(self._loaded())
+
+    def etag(self, version: int, *extra: Any) -> str:
+        parts = [self.instance, str(version)] + [str(part) for part in extra]
+        return '"' + "-".join(parts) + '"'
+
+    # --- Updates ---
+    def set(self, key: str, value: Any) -> int:
+        return self.update({key: value})
+
+    def update(self, values: Dict[str, Any]) -> int:
+        """Change several keys as one version step. Returns the new version."""
+        unknown = set(values) - set(STATE_DEFAULTS)
+        if unknown:
+            raise KeyError(f"Unknown state keys: {', '.join(sorted(unknown))}")
+        normalized = {key: self._normalize(key, value) for key, value in values.items()}
+        with self._lock:
+            state = self._loaded()
+            state.update(normalized)
+            self._dirty.update(normalized)
+            self._version += 1
+            version = self._version
+        self._schedule()
+        return version
+
+    # --- Persistence ---
+    def start(self):
+        self._flusher.start()
+
+    def flush(self) -> bool:
+        ok = True
+        with self._flush_lock:
+            with self._lock:
+                if self._state is None:
+                    return True
+                pending = [(key, self._serialise(key, self._state[key])) for key in sorted(self._dirty)]
+                self._dirty.clear()
+            for key, text in pending:
+                path = self.paths[key]
+                try:
+                    write_atomic(path, text)
+                    with self._lock:
+                        self._writes += 1
+                except OSError as exc:
+                    ok = False
+                    self.logger.error(f"[CENTRAL_STATE] Could not write {path}: {exc}")
+                    with self._lock:
+                        self._dirty.add(key)
+        return ok
+
+    def close(self):
+        self._flusher.stop()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "dirty": sorted(self._dirty),
+                "writes": self._writes,
+                "flush_interval": self.flush_interval,
+            }
+
+    # --- Internals ---
+    @staticmethod
+    def _normalize(key: str, value: Any) -> Any:
+        """Coerce a value the way a write and re-read of its file would."""
+        if key == "current_order":
+            return copy.deepcopy(value) if value is not None else []
+        if key == "order_line_counter":
+            try:
+                return int(str(value).strip())
+            except (TypeError, ValueError):
+                return 0
+        return str(value).strip() if value is not None else ""
+
+    @staticmethod
+    def _serialise(key: str, value: Any) -> str:
+        if key == "current_order":
+            return json.dumps(value, indent=2)
+        return str(value)
+
+    def _schedule(self):
+        self._flusher.schedule()
+
+    def _loaded(self) -> Dict[str, Any]:
+        """Read every key's file on first use, falling back to defaults. Caller holds _lock."""
+        if self._state is not None:
+            return self._state
+        state = copy.deepcopy(STATE_DEFAULTS)
+        for key in STATE_DEFAULTS:
+            path = self.paths.get(key)
+            if not path:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                state[key] = json.loads(text) if key == "current_order" else self._normalize(key, text)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as exc:
+                self.logger.warning(f"[CENTRAL_STATE] Could not read {path}, using default: {exc}")
+        if not isinstance(state["current_order"], list):
+            state["current_order"] = []
+        self._state = state
+        return state
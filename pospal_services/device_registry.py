@@ -0,0 +1,211 @@
+"""
+Device Registry
+In-memory device presence (sessions) and profiles with throttled atomic flushes
+"""
+
+import copy
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Callable
+
+from .write_behind import WriteBehindFlusher, write_atomic
+
+
+def _migrate_sessions(raw: Any) -> Dict[str, Dict[str, Any]]:
+    """Accept the current {device_id: session} map or the legacy list / {"sessions": [...]} shapes."""
+    entries = None
+    if isinstance(raw, dict):
+        if isinstance(raw.get("sessions"), list):
+            entries = raw["sessions"]
+        else:
+            return {str(k): v for k, v in raw.items() if isinstance(v, dict)}
+    elif isinstance(raw, list):
+        entries = raw
+    migrated = {}
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            device_id = entry.get("device_id") or entry.get("id") or entry.get("device")
+            if device_id:
+                migrated[str(device_id)] = {k: v for k, v in entry.items() if k not in ("device_id", "id", "device")}
+    return migrated
+
+
+class DeviceRegistry:
+    """
+    Holds device_sessions.json (who is polling right now) and
+    device_profiles.json (names, roles, printer overrides, last seen) in
+    memory. Heartbeats only update the in-memory entry and mark the map
+    dirty; a flusher thread writes each dirty map atomically at most every
+    flush_interval seconds (see write_behind.WriteBehindFlusher), and
+    close() writes whatever is left.
+
+    cleanup_sessions() drops sessions whose last_seen is older than
+    session_ttl_seconds.
+    """
+
+    def __init__(self, app_logger, sessions_path: str, profiles_path: str,
+                 flush_interval: float = 5.0, session_ttl_seconds: float = 1800.0):
+        self.logger = app_logger
+        self.paths = {"sessions": sessions_path, "profiles": profiles_path}
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.session_ttl_seconds = session_ttl_seconds
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._maps: Dict[str, Optional[Dict[str, Dict[str, Any]]]] = {"sessions": None, "profiles": None}
+        self._dirty = set()
+        self._writes = 0
+
+        self._flusher = WriteBehindFlusher(app_logger, self.flush, self.flush_interval,
+                                           name="DeviceRegistryFlusher", log_tag="DEVICE_REGISTRY")
+
+    # --- Sessions ---
+    def register_session(self, device_id: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            session = {"info": info, "last_seen": datetime.now().isoformat(), "active": True}
+            self._map("sessions")[device_id] = session
+            self._dirty.add("sessions")
+        self._schedule()
+        return dict(session)
+
+    def touch_session(self, device_id: str) -> bool:
+        with self._lock:
+            session = self._map("sessions").get(device_id)
+            if session is None:
+                return False
+            session["last_seen"] = datetime.now().isoformat()
+            self._dirty.add("sessions")
+        self._schedule()
+        return True
+
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._map("sessions"))
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self._map("sessions"))
+
+    def cleanup_sessions(self) -> int:
+        """Drop sessions not seen within session_ttl_seconds. Returns how many were removed."""
+        cutoff = datetime.now() - timedelta(seconds=self.session_ttl_seconds)
+        with self._lock:
+            sessions = self._map("sessions")
+            stale = []
+            for device_id, session in sessions.items():
+                try:
+                    if datetime.fromisoformat(session.get("last_seen")) > cutoff:
+                        continue
+                except (AttributeError, TypeError, ValueError):
+                    pass  # invalid timestamp: drop the session
+                stale.append(device_id)
+            for device_id in stale:
+                sessions.pop(device_id, None)
+            if stale:
+                self._dirty.add("sessions")
+        if stale:
+            self.logger.info(f"Cleaned up {len(stale)} inactive sessions")
+            self._schedule()
+        return len(stale)
+
+    def replace_sessions(self, sessions: Any):
+        with self._lock:
+            self._maps["sessions"] = _migrate_sessions(copy.deepcopy(sessions))
+            self._dirty.add("sessions")
+        self._schedule()
+
+    # --- Profiles ---
+    def profile(self, device_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            profile = self._map("profiles").get(device_id)
+            return copy.deepcopy(profile) if profile is not None else None
+
+    def profiles(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._map("profiles"))
+
+    def replace_profiles(self, profiles: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            self._maps["profiles"] = {str(k): v for k, v in copy.deepcopy(profiles).items() if isinstance(v, dict)}
+            self._dirty.add("profiles")
+        self._schedule()
+
+    def update_profile(self, device_id: str, mutate: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Apply mutate(profile) to a device's profile (created if missing) and return a copy."""
+        with self._lock:
+            profiles = self._map("profiles")
+            profile = profiles.get(device_id)
+            if profile is None:
+                profile = {"device_id": device_id, "created_at": datetime.now().isoformat(), "printers": {}}
+            mutate(profile)
+            profiles[device_id] = profile
+            self._dirty.add("profiles")
+            result = copy.deepcopy(profile)
+        self._schedule()
+        return result
+
+    # --- Persistence ---
+    def start(self):
+        self._flusher.start()
+
+    def flush(self) -> bool:
+        ok = True
+        with self._flush_lock:
+            with self._lock:
+                pending = [(name, json.dumps(self._maps[name], indent=2)) for name in sorted(self._dirty)
+                           if self._maps[name] is not None]
+                self._dirty.clear()
+            for name, text in pending:
+                path = self.paths[name]
+                try:
+                    write_atomic(path, text, fsync=False)
+                    with self._lock:
+                        self._writes += 1
+                except OSError as exc:
+                    ok = False
+                    self.logger.error(f"[DEVICE_REGISTRY] Could not write {path}: {exc}")
+                    with self._lock:
+                        self._dirty.add(name)
+        return ok
+
+    def close(self):
+        self._flusher.stop()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._maps["sessions"] or {}),
+                "profiles": len(self._maps["profiles"] or {}),
+                "dirty": sorted(self._dirty),
+                "writes": self._writes,
+                "flush_interval": self.flush_interval,
+            }
+
+    # --- Internals ---
+    def _map(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """The named map, loaded from disk on first use. Caller holds _lock."""
+        loaded = self._maps[name]
+        if loaded is not None:
+            return loaded
+        path = self.paths[name]
+        data: Any = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[DEVICE_REGISTRY] Could not read {path}, starting empty: {exc}")
+        if name == "sessions":
+            loaded = _migrate_sessions(data)
+            if isinstance(data, list) or (isinstance(data, dict) and isinstance(data.get("sessions"), list)):
+                self._dirty.add(name)  # rewrite legacy shape on the next flush
+        else:
+            loaded = {str(k): v for k, v in data.items() if isinstance(v, dict)} if isinstance(data, dict) else {}
+        self._maps[name] = loaded
+        return loaded
+
+    def _schedule(self):
+        self._flusher.schedule()
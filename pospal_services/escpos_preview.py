@@ -0,0 +1,94 @@
+"""
+ESC/POS Preview
+Plain-text rendering of the ESC/POS byte streams POSPal sends to receipt printers
+"""
+
+from typing import List
+
+ESC = 0x1B
+GS = 0x1D
+
+# ESC commands followed by a single parameter byte (bold, align, font, code page, ...)
+_ESC_ONE_ARG = set(b"EaMt!-GdJ")
+CUT_MARKER = "-" * 8 + " cut " + "-" * 8
+
+
+def escpos_to_text(data: bytes, width: int = 42, small_width: int = 56, encoding: str = "cp858") -> str:
+    """
+    Strip printer commands and return what the paper would show: text lines
+    padded for centre/right alignment at the active font width, "[QR: ...]"
+    for QR codes and a marker line for each cut.
+    """
+    data = bytes(data)
+    lines: List[str] = []
+    text = bytearray()
+    state = {"align": 0, "font_b": False, "double_width": False}
+    qr_payload = b""
+
+    def line_width() -> int:
+        cols = small_width if state["font_b"] else width
+        return cols // 2 if state["double_width"] else cols
+
+    def flush():
+        line = text.decode(encoding, errors="replace").rstrip("\r")
+        cols = line_width()
+        if state["align"] == 1 and line:
+            line = line.center(cols).rstrip()
+        elif state["align"] == 2 and line:
+            line = line.rjust(cols)
+        lines.append(line)
+        text.clear()
+
+    i, n = 0, len(data)
+    while i < n:
+        byte = data[i]
+        if byte == ESC and i + 1 < n:
+            cmd = data[i + 1]
+            if cmd == ord("@"):
+                state.update(align=0, font_b=False, double_width=False)
+                i += 2
+            elif cmd in _ESC_ONE_ARG and i + 2 < n:
+                arg = data[i + 2]
+                if cmd == ord("a"):
+                    state["align"] = arg if arg in (0, 1, 2) else arg - 48
+                elif cmd == ord("M"):
+                    state["font_b"] = arg in (1, 49)
+                elif cmd == ord("d"):
+                    if text:
+                        flush()
+                    lines.extend([""] * arg)
+                i += 3
+            else:
+                i += 2
+        elif byte == GS and i + 1 < n:
+            cmd = data[i + 1]
+            if cmd == ord("!") and i + 2 < n:
+                state["double_width"] = bool(data[i + 2] & 0x70)
+                i += 3
+            elif cmd == ord("V") and i + 2 < n:
+                if text:
+                    flush()
+                lines.append(CUT_MARKER)
+                i += 4 if data[i + 2] in (65, 66) else 3
+            elif cmd == ord("(") and i + 4 < n:
+                # GS ( k pL pH cn fn [data]: keep the stored QR payload, show it on print
+                size = data[i + 3] | (data[i + 4] << 8)
+                block = data[i + 5:i + 5 + size]
+                if len(block) >= 2 and block[1] == 80:
+                    qr_payload = block[3:]
+                elif len(block) >= 2 and block[1] == 81:
+                    text.extend(b"[QR: " + qr_payload + b"]")
+                    flush()
+                i += 5 + size
+            else:
+                i += 3
+        elif byte == 0x0A:
+            flush()
+            i += 1
+        else:
+            if byte >= 0x20 or byte == 0x09:
+                text.append(byte)
+            i += 1
+    if text:
+        flush()
+    return "\n".join(lines)
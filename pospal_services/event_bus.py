@@ -0,0 +1,217 @@
+"""
+Event Bus
+Non-blocking server-sent event fan-out with event ids, a bounded replay ring and lag handling
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from itertools import islice
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+RESYNC_EVENT = "resync"
+
+# Event names whose newest payload supersedes older ones (optionally per payload key)
+DEFAULT_COALESCE: Dict[str, Optional[str]] = {
+    "settings": None,
+    "config_updated": None,
+    "tables_config": None,
+    "table_system_updated": None,
+    "license_status_update": None,
+    "table_status": "table_id",
+    "payment_updated": "table_id",
+}
+
+
+class EventSubscription:
+    """
+    A reader positioned in the bus ring. Subscriptions hold no queue of
+    their own, so a slow reader never costs the publisher anything: it just
+    falls behind, and next_batch() coalesces or resyncs when it catches up.
+    """
+
+    def __init__(self, bus: "EventBus", cursor: int, resync_reason: Optional[str] = None):
+        self.bus = bus
+        self.cursor = cursor
+        self.closed = False
+        self._resync_reason = resync_reason
+
+    def next_batch(self, timeout: Optional[float] = None) -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Events after the cursor as (event_id, name, data), waiting up to timeout.
+        Returns [] on timeout and None once the subscription or bus is closed.
+        """
+        return self.bus._read(self, timeout)
+
+    def poll(self) -> Optional[List[Tuple[str, str, str]]]:
+        return self.bus._read(self, 0)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    Publishes events to any number of stream readers without ever blocking
+    the publisher.
+
+    Every event gets an id of the form "<epoch>-<seq>" and is kept in a ring
+    of the last buffer_size events. Readers keep a cursor into the ring; a
+    reconnecting client passes its Last-Event-ID and is replayed everything
+    it missed. A reader that fell out of the ring (or presents an id from
+    another server run) receives a single "resync" event and continues from
+    the newest event. When a reader is more than coalesce_after events
+    behind, superseded state events (see DEFAULT_COALESCE) are collapsed to
+    their latest value.
+
+    Listeners registered with add_listener() are called after each publish;
+    they must not block (the asyncio gateway uses call_soon_threadsafe).
+    """
+
+    def __init__(self, app_logger, buffer_size: int = 512, coalesce_after: int = 32,
+                 coalesce: Optional[Dict[str, Optional[str]]] = None):
+        self.logger = app_logger
+        self.buffer_size = max(1, int(buffer_size))
+        self.coalesce_after = max(1, int(coalesce_after))
+        self.coalesce = dict(DEFAULT_COALESCE if coalesce is None else coalesce)
+        self.epoch = format(int(time.time() * 1000), "x")
+
+        self._cond = threading.Condition()
+        self._ring: deque = deque(maxlen=self.buffer_size)  # (seq, name, data, coalesce_key)
+        self._seq = 0
+        self._closed = False
+        self._subscriptions = set()
+        self._listeners: List[Callable[[int], None]] = []
+        self._stats = {"published": 0, "coalesced": 0, "resyncs": 0}
+
+    # --- Publishing ---
+    def publish(self, event_name: str, payload: Any) -> str:
+        if isinstance(payload, str):
+            data = payload
+        else:
+            try:
+                data = json.dumps(payload, ensure_ascii=False)
+            except Exception:
+                data = "{}"
+        key = None
+        if event_name in self.coalesce:
+            field = self.coalesce[event_name]
+            key = (event_name, payload.get(field) if field and isinstance(payload, dict) else None)
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            self._ring.append((seq, event_name, data, key))
+            self._stats["published"] += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(seq)
+            except Exception as exc:
+                self.logger.warning(f"[EVENT_BUS] Listener failed: {exc}")
+        return self.event_id(seq)
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def add_listener(self, listener: Callable[[int], None]):
+        with self._cond:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int], None]):
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    # --- Subscribing ---
+    def subscribe(self, last_event_id: Optional[str] = None) -> EventSubscription:
+        """Start reading after last_event_id, or at the newest event when none is given."""
+        with self._cond:
+            resync = None
+            cursor = self._seq
+            if last_event_id:
+                seq = self._parse_id(last_event_id)
+                oldest = self._ring[0][0] if self._ring else self._seq + 1
+                if seq is None or seq > self._seq:
+                    resync = "unknown_last_event_id"
+                elif seq < oldest - 1:
+                    resync = "lagged"
+                else:
+                    cursor = seq
+            subscription = EventSubscription(self, cursor, resync)
+            self._subscriptions.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        with self._cond:
+            subscription.closed = True
+            self._subscriptions.discard(subscription)
+            self._cond.notify_all()
+
+    def subscriber_count(self) -> int:
+        with self._cond:
+            return len(self._subscriptions)
+
+    def close(self):
+        """End every subscription once it has drained what is buffered (server shutdown)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._stats, last_event_id=self.event_id(self._seq),
+                        buffered=len(self._ring), subscribers=len(self._subscriptions))
+
+    # --- Internals ---
+    def _parse_id(self, event_id: str) -> Optional[int]:
+        epoch, _, seq = str(event_id).strip().partition("-")
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(seq)
+        except ValueError:
+            return None
+
+    def _read(self, subscription: EventSubscription, timeout: Optional[float]):
+        with self._cond:
+            if not subscription.closed and subscription.cursor >= self._seq and timeout != 0 \
+                    and subscription._resync_reason is None:
+                self._cond.wait_for(
+                    lambda: subscription.closed or self._closed or subscription.cursor < self._seq,
+                    timeout
+                )
+            if subscription.closed:
+                return None
+
+            oldest = self._ring[0][0] if self._ring else self._seq + 1
+            if subscription._resync_reason is None and subscription.cursor < oldest - 1:
+                subscription._resync_reason = "lagged"
+            if subscription._resync_reason is not None:
+                reason, subscription._resync_reason = subscription._resync_reason, None
+                subscription.cursor = self._seq
+                self._stats["resyncs"] += 1
+                data = json.dumps({"reason": reason, "last_event_id": self.event_id(self._seq)})
+                return [(self.event_id(self._seq), RESYNC_EVENT, data)]
+
+            start = subscription.cursor - oldest + 1
+            pending = list(islice(self._ring, max(0, start), None))
+            if pending:
+                subscription.cursor = pending[-1][0]
+            if len(pending) > self.coalesce_after:
+                before = len(pending)
+                pending = self._coalesced(pending)
+                self._stats["coalesced"] += before - len(pending)
+            if not pending and self._closed:
+                return None
+        return [(self.event_id(seq), name, data) for seq, name, data, _ in pending]
+
+    @staticmethod
+    def _coalesced(pending):
+        latest = {}
+        for index, event in enumerate(pending):
+            if event[3] is not None:
+                latest[event[3]] = index
+        return [event for index, event in enumerate(pending)
+                if event[3] is None or latest[event[3]] == index]
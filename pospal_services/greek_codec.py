@@ -0,0 +1,143 @@
+"""
+Greek Receipt Codec
+Registered "pospal-greek" codec: Greek-to-Latin transliteration encoded as cp437
+"""
+
+import re
+import codecs
+from functools import lru_cache
+from typing import Optional, Tuple
+
+GREEK_CODEC_NAME = "pospal-greek"
+TARGET_ENCODING = "cp437"
+MEMO_SIZE = 4096
+
+# Common Greek food/business terms that customers will recognize; replaced
+# before the letter mapping, in this order (καφές before καφέ)
+COMMON_TERMS = {
+    'καφές': 'KAFES',           # Coffee
+    'καφέ': 'KAFE',
+    'τσάι': 'TSAI',             # Tea
+    'νερό': 'NERO',             # Water
+    'τυρόπιτα': 'TYROPITA',     # Cheese pie
+    'σπανακόπιτα': 'SPANAKOPITA', # Spinach pie
+    'μουσακάς': 'MOUSAKAS',     # Moussaka
+    'σαλάτα': 'SALATA',         # Salad
+    'κρέας': 'KREAS',           # Meat
+    'ψάρι': 'PSARI',            # Fish
+    'πατάτες': 'PATATES',       # Potatoes
+    'κρεμμύδι': 'KREMMYDI',     # Onion
+    'ντομάτα': 'DOMATA',        # Tomato
+    'τυρί': 'TYRI',             # Cheese
+    'ψωμί': 'PSOMI',            # Bread
+    'κρασί': 'KRASI',           # Wine
+    'μπίρα': 'BIRA',            # Beer
+    'γάλα': 'GALA',             # Milk
+    'ζάχαρη': 'ZAHARI',         # Sugar
+    'αλάτι': 'ALATI',           # Salt
+    'πιπέρι': 'PIPERI',         # Pepper
+    'ελιές': 'ELIES',           # Olives
+    'φέτα': 'FETA',             # Feta cheese
+    'γιαούρτι': 'GIAOYRTI',     # Yogurt
+    'μέλι': 'MELI',             # Honey
+    'σοκολάτα': 'SOKOLATA',     # Chocolate
+    'παγωτό': 'PAGOTO',         # Ice cream
+}
+
+LETTERS = {
+    # Basic Greek alphabet with better phonetic mapping
+    'α': 'a', 'β': 'v', 'γ': 'g', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'i', 'θ': 'th',
+    'ι': 'i', 'κ': 'k', 'λ': 'l', 'μ': 'm', 'ν': 'n', 'ξ': 'ks', 'ο': 'o', 'π': 'p',
+    'ρ': 'r', 'σ': 's', 'ς': 's', 'τ': 't', 'υ': 'y', 'φ': 'f', 'χ': 'h', 'ψ': 'ps', 'ω': 'o',
+
+    # Capital letters
+    'Α': 'A', 'Β': 'V', 'Γ': 'G', 'Δ': 'D', 'Ε': 'E', 'Ζ': 'Z', 'Η': 'I', 'Θ': 'TH',
+    'Ι': 'I', 'Κ': 'K', 'Λ': 'L', 'Μ': 'M', 'Ν': 'N', 'Ξ': 'KS', 'Ο': 'O', 'Π': 'P',
+    'Ρ': 'R', 'Σ': 'S', 'Τ': 'T', 'Υ': 'Y', 'Φ': 'F', 'Χ': 'H', 'Ψ': 'PS', 'Ω': 'O',
+
+    # Accented characters (maintain vowel sounds)
+    'ά': 'a', 'έ': 'e', 'ή': 'i', 'ί': 'i', 'ό': 'o', 'ύ': 'y', 'ώ': 'o',
+    'ΐ': 'i', 'ΰ': 'y', 'ϊ': 'i', 'ϋ': 'y',
+}
+
+DIGRAPHS = {
+    # Common digraph patterns in Greek
+    'ου': 'ou', 'ΟΥ': 'OU', 'Ου': 'Ou',
+    'αι': 'ai', 'ΑΙ': 'AI', 'Αι': 'Ai',
+    'ει': 'ei', 'ΕΙ': 'EI', 'Ει': 'Ei',
+    'οι': 'oi', 'ΟΙ': 'OI', 'Οι': 'Oi',
+    'υι': 'yi', 'ΥΙ': 'YI', 'Υι': 'Yi',
+    'αυ': 'af', 'ΑΥ': 'AF', 'Αυ': 'Af',
+    'ευ': 'ef', 'ΕΥ': 'EF', 'Ευ': 'Ef',
+
+    # Common prefixes and suffixes
+    'μπ': 'b', 'ΜΠ': 'B', 'Μπ': 'B',      # μπ -> b sound
+    'ντ': 'd', 'ΝΤ': 'D', 'Ντ': 'D',      # ντ -> d sound
+    'γκ': 'g', 'ΓΚ': 'G', 'Γκ': 'G',      # γκ -> g sound
+    'τζ': 'tz', 'ΤΖ': 'TZ', 'Τζ': 'Tz',   # τζ -> tz sound
+    'τσ': 'ts', 'ΤΣ': 'TS', 'Τς': 'Ts',   # τσ -> ts sound
+}
+
+# Precomputed once at import: (term, TERM, Term, latin) and the str.translate table
+_TERM_FORMS = tuple((term, term.upper(), term.capitalize(), latin) for term, latin in COMMON_TERMS.items())
+_LETTER_TABLE = str.maketrans(LETTERS)
+# Leftmost, non-overlapping digraph matches: the same left-to-right pairing as
+# scanning two characters at a time and falling back to one
+_DIGRAPH_RE = re.compile("|".join(re.escape(pair) for pair in DIGRAPHS))
+_GREEK_RE = re.compile('[\u0370-\u03FF\u1F00-\u1FFF]')
+
+
+def contains_greek(text: str) -> bool:
+    return _GREEK_RE.search(text) is not None
+
+
+def _digraph(match) -> str:
+    return DIGRAPHS[match.group()]
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def transliterate(text: str) -> str:
+    """
+    Greek text to readable Latin for receipts. Memoised: the same menu item
+    names are printed over and over, so most calls are a dict hit.
+    """
+    # Whole-term matches are checked against the original lower-cased text
+    text_lower = text.lower()
+    for term, upper, capitalized, latin in _TERM_FORMS:
+        if term in text_lower:
+            text = text.replace(term, latin).replace(upper, latin).replace(capitalized, latin)
+    return _DIGRAPH_RE.sub(_digraph, text).translate(_LETTER_TABLE)
+
+
+def encode(text: str, errors: str = "strict") -> Tuple[bytes, int]:
+    return transliterate(text).encode(TARGET_ENCODING, errors), len(text)
+
+
+def decode(data, errors: str = "strict") -> Tuple[str, int]:
+    # Transliteration is one-way; decoding just reads the printer code page
+    return codecs.decode(bytes(data), TARGET_ENCODING, errors), len(data)
+
+
+_CODEC_INFO = codecs.CodecInfo(name=GREEK_CODEC_NAME, encode=encode, decode=decode)
+
+
+def _search(name: str) -> Optional[codecs.CodecInfo]:
+    if name.replace("_", "-") == GREEK_CODEC_NAME:
+        return _CODEC_INFO
+    return None
+
+
+_registered = False
+
+
+def register_greek_codec() -> str:
+    """Register the codec (idempotent) and return its name for str.encode()."""
+    global _registered
+    if not _registered:
+        codecs.register(_search)
+        _registered = True
+    return GREEK_CODEC_NAME
+
+
+def memo_stats():
+    return transliterate.cache_info()
@@ -0,0 +1,271 @@
+"""
+Spooler Job Monitor
+One watcher thread per printer that resolves a future for every outstanding spooler job
+"""
+
+import time
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Sequence
+
+SPOOL_JOB_COMPLETED = "completed"
+SPOOL_JOB_GONE = "gone"
+SPOOL_JOB_FATAL = "job_fatal"
+SPOOL_JOB_PRINTER_FATAL = "printer_fatal"
+SPOOL_JOB_BLOCKED = "blocked"
+SPOOL_JOB_TIMEOUT = "timeout"
+SPOOL_JOB_UNAVAILABLE = "printer_unavailable"
+SPOOL_JOB_ERROR = "error"
+
+# Delay after the n-th check of the youngest outstanding job; the last value repeats
+DEFAULT_BACKOFF = (0.03, 0.05, 0.1, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+
+JOB_PRINTED = 0x00000080
+JOB_COMPLETE = 0x00001000
+
+
+class _WatchedJob:
+    __slots__ = ("job_id", "future", "started", "deadline", "checks",
+                 "job_fatal", "printer_fatal", "blocked", "job_status")
+
+    def __init__(self, job_id, timeout_seconds: float):
+        self.job_id = job_id
+        self.future: Future = Future()
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout_seconds
+        self.checks = 0
+        self.job_fatal = None  # [count, first_seen] while the condition persists
+        self.printer_fatal = None
+        self.blocked = None
+        self.job_status = 0
+
+
+class _PrinterWatch:
+    """Outstanding jobs of one printer and the thread that sweeps them."""
+
+    def __init__(self, monitor: "PrintJobMonitor", printer_name: str):
+        self.monitor = monitor
+        self.printer_name = printer_name
+        self.jobs: Dict[Any, _WatchedJob] = {}
+        self.next_sweep = 0.0
+        self.cond = threading.Condition(monitor._lock)
+        self.thread = threading.Thread(target=monitor._run, args=(self,), name=f"PrintJobMonitor[{printer_name}]",
+                                       daemon=True)
+
+
+class PrintJobMonitor:
+    """
+    Tracks spooler jobs for every printer with a single EnumJobs call per
+    printer per sweep, instead of each request thread polling on its own.
+
+    watch() registers a job and returns a concurrent.futures.Future that
+    resolves to an outcome dict: state (one of the SPOOL_JOB_* values),
+    job_status, printer_status, elapsed, checks and error. Sweeps start
+    fast and back off (see DEFAULT_BACKOFF), so a job that finishes in 80 ms
+    is reported after ~80 ms rather than at the next 500 ms tick.
+
+    Fatal job/printer states and blocked queues only fail a job once they
+    were seen on fatal_checks / blocked_checks consecutive sweeps and have
+    persisted for fatal_seconds / blocked_seconds, so faster sweeps do not
+    make transient spooler states fail sooner. Watcher threads open their
+    own printer handle and exit after idle_seconds without jobs; if the
+    handle cannot be opened, pending jobs resolve as SPOOL_JOB_UNAVAILABLE,
+    while errors from the sweep itself resolve as SPOOL_JOB_ERROR.
+    """
+
+    def __init__(self, app_logger, win32print_module,
+                 status_reader: Optional[Callable[[Any, str], int]] = None,
+                 job_fatal_flags: int = 0, job_transient_flags: int = 0, printer_fatal_flags: int = 0,
+                 fatal_checks: int = 3, fatal_seconds: float = 1.0,
+                 blocked_checks: int = 5, blocked_seconds: float = 2.0,
+                 backoff: Sequence[float] = DEFAULT_BACKOFF, idle_seconds: float = 5.0):
+        self.logger = app_logger
+        self.win32print = win32print_module
+        self.status_reader = status_reader
+        self.job_fatal_flags = job_fatal_flags
+        self.job_transient_flags = job_transient_flags
+        self.printer_fatal_flags = printer_fatal_flags
+        self.fatal_checks = fatal_checks
+        self.fatal_seconds = fatal_seconds
+        self.blocked_checks = blocked_checks
+        self.blocked_seconds = blocked_seconds
+        self.backoff = tuple(backoff) or DEFAULT_BACKOFF
+        self.idle_seconds = idle_seconds
+
+        self._lock = threading.Lock()
+        self._watches: Dict[str, _PrinterWatch] = {}
+        self._closed = False
+        self._stats = {"watched": 0, "sweeps": 0, "enum_calls": 0}
+
+    # --- Public API ---
+    def watch(self, printer_name: str, job_id, timeout_seconds: float = 15.0) -> Future:
+        job = _WatchedJob(job_id, timeout_seconds)
+        with self._lock:
+            if self._closed:
+                job.future.set_result(self._outcome(job, SPOOL_JOB_ERROR, error=RuntimeError("monitor closed")))
+                return job.future
+            watch = self._watches.get(printer_name)
+            start = watch is None
+            if start:
+                watch = _PrinterWatch(self, printer_name)
+                self._watches[printer_name] = watch
+            watch.jobs[job_id] = job
+            first_check = job.started + self.backoff[0]
+            watch.next_sweep = min(watch.next_sweep, first_check) if len(watch.jobs) > 1 else first_check
+            self._stats["watched"] += 1
+            watch.cond.notify()
+        if start:
+            watch.thread.start()
+        return job.future
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: len(watch.jobs) for name, watch in self._watches.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, printers=len(self._watches))
+
+    def close(self, timeout: float = 2.0):
+        """Stop every watcher; jobs still outstanding resolve with state 'error'."""
+        with self._lock:
+            self._closed = True
+            watches = list(self._watches.values())
+            for watch in watches:
+                watch.cond.notify_all()
+        for watch in watches:
+            if watch.thread.is_alive():
+                watch.thread.join(timeout)
+
+    # --- Watcher thread ---
+    def _run(self, watch: _PrinterWatch):
+        handle = None
+        leftovers = []
+        try:
+            while True:
+                with self._lock:
+                    while not self._closed:
+                        now = time.monotonic()
+                        if watch.jobs and now >= watch.next_sweep:
+                            break
+                        if not watch.jobs:
+                            if not watch.cond.wait(self.idle_seconds) and not watch.jobs:
+                                self._watches.pop(watch.printer_name, None)
+                                return
+                            continue
+                        watch.cond.wait(watch.next_sweep - now)
+                    if self._closed:
+                        self._watches.pop(watch.printer_name, None)
+                        leftovers, watch.jobs = list(watch.jobs.values()), {}
+                        break
+                    jobs = list(watch.jobs.values())
+
+                try:
+                    if handle is None:
+                        handle = self.win32print.OpenPrinter(watch.printer_name)
+                except Exception as exc:
+                    resolved = [(job, self._outcome(job, SPOOL_JOB_UNAVAILABLE, error=exc)) for job in jobs]
+                else:
+                    try:
+                        resolved = self._sweep(watch.printer_name, handle, jobs)
+                    except Exception as exc:
+                        resolved = [(job, self._outcome(job, SPOOL_JOB_ERROR, error=exc)) for job in jobs]
+                        handle = self._close_handle(handle)
+
+                with self._lock:
+                    for job, _ in resolved:
+                        watch.jobs.pop(job.job_id, None)
+                    now = time.monotonic()
+                    watch.next_sweep = min(
+                        (min(now + self.backoff[min(job.checks, len(self.backoff) - 1)], job.deadline)
+                         for job in watch.jobs.values()),
+                        default=now
+                    )
+                for job, outcome in resolved:
+                    job.future.set_result(outcome)
+            for job in leftovers:
+                job.future.set_result(self._outcome(job, SPOOL_JOB_ERROR, error=RuntimeError("monitor closed")))
+        finally:
+            self._close_handle(handle)
+
+    def _close_handle(self, handle):
+        if handle is not None:
+            try:
+                self.win32print.ClosePrinter(handle)
+            except Exception:
+                pass
+        return None
+
+    def _sweep(self, printer_name: str, handle, jobs):
+        """One EnumJobs (and at most one status read) for every outstanding job of a printer."""
+        queue = {info.get('JobId'): info for info in self.win32print.EnumJobs(handle, 0, -1, 1)}
+        with self._lock:
+            self._stats["sweeps"] += 1
+            self._stats["enum_calls"] += 1
+
+        now = time.monotonic()
+        printer_status = None
+        resolved = []
+        for job in jobs:
+            job.checks += 1
+            info = queue.get(job.job_id)
+            if info is None:
+                resolved.append((job, self._outcome(job, SPOOL_JOB_GONE)))
+                continue
+            status = job.job_status = int(info.get('Status', 0) or 0)
+            if status == 0 or status & (JOB_PRINTED | JOB_COMPLETE):
+                resolved.append((job, self._outcome(job, SPOOL_JOB_COMPLETED)))
+                continue
+
+            if printer_status is None:
+                printer_status = self._printer_status(handle, printer_name)
+
+            job.job_fatal = self._persist(job.job_fatal, status & self.job_fatal_flags, now)
+            job.printer_fatal = self._persist(job.printer_fatal, printer_status & self.printer_fatal_flags, now)
+            job.blocked = self._persist(job.blocked, status & self.job_transient_flags, now)
+            if job.blocked and job.blocked[0] == 1:
+                self.logger.info(
+                    f"[PRINTER_MONITOR] Job {job.job_id} for '{printer_name}' reported transient status "
+                    f"0x{status:04x}; continuing to monitor."
+                )
+
+            if self._held(job.job_fatal, self.fatal_checks, self.fatal_seconds, now):
+                resolved.append((job, self._outcome(job, SPOOL_JOB_FATAL, printer_status)))
+            elif self._held(job.printer_fatal, self.fatal_checks, self.fatal_seconds, now):
+                resolved.append((job, self._outcome(job, SPOOL_JOB_PRINTER_FATAL, printer_status)))
+            elif self._held(job.blocked, self.blocked_checks, self.blocked_seconds, now):
+                resolved.append((job, self._outcome(job, SPOOL_JOB_BLOCKED, printer_status)))
+            elif now >= job.deadline:
+                resolved.append((job, self._outcome(job, SPOOL_JOB_TIMEOUT, printer_status)))
+        return resolved
+
+    def _printer_status(self, handle, printer_name: str) -> int:
+        if self.status_reader is not None:
+            return int(self.status_reader(handle, printer_name) or 0)
+        return int(self.win32print.GetPrinter(handle, 2).get('Status', 0) or 0)
+
+    @staticmethod
+    def _persist(streak, active: int, now: float):
+        if not active:
+            return None
+        if streak is None:
+            return [1, now]
+        streak[0] += 1
+        return streak
+
+    @staticmethod
+    def _held(streak, checks: int, seconds: float, now: float) -> bool:
+        return streak is not None and streak[0] >= checks and now - streak[1] >= seconds
+
+    @staticmethod
+    def _outcome(job: _WatchedJob, state: str, printer_status: Optional[int] = None,
+                 error: Optional[BaseException] = None) -> Dict[str, Any]:
+        return {
+            "state": state,
+            "job_id": job.job_id,
+            "job_status": job.job_status,
+            "printer_status": printer_status,
+            "elapsed": time.monotonic() - job.started,
+            "checks": job.checks,
+            "error": error,
+        }
@@ -0,0 +1,170 @@
+"""
+Kitchen Station Routing
+Splits an order's items into per-station kitchen tickets by menu category
+"""
+
+import os
+import json
+import threading
+from typing import Optional, Dict, Any, Callable, List
+
+DEFAULT_STATION = "kitchen"
+
+
+class KitchenStationRouter:
+    """
+    Maps menu categories to kitchen stations (bar, grill, ...) so each order
+    can be split into one ticket per station.
+
+    stations_fn() returns the configured stations, e.g.
+    {"bar": {"categories": ["5.COLD DRINKS"], "printer": "Bar", "failover": [], "label": "BAR"}}.
+    menu_path_fn() returns the path of menu.json; the item -> category index
+    built from it is reused until the file changes. Items are matched to
+    their category by id first, then by name; items whose category is not
+    mapped (or that are not on the menu) go to DEFAULT_STATION, which prints
+    on the normal kitchen printer.
+    """
+
+    def __init__(self, app_logger, stations_fn: Callable[[], Dict[str, Any]],
+                 menu_path_fn: Callable[[], str]):
+        self.logger = app_logger
+        self.stations_fn = stations_fn
+        self.menu_path_fn = menu_path_fn
+
+        self._lock = threading.Lock()
+        self._menu_key = None
+        self._by_id: Dict[str, str] = {}
+        self._by_name: Dict[str, str] = {}
+
+    # --- Configuration ---
+    def stations(self) -> Dict[str, Dict[str, Any]]:
+        """Configured stations, normalised: station -> {label, printer, failover, categories}."""
+        try:
+            configured = self.stations_fn() or {}
+        except Exception as exc:
+            self.logger.warning(f"[KITCHEN_STATIONS] Could not read station configuration: {exc}")
+            return {}
+        if not isinstance(configured, dict):
+            self.logger.warning(f"[KITCHEN_STATIONS] Ignoring station configuration of type {type(configured).__name__}")
+            return {}
+        result = {}
+        for name, station in configured.items():
+            name = str(name or "").strip()
+            if not name or name == DEFAULT_STATION or not isinstance(station, dict):
+                continue
+            categories = station.get("categories") or []
+            failover = station.get("failover") or []
+            if isinstance(categories, str):
+                categories = categories.split(",")
+            if isinstance(failover, str):
+                failover = failover.split(",")
+            if not isinstance(categories, (list, tuple)):
+                categories = []
+            if not isinstance(failover, (list, tuple)):
+                failover = []
+            result[name] = {
+                "label": str(station.get("label") or name).strip(),
+                "printer": str(station.get("printer") or "").strip(),
+                "failover": [str(p).strip() for p in failover if str(p).strip()],
+                "categories": [str(c).strip() for c in categories if str(c).strip()],
+            }
+        return result
+
+    def enabled(self) -> bool:
+        return any(station["categories"] for station in self.stations().values())
+
+    # --- Lookups ---
+    def category_for(self, item: Dict[str, Any]) -> Optional[str]:
+        """Menu category of an order item (an explicit 'category' on the item wins)."""
+        category = str(item.get("category") or "").strip()
+        if category:
+            return category
+        self._refresh_menu_index()
+        with self._lock:
+            item_id = item.get("id")
+            if item_id is not None and str(item_id) in self._by_id:
+                return self._by_id[str(item_id)]
+            return self._by_name.get(str(item.get("name") or "").strip().casefold())
+
+    def station_for(self, item: Dict[str, Any], stations: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        stations = self.stations() if stations is None else stations
+        category = (self.category_for(item) or "").casefold()
+        if category:
+            for name, station in stations.items():
+                if any(c.casefold() == category for c in station["categories"]):
+                    return name
+        return DEFAULT_STATION
+
+    # --- Splitting ---
+    def split(self, order_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        One entry per station that has items in the order, in configured order
+        with DEFAULT_STATION last: {"station", "label", "printer", "failover", "order"}.
+        Each "order" is a copy of order_data holding only that station's items.
+        """
+        stations = self.stations()
+        items_by_station: Dict[str, list] = {}
+        for item in order_data.get("items") or []:
+            items_by_station.setdefault(self.station_for(item, stations), []).append(item)
+
+        splits = []
+        for name in list(stations) + [DEFAULT_STATION]:
+            items = items_by_station.get(name)
+            if not items:
+                continue
+            station = stations.get(name) or {"label": "", "printer": "", "failover": []}
+            station_order = dict(order_data)
+            station_order["items"] = items
+            station_order["station"] = name
+            splits.append({
+                "station": name,
+                "label": station["label"],
+                "printer": station["printer"],
+                "failover": list(station["failover"]),
+                "order": station_order,
+            })
+        return splits
+
+    def describe(self) -> Dict[str, Any]:
+        """Stations plus the menu categories no station claims (they print on the kitchen printer)."""
+        stations = self.stations()
+        self._refresh_menu_index()
+        with self._lock:
+            menu_categories = sorted(set(self._by_name.values()) | set(self._by_id.values()))
+        claimed = {c.casefold() for station in stations.values() for c in station["categories"]}
+        return {
+            "stations": stations,
+            "default_station": DEFAULT_STATION,
+            "menu_categories": menu_categories,
+            "unassigned_categories": [c for c in menu_categories if c.casefold() not in claimed],
+        }
+
+    # --- Internals ---
+    def _refresh_menu_index(self):
+        path = self.menu_path_fn()
+        try:
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = (path, None, None)
+        with self._lock:
+            if key == self._menu_key:
+                return
+        by_id, by_name = {}, {}
+        if key[1] is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    menu = json.load(f)
+                for category, items in (menu.items() if isinstance(menu, dict) else []):
+                    for item in items or []:
+                        if not isinstance(item, dict):
+                            continue
+                        if item.get("id") is not None:
+                            by_id[str(item["id"])] = category
+                        name = str(item.get("name") or "").strip().casefold()
+                        if name:
+                            by_name.setdefault(name, category)
+            except (OSError, ValueError) as exc:
+                self.logger.warning(f"[KITCHEN_STATIONS] Could not index menu categories from {path}: {exc}")
+        with self._lock:
+            self._menu_key, self._by_id, self._by_name = key, by_id, by_name
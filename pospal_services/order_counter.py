@@ -0,0 +1,172 @@
+"""
+Daily Order Number Allocator
+In-memory order counter persisted through an append-only sequence journal
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+class OrderNumberAllocator:
+    """
+    Hands out daily order numbers from memory behind a single lock.
+
+    Every allocation is appended to a small sequence journal and fsync'd
+    before the number is returned, so after a crash the highest journaled
+    value is exactly the last number issued. The journal is folded into the
+    JSON snapshot (the legacy order_counter.json format) on day rollover and
+    whenever it grows past compact_every entries.
+    """
+
+    def __init__(self, app_logger, snapshot_path: str, journal_path: str,
+                 compact_every: int = 500, fsync: bool = True):
+        self.logger = app_logger
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = max(1, int(compact_every))
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._date: Optional[str] = None
+        self._counter = 0
+        self._journal_entries = 0
+        self._journal_file = None
+
+    # --- Public API ---
+    def next_number(self, today: Optional[str] = None) -> int:
+        """Allocate and durably record the next order number for today."""
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            self._ensure_loaded()
+            if self._date != today:
+                self._roll_over(today)
+            value = self._counter + 1
+            self._append(today, value)
+            self._counter = value
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+            return value
+
+    def peek_next(self, today: Optional[str] = None) -> int:
+        """Return the number the next order will receive without allocating it."""
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            self._ensure_loaded()
+            return (self._counter if self._date == today else 0) + 1
+
+    def current(self) -> Tuple[Optional[str], int]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._date, self._counter
+
+    def close(self):
+        """Fold the journal into the snapshot and release the file handle."""
+        with self._lock:
+            if self._loaded and self._date:
+                self._compact()
+            self._close_journal()
+
+    # --- Recovery ---
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        date_str, counter = self._read_snapshot()
+        journal_entries = 0
+        if os.path.exists(self.journal_path):
+            try:
+                self._truncate_torn_tail()
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for raw in f:
+                        parts = raw.split()
+                        if len(parts) != 2 or len(parts[0]) != 10:
+                            continue
+                        entry_date, entry_value = parts[0], parts[1]
+                        try:
+                            value = int(entry_value)
+                        except ValueError:
+                            continue
+                        journal_entries += 1
+                        if entry_date != date_str:
+                            if date_str is None or entry_date > date_str:
+                                date_str, counter = entry_date, value
+                            continue
+                        counter = max(counter, value)
+            except Exception as exc:
+                self.logger.error(f"[ORDER_COUNTER] Could not replay journal {self.journal_path}: {exc}")
+        self._date = date_str
+        self._counter = counter
+        self._journal_entries = journal_entries
+        self._loaded = True
+        self.logger.info(f"[ORDER_COUNTER] Recovered counter {counter} for {date_str or 'n/a'} ({journal_entries} journal entries)")
+
+    def _truncate_torn_tail(self):
+        """Drop a partial last line left by a crash mid-append; that number was never handed out."""
+        with open(self.journal_path, "rb+") as f:
+            data = f.read()
+            if not data or data.endswith(b"\n"):
+                return
+            keep = data.rfind(b"\n") + 1
+            f.truncate(keep)
+            self.logger.warning(f"[ORDER_COUNTER] Discarded torn journal entry {data[keep:]!r}")
+
+    def _read_snapshot(self) -> Tuple[Optional[str], int]:
+        if not os.path.exists(self.snapshot_path):
+            return None, 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+            return data.get("date"), int(data.get("counter", 0) or 0)
+        except (json.JSONDecodeError, ValueError, TypeError, OSError) as exc:
+            self.logger.warning(f"[ORDER_COUNTER] Error reading {self.snapshot_path} ({exc}); relying on journal.")
+            return None, 0
+
+    # --- Persistence ---
+    def _append(self, date_str: str, value: int):
+        if self._journal_file is None:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_file.write(f"{date_str} {value}\n")
+        self._journal_file.flush()
+        if self.fsync:
+            os.fsync(self._journal_file.fileno())
+        self._journal_entries += 1
+
+    def _roll_over(self, today: str):
+        self.logger.info(f"[ORDER_COUNTER] New business day {today}; resetting counter (previous: {self._date} #{self._counter})")
+        self._date = today
+        self._counter = 0
+        self._compact()
+
+    def _compact(self):
+        """Atomically write the snapshot, then truncate the journal."""
+        temp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"date": self._date, "counter": self._counter}, f)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+        except Exception as exc:
+            # Keep the journal: it still holds everything needed for recovery
+            self.logger.warning(f"[ORDER_COUNTER] Snapshot write failed: {exc}")
+            return
+        self._close_journal()
+        try:
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+            self._journal_entries = 0
+        except Exception as exc:
+            self.logger.warning(f"[ORDER_COUNTER] Could not truncate journal: {exc}")
+
+    def _close_journal(self):
+        if self._journal_file is not None:
+            try:
+                self._journal_file.close()
+            except Exception:
+                pass
+            self._journal_file = None
@@ -0,0 +1,253 @@
+"""
+Order CSV Offset Index
+Sidecar orders_YYYY-MM-DD.idx files mapping order numbers to byte ranges in the day CSV
+"""
+
+import os
+import io
+import csv
+import threading
+from typing import Optional, Dict, Tuple, List
+
+
+class OrderOffsetIndex:
+    """
+    Maps order_number -> (offset, length) of its row in orders_YYYY-MM-DD.csv.
+
+    The order journal reports every append, so the index normally just grows
+    with the CSV. Each .idx line is "order_number offset length". An index
+    that is missing, or no longer ends where the CSV ends, is brought up to
+    date lazily on the next lookup: new rows are scanned from the last known
+    offset, and a shrunk or rewritten file is re-indexed from scratch. Rows
+    read through the index are checked against the requested number, so an
+    in-place rewrite that kept the file size still triggers a rebuild.
+    """
+
+    def __init__(self, app_logger, data_dir: str, file_prefix: str = "orders_"):
+        self.logger = app_logger
+        self.data_dir = data_dir
+        self.file_prefix = file_prefix
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._covered: Dict[str, int] = {}
+        self._headers: Dict[str, List[str]] = {}
+        self._sidecar = None
+        self._sidecar_date: Optional[str] = None
+
+    # --- Paths ---
+    def csv_path(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.csv")
+
+    def index_path(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.idx")
+
+    # --- Journal hook ---
+    def record(self, date_str: str, order_number, offset: int, length: int):
+        """Register a row the journal just appended at [offset, offset + length)."""
+        key = str(order_number)
+        with self._lock:
+            entries = self._entries.get(date_str)
+            if entries is None or self._covered.get(date_str) != offset:
+                # Not loaded (or out of step): index every earlier row from disk first.
+                # The row is already written, so catching up covers it as well.
+                self._fresh_entries(date_str)
+            else:
+                entries.setdefault(key, (offset, length))
+                self._covered[date_str] = offset + length
+                self._append_sidecar(date_str, [(key, offset, length)])
+
+    def invalidate(self, date_str: str):
+        """Drop a day's offsets and its .idx file, e.g. after the CSV was rewritten in place."""
+        with self._lock:
+            self._entries.pop(date_str, None)
+            self._covered.pop(date_str, None)
+            self._headers.pop(date_str, None)
+            self._close_sidecar()
+            try:
+                os.remove(self.index_path(date_str))
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                self.logger.warning(f"[ORDER_INDEX] Could not remove {self.index_path(date_str)}: {exc}")
+
+    def close(self):
+        with self._lock:
+            self._close_sidecar()
+
+    # --- Lookups ---
+    def find_row(self, date_str: str, order_number) -> Optional[Dict[str, str]]:
+        """Return the CSV row for an order by seeking straight to it, or None."""
+        key = str(order_number)
+        for attempt in range(2):
+            with self._lock:
+                entries = self._fresh_entries(date_str)
+                if entries is None:
+                    return None
+                span = entries.get(key)
+                header = self._headers.get(date_str)
+            if span is None or not header:
+                return None
+            row = self._read_row(date_str, header, span)
+            if row is not None and row.get("order_number") == key:
+                return row
+            self.logger.info(f"[ORDER_INDEX] Stale offsets for {date_str}; rebuilding index")
+            with self._lock:
+                self._rebuild(date_str)
+        return None
+
+    def _read_row(self, date_str: str, header: List[str], span: Tuple[int, int]) -> Optional[Dict[str, str]]:
+        offset, length = span
+        try:
+            with open(self.csv_path(date_str), "rb") as f:
+                f.seek(offset)
+                data = f.read(length)
+            values = next(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+        except (OSError, UnicodeDecodeError, StopIteration, csv.Error):
+            return None
+        return dict(zip(header, values + [""] * (len(header) - len(values))))
+
+    # --- Maintenance ---
+    def _fresh_entries(self, date_str: str) -> Optional[Dict[str, Tuple[int, int]]]:
+        """Entries for a day that cover the whole CSV. Caller holds _lock."""
+        path = self.csv_path(date_str)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        if date_str not in self._entries:
+            self._load(date_str)
+        covered = self._covered.get(date_str, 0)
+        if covered > size or date_str not in self._headers or not self._at_record_boundary(path, covered):
+            self._rebuild(date_str)
+        elif covered < size:
+            self._catch_up(date_str)
+        return self._entries.get(date_str)
+
+    @staticmethod
+    def _at_record_boundary(path: str, offset: int) -> bool:
+        if offset <= 0:
+            return True
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset - 1)
+                return f.read(1) == b"\n"
+        except OSError:
+            return False
+
+    def _load(self, date_str: str):
+        """Load a day's .idx; it must describe the rows contiguously from the end of the CSV header."""
+        entries: Dict[str, Tuple[int, int]] = {}
+        covered = self._read_header(date_str)
+        rejected = False
+        try:
+            with open(self.index_path(date_str), "r", encoding="utf-8") as f:
+                for raw in f:
+                    parts = raw.split()
+                    if len(parts) != 3:
+                        continue
+                    try:
+                        offset, length = int(parts[1]), int(parts[2])
+                    except ValueError:
+                        continue
+                    if offset != covered:
+                        # Does not start at the first row, or has a gap: rows would go unindexed
+                        rejected = True
+                        break
+                    entries.setdefault(parts[0], (offset, length))
+                    covered = offset + length
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.logger.warning(f"[ORDER_INDEX] Could not read {self.index_path(date_str)}: {exc}")
+        self._entries[date_str] = entries
+        self._covered[date_str] = covered
+        if rejected:
+            self.logger.info(f"[ORDER_INDEX] {self.index_path(date_str)} does not match the CSV; rebuilding")
+            self._rebuild(date_str)
+
+    def _read_header(self, date_str: str) -> int:
+        """Cache the CSV header and return its length in bytes (0 if unreadable)."""
+        try:
+            with open(self.csv_path(date_str), "rb") as f:
+                first = f.readline()
+            self._headers[date_str] = next(csv.reader([first.decode("utf-8").rstrip("\r\n")]))
+            return len(first)
+        except (OSError, UnicodeDecodeError, StopIteration):
+            self._headers.pop(date_str, None)
+            return 0
+
+    def _rebuild(self, date_str: str):
+        self._entries[date_str] = {}
+        self._headers.pop(date_str, None)
+        self._covered[date_str] = self._read_header(date_str)
+        added = self._scan(date_str)
+        lines = [f"{key} {off} {length}\n" for key, (off, length) in
+                 sorted(self._entries[date_str].items(), key=lambda kv: kv[1][0])]
+        temp_path = self.index_path(date_str) + ".tmp"
+        if self._sidecar_date == date_str:
+            self._close_sidecar()
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(temp_path, self.index_path(date_str))
+        except OSError as exc:
+            self.logger.warning(f"[ORDER_INDEX] Could not write {self.index_path(date_str)}: {exc}")
+        self.logger.info(f"[ORDER_INDEX] Rebuilt index for {date_str} ({len(added)} rows)")
+
+    def _catch_up(self, date_str: str):
+        added = self._scan(date_str)
+        if added:
+            self._append_sidecar(date_str, added)
+
+    def _append_sidecar(self, date_str: str, rows: List[Tuple[str, int, int]]):
+        """Append entries to the day's .idx, keeping the file open while the day is current."""
+        try:
+            if self._sidecar_date != date_str:
+                self._close_sidecar()
+                self._sidecar = open(self.index_path(date_str), "a", encoding="utf-8")
+                self._sidecar_date = date_str
+            self._sidecar.writelines(f"{key} {off} {length}\n" for key, off, length in rows)
+            self._sidecar.flush()
+        except OSError as exc:
+            self.logger.warning(f"[ORDER_INDEX] Could not append to {self.index_path(date_str)}: {exc}")
+            self._close_sidecar()
+
+    def _close_sidecar(self):
+        if self._sidecar is not None:
+            try:
+                self._sidecar.close()
+            except OSError:
+                pass
+        self._sidecar = None
+        self._sidecar_date = None
+
+    def _scan(self, date_str: str) -> List[Tuple[str, int, int]]:
+        """Index complete CSV records after the covered offset. Caller holds _lock."""
+        entries = self._entries.setdefault(date_str, {})
+        pos = self._covered.get(date_str, 0)
+        added = []
+        try:
+            with open(self.csv_path(date_str), "rb") as f:
+                f.seek(pos)
+                record, start = b"", pos
+                for line in f:
+                    if not record:
+                        start = pos
+                    record += line
+                    pos += len(line)
+                    # An odd number of quotes means a quoted field spans lines
+                    if record.count(b'"') % 2 or not line.endswith(b"\n"):
+                        continue
+                    try:
+                        values = next(csv.reader(io.StringIO(record.decode("utf-8"), newline="")))
+                    except (UnicodeDecodeError, StopIteration, csv.Error):
+                        values = []
+                    if values and values[0]:
+                        entries.setdefault(values[0], (start, len(record)))
+                        added.append((values[0], start, len(record)))
+                    record = b""
+                    self._covered[date_str] = pos
+        except OSError as exc:
+            self.logger.warning(f"[ORDER_INDEX] Could not scan {self.csv_path(date_str)}: {exc}")
+        return added
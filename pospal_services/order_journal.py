@@ -0,0 +1,194 @@
+"""
+Order Journal
+Append-only daily order CSV writer with group commit and a configurable fsync policy
+"""
+
+import os
+import io
+import csv
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+
+FSYNC_NONE = "none"
+FSYNC_BATCHED = "batched"
+FSYNC_EVERY = "every"
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_BATCHED, FSYNC_EVERY)
+
+
+class OrderJournal:
+    """
+    Keeps the current day's orders_YYYY-MM-DD.csv open and appends rows to it.
+
+    Each row is written and flushed to the OS in a single write() so readers
+    of the CSV see it immediately. Durability depends on the fsync policy:
+
+    - none:    never fsync; the OS decides when data reaches the disk
+    - batched: a committer thread fsyncs at most once per commit window, so a
+               power cut loses at most one window of orders
+    - every:   append() returns only after its row is fsync'd; concurrent
+               appends share a single fsync (group commit)
+    """
+
+    def __init__(self, app_logger, data_dir: str, fieldnames: List[str],
+                 fsync_policy: str = FSYNC_BATCHED, commit_window_ms: int = 50,
+                 file_prefix: str = "orders_", index=None):
+        self.logger = app_logger
+        self.data_dir = data_dir
+        self.fieldnames = list(fieldnames)
+        self.fsync_policy = fsync_policy if fsync_policy in FSYNC_POLICIES else FSYNC_BATCHED
+        self.commit_window = max(1, int(commit_window_ms)) / 1000.0
+        self.file_prefix = file_prefix
+        self.index = index
+
+        self._write_lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._date: Optional[str] = None
+        self._write_seq = 0
+        self._synced_seq = 0
+        self._fsync_count = 0
+        self._committer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- Public API ---
+    def path_for(self, date_str: str) -> str:
+        return os.path.abspath(os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.csv"))
+
+    def append(self, row: Dict[str, Any], date_str: Optional[str] = None) -> int:
+        """Append one order row to the day file. Returns the row's write sequence number."""
+        date_str = date_str or datetime.now().strftime("%Y-%m-%d")
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=self.fieldnames, extrasaction="ignore").writerow(row)
+        encoded = buffer.getvalue().encode("utf-8")
+
+        with self._write_lock:
+            handle = self._handle_for(date_str)
+            offset = handle.tell()
+            handle.write(encoded)
+            handle.flush()
+            self._write_seq += 1
+            seq = self._write_seq
+            if self.index is not None:
+                self.index.record(date_str, row.get("order_number", ""), offset, len(encoded))
+
+        if self.fsync_policy == FSYNC_EVERY:
+            self._sync_to(seq)
+        elif self.fsync_policy == FSYNC_BATCHED:
+            self._ensure_committer()
+        return seq
+
+    def flush(self):
+        """Force everything written so far to disk."""
+        with self._write_lock:
+            target = self._write_seq
+        if self._file is not None:
+            self._sync_to(target)
+
+    @contextmanager
+    def locked(self):
+        """
+        Block appends and release the open day file, e.g. while another
+        component rewrites a CSV in place. The file is reopened on the next append.
+        """
+        with self._write_lock:
+            self._close_current()
+            yield
+
+    def close(self):
+        self._stop.set()
+        if self._committer is not None:
+            self._committer.join(timeout=2.0)
+            self._committer = None
+        with self._write_lock:
+            self._close_current()
+            if self.index is not None:
+                self.index.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fsync_policy": self.fsync_policy,
+            "commit_window_ms": int(self.commit_window * 1000),
+            "rows_written": self._write_seq,
+            "rows_synced": self._synced_seq,
+            "fsync_calls": self._fsync_count,
+            "current_file": self.path_for(self._date) if self._date else None,
+        }
+
+    # --- File handling ---
+    def _handle_for(self, date_str: str):
+        if self._file is not None and self._date == date_str:
+            return self._file
+        self._close_current()
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self.path_for(date_str)
+        needs_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        # Binary append so tell() gives the byte offsets recorded in the sidecar index
+        handle = open(path, "ab")
+        if needs_header:
+            buffer = io.StringIO()
+            csv.DictWriter(buffer, fieldnames=self.fieldnames).writeheader()
+            handle.write(buffer.getvalue().encode("utf-8"))
+            handle.flush()
+        self._file = handle
+        self._date = date_str
+        return handle
+
+    def _close_current(self):
+        """Sync and close the open day file. Caller holds _write_lock."""
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if self.fsync_policy != FSYNC_NONE:
+                os.fsync(self._file.fileno())
+                self._fsync_count += 1
+            self._synced_seq = self._write_seq
+        except Exception as exc:
+            self.logger.warning(f"[ORDER_JOURNAL] Sync on close failed: {exc}")
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        self._file = None
+        self._date = None
+
+    # --- Group commit ---
+    def _sync_to(self, seq: int):
+        """Make sure rows up to seq are on disk; one caller fsyncs for everyone waiting."""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._write_lock:
+                if self._file is None:
+                    return
+                target = self._write_seq
+                fd = os.dup(self._file.fileno())
+            try:
+                os.fsync(fd)
+                self._fsync_count += 1
+            except Exception as exc:
+                self.logger.error(f"[ORDER_JOURNAL] fsync failed: {exc}")
+                return
+            finally:
+                os.close(fd)
+            self._synced_seq = max(self._synced_seq, target)
+
+    def _ensure_committer(self):
+        if self._committer is not None and self._committer.is_alive():
+            return
+        with self._write_lock:
+            if self._committer is not None and self._committer.is_alive():
+                return
+            self._stop.clear()
+            self._committer = threading.Thread(target=self._commit_loop, name="OrderJournalCommitter", daemon=True)
+            self._committer.start()
+
+    def _commit_loop(self):
+        while not self._stop.is_set():
+            time.sleep(self.commit_window)
+            if self._synced_seq < self._write_seq:
+                self._sync_to(self._write_seq)
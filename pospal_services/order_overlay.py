@@ -0,0 +1,181 @@
+"""
+Order Outcome Overlay
+Append-only per-day record of late order outcomes (payment method, print status), merged over order CSV rows at read time
+"""
+
+import os
+import csv
+import json
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+# CSV columns an overlay entry can override
+OVERLAY_FIELDS = ("payment_method", "printed_status")
+
+
+class OrderOutcomeOverlay:
+    """
+    Stores outcomes that are settled after an order row was written - the
+    payment method resolved at table clear and the final print status of a
+    queued kitchen ticket - in order_outcomes_YYYY-MM-DD.jsonl next to the
+    day's order CSV instead of rewriting the CSV. Each entry carries the
+    order number, the overridden CSV fields and a timestamp; entries for an
+    order are merged, later fields winning.
+
+    Readers call apply() on CSV rows to see the resolved values. compact()
+    folds a day's overlay into its CSV with a single rewrite and removes the
+    overlay file; it is meant for days that no longer receive orders.
+    """
+
+    def __init__(self, app_logger, data_dir: str, file_prefix: str = "order_outcomes_"):
+        self.logger = app_logger
+        self.data_dir = data_dir
+        self.file_prefix = file_prefix
+
+        self._lock = threading.Lock()
+        # date -> (bytes parsed, {order_number: entry})
+        self._cache: Dict[str, Any] = {}
+
+    def path_for(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.jsonl")
+
+    # --- Writes ---
+    def record_payment(self, order_date: str, order_number, payment_method: str) -> Dict[str, Any]:
+        entry = {
+            "order_number": str(order_number),
+            "payment_method": payment_method,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return self._append(order_date, entry)
+
+    def record_printed_status(self, order_date: str, order_number, printed_status: str) -> Dict[str, Any]:
+        entry = {
+            "order_number": str(order_number),
+            "printed_status": printed_status,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return self._append(order_date, entry)
+
+    def _append(self, order_date: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            with open(self.path_for(order_date), "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return entry
+
+    # --- Reads ---
+    def entries_for_date(self, date_str: str) -> Dict[str, Dict[str, Any]]:
+        """Latest overlay entry per order number for a day (empty if none)."""
+        path = self.path_for(date_str)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                self._cache.pop(date_str, None)
+                return {}
+            parsed, entries = self._cache.get(date_str, (0, {}))
+            if size < parsed:
+                parsed, entries = 0, {}
+            if size > parsed:
+                parsed, entries = self._read_from(path, parsed, dict(entries))
+                self._cache[date_str] = (parsed, entries)
+            return entries
+
+    def _read_from(self, path: str, offset: int, entries: Dict[str, Dict[str, Any]]):
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError as exc:
+            self.logger.warning(f"[ORDER_OVERLAY] Could not read {path}: {exc}")
+            return offset, entries
+        # Only consume complete lines; a torn tail is picked up once it is finished
+        complete = data[:data.rfind(b"\n") + 1]
+        for raw in complete.splitlines():
+            try:
+                entry = json.loads(raw.decode("utf-8"))
+                key = str(entry["order_number"])
+                entries[key] = {**entries.get(key, {}), **entry}
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                continue
+        return offset + len(complete), entries
+
+    def apply(self, date_str: str, rows: Optional[List[Dict[str, str]]]) -> Optional[List[Dict[str, str]]]:
+        """Overlay recorded outcomes onto a day's CSV rows (in place)."""
+        if not rows:
+            return rows
+        entries = self.entries_for_date(date_str)
+        if entries:
+            for row in rows:
+                entry = entries.get(str(row.get("order_number")))
+                if entry:
+                    for field in OVERLAY_FIELDS:
+                        if field in entry:
+                            row[field] = entry[field]
+        return rows
+
+    def apply_row(self, date_str: str, row: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        if row is not None:
+            self.apply(date_str, [row])
+        return row
+
+    def pending_dates(self) -> List[str]:
+        """Days that still have an overlay file."""
+        if not os.path.isdir(self.data_dir):
+            return []
+        dates = []
+        for name in os.listdir(self.data_dir):
+            if name.startswith(self.file_prefix) and name.endswith(".jsonl"):
+                dates.append(name[len(self.file_prefix):-len(".jsonl")])
+        return sorted(dates)
+
+    # --- Compaction ---
+    def compact(self, date_str: str, csv_path: str) -> int:
+        """
+        Fold a day's overlay into its CSV and delete the overlay. The caller must
+        make sure nothing appends to csv_path meanwhile. Returns rows changed.
+        """
+        entries = self.entries_for_date(date_str)
+        if not entries:
+            self._remove(date_str)
+            return 0
+        if not os.path.exists(csv_path):
+            self.logger.warning(f"[ORDER_OVERLAY] {csv_path} missing; keeping overlay for {date_str}")
+            return 0
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        changed = 0
+        for row in rows:
+            entry = entries.get(str(row.get("order_number"))) or {}
+            updates = {field: entry[field] for field in OVERLAY_FIELDS
+                       if field in entry and row.get(field) != entry[field]}
+            if updates:
+                row.update(updates)
+                changed += 1
+        if changed:
+            temp_path = csv_path + ".tmp"
+            with open(temp_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, csv_path)
+        # Re-applying a surviving overlay is harmless, so it goes only after the CSV is in place
+        self._remove(date_str)
+        self.logger.info(f"[ORDER_OVERLAY] Compacted {date_str}: {changed} rows updated")
+        return changed
+
+    def _remove(self, date_str: str):
+        with self._lock:
+            self._cache.pop(date_str, None)
+            try:
+                os.remove(self.path_for(date_str))
+            except FileNotFoundError:
+                pass
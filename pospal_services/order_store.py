@@ -0,0 +1,336 @@
+"""
+SQLite Order Store
+Optional WAL-mode storage engine for orders and order lines with indexed lookups
+"""
+
+import os
+import io
+import csv
+import json
+import sqlite3
+import threading
+from typing import Optional, Dict, Any, List, Iterable
+
+
+ORDER_FIELDNAMES = ['order_number', 'table_number', 'timestamp', 'items_summary',
+                    'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    order_date TEXT NOT NULL,
+    order_number TEXT NOT NULL,
+    table_number TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    items_summary TEXT NOT NULL DEFAULT '',
+    universal_comment TEXT NOT NULL DEFAULT '',
+    order_total REAL NOT NULL DEFAULT 0,
+    payment_method TEXT NOT NULL DEFAULT 'Cash',
+    printed_status TEXT NOT NULL DEFAULT '',
+    items_json TEXT NOT NULL DEFAULT '[]',
+    UNIQUE (order_date, order_number)
+);
+CREATE INDEX IF NOT EXISTS idx_orders_table_number ON orders (table_number);
+CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp);
+
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_id INTEGER NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+    line_no INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    quantity INTEGER NOT NULL DEFAULT 0,
+    unit_price REAL NOT NULL DEFAULT 0,
+    options_json TEXT NOT NULL DEFAULT '[]',
+    comment TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (order_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_order_lines_name ON order_lines (name);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT -1,
+    imported_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+"""
+
+_ROW_COLUMNS = "order_number, table_number, timestamp, items_summary, universal_comment, " \
+               "order_total, payment_method, printed_status, items_json"
+
+
+class SQLiteOrderStore:
+    """
+    Orders and their lines in a single SQLite database in WAL mode.
+
+    Readers get one connection per thread and never block the writer; writes
+    are serialised behind a process lock. Rows come back shaped exactly like
+    csv.DictReader rows of the daily orders_YYYY-MM-DD.csv files (all string
+    values, order_total formatted with two decimals) so existing callers can
+    switch engines without changing how they parse a row.
+    """
+
+    def __init__(self, app_logger, db_path: str):
+        self.logger = app_logger
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    # --- Connections ---
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self._ensure_schema()
+        conn = self._open()
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._open()
+            try:
+                conn.executescript(_SCHEMA)
+                columns = {r[1] for r in conn.execute("PRAGMA table_info(imported_files)")}
+                if "size" not in columns:
+                    conn.execute("ALTER TABLE imported_files ADD COLUMN size INTEGER NOT NULL DEFAULT -1")
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+            self.logger.info(f"[ORDER_STORE] Using SQLite order store at {self.db_path}")
+
+    def close(self):
+        """Checkpoint the WAL and close every thread's connection."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for index, conn in enumerate(connections):
+            try:
+                if index == 0:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as exc:
+                self.logger.warning(f"[ORDER_STORE] WAL checkpoint failed: {exc}")
+            try:
+                conn.close()
+            except sqlite3.Error as exc:
+                self.logger.warning(f"[ORDER_STORE] Closing a connection failed: {exc}")
+        self._local = threading.local()
+
+    # --- Writes ---
+    def record_order(self, order_date: str, row: Dict[str, Any]) -> bool:
+        """Insert one order (CSV row shape) and its lines. Returns False if it already exists."""
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                inserted = self._insert(conn, order_date, row, replace=False)
+        return inserted
+
+    def update_payment_method(self, order_number, payment_method: str, since_date: str) -> Optional[str]:
+        """
+        Set the payment method of the most recent order with this number dated
+        on or after since_date. Returns the order date that was updated, if any.
+        """
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                found = conn.execute(
+                    "SELECT id, order_date FROM orders WHERE order_number = ? AND order_date >= ? "
+                    "ORDER BY order_date DESC LIMIT 1",
+                    (str(order_number), since_date)
+                ).fetchone()
+                if found is None:
+                    return None
+                conn.execute("UPDATE orders SET payment_method = ? WHERE id = ?", (payment_method, found["id"]))
+        return found["order_date"]
+
+    def update_printed_status(self, order_date: str, order_number, printed_status: str) -> bool:
+        """Record the final print outcome of an order. Returns False if the order does not exist."""
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE orders SET printed_status = ? WHERE order_date = ? AND order_number = ?",
+                    (printed_status, order_date, str(order_number))
+                )
+        return cursor.rowcount > 0
+
+    def _insert(self, conn: sqlite3.Connection, order_date: str, row: Dict[str, Any], replace: bool) -> bool:
+        try:
+            total = float(row.get("order_total") or 0.0)
+        except (TypeError, ValueError):
+            total = 0.0
+        values = (
+            order_date,
+            str(row.get("order_number", "")),
+            str(row.get("table_number") or ""),
+            str(row.get("timestamp") or ""),
+            str(row.get("items_summary") or ""),
+            str(row.get("universal_comment") or ""),
+            total,
+            str(row.get("payment_method") or "Cash"),
+            str(row.get("printed_status") or ""),
+            str(row.get("items_json") or "[]"),
+        )
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        cursor = conn.execute(
+            f"{verb} INTO orders (order_date, {_ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            values
+        )
+        if cursor.rowcount == 0:
+            return False
+        order_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO order_lines (order_id, line_no, name, quantity, unit_price, options_json, comment) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            list(self._lines(order_id, values[-1]))
+        )
+        return True
+
+    @staticmethod
+    def _lines(order_id: int, items_json: str) -> Iterable[tuple]:
+        try:
+            items = json.loads(items_json or "[]")
+        except (TypeError, ValueError):
+            return
+        if not isinstance(items, list):
+            return
+        for line_no, item in enumerate(items, start=1):
+            if not isinstance(item, dict):
+                continue
+            try:
+                quantity = int(item.get("quantity", 0))
+                unit_price = float(item.get("itemPriceWithModifiers", item.get("basePrice", 0.0)))
+            except (TypeError, ValueError):
+                quantity, unit_price = 0, 0.0
+            yield (
+                order_id,
+                line_no,
+                str(item.get("name", "")),
+                quantity,
+                unit_price,
+                json.dumps(item.get("generalSelectedOptions") or []),
+                str(item.get("comment") or ""),
+            )
+
+    # --- Reads (CSV row shape) ---
+    @staticmethod
+    def _as_row(record: sqlite3.Row) -> Dict[str, str]:
+        row = {key: record[key] for key in ORDER_FIELDNAMES}
+        row["order_total"] = f"{float(record['order_total'] or 0.0):.2f}"
+        return row
+
+    def get_order(self, order_date: str, order_number) -> Optional[Dict[str, str]]:
+        record = self._connect().execute(
+            f"SELECT {_ROW_COLUMNS} FROM orders WHERE order_date = ? AND order_number = ?",
+            (order_date, str(order_number))
+        ).fetchone()
+        return self._as_row(record) if record else None
+
+    def orders_for_date(self, order_date: str) -> List[Dict[str, str]]:
+        records = self._connect().execute(
+            f"SELECT {_ROW_COLUMNS} FROM orders WHERE order_date = ? ORDER BY id",
+            (order_date,)
+        ).fetchall()
+        return [self._as_row(r) for r in records]
+
+    def orders_for_table(self, table_number, start_date: str, end_date: str) -> List[Dict[str, str]]:
+        """Orders for a table dated between start_date and end_date (inclusive)."""
+        records = self._connect().execute(
+            f"SELECT {_ROW_COLUMNS} FROM orders WHERE table_number = ? AND order_date BETWEEN ? AND ? "
+            "ORDER BY timestamp",
+            (str(table_number).strip(), start_date, end_date)
+        ).fetchall()
+        return [self._as_row(r) for r in records]
+
+    def orders_between(self, start_timestamp: str, end_timestamp: str) -> List[Dict[str, str]]:
+        """Orders with start_timestamp <= timestamp < end_timestamp ('YYYY-MM-DD HH:MM:SS')."""
+        records = self._connect().execute(
+            f"SELECT {_ROW_COLUMNS} FROM orders WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (start_timestamp, end_timestamp)
+        ).fetchall()
+        return [self._as_row(r) for r in records]
+
+    def daily_summary(self, order_date: str) -> Dict[str, Any]:
+        record = self._connect().execute(
+            "SELECT COUNT(*) AS total_orders, COALESCE(SUM(order_total), 0) AS grand_total, "
+            "COALESCE(SUM(CASE WHEN lower(trim(payment_method)) = 'card' THEN order_total END), 0) AS card_total "
+            "FROM orders WHERE order_date = ?",
+            (order_date,)
+        ).fetchone()
+        grand_total = float(record["grand_total"])
+        card_total = float(record["card_total"])
+        return {
+            "total_orders": int(record["total_orders"]),
+            "grand_total": grand_total,
+            "cash_total": grand_total - card_total,
+            "card_total": card_total,
+        }
+
+    # --- CSV import / export ---
+    def import_csv_files(self, data_dir: str, prefix: str = "orders_") -> int:
+        """
+        Import orders_YYYY-MM-DD.csv files that are new or have changed size
+        since they were last imported. Rows already in the store are skipped,
+        so a re-import only adds orders written to the CSV in the meantime
+        (while the store was disabled, or when a store write failed after
+        the CSV append). Returns rows added.
+        """
+        if not os.path.isdir(data_dir):
+            return 0
+        conn = self._connect()
+        done = {r["filename"]: r["size"] for r in conn.execute("SELECT filename, size FROM imported_files")}
+        added = 0
+        for name in sorted(os.listdir(data_dir)):
+            if not (name.startswith(prefix) and name.endswith(".csv")):
+                continue
+            order_date = name[len(prefix):-len(".csv")]
+            if len(order_date) != 10:
+                continue
+            path = os.path.join(data_dir, name)
+            try:
+                size = os.path.getsize(path)
+                if done.get(name) == size:
+                    continue
+                with open(path, "r", newline="", encoding="utf-8") as f:
+                    rows = [row for row in csv.DictReader(f) if row.get("order_number")]
+            except Exception as exc:
+                self.logger.warning(f"[ORDER_STORE] Skipping {name}: {exc}")
+                continue
+            with self._write_lock:
+                with conn:
+                    count = sum(1 for row in rows if self._insert(conn, order_date, row, replace=False))
+                    conn.execute("INSERT OR REPLACE INTO imported_files (filename, rows, size) VALUES (?, ?, ?)",
+                                 (name, len(rows), size))
+            added += count
+            self.logger.info(f"[ORDER_STORE] Imported {count}/{len(rows)} orders from {name}")
+        return added
+
+    def export_csv(self, order_date: str) -> str:
+        """Render one day's orders in the orders_YYYY-MM-DD.csv format."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=ORDER_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(self.orders_for_date(order_date))
+        return buffer.getvalue()
+
+    def dates(self) -> List[str]:
+        return [r["order_date"] for r in self._connect().execute(
+            "SELECT DISTINCT order_date FROM orders ORDER BY order_date"
+        )]
@@ -0,0 +1,409 @@
+"""
+Print Job Queue
+Durable per-printer background queue that decouples printing from order submission
+"""
+
+import os
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from queue import Queue, Empty
+from typing import Optional, Dict, Any, Callable, List
+
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_PRINTING = "printing"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_PARTIAL = "partial"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_INTERRUPTED = "interrupted"
+
+TERMINAL_JOB_STATUSES = {JOB_STATUS_COMPLETED, JOB_STATUS_PARTIAL, JOB_STATUS_FAILED}
+
+PRINTED_INTERRUPTED = "Print Interrupted - Check Printer"
+PRINTED_CONFIRMED = "Confirmed Printed"
+
+
+class PrintJobQueue:
+    """
+    Persistent print job queue with one worker thread per printer.
+
+    Every job state transition is appended to a JSONL journal so queued jobs
+    survive a crash or restart and are resubmitted on the next start().
+    The actual printing is delegated to the handler supplied by the app.
+
+    A job that was already printing when the process died may or may not
+    have come out of the printer, so it is not printed again automatically:
+    it is marked interrupted until an operator calls resolve(). Finished
+    jobs are handed to on_finished (so the outcome can be stored with the
+    order) and are dropped from memory and the journal once older than
+    retention_seconds; the journal is compacted as it grows.
+    """
+
+    def __init__(self, app_logger, journal_path: str,
+                 handler: Callable[[Dict[str, Any], Callable[..., None]], Dict[str, Any]],
+                 publish: Optional[Callable[[str, dict], None]] = None,
+                 retention_seconds: int = 24 * 3600,
+                 on_finished: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 prune_interval: float = 300.0):
+        self.logger = app_logger
+        self.journal_path = journal_path
+        self.handler = handler
+        self.publish = publish
+        self.retention_seconds = retention_seconds
+        self.on_finished = on_finished
+        self.prune_interval = prune_interval
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._order_index: Dict[str, str] = {}
+        self._workers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._journal_file = None
+        self._started = False
+        self._stopping = False
+        self._journal_lines = 0
+        self._last_prune = time.time()
+
+    # --- Lifecycle ---
+    def start(self):
+        """Replay the journal, compact it and resubmit unfinished jobs."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping = False
+
+        pending = self._load_journal()
+        self._compact_journal()
+
+        for job in pending:
+            self.logger.info(f"[PRINT_QUEUE] Resuming job {job['job_id']} for order #{job.get('order_number')} on '{job['printer']}'")
+            self._dispatch(job)
+
+    def stop(self, timeout: float = 2.0):
+        """Signal all workers to exit and close the journal."""
+        with self._lock:
+            self._stopping = True
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker["queue"].put(None)
+        for worker in workers:
+            try:
+                worker["thread"].join(timeout=timeout)
+            except Exception:
+                pass
+        with self._journal_lock:
+            if self._journal_file:
+                try:
+                    self._journal_file.close()
+                except Exception:
+                    pass
+                self._journal_file = None
+        self._started = False
+
+    # --- Public API ---
+    def submit(self, printer_name: str, kind: str, payload: Dict[str, Any],
+               order_number=None, order_date: Optional[str] = None,
+               device_id: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a new job and hand it to the printer's worker. Returns a job snapshot."""
+        now = datetime.now()
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "printer": printer_name or "",
+            "order_number": order_number,
+            "order_date": order_date or now.strftime("%Y-%m-%d"),
+            "device_id": device_id,
+            "payload": payload,
+            "status": JOB_STATUS_QUEUED,
+            "attempts": 0,
+            "printed": None,
+            "error": None,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            if order_number is not None:
+                self._order_index[self._order_key(job["order_date"], order_number, kind)] = job["job_id"]
+        self._append_journal(job, sync=True)
+        self._publish("print_job_queued", job)
+        self._dispatch(job)
+        return self._snapshot(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def find_for_order(self, order_date: str, order_number, kind: str = "kitchen") -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job_id = self._order_index.get(self._order_key(order_date, order_number, kind))
+            job = self._jobs.get(job_id) if job_id else None
+            return self._snapshot(job) if job else None
+
+    def resolve(self, job_id: str, reprint: bool) -> Optional[Dict[str, Any]]:
+        """
+        Settle an interrupted job: queue it again (reprint=True) or record that
+        it did print. Returns the job snapshot, or None if it is not interrupted.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != JOB_STATUS_INTERRUPTED:
+                return None
+        if reprint:
+            self.logger.info(f"[PRINT_QUEUE] Reprinting interrupted job {job_id} for order #{job.get('order_number')}")
+            self._update(job, status=JOB_STATUS_QUEUED, printed=None, error=None)
+            self._dispatch(job)
+        else:
+            self.logger.info(f"[PRINT_QUEUE] Interrupted job {job_id} for order #{job.get('order_number')} confirmed printed")
+            self._update(job, status=JOB_STATUS_COMPLETED, printed=PRINTED_CONFIRMED, error=None)
+            self._finished(job)
+        return self._snapshot(job)
+
+    def list_jobs(self, include_finished: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = [
+                self._snapshot(job) for job in self._jobs.values()
+                if include_finished or job["status"] not in TERMINAL_JOB_STATUSES
+            ]
+        jobs.sort(key=lambda j: j.get("created_at") or "")
+        return jobs
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_printer = {name: worker["queue"].qsize() for name, worker in self._workers.items()}
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"printers": per_printer, "jobs_by_status": counts}
+
+    # --- Workers ---
+    def _dispatch(self, job: Dict[str, Any]):
+        printer_name = job.get("printer") or ""
+        with self._lock:
+            if self._stopping:
+                return
+            worker = self._workers.get(printer_name)
+            if worker is None or not worker["thread"].is_alive():
+                q: Queue = Queue()
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(printer_name, q),
+                    name=f"PrintWorker[{printer_name or 'default'}]",
+                    daemon=True
+                )
+                worker = {"queue": q, "thread": thread}
+                self._workers[printer_name] = worker
+                thread.start()
+        worker["queue"].put(job["job_id"])
+
+    def _worker_loop(self, printer_name: str, q: Queue):
+        while True:
+            try:
+                job_id = q.get(timeout=60)
+            except Empty:
+                if self._stopping:
+                    return
+                continue
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if not job or job["status"] in TERMINAL_JOB_STATUSES:
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job: Dict[str, Any]):
+        self._update(job, status=JOB_STATUS_PRINTING, attempts=job.get("attempts", 0) + 1)
+
+        def progress(message: str, **extra):
+            self._update(job, persist=False, progress=message, **extra)
+
+        started = time.time()
+        try:
+            result = self.handler(self._snapshot(job, include_payload=True), progress) or {}
+        except Exception as exc:
+            self.logger.error(f"[PRINT_QUEUE] Job {job['job_id']} raised: {exc}", exc_info=True)
+            result = {"status": JOB_STATUS_FAILED, "printed": "All Print Attempts Failed", "error": str(exc)}
+
+        status = result.get("status") if result.get("status") in TERMINAL_JOB_STATUSES else JOB_STATUS_FAILED
+        extra = {k: v for k, v in result.items() if k not in ("status", "printed", "error")}
+        self._update(
+            job,
+            status=status,
+            printed=result.get("printed"),
+            error=result.get("error"),
+            duration_ms=int((time.time() - started) * 1000),
+            **extra
+        )
+        log = self.logger.info if status == JOB_STATUS_COMPLETED else self.logger.warning
+        log(f"[PRINT_QUEUE] Job {job['job_id']} for order #{job.get('order_number')} finished: {status} ({result.get('printed')})")
+        self._finished(job)
+
+    def _finished(self, job: Dict[str, Any]):
+        if self.on_finished:
+            try:
+                self.on_finished(self._snapshot(job))
+            except Exception as exc:
+                self.logger.error(f"[PRINT_QUEUE] Could not record outcome of job {job['job_id']}: {exc}")
+        self.prune()
+
+    def prune(self, force: bool = False) -> int:
+        """
+        Drop finished jobs older than retention_seconds and compact the journal
+        when it has grown well past the retained jobs. Runs at most once per
+        prune_interval unless forced. Returns how many jobs were dropped.
+        """
+        now = time.time()
+        if not force and now - self._last_prune < self.prune_interval:
+            return 0
+        self._last_prune = now
+        cutoff = now - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in TERMINAL_JOB_STATUSES and self._timestamp(job) < cutoff]
+            for job_id in expired:
+                job = self._jobs.pop(job_id)
+                if job.get("order_number") is not None:
+                    key = self._order_key(job.get("order_date"), job["order_number"], job.get("kind"))
+                    if self._order_index.get(key) == job_id:
+                        del self._order_index[key]
+            retained = len(self._jobs)
+        if expired or self._journal_lines > 2 * retained + 100:
+            self._compact_journal()
+        if expired:
+            self.logger.info(f"[PRINT_QUEUE] Dropped {len(expired)} finished jobs past retention")
+        return len(expired)
+
+    # --- State & persistence ---
+    def _update(self, job: Dict[str, Any], persist: bool = True, **changes):
+        with self._lock:
+            job.update(changes)
+            job["updated_at"] = datetime.now().isoformat()
+        status = job["status"]
+        if persist:
+            self._append_journal(job, sync=status in TERMINAL_JOB_STATUSES)
+        if status == JOB_STATUS_FAILED:
+            self._publish("print_job_failed", job)
+        elif status in TERMINAL_JOB_STATUSES:
+            self._publish("print_job_completed", job)
+        else:
+            self._publish("print_job_progress", job)
+
+    def _publish(self, event_name: str, job: Dict[str, Any]):
+        if not self.publish:
+            return
+        try:
+            self.publish(event_name, self._snapshot(job))
+        except Exception as exc:
+            self.logger.debug(f"[PRINT_QUEUE] Publish failed for {event_name}: {exc}")
+
+    def _append_journal(self, job: Dict[str, Any], sync: bool = False):
+        try:
+            line = json.dumps(self._snapshot(job, include_payload=True), ensure_ascii=False)
+        except Exception as exc:
+            self.logger.error(f"[PRINT_QUEUE] Could not serialise job {job.get('job_id')}: {exc}")
+            return
+        with self._journal_lock:
+            try:
+                if self._journal_file is None:
+                    os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                    self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+                self._journal_file.write(line + "\n")
+                self._journal_file.flush()
+                self._journal_lines += 1
+                if sync:
+                    os.fsync(self._journal_file.fileno())
+            except Exception as exc:
+                self.logger.error(f"[PRINT_QUEUE] Journal write failed: {exc}")
+
+    def _load_journal(self) -> List[Dict[str, Any]]:
+        """Rebuild in-memory state from the journal; returns jobs that still need printing."""
+        if not os.path.exists(self.journal_path):
+            return []
+        latest: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for raw in f:
+                    raw = raw.strip()
+                    if not raw:
+                        continue
+                    try:
+                        entry = json.loads(raw)
+                    except json.JSONDecodeError:
+                        # A torn final line after a crash is expected; skip it
+                        continue
+                    if isinstance(entry, dict) and entry.get("job_id"):
+                        latest[entry["job_id"]] = entry
+        except Exception as exc:
+            self.logger.error(f"[PRINT_QUEUE] Could not read journal {self.journal_path}: {exc}")
+            return []
+
+        cutoff = time.time() - self.retention_seconds
+        pending = []
+        with self._lock:
+            for job_id, job in latest.items():
+                status = job.get("status")
+                if status in TERMINAL_JOB_STATUSES and self._timestamp(job) < cutoff:
+                    continue
+                if status in (JOB_STATUS_PRINTING, JOB_STATUS_INTERRUPTED):
+                    # It may already be on paper; printing it again blindly duplicates the ticket
+                    job["status"] = JOB_STATUS_INTERRUPTED
+                    job["printed"] = PRINTED_INTERRUPTED
+                    self.logger.warning(f"[PRINT_QUEUE] Job {job_id} for order #{job.get('order_number')} "
+                                        f"was interrupted while printing; waiting for confirmation")
+                elif status not in TERMINAL_JOB_STATUSES:
+                    job["status"] = JOB_STATUS_QUEUED
+                    pending.append(job)
+                self._jobs[job_id] = job
+                if job.get("order_number") is not None:
+                    self._order_index[self._order_key(job.get("order_date"), job["order_number"], job.get("kind"))] = job_id
+        pending.sort(key=lambda j: j.get("created_at") or "")
+        return pending
+
+    def _compact_journal(self):
+        """Rewrite the journal with one line per retained job."""
+        temp_path = self.journal_path + ".tmp"
+        with self._journal_lock:
+            # Snapshot under the journal lock so no update lands in the file being replaced
+            with self._lock:
+                jobs = sorted(self._jobs.values(), key=lambda j: j.get("created_at") or "")
+                lines = [json.dumps(self._snapshot(job, include_payload=True), ensure_ascii=False) for job in jobs]
+            try:
+                os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for line in lines:
+                        f.write(line + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._journal_file:
+                    self._journal_file.close()
+                    self._journal_file = None
+                os.replace(temp_path, self.journal_path)
+                self._journal_lines = len(lines)
+            except Exception as exc:
+                self.logger.warning(f"[PRINT_QUEUE] Journal compaction failed: {exc}")
+
+    # --- Helpers ---
+    @staticmethod
+    def _order_key(order_date, order_number, kind) -> str:
+        return f"{order_date}|{order_number}|{kind or ''}"
+
+    @staticmethod
+    def _timestamp(job: Dict[str, Any]) -> float:
+        try:
+            return datetime.fromisoformat(job.get("updated_at") or job.get("created_at")).timestamp()
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any], include_payload: bool = False) -> Dict[str, Any]:
+        data = {k: v for k, v in job.items() if k != "payload"}
+        if include_payload:
+            data["payload"] = job.get("payload")
+        return data
@@ -0,0 +1,219 @@
+"""
+Printer Backends
+Transport for rendered ESC/POS bytes: Windows spooler, raw TCP (port 9100) or a file/loopback target
+"""
+
+import os
+import socket
+import threading
+from datetime import datetime
+from typing import Optional, Callable, Tuple, Any
+
+RAW_TCP_SCHEME = "tcp://"
+FILE_SCHEME = "file://"
+DEFAULT_RAW_PORT = 9100
+
+# Same bit as the spooler's PRINTER_STATUS_OFFLINE, so callers can treat every backend alike
+PRINTER_STATUS_OFFLINE = 0x00000080
+
+
+class PrinterBackend:
+    """
+    One printer target. Used as a context manager around a print:
+
+        with backend:
+            if backend.status() & fatal_bits: ...
+            job = backend.submit(doc_name, data)
+            ok, reason = backend.wait(job)
+
+    status() returns spooler-style PRINTER_STATUS bits (0 when ready),
+    submit() raises on transport errors and wait() returns
+    (success, failure_reason) like wait_for_printer_job_completion.
+    """
+
+    kind = "base"
+
+    def __init__(self, printer_name: str):
+        self.printer_name = printer_name
+
+    def open(self):
+        pass
+
+    def status(self) -> int:
+        return 0
+
+    def submit(self, doc_name: str, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def wait(self, job: Any, timeout_seconds: float = 15.0) -> Tuple[bool, Optional[str]]:
+        return True, None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class Win32SpoolerBackend(PrinterBackend):
+    """RAW documents through the Windows print spooler (win32print)."""
+
+    kind = "spooler"
+
+    def __init__(self, printer_name: str, win32print_module,
+                 status_reader: Optional[Callable[[Any, str], int]] = None,
+                 job_waiter: Optional[Callable[..., Tuple[bool, Optional[str]]]] = None):
+        super().__init__(printer_name)
+        self.win32print = win32print_module
+        self.status_reader = status_reader
+        self.job_waiter = job_waiter
+        self.handle = None
+
+    def open(self):
+        if self.handle is None:
+            self.handle = self.win32print.OpenPrinter(self.printer_name)
+
+    def status(self) -> int:
+        self.open()
+        if self.status_reader is not None:
+            return int(self.status_reader(self.handle, self.printer_name) or 0)
+        info = self.win32print.GetPrinter(self.handle, 2)
+        return int(info.get('Status', 0) or 0)
+
+    def submit(self, doc_name: str, data: bytes) -> Any:
+        self.open()
+        job_id = self.win32print.StartDocPrinter(self.handle, 1, (doc_name, None, "RAW"))
+        try:
+            self.win32print.StartPagePrinter(self.handle)
+            self.win32print.WritePrinter(self.handle, bytes(data))
+            self.win32print.EndPagePrinter(self.handle)
+        except Exception:
+            try:
+                self.win32print.EndDocPrinter(self.handle)
+            except Exception:
+                pass
+            raise
+        self.win32print.EndDocPrinter(self.handle)
+        return job_id
+
+    def wait(self, job: Any, timeout_seconds: float = 15.0) -> Tuple[bool, Optional[str]]:
+        if self.job_waiter is None:
+            return True, None
+        return self.job_waiter(job, self.printer_name, timeout_seconds=timeout_seconds)
+
+    def close(self):
+        if self.handle is not None:
+            handle, self.handle = self.handle, None
+            self.win32print.ClosePrinter(handle)
+
+
+class RawSocketBackend(PrinterBackend):
+    """
+    ESC/POS bytes straight to a network printer's raw port (JetDirect, usually
+    9100), bypassing the spooler. A completed sendall means the printer
+    accepted the data into its buffer, which is the strongest confirmation the
+    raw protocol offers.
+    """
+
+    kind = "raw_tcp"
+
+    def __init__(self, printer_name: str, host: str, port: int = DEFAULT_RAW_PORT, timeout: float = 5.0):
+        super().__init__(printer_name)
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+
+    def open(self):
+        if self.sock is None:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def status(self) -> int:
+        try:
+            self.open()
+        except OSError:
+            return PRINTER_STATUS_OFFLINE
+        return 0
+
+    def submit(self, doc_name: str, data: bytes) -> Any:
+        self.open()
+        self.sock.sendall(bytes(data))
+        return {"doc_name": doc_name, "bytes": len(data)}
+
+    def close(self):
+        if self.sock is not None:
+            sock, self.sock = self.sock, None
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            sock.close()
+
+
+class FileBackend(PrinterBackend):
+    """
+    Loopback target for tests and benchmarks. A directory path receives one
+    .bin file per document; any other path has documents appended to it.
+    """
+
+    kind = "file"
+    _counter_lock = threading.Lock()
+    _counter = 0
+
+    def __init__(self, printer_name: str, path: str):
+        super().__init__(printer_name)
+        self.path = path
+
+    def status(self) -> int:
+        parent = self.path if os.path.isdir(self.path) else (os.path.dirname(self.path) or ".")
+        return 0 if os.path.isdir(parent) else PRINTER_STATUS_OFFLINE
+
+    def submit(self, doc_name: str, data: bytes) -> Any:
+        if os.path.isdir(self.path):
+            with FileBackend._counter_lock:
+                FileBackend._counter += 1
+                seq = FileBackend._counter
+            safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in doc_name)[:80]
+            target = os.path.join(self.path, f"{datetime.now():%Y%m%d_%H%M%S}_{seq:06d}_{safe_name}.bin")
+            with open(target, "wb") as f:
+                f.write(bytes(data))
+            return target
+        with open(self.path, "ab") as f:
+            f.write(bytes(data))
+        return self.path
+
+
+def is_direct_printer(printer_name: Optional[str]) -> bool:
+    """True for printer names that bypass the spooler (tcp://host[:port], file://path)."""
+    lowered = (printer_name or "").strip().lower()
+    return lowered.startswith(RAW_TCP_SCHEME) or lowered.startswith(FILE_SCHEME)
+
+
+def create_printer_backend(printer_name: str, win32print_module=None,
+                           status_reader: Optional[Callable[[Any, str], int]] = None,
+                           job_waiter: Optional[Callable[..., Tuple[bool, Optional[str]]]] = None,
+                           socket_timeout: float = 5.0) -> PrinterBackend:
+    """
+    Pick the backend for a configured printer name. "tcp://192.168.1.50:9100"
+    and "file://C:/POSPal/out" select the direct backends; anything else is
+    an installed Windows printer.
+    """
+    name = (printer_name or "").strip()
+    lowered = name.lower()
+    if lowered.startswith(RAW_TCP_SCHEME):
+        address = name[len(RAW_TCP_SCHEME):].strip().rstrip("/")
+        host, sep, port = address.rpartition(":")
+        if not sep or not port.isdigit():
+            host, port = address, str(DEFAULT_RAW_PORT)
+        return RawSocketBackend(name, host, int(port), timeout=socket_timeout)
+    if lowered.startswith(FILE_SCHEME):
+        return FileBackend(name, name[len(FILE_SCHEME):])
+    if win32print_module is None:
+        raise ValueError(f"No spooler available for printer '{name}'")
+    return Win32SpoolerBackend(name, win32print_module, status_reader=status_reader, job_waiter=job_waiter)
@@ -0,0 +1,229 @@
+"""
+Printer Health Prober
+Background status probing for the role printers with a cached, timestamped snapshot
+"""
+
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, Iterable
+
+
+class PrinterHealthProber:
+    """
+    Probes each target printer on its own schedule so request handlers never
+    talk to the spooler: every health/status endpoint reads snapshot().
+
+    probe_fn(printer_name) returns {"online": bool, "status_code": int} (extra
+    keys are kept) or raises; targets_fn() returns {role: printer_name}.
+    A healthy printer is re-probed every interval_seconds, a failing one every
+    failure_interval_seconds (as is one whose status code has any of
+    failure_flags set, e.g. paper out). Probes run on a small pool, at most one per
+    printer at a time, so one slow network printer does not delay the others.
+    publish_fn(entry) is called whenever a printer's online state, status
+    code or error changes.
+    """
+
+    def __init__(self, app_logger, probe_fn: Callable[[str], Dict[str, Any]],
+                 targets_fn: Callable[[], Dict[str, str]],
+                 publish_fn: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 interval_seconds: float = 15.0, failure_interval_seconds: float = 3.0,
+                 failure_flags: int = 0, adhoc_ttl_seconds: float = 600.0, max_workers: int = 4):
+        self.logger = app_logger
+        self.probe_fn = probe_fn
+        self.targets_fn = targets_fn
+        self.publish_fn = publish_fn
+        self.interval_seconds = interval_seconds
+        self.failure_interval_seconds = failure_interval_seconds
+        self.failure_flags = failure_flags
+        self.adhoc_ttl_seconds = adhoc_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="printer-probe")
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._roles: Dict[str, str] = {}
+        self._adhoc: Dict[str, float] = {}      # printer -> monotonic expiry
+        self._next_due: Dict[str, float] = {}
+        self._in_flight = set()
+        self._probes = 0
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="printer-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._pool.shutdown(wait=False)
+
+    # --- Reads ---
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            printers = {name: self._public(entry, now) for name, entry in self._entries.items()}
+            roles = dict(self._roles)
+        return {
+            "roles": roles,
+            "printers": printers,
+            "interval_seconds": self.interval_seconds,
+            "generated_at": datetime.now().isoformat(timespec="milliseconds"),
+        }
+
+    def get(self, printer_name: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(printer_name)
+            return self._public(entry, now) if entry else None
+
+    def track(self, printer_name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for any printer name, scheduling probes for untracked ones."""
+        printer_name = (printer_name or "").strip()
+        if not printer_name:
+            return None
+        with self._lock:
+            known = printer_name in self._entries or printer_name in self._roles.values()
+            self._adhoc[printer_name] = time.monotonic() + self.adhoc_ttl_seconds
+            if not known:
+                self._next_due[printer_name] = 0.0
+        if not known:
+            self._wake.set()
+        return self.get(printer_name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"printers": len(self._entries), "probes": self._probes, "in_flight": len(self._in_flight)}
+
+    # --- Updates ---
+    def refresh(self, printer_name: Optional[str] = None):
+        """Probe now (one printer or all targets) instead of waiting for the schedule."""
+        with self._lock:
+            names = [printer_name] if printer_name else list(self._next_due)
+            for name in names:
+                self._next_due[name] = 0.0
+        self._wake.set()
+
+    def observe(self, printer_name: str, status_code: int, online: bool = True, source: str = "print"):
+        """Record a status read by the print path, which already had the printer open."""
+        if printer_name:
+            self._record(printer_name, {"online": online, "status_code": int(status_code or 0)}, None, 0.0, source)
+
+    # --- Internals ---
+    def _public(self, entry: Dict[str, Any], now: float) -> Dict[str, Any]:
+        public = {key: value for key, value in entry.items() if not key.startswith("_")}
+        age = now - entry["_checked_monotonic"]
+        public["age_seconds"] = round(age, 3)
+        interval = self.interval_seconds if entry.get("online") else self.failure_interval_seconds
+        public["fresh"] = age <= interval * 2 + 1.0
+        return public
+
+    def _targets(self, now: float) -> Dict[str, Iterable[str]]:
+        try:
+            roles = {role: (name or "").strip() for role, name in (self.targets_fn() or {}).items()}
+        except Exception as exc:
+            self.logger.warning(f"[PRINTER_HEALTH] Could not resolve role printers: {exc}")
+            roles = dict(self._roles)
+        roles = {role: name for role, name in roles.items() if name}
+        with self._lock:
+            self._roles = roles
+            for name, expires in list(self._adhoc.items()):
+                if expires < now:
+                    self._adhoc.pop(name, None)
+            targets: Dict[str, list] = {}
+            for role, name in roles.items():
+                targets.setdefault(name, []).append(role)
+            for name in self._adhoc:
+                targets.setdefault(name, [])
+            for name in set(self._next_due) | set(self._entries):
+                if name not in targets:
+                    self._next_due.pop(name, None)
+                    self._entries.pop(name, None)
+            for name in targets:
+                self._next_due.setdefault(name, 0.0)
+        return targets
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            targets = self._targets(now)
+            with self._lock:
+                due = [name for name in targets
+                       if self._next_due.get(name, 0.0) <= now and name not in self._in_flight]
+                for name in due:
+                    self._in_flight.add(name)
+                upcoming = [when for name, when in self._next_due.items() if name not in self._in_flight]
+            for name in due:
+                try:
+                    self._pool.submit(self._probe, name, tuple(targets[name]))
+                except RuntimeError:
+                    return  # pool shut down
+            wait = min(upcoming) - now if upcoming else self.interval_seconds
+            self._wake.wait(max(0.05, min(wait, self.interval_seconds)))
+
+    def _probe(self, printer_name: str, roles: tuple):
+        started = time.monotonic()
+        result, error = None, None
+        try:
+            result = self.probe_fn(printer_name) or {}
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+        elapsed_ms = (time.monotonic() - started) * 1000
+        try:
+            self._record(printer_name, result, error, elapsed_ms, "probe", roles)
+        finally:
+            with self._lock:
+                self._in_flight.discard(printer_name)
+                self._probes += 1
+            self._wake.set()
+
+    def _record(self, printer_name: str, result: Optional[Dict[str, Any]], error: Optional[str],
+                elapsed_ms: float, source: str, roles: Optional[tuple] = None):
+        now = time.monotonic()
+        online = bool(result and result.get("online")) and error is None
+        status_code = None if result is None else result.get("status_code")
+        with self._lock:
+            previous = self._entries.get(printer_name)
+            failures = 0 if online else (previous or {}).get("consecutive_failures", 0) + 1
+            changed = (previous is None or previous.get("online") != online
+                       or previous.get("status_code") != status_code or previous.get("error") != error)
+            checked_at = datetime.now().isoformat(timespec="milliseconds")
+            entry = dict(result or {})
+            entry.update({
+                "printer_name": printer_name,
+                "roles": list(roles) if roles is not None else (previous or {}).get("roles", []),
+                "online": online,
+                "status_code": status_code,
+                "error": error,
+                "checked_at": checked_at,
+                "changed_at": checked_at if changed else previous.get("changed_at"),
+                "consecutive_failures": failures,
+                "probe_ms": round(elapsed_ms, 1),
+                "source": source,
+                "_checked_monotonic": now,
+            })
+            self._entries[printer_name] = entry
+            if printer_name in self._next_due or source == "probe":
+                healthy = online and not ((status_code or 0) & self.failure_flags)
+                delay = self.interval_seconds if healthy else self.failure_interval_seconds
+                self._next_due[printer_name] = now + delay
+            public = self._public(entry, now)
+        if changed:
+            level = self.logger.info if online else self.logger.warning
+            level(f"[PRINTER_HEALTH] '{printer_name}' is now {'online' if online else 'offline'}"
+                  f" (status={status_code}, error={error})")
+            if self.publish_fn is not None:
+                try:
+                    self.publish_fn(public)
+                except Exception as exc:
+                    self.logger.warning(f"[PRINTER_HEALTH] Publishing status change failed: {exc}")
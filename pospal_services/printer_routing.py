@@ -0,0 +1,133 @@
+"""
+Printer Failover Routing
+Orders a role's printers by health snapshot and per-printer circuit-breaker state
+"""
+
+import time
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List, Iterable
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class PrinterFailoverRouter:
+    """
+    Decides which of a role's printers (primary first, then the configured
+    failover list) a job should try, and in which order.
+
+    A printer goes to the back of the list when its health snapshot says it is
+    offline or reports one of fatal_flags, or when its circuit breaker is
+    open: failure_threshold consecutive print failures open the breaker for
+    cooldown_seconds, after which it is tried first again (half-open): a
+    success closes it, a failure re-opens it. Printers that look bad are still
+    tried last, so a job is never dropped only because every printer looked
+    unhealthy.
+    """
+
+    def __init__(self, app_logger, health_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                 fatal_flags: int = 0, failure_threshold: int = 2, cooldown_seconds: float = 30.0):
+        self.logger = app_logger
+        self.health_lookup = health_lookup
+        self.fatal_flags = fatal_flags
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, Dict[str, Any]] = {}
+
+    # --- Routing ---
+    def route(self, candidates: Iterable[str]) -> List[str]:
+        """Candidates in attempt order: usable printers first (in configured order), then the rest."""
+        ordered, seen = [], set()
+        for name in candidates:
+            name = (name or "").strip()
+            if name and name not in seen:
+                seen.add(name)
+                ordered.append(name)
+        usable, deferred = [], []
+        for name in ordered:
+            (usable if self._usable(name) else deferred).append(name)
+        return usable + deferred
+
+    def unhealthy_reason(self, printer_name: str) -> Optional[str]:
+        """Why the health snapshot says not to use a printer (None when it looks fine or is unknown)."""
+        if self.health_lookup is None:
+            return None
+        try:
+            entry = self.health_lookup(printer_name)
+        except Exception:
+            return None
+        if not entry or not entry.get("fresh", True):
+            return None
+        if entry.get("error"):
+            return entry["error"]
+        if not entry.get("online", True):
+            return "offline"
+        status_code = entry.get("status_code") or 0
+        if status_code & self.fatal_flags:
+            return f"status 0x{status_code:04x}"
+        return None
+
+    # --- Outcomes ---
+    def record_success(self, printer_name: str):
+        with self._lock:
+            breaker = self._breakers.get(printer_name)
+            if breaker is None:
+                return
+            reopened = breaker["state"] != BREAKER_CLOSED
+            self._breakers.pop(printer_name, None)
+        if reopened:
+            self.logger.info(f"[PRINTER_FAILOVER] '{printer_name}' printed again; circuit closed")
+
+    def record_failure(self, printer_name: str, reason: Optional[str] = None):
+        now = time.monotonic()
+        with self._lock:
+            breaker = self._breakers.setdefault(printer_name, {
+                "state": BREAKER_CLOSED, "failures": 0, "opened_at": None, "_opened_monotonic": None
+            })
+            breaker["failures"] += 1
+            breaker["last_error"] = reason
+            breaker["last_failure_at"] = datetime.now().isoformat(timespec="seconds")
+            tripped = breaker["state"] == BREAKER_HALF_OPEN or (
+                breaker["state"] == BREAKER_CLOSED and breaker["failures"] >= self.failure_threshold)
+            if tripped:
+                breaker["state"] = BREAKER_OPEN
+                breaker["opened_at"] = breaker["last_failure_at"]
+                breaker["_opened_monotonic"] = now
+        if tripped:
+            self.logger.warning(
+                f"[PRINTER_FAILOVER] Circuit open for '{printer_name}' after {breaker['failures']} failure(s)"
+                f"{f': {reason}' if reason else ''}; routing around it for {self.cooldown_seconds:.0f}s"
+            )
+
+    def breaker_state(self, printer_name: str) -> str:
+        with self._lock:
+            return self._state(printer_name, time.monotonic())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            result = {}
+            for name, breaker in self._breakers.items():
+                public = {key: value for key, value in breaker.items() if not key.startswith("_")}
+                public["state"] = self._state(name, now)
+                result[name] = public
+            return result
+
+    # --- Internals ---
+    def _state(self, printer_name: str, now: float) -> str:
+        breaker = self._breakers.get(printer_name)
+        if breaker is None:
+            return BREAKER_CLOSED
+        if breaker["state"] == BREAKER_OPEN and now - breaker["_opened_monotonic"] >= self.cooldown_seconds:
+            breaker["state"] = BREAKER_HALF_OPEN
+        return breaker["state"]
+
+    def _usable(self, printer_name: str) -> bool:
+        with self._lock:
+            if self._state(printer_name, time.monotonic()) == BREAKER_OPEN:
+                return False
+        return self.unhealthy_reason(printer_name) is None
@@ -0,0 +1,84 @@
+"""
+Receipt Templates
+Compiled, cached ESC/POS byte blocks for the static parts of a receipt
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Hashable
+
+
+class CompiledReceiptTemplate:
+    """
+    The parts of a receipt that only depend on the business profile, the
+    language and the printer width, already encoded to ESC/POS bytes.
+
+    header:    logo, business name and contact/tax lines (or the placeholder)
+    headings:  section heading blocks by label key ("section_items", ...)
+    qr_block:  QR section (heading, code and hint), empty when no QR payload
+    footers:   closing block per receipt kind ("customer", "kitchen", "table")
+    labels:    receipt labels without format arguments, by key
+    """
+
+    __slots__ = ("key", "header", "headings", "qr_block", "footers", "labels",
+                 "tax_line", "website")
+
+    def __init__(self, key: Hashable, header: bytes, headings: Dict[str, bytes], qr_block: bytes,
+                 footers: Dict[str, bytes], labels: Dict[str, str], tax_line: str = "", website: str = ""):
+        self.key = key
+        self.header = header
+        self.headings = headings
+        self.qr_block = qr_block
+        self.footers = footers
+        self.labels = labels
+        self.tax_line = tax_line
+        self.website = website
+
+    def heading(self, label_key: str) -> bytes:
+        return self.headings.get(label_key, b"")
+
+    def footer(self, receipt_kind: str) -> bytes:
+        return self.footers.get(receipt_kind) or self.footers.get("customer", b"")
+
+
+class ReceiptTemplateCache:
+    """
+    Small LRU of compiled templates. Keys are chosen by the caller, e.g.
+    (profile updated_at, language, line width); a changed profile gets a new
+    key, so nothing has to be invalidated explicitly.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CompiledReceiptTemplate]" = OrderedDict()
+        self._stats = {"hits": 0, "compiles": 0}
+
+    def get(self, key: Hashable, compile_fn: Callable[[], CompiledReceiptTemplate]) -> CompiledReceiptTemplate:
+        with self._lock:
+            template = self._entries.get(key)
+            if template is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return template
+        # Compile outside the lock; two racing threads just build the same bytes
+        template = compile_fn()
+        with self._lock:
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["compiles"] += 1
+        return template
+
+    def peek(self, key: Hashable) -> Optional[CompiledReceiptTemplate]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
@@ -0,0 +1,252 @@
+"""
+SSE Gateway
+Asyncio event-stream server sharing the EventBus, so idle streams do not hold Waitress threads
+"""
+
+import json
+import asyncio
+import threading
+from urllib.parse import parse_qs, urlsplit
+from typing import Optional, Callable, List, Tuple
+
+from .event_bus import EventBus
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Methods: GET, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n"
+)
+
+
+class SSEGateway:
+    """
+    Serves GET /api/events (same wire format as the Flask endpoint) and
+    GET /ping from one asyncio event loop running in a daemon thread. Each
+    stream is a coroutine parked on a shared wakeup future, so thousands of
+    idle connections cost a socket each rather than a worker thread.
+
+    Publishers stay on the EventBus; a bus listener wakes the loop with
+    call_soon_threadsafe and every stream drains its own subscription.
+    initial_events() supplies (event, data) pairs sent first on each stream.
+
+    The gateway is on another port, so POSPal pages reach it cross-origin.
+    Only pages served by the main app (same host as the gateway, app_port)
+    get an Access-Control-Allow-Origin echo; any other site is left to the
+    browser's same-origin policy.
+    """
+
+    def __init__(self, app_logger, event_bus: EventBus, host: str = "0.0.0.0", port: int = 5001,
+                 initial_events: Optional[Callable[[], List[Tuple[str, str]]]] = None,
+                 keepalive_seconds: float = 30.0, write_timeout: float = 30.0,
+                 app_port: Optional[int] = None):
+        self.logger = app_logger
+        self.event_bus = event_bus
+        self.host = host
+        self.port = int(port)
+        self.app_port = int(app_port) if app_port else None
+        self.initial_events = initial_events
+        self.keepalive_seconds = keepalive_seconds
+        self.write_timeout = write_timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._wakeup = None
+        self._wake_scheduled = False
+        self._connections = 0
+        self._tasks = set()
+        self._stopping = False
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None and self._loop is not None and self._loop.is_running()
+
+    def stats(self):
+        return {"running": self.running, "port": self.port, "connections": self._connections, "error": self.error}
+
+    # --- Lifecycle ---
+    def start(self, timeout: float = 5.0) -> bool:
+        """Bind and start serving; False if the port could not be bound."""
+        if self._thread is not None and self._thread.is_alive():
+            return self.running
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="SSEGateway", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self.running
+
+    def stop(self, timeout: float = 5.0):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception as exc:
+            self.logger.warning(f"[SSE_GATEWAY] Shutdown did not complete cleanly: {exc!r}")
+        try:
+            loop.call_soon_threadsafe(loop.stop)
+        except RuntimeError:
+            pass  # already closed
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=512)
+            )
+        except OSError as exc:
+            self.error = str(exc)
+            self._server = None
+            self.logger.error(f"[SSE_GATEWAY] Could not listen on {self.host}:{self.port}: {exc}")
+            loop.close()
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port 0
+        self._loop = loop
+        self._stopping = False
+        self._wakeup = loop.create_future()
+        self.event_bus.add_listener(self._on_publish)
+        loop.call_soon(self._ready.set)
+        self.logger.info(f"[SSE_GATEWAY] Serving event streams on {self.host}:{self.port}")
+        try:
+            loop.run_forever()
+        finally:
+            self.event_bus.remove_listener(self._on_publish)
+            self._server = None
+            loop.close()
+
+    async def _shutdown(self):
+        """End streams after they drain what the bus still holds; cancel any that are stuck."""
+        self._stopping = True
+        self._server.close()
+        self._wake_streams()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=1.0)
+        for task in list(self._tasks):
+            task.cancel()
+
+    # --- Wakeups ---
+    def _on_publish(self, _seq: int):
+        """EventBus listener; runs on the publishing thread."""
+        loop = self._loop
+        if loop is None or self._wake_scheduled:
+            return
+        self._wake_scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._wake_streams)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _wake_streams(self):
+        self._wake_scheduled = False
+        wakeup, self._wakeup = self._wakeup, self._loop.create_future()
+        if not wakeup.done():
+            wakeup.set_result(None)
+
+    # --- HTTP ---
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2:
+                return
+            method, (path, _, query) = parts[0].upper(), parts[1].partition("?")
+            cors = self._cors_headers(headers)
+            if method == "OPTIONS":
+                await self._respond(writer, "204 No Content", "", cors=cors)
+            elif method == "GET" and path == "/ping":
+                await self._respond(writer, "200 OK", json.dumps({"status": "ok", "gateway": "sse"}),
+                                    content_type="application/json", cors=cors)
+            elif method == "GET" and path == "/api/events":
+                last_event_id = headers.get("last-event-id") or parse_qs(query).get("lastEventId", [None])[0]
+                await self._stream(writer, last_event_id, cors)
+            else:
+                await self._respond(writer, "404 Not Found", json.dumps({"error": "not found"}),
+                                    content_type="application/json", cors=cors)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            pass  # gateway shutting down
+        finally:
+            self._tasks.discard(task)
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def _cors_headers(self, headers) -> str:
+        """CORS headers for a request: the Origin is echoed only for the main app on this host."""
+        origin = headers.get("origin")
+        if not origin or self.app_port is None:
+            return "Vary: Origin\r\n"
+        try:
+            source = urlsplit(origin)
+            target = urlsplit(f"//{headers.get('host', '')}")
+            allowed = (
+                source.scheme == "http" and source.hostname is not None
+                and source.hostname == target.hostname
+                and (source.port or 80) == self.app_port
+            )
+        except ValueError:
+            allowed = False
+        if not allowed:
+            return "Vary: Origin\r\n"
+        return f"Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n{CORS_HEADERS}"
+
+    async def _respond(self, writer, status: str, body: str, content_type: str = "text/plain", cors: str = ""):
+        payload = body.encode("utf-8")
+        writer.write((
+            f"HTTP/1.1 {status}\r\n{cors}"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+            "Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        ).encode("latin-1") + payload)
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+
+    async def _stream(self, writer, last_event_id: Optional[str], cors: str = ""):
+        subscription = self.event_bus.subscribe(last_event_id)
+        self._connections += 1
+        try:
+            chunks = [
+                f"HTTP/1.1 200 OK\r\n{cors}"
+                "Content-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                "X-Accel-Buffering: no\r\nConnection: keep-alive\r\n\r\n"
+            ]
+            for event_name, data in (self.initial_events() if self.initial_events else []):
+                chunks.append(f"event: {event_name}\ndata: {data}\n\n")
+            writer.write("".join(chunks).encode("utf-8"))
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+            while True:
+                # Take the wakeup before polling so a publish in between is not missed
+                wakeup = self._wakeup
+                batch = subscription.poll()
+                if batch is None or (self._stopping and not batch):
+                    break
+                if batch:
+                    writer.write("".join(
+                        f"id: {event_id}\nevent: {event_name}\ndata: {data}\n\n"
+                        for event_id, event_name, data in batch
+                    ).encode("utf-8"))
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+                    continue
+                try:
+                    await asyncio.wait_for(asyncio.shield(wakeup), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+        finally:
+            subscription.close()
+            self._connections -= 1
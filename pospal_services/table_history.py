@@ -0,0 +1,271 @@
+"""
+Table History Store
+Append-only per-day table session history with a footer index on finished days
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+TRAILER_PREFIX = b"#footer "
+TRAILER_SIZE = len(TRAILER_PREFIX) + 12 + 1   # "#footer " + 12-digit offset + "\n"
+FOOTER_KEY = "_footer"
+
+
+class TableHistoryStore:
+    """
+    Closed table sessions go to table_history_YYYY-MM-DD.jsonl, one JSON line
+    each, appended to a file that stays open while the day is current, so a
+    clear costs one write however busy the day has been.
+
+    Once a day is over its file is sealed: a footer line indexing every
+    session (offset, length, table_id, closed_at, total) plus day totals is
+    appended, followed by a fixed-size "#footer <offset>" trailer. Readers of
+    a sealed day go straight to the footer and only seek to the sessions they
+    need; the current day (or a day written after sealing) is scanned.
+
+    A legacy table_history_YYYY-MM-DD.json for a day is imported into the
+    day's .jsonl (then renamed to .json.migrated) the first time that day is
+    written or read.
+    """
+
+    def __init__(self, app_logger, data_dir: str, file_prefix: str = "table_history_"):
+        self.logger = app_logger
+        self.data_dir = data_dir
+        self.file_prefix = file_prefix
+
+        self._lock = threading.RLock()
+        self._handle = None
+        self._handle_date: Optional[str] = None
+
+    # --- Paths ---
+    def path_for(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.jsonl")
+
+    def legacy_path_for(self, date_str: str) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{date_str}.json")
+
+    # --- Writes ---
+    def append(self, session: Dict[str, Any], date_str: Optional[str] = None) -> None:
+        date_str = date_str or datetime.now().strftime("%Y-%m-%d")
+        line = (json.dumps(session, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            handle = self._handle_for(date_str)
+            handle.write(line)
+            handle.flush()
+
+    def seal(self, date_str: str) -> bool:
+        """Write the footer index for a finished day. Returns False if there is nothing to seal."""
+        with self._lock:
+            if self._handle_date == date_str:
+                self._close_handle()
+            path = self.path_for(date_str)
+            if not os.path.exists(path) or self._read_footer(path) is not None:
+                return False
+            rows, end = self._scan(path)
+            footer = {
+                "date": date_str,
+                "count": len(rows),
+                "total": round(sum(total for *_, total in rows), 2),
+                "tables": {},
+                "entries": [list(row) for row in rows],
+            }
+            for _, _, table_id, _, _ in rows:
+                footer["tables"][table_id] = footer["tables"].get(table_id, 0) + 1
+            with open(path, "r+b") as f:
+                f.seek(end)
+                f.truncate()
+                f.write((json.dumps({FOOTER_KEY: footer}, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+                f.write(TRAILER_PREFIX + f"{end:012d}\n".encode("ascii"))
+                f.flush()
+                os.fsync(f.fileno())
+            self.logger.info(f"[TABLE_HISTORY] Sealed {os.path.basename(path)} ({len(rows)} sessions)")
+            return True
+
+    def close(self):
+        with self._lock:
+            self._close_handle()
+
+    # --- Reads ---
+    def load_day(self, date_str: str, table_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [session for _, session in self.iter_range(date_str, date_str, table_id=table_id)]
+
+    def day_summary(self, date_str: str) -> Dict[str, Any]:
+        """Session count, total and sessions per table for a day (from the footer when sealed)."""
+        footer = self._footer_for(date_str)
+        if footer is not None:
+            return {key: footer[key] for key in ("date", "count", "total", "tables")}
+        summary = {"date": date_str, "count": 0, "total": 0.0, "tables": {}}
+        for _, session in self.iter_range(date_str, date_str):
+            table_id = str(session.get("table_id", ""))
+            summary["count"] += 1
+            summary["total"] = round(summary["total"] + float(session.get("total") or 0), 2)
+            summary["tables"][table_id] = summary["tables"].get(table_id, 0) + 1
+        return summary
+
+    def iter_range(self, start: str, end: str, table_id: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (date, session) for every day from start to end inclusive, oldest first, one day at a time."""
+        table_id = None if table_id in (None, "") else str(table_id)
+        day = date.fromisoformat(start)
+        last = date.fromisoformat(end)
+        while day <= last:
+            date_str = day.isoformat()
+            for session in self._iter_day(date_str, table_id):
+                yield date_str, session
+            day += timedelta(days=1)
+
+    # --- Internals ---
+    def _handle_for(self, date_str: str):
+        """Open (or reuse) the append handle for a day. Caller holds _lock."""
+        if self._handle is not None and self._handle_date == date_str:
+            return self._handle
+        previous = self._handle_date
+        self._close_handle()
+        if previous and previous < date_str:
+            try:
+                self.seal(previous)
+            except OSError as exc:
+                self.logger.warning(f"[TABLE_HISTORY] Could not seal {previous}: {exc}")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._import_legacy(date_str)
+        path = self.path_for(date_str)
+        handle = open(path, "ab")
+        if handle.tell() and not self._ends_with_newline(path):
+            handle.write(b"\n")  # torn line from a crash
+        self._handle, self._handle_date = handle, date_str
+        return handle
+
+    def _close_handle(self):
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+        self._handle = None
+        self._handle_date = None
+
+    def _footer_for(self, date_str: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._import_legacy(date_str)
+            path = self.path_for(date_str)
+            if not os.path.exists(path):
+                return None
+            footer = self._read_footer(path)
+            if footer is None and date_str < datetime.now().strftime("%Y-%m-%d") and self._handle_date != date_str:
+                try:
+                    if self.seal(date_str):
+                        footer = self._read_footer(path)
+                except OSError as exc:
+                    self.logger.warning(f"[TABLE_HISTORY] Could not seal {date_str}: {exc}")
+            return footer
+
+    def _iter_day(self, date_str: str, table_id: Optional[str]) -> Iterator[Dict[str, Any]]:
+        footer = self._footer_for(date_str)
+        path = self.path_for(date_str)
+        try:
+            with open(path, "rb") as f:
+                if footer is not None:
+                    for offset, length, row_table, *_ in footer["entries"]:
+                        if table_id is not None and row_table != table_id:
+                            continue
+                        f.seek(offset)
+                        session = self._parse(f.read(length))
+                        if session is not None:
+                            yield session
+                    return
+                for line in f:
+                    session = self._parse(line)
+                    if session is not None and (table_id is None or str(session.get("table_id", "")) == table_id):
+                        yield session
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[Dict[str, Any]]:
+        if not line.endswith(b"\n") or line.startswith(TRAILER_PREFIX):
+            return None
+        try:
+            value = json.loads(line.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return None
+        if not isinstance(value, dict) or FOOTER_KEY in value:
+            return None
+        return value
+
+    def _scan(self, path: str) -> Tuple[List[Tuple[int, int, str, str, float]], int]:
+        """Index rows of a day file and the offset where complete session lines end."""
+        rows = []
+        pos = end = 0
+        with open(path, "rb") as f:
+            for line in f:
+                start, pos = pos, pos + len(line)
+                session = self._parse(line)
+                if session is None:
+                    if line.endswith(b"\n"):
+                        end = pos
+                    continue
+                try:
+                    total = float(session.get("total") or 0)
+                except (TypeError, ValueError):
+                    total = 0.0
+                rows.append((start, len(line), str(session.get("table_id", "")),
+                             str(session.get("closed_at", "")), total))
+                end = pos
+        return rows, end
+
+    @staticmethod
+    def _read_footer(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            size = os.path.getsize(path)
+            if size < TRAILER_SIZE:
+                return None
+            with open(path, "rb") as f:
+                f.seek(size - TRAILER_SIZE)
+                trailer = f.read(TRAILER_SIZE)
+                if not trailer.startswith(TRAILER_PREFIX) or not trailer.endswith(b"\n"):
+                    return None
+                offset = int(trailer[len(TRAILER_PREFIX):-1])
+                f.seek(offset)
+                footer = json.loads(f.read(size - TRAILER_SIZE - offset).decode("utf-8"))[FOOTER_KEY]
+        except (OSError, ValueError, KeyError, TypeError, UnicodeDecodeError):
+            return None
+        return footer if isinstance(footer, dict) and isinstance(footer.get("entries"), list) else None
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def _import_legacy(self, date_str: str):
+        """Move a day's old whole-file JSON history into its .jsonl. Caller holds _lock."""
+        legacy = self.legacy_path_for(date_str)
+        if not os.path.exists(legacy):
+            return
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                sessions = (json.load(f) or {}).get("sessions") or []
+        except (OSError, ValueError, AttributeError) as exc:
+            self.logger.warning(f"[TABLE_HISTORY] Could not read legacy history {legacy}: {exc}")
+            sessions = []
+        path = self.path_for(date_str)
+        existing = []
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                existing = [s for s in (self._parse(line) for line in f) if s is not None]
+        lines = [json.dumps(s, ensure_ascii=False, separators=(",", ":")) + "\n"
+                 for s in sessions if isinstance(s, dict)]
+        lines += [json.dumps(s, ensure_ascii=False, separators=(",", ":")) + "\n" for s in existing]
+        if self._handle_date == date_str:
+            self._close_handle()
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(lines)
+        os.replace(temp_path, path)
+        os.replace(legacy, legacy + ".migrated")
+        self.logger.info(f"[TABLE_HISTORY] Imported {len(sessions)} sessions from {os.path.basename(legacy)}")
@@ -0,0 +1,209 @@
+"""
+Table Session Store
+Authoritative in-memory table sessions with per-table locks and write-behind persistence
+"""
+
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+
+from .write_behind import WriteBehindFlusher, write_atomic
+
+
+class TableSessionStore:
+    """
+    Keeps every open table session in memory; table_sessions.json is only
+    the persisted snapshot.
+
+    Sessions are held as canonical JSON text plus the decoded object, so
+    callers always receive private copies and changes are detected by
+    comparing text. Mutations mark tables dirty; a flusher thread appends
+    the latest state of each dirty table to a mutation journal every
+    flush_interval seconds (fsync'd), and folds the journal into the JSON
+    snapshot once it reaches compact_every entries and on close(). Startup
+    replays the journal over the snapshot.
+
+    lock(table_id) serialises read-modify-write sequences on one table
+    without blocking other tables.
+    """
+
+    def __init__(self, app_logger, snapshot_path: str, journal_path: str,
+                 flush_interval: float = 0.25, compact_every: int = 500):
+        self.logger = app_logger
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.compact_every = max(1, int(compact_every))
+
+        self._state_lock = threading.Lock()
+        self._table_locks: Dict[str, threading.RLock] = {}
+        self._encoded: Dict[str, str] = {}
+        self._objects: Dict[str, Any] = {}
+        self._dirty: Dict[str, Optional[str]] = {}
+        self._loaded = False
+
+        self._flush_lock = threading.Lock()
+        self._journal_entries = 0
+        self._flusher = WriteBehindFlusher(app_logger, self.flush, self.flush_interval,
+                                           name="TableSessionFlusher", log_tag="TABLE_SESSIONS")
+
+    # --- Locking ---
+    @contextmanager
+    def lock(self, table_id):
+        key = str(table_id)
+        with self._state_lock:
+            table_lock = self._table_locks.setdefault(key, threading.RLock())
+        with table_lock:
+            yield
+
+    # --- Reads ---
+    def get(self, table_id) -> Optional[Dict[str, Any]]:
+        """Private copy of one table's session, or None."""
+        self._ensure_loaded()
+        with self._state_lock:
+            encoded = self._encoded.get(str(table_id))
+        return json.loads(encoded) if encoded is not None else None
+
+    def peek(self, table_id, field: str, default=None):
+        """Read one top-level field without copying the session."""
+        self._ensure_loaded()
+        with self._state_lock:
+            session = self._objects.get(str(table_id))
+            return session.get(field, default) if isinstance(session, dict) else default
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Private copy of all sessions, in the legacy table_sessions.json shape."""
+        self._ensure_loaded()
+        with self._state_lock:
+            encoded = dict(self._encoded)
+        return {k: json.loads(v) for k, v in encoded.items()}
+
+    def table_ids(self):
+        self._ensure_loaded()
+        with self._state_lock:
+            return list(self._encoded.keys())
+
+    # --- Writes ---
+    def put(self, table_id, session: Dict[str, Any]):
+        self._ensure_loaded()
+        key = str(table_id)
+        encoded = json.dumps(session, ensure_ascii=False, sort_keys=True)
+        with self._state_lock:
+            if self._encoded.get(key) == encoded:
+                return
+            self._encoded[key] = encoded
+            self._objects[key] = json.loads(encoded)
+            self._dirty[key] = encoded
+        self._schedule()
+
+    def delete(self, table_id):
+        self._ensure_loaded()
+        key = str(table_id)
+        with self._state_lock:
+            if key not in self._encoded:
+                return
+            del self._encoded[key]
+            del self._objects[key]
+            self._dirty[key] = None
+        self._schedule()
+
+    # --- Persistence ---
+    def start(self):
+        self._ensure_loaded()
+        self._flusher.start()
+
+    def flush(self):
+        """Journal all pending mutations now."""
+        with self._flush_lock:
+            with self._state_lock:
+                pending, self._dirty = self._dirty, {}
+            if not pending:
+                return
+            lines = []
+            for key, encoded in pending.items():
+                if encoded is None:
+                    lines.append(json.dumps({"op": "del", "table": key}))
+                else:
+                    lines.append('{"op": "put", "table": %s, "session": %s}' % (json.dumps(key), encoded))
+            try:
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_entries += len(lines)
+            except OSError as exc:
+                self.logger.error(f"[TABLE_SESSIONS] Journal write failed: {exc}")
+                with self._state_lock:
+                    for key, encoded in pending.items():
+                        self._dirty.setdefault(key, encoded)
+                return
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    def close(self):
+        self._flusher.stop()
+        if self._loaded:
+            self.flush()
+            with self._flush_lock:
+                self._compact()
+
+    def _schedule(self):
+        self._flusher.schedule()
+
+    def _compact(self):
+        """Write the JSON snapshot atomically, then empty the journal. Caller holds _flush_lock."""
+        with self._state_lock:
+            sessions = {k: self._objects[k] for k in self._encoded}
+            text = json.dumps(sessions, indent=2, ensure_ascii=False)
+        try:
+            write_atomic(self.snapshot_path, text)
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+            self._journal_entries = 0
+        except OSError as exc:
+            self.logger.warning(f"[TABLE_SESSIONS] Snapshot write failed (journal kept): {exc}")
+
+    # --- Recovery ---
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._flush_lock:
+            if self._loaded:
+                return
+            sessions: Dict[str, Any] = {}
+            try:
+                if os.path.exists(self.snapshot_path):
+                    with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        sessions = data
+            except (OSError, ValueError) as exc:
+                self.logger.error(f"[TABLE_SESSIONS] Could not read {self.snapshot_path}: {exc}")
+            entries = 0
+            if os.path.exists(self.journal_path):
+                try:
+                    with open(self.journal_path, "r", encoding="utf-8") as f:
+                        for raw in f:
+                            try:
+                                entry = json.loads(raw)
+                            except ValueError:
+                                continue  # torn last line
+                            key = str(entry.get("table"))
+                            if entry.get("op") == "put":
+                                sessions[key] = entry.get("session")
+                            elif entry.get("op") == "del":
+                                sessions.pop(key, None)
+                            entries += 1
+                except OSError as exc:
+                    self.logger.error(f"[TABLE_SESSIONS] Could not replay {self.journal_path}: {exc}")
+            with self._state_lock:
+                for key, session in sessions.items():
+                    encoded = json.dumps(session, ensure_ascii=False, sort_keys=True)
+                    self._encoded[str(key)] = encoded
+                    self._objects[str(key)] = json.loads(encoded)
+            self._journal_entries = entries
+            self._loaded = True
+            if entries:
+                self.logger.info(f"[TABLE_SESSIONS] Replayed {entries} journal entries over {self.snapshot_path}")
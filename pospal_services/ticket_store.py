@@ -0,0 +1,181 @@
+"""
+Ticket Blob Store
+Content-addressed store of rendered ESC/POS tickets, indexed per day by order number
+"""
+
+import os
+import json
+import zlib
+import time
+import hashlib
+import threading
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any, List
+
+
+class TicketBlobStore:
+    """
+    Keeps the exact bytes sent to the printer so reprints can resend them
+    without re-reading the order or re-rendering it.
+
+    Blobs live in <root>/blobs/<aa>/<sha256>.bin (zlib-compressed, named by
+    the hash of the uncompressed bytes, so identical tickets are stored once).
+    Each day has an append-only <root>/index_YYYY-MM-DD.jsonl mapping
+    (order number, kind) to a hash; the last entry wins. Day indexes are
+    loaded once and kept in memory, so lookups are a dict hit plus one read.
+
+    prune() drops day indexes older than the retention window and deletes
+    blobs no remaining index refers to.
+    """
+
+    def __init__(self, app_logger, root_dir: str, compress_level: int = 6, max_cached_days: int = 14):
+        self.logger = app_logger
+        self.root_dir = root_dir
+        self.blob_dir = os.path.join(root_dir, "blobs")
+        self.compress_level = compress_level
+        self.max_cached_days = max_cached_days
+
+        self._lock = threading.Lock()
+        # date -> {(order_number, kind): entry}
+        self._indexes: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+
+    def index_path(self, date_str: str) -> str:
+        return os.path.join(self.root_dir, f"index_{date_str}.jsonl")
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.bin")
+
+    # --- Writes ---
+    def store(self, date_str: str, order_number, data: bytes, kind: str = "kitchen") -> str:
+        data = bytes(data)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        try:
+            os.utime(path)  # already stored: a fresh mtime keeps prune() off it until it is indexed
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data, self.compress_level))
+            os.replace(tmp, path)
+
+        entry = {
+            "order_number": str(order_number),
+            "kind": kind,
+            "sha256": digest,
+            "size": len(data),
+            "stored_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            index = self._load_index(date_str)
+            os.makedirs(self.root_dir, exist_ok=True)
+            with open(self.index_path(date_str), "a+b") as f:
+                f.seek(0, os.SEEK_END)
+                prefix = b""
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    prefix = b"" if f.read(1) == b"\n" else b"\n"  # end a torn line first
+                f.write(prefix + json.dumps(entry).encode("utf-8") + b"\n")
+            index[(entry["order_number"], kind)] = entry
+        return digest
+
+    # --- Reads ---
+    def entry(self, date_str: str, order_number, kind: str = "kitchen") -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load_index(date_str).get((str(order_number), kind))
+
+    def kinds(self, date_str: str, order_number) -> List[str]:
+        """Kinds stored for an order (e.g. "kitchen", "station:bar"), in the order first stored."""
+        number = str(order_number)
+        with self._lock:
+            return [kind for (entry_number, kind) in self._load_index(date_str) if entry_number == number]
+
+    def has(self, date_str: str, order_number, kind: str = "kitchen") -> bool:
+        return self.entry(date_str, order_number, kind) is not None
+
+    def load(self, date_str: str, order_number, kind: str = "kitchen") -> Optional[bytes]:
+        entry = self.entry(date_str, order_number, kind)
+        if entry is None:
+            return None
+        try:
+            with open(self.blob_path(entry["sha256"]), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error) as exc:
+            self.logger.warning(f"[TICKET_STORE] Blob for order #{order_number} ({date_str}) unreadable: {exc}")
+            return None
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            self.logger.warning(f"[TICKET_STORE] Blob for order #{order_number} ({date_str}) failed its hash check")
+            return None
+        return data
+
+    # --- Retention ---
+    def prune(self, retained_days: int, today: Optional[date] = None, grace_seconds: float = 3600.0) -> Dict[str, int]:
+        """
+        Remove day indexes older than retained_days (counting today) and every
+        blob that no remaining index references. Blobs written within
+        grace_seconds are kept, as their index entry may not be written yet.
+        Returns {"days": indexes removed, "blobs": blobs removed}.
+        """
+        cutoff = ((today or date.today()) - timedelta(days=max(1, int(retained_days)) - 1)).isoformat()
+        removed_days = removed_blobs = 0
+        with self._lock:
+            referenced = set()
+            try:
+                names = sorted(os.listdir(self.root_dir))
+            except FileNotFoundError:
+                return {"days": 0, "blobs": 0}
+            for name in names:
+                if not (name.startswith("index_") and name.endswith(".jsonl")):
+                    continue
+                date_str = name[len("index_"):-len(".jsonl")]
+                if date_str < cutoff:
+                    try:
+                        os.remove(os.path.join(self.root_dir, name))
+                        removed_days += 1
+                    except OSError as exc:
+                        self.logger.warning(f"[TICKET_STORE] Could not remove {name}: {exc}")
+                        referenced.update(e["sha256"] for e in self._load_index(date_str).values())
+                    self._indexes.pop(date_str, None)
+                else:
+                    referenced.update(e["sha256"] for e in self._load_index(date_str).values())
+
+            fresh_after = time.time() - grace_seconds
+            for folder, _, files in os.walk(self.blob_dir):
+                for name in files:
+                    digest, ext = os.path.splitext(name)
+                    if ext != ".bin" or digest in referenced:
+                        continue
+                    path = os.path.join(folder, name)
+                    try:
+                        if os.path.getmtime(path) >= fresh_after:
+                            continue
+                        os.remove(path)
+                        removed_blobs += 1
+                    except OSError:
+                        continue
+        if removed_days or removed_blobs:
+            self.logger.info(f"[TICKET_STORE] Pruned {removed_days} day indexes and {removed_blobs} blobs older than {cutoff}")
+        return {"days": removed_days, "blobs": removed_blobs}
+
+    # --- Internals ---
+    def _load_index(self, date_str: str) -> Dict[Any, Dict[str, Any]]:
+        index = self._indexes.get(date_str)
+        if index is not None:
+            return index
+        index = {}
+        try:
+            with open(self.index_path(date_str), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        index[(str(entry["order_number"]), entry.get("kind", "kitchen"))] = entry
+                    except (ValueError, KeyError):
+                        continue  # torn last line after a crash
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.logger.warning(f"[TICKET_STORE] Could not read index for {date_str}: {exc}")
+        if len(self._indexes) >= self.max_cached_days:
+            self._indexes.pop(min(self._indexes))
+        self._indexes[date_str] = index
+        return index
@@ -0,0 +1,196 @@
+"""
+Usage Counters
+In-memory order/revenue counters behind usage_analytics.json with periodic atomic flushes
+"""
+
+import json
+import threading
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any
+
+from .write_behind import WriteBehindFlusher, write_atomic
+
+USAGE_COUNTERS_VERSION = 2
+
+
+class UsageCounters:
+    """
+    Keeps the usage analytics totals (orders, revenue, first/last order date)
+    and per-day counts in memory, so recording an order is a few additions
+    under a lock instead of a load and rewrite of usage_analytics.json.
+
+    The file is written atomically (temp file + replace) by a flusher thread
+    at most every flush_interval seconds while there are changes, and on
+    close(). Per-day data is stored compactly as two arrays covering the
+    last retained_days days ("days": {"start", "orders", "revenue"}), so the
+    file no longer grows with every day in business; totals are unaffected
+    when old days roll off. Files in the old format (orders_by_day /
+    revenue_by_day maps) are converted on load.
+    """
+
+    def __init__(self, app_logger, path: str, flush_interval: float = 30.0, retained_days: int = 90):
+        self.logger = app_logger
+        self.path = path
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.retained_days = max(1, int(retained_days))
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._dirty = False
+
+        self._flusher = WriteBehindFlusher(app_logger, self.flush, self.flush_interval,
+                                           name="UsageCountersFlusher", log_tag="USAGE_COUNTERS")
+
+    # --- Updates ---
+    def record_order(self, total: float, when: Optional[datetime] = None):
+        day = (when or datetime.now()).date()
+        with self._lock:
+            state = self._loaded()
+            state["total_orders"] += 1
+            state["total_revenue"] += float(total)
+            day_str = day.isoformat()
+            if not state["first_order_date"]:
+                state["first_order_date"] = day_str
+            if not state["last_order_date"] or day_str > state["last_order_date"]:
+                state["last_order_date"] = day_str
+            index = self._day_index(state, day)
+            if index is not None:
+                state["orders"][index] += 1
+                state["revenue"][index] += float(total)
+            self._dirty = True
+        self._schedule()
+
+    # --- Reads ---
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals plus orders_by_day / revenue_by_day for the retained days that had orders."""
+        with self._lock:
+            state = self._loaded()
+            start = state["start"]
+            orders_by_day, revenue_by_day = {}, {}
+            for offset, count in enumerate(state["orders"]):
+                if count:
+                    day_str = (start + timedelta(days=offset)).isoformat()
+                    orders_by_day[day_str] = count
+                    revenue_by_day[day_str] = round(state["revenue"][offset], 2)
+            return {
+                "total_orders": state["total_orders"],
+                "total_revenue": round(state["total_revenue"], 2),
+                "first_order_date": state["first_order_date"],
+                "last_order_date": state["last_order_date"],
+                "orders_by_day": orders_by_day,
+                "revenue_by_day": revenue_by_day,
+            }
+
+    # --- Persistence ---
+    def start(self):
+        self._flusher.start()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty or self._state is None:
+                    return
+                text = json.dumps(self._serialise(self._state), ensure_ascii=False, separators=(",", ":"))
+                self._dirty = False
+            try:
+                write_atomic(self.path, text)
+            except OSError as exc:
+                self.logger.error(f"[USAGE_COUNTERS] Could not write {self.path}: {exc}")
+                with self._lock:
+                    self._dirty = True
+
+    def close(self):
+        self._flusher.stop()
+        self.flush()
+
+    # --- Internals ---
+    def _schedule(self):
+        self._flusher.schedule()
+
+    def _day_index(self, state: Dict[str, Any], day: date) -> Optional[int]:
+        """Index of a day in the rolling arrays, sliding the window forward if needed. Caller holds _lock."""
+        offset = (day - state["start"]).days
+        if offset < 0:
+            return None  # older than the retained window (clock moved back)
+        overflow = offset - self.retained_days + 1
+        if overflow > 0:
+            drop = min(overflow, self.retained_days)
+            state["orders"] = state["orders"][drop:] + [0] * drop
+            state["revenue"] = state["revenue"][drop:] + [0.0] * drop
+            state["start"] = day - timedelta(days=self.retained_days - 1)
+            offset = self.retained_days - 1
+        return offset
+
+    def _new_state(self) -> Dict[str, Any]:
+        return {
+            "total_orders": 0,
+            "total_revenue": 0.0,
+            "first_order_date": None,
+            "last_order_date": None,
+            "start": date.today() - timedelta(days=self.retained_days - 1),
+            "orders": [0] * self.retained_days,
+            "revenue": [0.0] * self.retained_days,
+        }
+
+    def _serialise(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "version": USAGE_COUNTERS_VERSION,
+            "total_orders": state["total_orders"],
+            "total_revenue": round(state["total_revenue"], 2),
+            "first_order_date": state["first_order_date"],
+            "last_order_date": state["last_order_date"],
+            "days": {
+                "start": state["start"].isoformat(),
+                "orders": state["orders"],
+                "revenue": [round(value, 2) for value in state["revenue"]],
+            },
+        }
+
+    def _loaded(self) -> Dict[str, Any]:
+        """Load the file on first use (old or compact format). Caller holds _lock."""
+        if self._state is not None:
+            return self._state
+        state = self._new_state()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = None
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[USAGE_COUNTERS] Could not read {self.path}, starting from zero: {exc}")
+            data = None
+
+        if isinstance(data, dict):
+            state["total_orders"] = int(data.get("total_orders") or 0)
+            state["total_revenue"] = float(data.get("total_revenue") or 0.0)
+            state["first_order_date"] = data.get("first_order_date")
+            state["last_order_date"] = data.get("last_order_date")
+            per_day = {}
+            days = data.get("days")
+            if isinstance(days, dict):
+                try:
+                    start = date.fromisoformat(days["start"])
+                    for offset, (count, revenue) in enumerate(zip(days["orders"], days["revenue"])):
+                        per_day[start + timedelta(days=offset)] = (int(count), float(revenue))
+                except (KeyError, TypeError, ValueError):
+                    per_day = {}
+            else:
+                # Old format: unbounded {date: value} maps
+                revenue_by_day = data.get("revenue_by_day") or {}
+                for day_str, count in (data.get("orders_by_day") or {}).items():
+                    try:
+                        per_day[date.fromisoformat(day_str)] = (int(count), float(revenue_by_day.get(day_str) or 0.0))
+                    except (TypeError, ValueError):
+                        continue
+                if per_day:
+                    self._dirty = True
+            if per_day:
+                state["start"] = max(per_day) - timedelta(days=self.retained_days - 1)
+                for day, (count, revenue) in per_day.items():
+                    index = self._day_index(state, day)
+                    if index is not None:
+                        state["orders"][index] += count
+                        state["revenue"][index] += revenue
+        self._state = state
+        return state
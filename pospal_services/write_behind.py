@@ -0,0 +1,82 @@
+"""
+Write-Behind Flushing
+Background flusher thread and atomic file writes shared by the in-memory stores
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+
+
+def write_atomic(path: str, text: str, fsync: bool = True):
+    """Replace path with text via a temp file, so readers never see a partial file. Raises OSError."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class WriteBehindFlusher:
+    """
+    Runs flush() on a daemon thread. schedule() wakes the thread, which then
+    waits flush_interval seconds so every change made in that window is
+    written by a single flush() call. Before start() (or after stop())
+    schedule() calls flush() at once, so stores used by tests and tools
+    persist every change synchronously.
+
+    The owning store keeps its own dirty tracking inside flush(); stop()
+    only ends the thread, so owners flush once more after it.
+    """
+
+    def __init__(self, app_logger, flush: Callable[[], object], flush_interval: float,
+                 name: str, log_tag: str):
+        self.logger = app_logger
+        self.flush = flush
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.name = name
+        self.log_tag = log_tag
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def schedule(self):
+        if self._thread is None:
+            self.flush()
+        else:
+            self._wake.set()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.is_set():
+                break
+            # Coalesce everything that happens within one interval
+            self._stop.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                self.logger.error(f"[{self.log_tag}] Flush failed: {exc}")
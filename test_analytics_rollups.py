@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-day analytics rollups
+Covers incremental updates, payment changes and rebuilds of stale rollups
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.analytics_rollups import AnalyticsRollups, add_order_row, new_rollup, merge_rollups
+
+logger = logging.getLogger("test_analytics_rollups")
+
+DAY = '2025-06-01'
+
+
+def _row(number, hour=12, method='Cash', items=None):
+    items = items if items is not None else [
+        {'name': 'Latte', 'quantity': 2, 'itemPriceWithModifiers': 3.5,
+         'generalSelectedOptions': [{'name': 'Oat milk', 'priceChange': 0.5}, {'name': 'No sugar', 'priceChange': 0}]},
+        {'name': 'Croissant', 'quantity': 1, 'basePrice': 2.0},
+    ]
+    total = sum(float(i.get('itemPriceWithModifiers', i.get('basePrice', 0.0))) * i['quantity'] for i in items)
+    return {
+        'order_number': str(number),
+        'timestamp': f'{DAY} {hour:02d}:15:00',
+        'order_total': f'{total:.2f}',
+        'payment_method': method,
+        'items_json': json.dumps(items),
+    }
+
+
+def test_rollup_matches_row_aggregation():
+    rollup = new_rollup(DAY)
+    add_order_row(rollup, _row(1, hour=9))
+    add_order_row(rollup, _row(2, hour=9, method='Pending'))
+    add_order_row(rollup, _row(3, hour=14, method='Card', items=[{'name': 'Latte', 'quantity': 1, 'itemPriceWithModifiers': 3.0}]))
+    assert add_order_row(rollup, _row(3)) is False  # counted once
+
+    merged = merge_rollups([rollup, rollup])
+    assert merged['orders'] == 6
+    assert round(merged['gross'], 2) == 2 * (9.0 + 9.0 + 3.0)
+    assert merged['hours'] == {9: 36.0, 14: 6.0}
+    assert merged['payments'] == {'Cash': [2, 18.0], 'Pending': [2, 18.0], 'Card': [2, 6.0]}
+    assert merged['items']['Latte'] == [10, 34.0]
+    assert merged['addons'] == {'Oat milk': [4.0, 4], 'No sugar': [0.0, 4]}
+
+
+def test_orders_and_payment_changes_persist():
+    with tempfile.TemporaryDirectory() as tmp:
+        rollups = AnalyticsRollups(logger, tmp, lambda d: None)
+        rollups.record_order(DAY, _row(1, method='Pending'))
+        rollups.record_order(DAY, _row(2, method='Pending'))
+        assert rollups.update_payment(DAY, 2, 'Card') is True
+        assert rollups.update_payment(DAY, 9, 'Card') is False
+
+        reloaded = AnalyticsRollups(logger, tmp, lambda d: None)
+        assert reloaded.get(DAY)['payments'] == {'Pending': [1, 9.0], 'Card': [1, 9.0]}
+        assert reloaded.merge([DAY, '2025-06-02'])['orders'] == 2
+
+
+def test_stale_rollup_is_rebuilt_from_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [_row(1), _row(2, method='Card')]
+        version = {'n': 1}
+        source = lambda d: rows if d == DAY else None
+        signature = lambda d: version['n']
+
+        first = AnalyticsRollups(logger, tmp, source, signature=signature)
+        assert first.get(DAY)['orders'] == 2
+        first.close()
+
+        # Rows written after the last flush (e.g. a crash) change the signature
+        rows.append(_row(3, method='Mixed'))
+        version['n'] = 2
+        second = AnalyticsRollups(logger, tmp, source, signature=signature)
+        assert second.get(DAY)['payments']['Mixed'] == [1, 9.0]
+        assert second.get(DAY)['orders'] == 3
+        assert not os.path.exists(second.path_for('2025-06-02')) and second.get('2025-06-02')['orders'] == 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only table audit log
+Covers rotation, indexed filtering and paging, legacy import and crash recovery
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.audit_log import AuditLog
+
+logger = logging.getLogger("test_audit_log")
+
+
+def _entry(i, table_id, operation="status_change"):
+    return {
+        "timestamp": f"2026-10-{10 + i // 100:02d}T12:{(i // 60) % 60:02d}:{i % 60:02d}",
+        "operation": operation,
+        "table_id": table_id,
+        "user_info": "system",
+        "details": {"n": i, "note": "tab\there"},
+    }
+
+
+def test_rotation_keeps_full_history_and_queries_page_through_it():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(logger, tmp, max_segment_bytes=4096)
+        for i in range(300):
+            log.append(_entry(i, str(i % 3 + 1), "open" if i % 10 == 0 else "status_change"))
+        assert len(log.segments()) > 3
+
+        page = log.query(table_id="2", limit=25)
+        assert len(page["entries"]) == 25 and page["has_more"] and page["next_offset"] == 25
+        assert [e["details"]["n"] for e in page["entries"][:3]] == [298, 295, 292]
+
+        seen = []
+        offset = 0
+        while offset is not None:
+            page = log.query(table_id="2", limit=40, offset=offset, newest_first=False)
+            seen.extend(e["details"]["n"] for e in page["entries"])
+            offset = page["next_offset"]
+        assert seen == list(range(1, 300, 3))
+
+        opens = log.query(operation="open", since="2026-10-11", until="2026-10-11", limit=1000)["entries"]
+        assert [e["details"]["n"] for e in opens] == list(range(190, 99, -10))
+        assert opens[0]["details"]["note"] == "tab\there"
+        log.close()
+
+        # A fresh instance continues the last segment and rebuilds a lost sidecar
+        os.remove(log.index_path(log.segments()[0]))
+        reopened = AuditLog(logger, tmp, max_segment_bytes=4096)
+        reopened.append(_entry(300, "2"))
+        assert reopened.query(table_id="2", limit=1)["entries"][0]["details"]["n"] == 300
+        assert reopened.query(table_id="2", limit=1, newest_first=False)["entries"][0]["details"]["n"] == 1
+        reopened.close()
+
+
+def test_legacy_file_is_imported_and_torn_lines_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "table_audit.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([_entry(i, "5") for i in range(3)], f, indent=2)
+        log_dir = os.path.join(tmp, "table_audit")
+        log = AuditLog(logger, log_dir, legacy_file=legacy)
+        log.append(_entry(3, "5"))
+        assert not os.path.exists(legacy) and os.path.exists(legacy + ".migrated")
+        assert [e["details"]["n"] for e in log.query(table_id="5")["entries"]] == [3, 2, 1, 0]
+        log.close()
+
+        # Simulate a crash mid-write: a partial line at the end of the segment
+        with open(log.segment_path(1), "ab") as f:
+            f.write(b'{"timestamp":"2026-10-10T13:00:00","operation":"op')
+        reopened = AuditLog(logger, log_dir, legacy_file=legacy)
+        reopened.append(_entry(4, "5"))
+        assert [e["details"]["n"] for e in reopened.query(table_id="5")["entries"]] == [4, 3, 2, 1, 0]
+        assert reopened.stats()["segments"] == 1
+        reopened.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned in-memory centralized state
+Covers loading the existing state files, version/ETag changes and background persistence
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.centralized_state import CentralizedState
+
+logger = logging.getLogger("test_centralized_state")
+
+
+def _paths(tmp):
+    return {key: os.path.join(tmp, f"{key}.json")
+            for key in ("current_order", "order_line_counter", "universal_comment", "selected_table")}
+
+
+def test_existing_files_load_and_versions_drive_etags():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _paths(tmp)
+        with open(paths["current_order"], "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "quantity": 2}], f)
+        with open(paths["order_line_counter"], "w", encoding="utf-8") as f:
+            f.write("7\n")
+        with open(paths["universal_comment"], "w", encoding="utf-8") as f:
+            f.write("not json")
+
+        state = CentralizedState(logger, paths)
+        version, snapshot = state.snapshot()
+        assert version == 0
+        assert snapshot == {"current_order": [{"id": 1, "quantity": 2}], "order_line_counter": 7,
+                            "universal_comment": "not json", "selected_table": ""}
+        snapshot["current_order"].clear()   # snapshots are copies
+        assert state.get("current_order") == [{"id": 1, "quantity": 2}]
+
+        etag = state.etag(state.version, 2)
+        assert state.etag(state.version, 2) == etag and state.etag(state.version, 3) != etag
+        assert state.set("selected_table", " 12 ") == 1
+        assert state.etag(state.version, 2) != etag
+        assert state.update({"current_order": [], "order_line_counter": "0"}) == 2
+        assert state.get("order_line_counter") == 0 and state.get("selected_table") == "12"
+        assert CentralizedState(logger, paths).etag(0) != state.etag(0)
+        try:
+            state.set("device_sessions", {})
+            raise AssertionError("unknown key accepted")
+        except KeyError:
+            pass
+
+        # No flusher running: each change was written straight away
+        with open(paths["order_line_counter"], "r", encoding="utf-8") as f:
+            assert f.read() == "0"
+        with open(paths["selected_table"], "r", encoding="utf-8") as f:
+            assert f.read() == "12"
+
+
+def test_flusher_writes_latest_values_atomically():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _paths(tmp)
+        state = CentralizedState(logger, paths, flush_interval=0.2)
+        state.start()
+        try:
+            for i in range(50):
+                state.set("current_order", [{"id": n} for n in range(i + 1)])
+            assert not os.path.exists(paths["current_order"])
+            time.sleep(0.4)
+            with open(paths["current_order"], "r", encoding="utf-8") as f:
+                assert len(json.load(f)) == 50
+            assert state.stats()["writes"] == 1
+            state.set("universal_comment", "no onions")
+        finally:
+            state.close()
+        with open(paths["universal_comment"], "r", encoding="utf-8") as f:
+            assert f.read() == "no onions"
+        assert not any(name.endswith(".tmp") for name in os.listdir(tmp))
+        assert CentralizedState(logger, paths).get("universal_comment") == "no onions"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
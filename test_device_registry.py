@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory device registry
+Covers heartbeat coalescing, legacy session migration and profile updates
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.device_registry import DeviceRegistry
+
+logger = logging.getLogger("test_device_registry")
+
+
+def _registry(tmp, **kwargs):
+    return DeviceRegistry(logger, os.path.join(tmp, "device_sessions.json"),
+                          os.path.join(tmp, "device_profiles.json"), **kwargs)
+
+
+def test_heartbeats_are_coalesced_and_legacy_sessions_migrated():
+    with tempfile.TemporaryDirectory() as tmp:
+        sessions_path = os.path.join(tmp, "device_sessions.json")
+        with open(sessions_path, "w", encoding="utf-8") as f:
+            json.dump({"sessions": [{"device_id": "tablet-1", "last_seen": datetime.now().isoformat(),
+                                     "info": {"ip": "10.0.0.2"}}]}, f)
+
+        registry = _registry(tmp, flush_interval=0.2)
+        registry.start()
+        try:
+            assert registry.sessions()["tablet-1"]["info"] == {"ip": "10.0.0.2"}
+            registry.register_session("tablet-2", {"ip": "10.0.0.3"})
+            for _ in range(200):
+                assert registry.touch_session("tablet-2")
+            assert not registry.touch_session("missing")
+            time.sleep(0.4)
+            assert registry.stats()["writes"] == 1
+            with open(sessions_path, "r", encoding="utf-8") as f:
+                assert set(json.load(f)) == {"tablet-1", "tablet-2"}
+        finally:
+            registry.close()
+        assert not os.path.exists(sessions_path + ".tmp")
+
+
+def test_profile_updates_and_session_cleanup():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = _registry(tmp)
+        stale = (datetime.now() - timedelta(hours=1)).isoformat()
+        registry.replace_sessions({"old": {"last_seen": stale}, "bad": {"last_seen": "nope"}})
+        registry.register_session("new", {})
+        assert registry.cleanup_sessions() == 2
+        assert list(registry.sessions()) == ["new"]
+
+        profile = registry.update_profile("kiosk", lambda p: p.update(device_name="Bar"))
+        assert profile["device_name"] == "Bar" and profile["printers"] == {}
+        profile["device_name"] = "changed"   # returned copies do not leak into the registry
+        assert registry.profile("kiosk")["device_name"] == "Bar"
+        registry.close()
+
+        reloaded = _registry(tmp)
+        assert reloaded.profile("kiosk")["device_name"] == "Bar"
+        assert list(reloaded.sessions()) == ["new"]
+        assert reloaded.profile("missing") is None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the ESC/POS plain-text preview
+Covers command stripping, alignment, QR blocks and cuts
+"""
+
+import os
+import sys
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.escpos_preview import escpos_to_text, CUT_MARKER
+
+ESC = b"\x1b"
+GS = b"\x1d"
+
+
+def test_commands_are_stripped_and_alignment_applied():
+    ticket = (
+        ESC + b"@" + ESC + b"t\x13"
+        + ESC + b"a\x01" + GS + b"!\x11" + ESC + b"E\x01" + b"Taverna\n" + ESC + b"E\x00"
+        + ESC + b"a\x00" + GS + b"!\x00" + b"2 x Souvlaki" + b" " * 22 + b"\xd57.00\n"
+        + ESC + b"a\x02" + b"Total\n"
+        + GS + b"V\x01"
+    )
+    lines = escpos_to_text(ticket, width=42).split("\n")
+    assert lines[0] == "Taverna".center(21).rstrip()
+    assert lines[1] == "2 x Souvlaki" + " " * 22 + "€7.00"
+    assert lines[2] == "Total".rjust(42)
+    assert lines[3] == CUT_MARKER
+
+
+def test_qr_block_and_font_b_width():
+    payload = b"https://example.test/menu"
+    size = len(payload) + 3
+    qr = (
+        GS + b"(k" + bytes([4, 0, 49, 65, 50, 0])
+        + GS + b"(k" + bytes([3, 0, 49, 67, 6])
+        + GS + b"(k" + bytes([size, 0, 49, 80, 48]) + payload
+        + GS + b"(k" + bytes([3, 0, 49, 81, 48])
+    )
+    ticket = ESC + b"a\x01" + qr + ESC + b"M\x01" + b"Scan me\n" + GS + b"V\x42\x00" + ESC + b"a\x00" + b"tail"
+    lines = escpos_to_text(ticket, width=42, small_width=56).split("\n")
+    assert lines[0].strip() == "[QR: https://example.test/menu]"
+    assert lines[1] == "Scan me".center(56).rstrip()
+    assert lines[2:] == [CUT_MARKER, "tail"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the SSE event bus
+Covers non-blocking publishing, Last-Event-ID replay, coalescing and lag resyncs
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.event_bus import EventBus, RESYNC_EVENT
+
+logger = logging.getLogger("test_event_bus")
+
+
+def test_stalled_reader_never_blocks_publishers():
+    bus = EventBus(logger, buffer_size=64)
+    bus.subscribe()  # never reads
+    started = time.perf_counter()
+    for n in range(5000):
+        bus.publish('table_order_added', {'table_id': '1', 'n': n})
+    assert time.perf_counter() - started < 2.0
+
+    reader = bus.subscribe()
+    received = []
+    thread = threading.Thread(target=lambda: received.extend(reader.next_batch(timeout=5)))
+    thread.start()
+    bus.publish('table_cleared', {'table_id': '1'})
+    thread.join()
+    assert [name for _, name, _ in received] == ['table_cleared']
+
+
+def test_reconnect_replays_missed_events():
+    bus = EventBus(logger)
+    first = bus.subscribe()
+    bus.publish('table_order_added', {'table_id': '1'})
+    last_id = first.poll()[-1][0]
+    first.close()
+
+    bus.publish('table_order_added', {'table_id': '2'})
+    bus.publish('table_cleared', {'table_id': '1'})
+    replay = bus.subscribe(last_id).poll()
+    assert [(name, json.loads(data)['table_id']) for _, name, data in replay] == [
+        ('table_order_added', '2'), ('table_cleared', '1')]
+
+    # Ids from another server run cannot be replayed
+    stale = bus.subscribe('0-3').poll()
+    assert [name for _, name, _ in stale] == [RESYNC_EVENT]
+
+
+def test_lagging_reader_is_coalesced_then_resynced():
+    bus = EventBus(logger, buffer_size=16, coalesce_after=4)
+    reader = bus.subscribe()
+    for n in range(6):
+        bus.publish('table_status', {'table_id': str(n % 2), 'n': n})
+    bus.publish('table_order_added', {'table_id': '1'})
+    batch = reader.poll()
+    assert [(name, json.loads(data).get('n')) for _, name, data in batch] == [
+        ('table_status', 4), ('table_status', 5), ('table_order_added', None)]
+
+    for n in range(40):
+        bus.publish('table_order_added', {'n': n})
+    resync = reader.poll()
+    assert [name for _, name, _ in resync] == [RESYNC_EVENT]
+    assert reader.poll() == []
+    bus.publish('table_cleared', {})
+    assert [name for _, name, _ in reader.poll()] == ['table_cleared']
+
+
+def test_close_drains_then_ends_streams():
+    bus = EventBus(logger)
+    reader = bus.subscribe()
+    bus.publish('shutdown', {'message': 'bye'})
+    bus.close()
+    assert [name for _, name, _ in reader.next_batch(timeout=1)] == ['shutdown']
+    assert reader.next_batch(timeout=1) is None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
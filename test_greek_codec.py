@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the Greek receipt codec
+Golden outputs captured from the previous to_bytes/transliterate_greek_enhanced,
+plus a randomized comparison with the original two-character scan
+"""
+
+import os
+import sys
+import codecs
+import random
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services import greek_codec
+from pospal_services.greek_codec import register_greek_codec, transliterate, contains_greek
+
+GOLDEN = [
+    ('Καφές φρέντο', b'KAFES fredo'),
+    ('ΚΑΦΈΣ ΕΛΛΗΝΙΚΌΣ', b'KAFES ELLINIK?S'),
+    ('Καφές καφέ ΚΑΦΈ', b'KAFES KAFE KAFE'),
+    ('ΣΠΑΝΑΚΌΠΙΤΑ', b'SPANAKOPITA'),
+    ('ελιές ΕΛΙΈΣ Ελιές', b'ELIES ELIES ELIES'),
+    ('Μπίρα Mythos', b'BIRA Mythos'),
+    ('Σουβλάκι χοιρινό', b'Souvlaki hoirino'),
+    ('Ευχαριστούμε!', b'Efharistoyme!'),
+    ('ΑΥΓΟΛΈΜΟΝΟ', b'AFGOL?MONO'),
+    ('Τζατζίκι', b'Tzatziki'),
+    ('ΜΠΟΥΓΑΤΣΑ', b'BOUGATSA'),
+    ('Υιοθεσία', b'Yiothesia'),
+    ('Ξιφίας', b'KSifias'),
+    ('Ά Έ Ή Ί Ό Ύ Ώ', b'? ? ? ? ? ? ?'),
+    ('ΐ ΰ ϊ ϋ', b'i y i y'),
+    ('Σύνολο: 12,50 €', b'Synolo: 12,50 ?'),
+    ('ἀγάπη ῥόδο', b'?gapi ?odo'),
+    ('Τς', b'Ts'),
+    ('Ντομάτα', b'DOMATA'),
+    ('Γιαούρτι με μέλι', b'GIAOYRTI me MELI'),
+]
+
+
+def _reference(text):
+    """The original character loop: two-character patterns first, then one."""
+    text_lower = text.lower()
+    for term, latin in greek_codec.COMMON_TERMS.items():
+        if term in text_lower:
+            text = text.replace(term, latin).replace(term.upper(), latin).replace(term.capitalize(), latin)
+    mapping = dict(greek_codec.LETTERS, **greek_codec.DIGRAPHS)
+    result, i = '', 0
+    while i < len(text):
+        if i < len(text) - 1 and text[i:i + 2] in mapping:
+            result += mapping[text[i:i + 2]]
+            i += 2
+            continue
+        result += mapping.get(text[i], text[i])
+        i += 1
+    return result
+
+
+def test_golden_receipt_bytes():
+    name = register_greek_codec()
+    for text, expected in GOLDEN:
+        assert contains_greek(text)
+        assert text.encode(name, errors='replace') == expected, text
+        assert codecs.encode(text, 'pospal_greek', 'replace') == expected, text
+    assert not contains_greek('Club sandwich 8.50 €')
+
+
+def test_matches_original_scan_on_random_text():
+    rng = random.Random(16)
+    alphabet = 'αβγδεζηθικλμνξοπρστυφχψωςΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩάέήίόύώΐΰϊϋ €.,-x09'
+    words = list(greek_codec.COMMON_TERMS) + list(greek_codec.DIGRAPHS)
+    for _ in range(2000):
+        parts = [rng.choice(alphabet) for _ in range(rng.randint(1, 30))]
+        parts.insert(rng.randint(0, len(parts)), rng.choice(words))
+        text = ''.join(parts)
+        assert transliterate(text) == _reference(text), text
+
+
+def test_repeated_names_hit_the_memo():
+    transliterate.cache_clear()
+    for _ in range(50):
+        for text, _expected in GOLDEN:
+            transliterate(text)
+    info = greek_codec.memo_stats()
+    assert info.misses == len(GOLDEN) and info.hits == 49 * len(GOLDEN)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
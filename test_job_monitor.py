@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared spooler job monitor
+Covers fast completion, shared EnumJobs sweeps, persistent fatal states and timeouts
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.job_monitor import (
+    PrintJobMonitor,
+    SPOOL_JOB_COMPLETED,
+    SPOOL_JOB_GONE,
+    SPOOL_JOB_FATAL,
+    SPOOL_JOB_TIMEOUT,
+    SPOOL_JOB_UNAVAILABLE,
+    SPOOL_JOB_ERROR,
+)
+
+logger = logging.getLogger("test_job_monitor")
+
+JOB_ERROR = 0x00000002
+JOB_SPOOLING = 0x00000008
+
+
+class _FakeSpooler:
+    """EnumJobs over a dict of job_id -> (status, finishes_at)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.enum_calls = 0
+        self.open_handles = 0
+
+    def add(self, job_id, status=JOB_SPOOLING, finishes_in=None):
+        with self.lock:
+            self.jobs[job_id] = (status, None if finishes_in is None else time.monotonic() + finishes_in)
+
+    def OpenPrinter(self, name):
+        self.open_handles += 1
+        return name
+
+    def ClosePrinter(self, handle):
+        self.open_handles -= 1
+
+    def GetPrinter(self, handle, level):
+        return {"Status": 0}
+
+    def EnumJobs(self, handle, first, count, level):
+        with self.lock:
+            self.enum_calls += 1
+            now = time.monotonic()
+            return [{"JobId": job_id, "Status": status}
+                    for job_id, (status, finishes_at) in self.jobs.items()
+                    if finishes_at is None or now < finishes_at]
+
+
+def _monitor(spooler, **kwargs):
+    return PrintJobMonitor(logger, spooler, job_fatal_flags=JOB_ERROR, idle_seconds=0.2, **kwargs)
+
+
+def test_job_completion_is_reported_without_500ms_rounding():
+    spooler = _FakeSpooler()
+    monitor = _monitor(spooler)
+    spooler.add(1, finishes_in=0.08)
+    outcome = monitor.watch("Kitchen", 1, timeout_seconds=5).result(5)
+    assert outcome["state"] == SPOOL_JOB_GONE
+    assert outcome["elapsed"] < 0.3
+    monitor.close()
+
+
+def test_concurrent_jobs_share_enum_calls():
+    spooler = _FakeSpooler()
+    monitor = _monitor(spooler)
+    futures = []
+    for job_id in range(1, 21):
+        spooler.add(job_id, finishes_in=0.4)
+        futures.append(monitor.watch("Kitchen", job_id, timeout_seconds=5))
+    outcomes = [future.result(5) for future in futures]
+    assert all(outcome["state"] == SPOOL_JOB_GONE for outcome in outcomes)
+    # Twenty independent 0.5 s pollers would need at least twenty calls
+    assert spooler.enum_calls < 20
+    monitor.close()
+    time.sleep(0.05)
+    assert spooler.open_handles == 0
+
+
+def test_fatal_status_must_persist_and_timeouts_resolve():
+    spooler = _FakeSpooler()
+    monitor = _monitor(spooler, fatal_checks=3, fatal_seconds=0.3)
+    spooler.add(7, status=JOB_ERROR)
+    started = time.monotonic()
+    outcome = monitor.watch("Bar", 7, timeout_seconds=5).result(5)
+    assert outcome["state"] == SPOOL_JOB_FATAL and outcome["job_status"] == JOB_ERROR
+    assert time.monotonic() - started >= 0.3
+
+    spooler.add(8, status=0x0)
+    assert monitor.watch("Bar", 8, timeout_seconds=5).result(5)["state"] == SPOOL_JOB_COMPLETED
+
+    spooler.add(9)
+    assert monitor.watch("Bar", 9, timeout_seconds=0.3).result(5)["state"] == SPOOL_JOB_TIMEOUT
+    monitor.close()
+
+
+def test_close_resolves_outstanding_jobs():
+    spooler = _FakeSpooler()
+    monitor = _monitor(spooler)
+    spooler.add(3)
+    future = monitor.watch("Kitchen", 3, timeout_seconds=30)
+    time.sleep(0.1)
+    monitor.close()
+    assert future.result(2)["state"] == SPOOL_JOB_ERROR
+    assert monitor.watch("Kitchen", 4).result(1)["state"] == SPOOL_JOB_ERROR
+
+
+def test_open_failures_are_told_apart_from_sweep_errors():
+    class _Broken(_FakeSpooler):
+        def __init__(self, fail_open):
+            super().__init__()
+            self.fail_open = fail_open
+
+        def OpenPrinter(self, name):
+            if self.fail_open:
+                raise OSError("invalid printer name")
+            return super().OpenPrinter(name)
+
+        def EnumJobs(self, handle, first, count, level):
+            raise OSError("invalid handle")
+
+    monitor = _monitor(_Broken(fail_open=True))
+    outcome = monitor.watch("Gone", 1).result(2)
+    assert outcome["state"] == SPOOL_JOB_UNAVAILABLE and "invalid printer name" in str(outcome["error"])
+    monitor.close()
+
+    monitor = _monitor(_Broken(fail_open=False))
+    outcome = monitor.watch("Kitchen", 2).result(2)
+    assert outcome["state"] == SPOOL_JOB_ERROR and "invalid handle" in str(outcome["error"])
+    monitor.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
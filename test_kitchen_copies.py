@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for single-job multi-copy kitchen printing
+Prints through the file:// backend and checks that all copies go out as one
+document, one cut per copy, and that a failed print reports its own printer's failure
+"""
+
+import os
+import sys
+import logging
+import threading
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+ORDER = {
+    "number": 17, "tableNumber": "3", "orderDate": "2025-06-01",
+    "items": [
+        {"name": "Burger", "quantity": 2, "basePrice": 9.0, "itemPriceWithModifiers": 9.0, "comment": "no onion"},
+        {"name": "Lemonade", "quantity": 1, "basePrice": 3.0, "itemPriceWithModifiers": 3.0},
+    ],
+}
+
+
+def _import_app():
+    # Only the file:// backend is used; stand in for pywin32 where it is missing
+    sys.path.insert(0, os.path.join(current_dir, "benchmarks"))
+    from _pywin32 import install_standins
+    install_standins()
+    import app
+    app.app.logger.setLevel(logging.WARNING)
+    return app
+
+
+def test_copies_are_submitted_as_one_document_with_a_cut_each():
+    app = _import_app()
+    trial_check = app.check_trial_status
+    app.check_trial_status = lambda: {"active": True}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            printer = f"file://{tmp}"
+            ticket = bytes(app.render_kitchen_ticket(ORDER))
+            assert ticket.endswith(app.PartialCut) and ticket.count(app.PartialCut) == 1
+
+            progress = []
+            printed_any, printed_all, failure = app.print_kitchen_copies_single_job(
+                ORDER, 3, ticket_bytes=ticket, candidates=[printer],
+                progress=lambda message, **info: progress.append(info))
+            assert (printed_any, printed_all, failure) == (True, True, None)
+
+            documents = os.listdir(tmp)
+            assert len(documents) == 1 and documents[0].endswith("_x3_ESCPOST.bin")
+            with open(os.path.join(tmp, documents[0]), "rb") as f:
+                data = f.read()
+            assert data == ticket * 3
+            assert data.count(app.PartialCut) == 3
+            assert progress[-1] == {"copies_done": 3, "copies_total": 3}
+    finally:
+        app.check_trial_status = trial_check
+
+
+def test_single_copy_is_not_repeated():
+    app = _import_app()
+    trial_check = app.check_trial_status
+    app.check_trial_status = lambda: {"active": True}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ticket = bytes(app.render_kitchen_ticket(ORDER))
+            assert app.print_kitchen_ticket(ORDER, ticket_bytes=ticket, printer_name=f"file://{tmp}", copies=1)
+            documents = os.listdir(tmp)
+            assert len(documents) == 1
+            with open(os.path.join(tmp, documents[0]), "rb") as f:
+                assert f.read() == ticket
+    finally:
+        app.check_trial_status = trial_check
+
+
+def test_failed_copies_report_their_own_printer_failure():
+    app = _import_app()
+    trial_check, pdf_fallback = app.check_trial_status, app.PDF_FALLBACK_ENABLED
+    app.check_trial_status = lambda: {"active": True}
+    app.PDF_FALLBACK_ENABLED = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Another printer's failure, recorded by another thread, must not be reported for this job
+            other = threading.Thread(target=lambda: app.record_printer_failure("Printer 'Bar' is out of paper"))
+            other.start()
+            other.join()
+
+            offline = f"file://{os.path.join(tmp, 'missing', 'kitchen.bin')}"
+            ticket = bytes(app.render_kitchen_ticket(ORDER))
+            printed_any, printed_all, failure = app.print_kitchen_copies_single_job(
+                ORDER, 2, ticket_bytes=ticket, candidates=[offline])
+            assert (printed_any, printed_all) == (False, False)
+            assert failure and offline in failure and "Bar" not in failure
+    finally:
+        app.check_trial_status, app.PDF_FALLBACK_ENABLED = trial_check, pdf_fallback
+        app.printer_router.record_success(offline)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
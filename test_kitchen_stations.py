@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for kitchen station routing
+Covers category lookup by id and name, per-station splits and menu reloads
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.kitchen_stations import KitchenStationRouter, DEFAULT_STATION
+
+logger = logging.getLogger("test_kitchen_stations")
+
+MENU = {
+    "1.COFFEE": [{"id": 1, "name": "Espresso", "price": 2.5}],
+    "4.GRILL": [{"id": 7, "name": "Burger", "price": 9.0}, {"id": 8, "name": "Souvlaki", "price": 8.0}],
+    "5.COLD DRINKS": [{"id": 12, "name": "Lemonade", "price": 3.0}],
+}
+
+STATIONS = {
+    "bar": {"categories": ["1.coffee", "5.COLD DRINKS"], "printer": "Bar", "label": "BAR"},
+    "grill": {"categories": "4.GRILL", "printer": "Grill", "failover": "Kitchen"},
+}
+
+
+def _write_menu(path, menu):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(menu, f)
+
+
+def test_order_is_split_by_station_in_configured_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        menu_path = os.path.join(tmp, "menu.json")
+        _write_menu(menu_path, MENU)
+        router = KitchenStationRouter(logger, lambda: STATIONS, lambda: menu_path)
+        assert router.enabled()
+
+        order = {"number": 42, "tableNumber": "5", "items": [
+            {"id": 7, "name": "Burger", "quantity": 2},
+            {"id": 99, "name": "Espresso", "quantity": 1},       # unknown id, matched by name
+            {"name": "Daily special", "quantity": 1},             # not on the menu
+            {"id": 12, "name": "Lemonade", "quantity": 3},
+            {"name": "Soup", "category": "4.grill", "quantity": 1},
+        ]}
+        splits = router.split(order)
+        assert [s["station"] for s in splits] == ["bar", "grill", DEFAULT_STATION]
+        assert [i["name"] for i in splits[0]["order"]["items"]] == ["Espresso", "Lemonade"]
+        assert [i["name"] for i in splits[1]["order"]["items"]] == ["Burger", "Soup"]
+        assert [i["name"] for i in splits[2]["order"]["items"]] == ["Daily special"]
+        assert splits[0]["label"] == "BAR" and splits[1]["label"] == "grill"
+        assert splits[1]["failover"] == ["Kitchen"]
+        assert splits[1]["order"]["number"] == 42 and order["items"][0]["name"] == "Burger"
+
+        described = router.describe()
+        assert described["unassigned_categories"] == []
+        assert described["menu_categories"] == ["1.COFFEE", "4.GRILL", "5.COLD DRINKS"]
+
+
+def test_menu_changes_are_picked_up_and_empty_config_disables_splitting():
+    with tempfile.TemporaryDirectory() as tmp:
+        menu_path = os.path.join(tmp, "menu.json")
+        _write_menu(menu_path, MENU)
+        stations = {}
+        router = KitchenStationRouter(logger, lambda: stations, lambda: menu_path)
+        assert not router.enabled()
+        assert [s["station"] for s in router.split({"items": [{"id": 7}]})] == [DEFAULT_STATION]
+
+        stations.update(STATIONS)
+        assert router.station_for({"id": 30, "name": "Mojito"}) == DEFAULT_STATION
+        time.sleep(0.01)
+        _write_menu(menu_path, dict(MENU, **{"5.COLD DRINKS": [{"id": 30, "name": "Mojito"}]}))
+        assert router.station_for({"id": 30, "name": "Mojito"}) == "bar"
+
+        # A missing menu only loses the id/name lookup
+        os.remove(menu_path)
+        assert router.station_for({"id": 30, "name": "Mojito"}) == DEFAULT_STATION
+        assert router.station_for({"name": "Mojito", "category": "5.cold drinks"}) == "bar"
+
+
+def test_malformed_station_config_disables_splitting_instead_of_failing():
+    with tempfile.TemporaryDirectory() as tmp:
+        menu_path = os.path.join(tmp, "menu.json")
+        _write_menu(menu_path, MENU)
+        config = {"value": ["bar"]}
+        router = KitchenStationRouter(logger, lambda: config["value"], lambda: menu_path)
+        assert router.stations() == {} and not router.enabled()
+        assert [s["station"] for s in router.split({"items": [{"id": 7}]})] == [DEFAULT_STATION]
+
+        config["value"] = {"bar": {"categories": 5, "failover": {"x": 1}, "printer": "Bar"}, "grill": "Grill"}
+        assert router.stations() == {"bar": {"label": "bar", "printer": "Bar", "failover": [], "categories": []}}
+        assert not router.enabled()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
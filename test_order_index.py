@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the order CSV offset index
+Covers journal-fed offsets, lazy rebuilds and recovery from in-place rewrites
+"""
+
+import os
+import sys
+import csv
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.order_index import OrderOffsetIndex
+from pospal_services.order_journal import OrderJournal, FSYNC_NONE
+
+logger = logging.getLogger("test_order_index")
+
+FIELDNAMES = ['order_number', 'table_number', 'timestamp', 'items_summary',
+              'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
+DAY = '2025-06-01'
+
+
+def _row(number, comment=''):
+    return {
+        'order_number': str(number),
+        'table_number': '',
+        'timestamp': f'{DAY} 12:00:00',
+        'items_summary': '1x Frappé [Unit EUR 3.00]',
+        'universal_comment': comment,
+        'order_total': '3.00',
+        'payment_method': 'Cash',
+        'printed_status': 'All Copies Printed',
+        'items_json': '[{"name": "Frapp\\u00e9", "quantity": 1}]',
+    }
+
+
+def _journal(tmp):
+    index = OrderOffsetIndex(logger, tmp)
+    return OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_NONE, index=index), index
+
+
+def test_lookup_seeks_to_rows_written_by_journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal, index = _journal(tmp)
+        for n in range(1, 51):
+            journal.append(_row(n, comment='two\nlines, "quoted"' if n == 7 else ''), date_str=DAY)
+
+        assert index.find_row(DAY, 7) == _row(7, comment='two\nlines, "quoted"')
+        assert index.find_row(DAY, 50) == _row(50)
+        assert index.find_row(DAY, 51) is None
+        assert index.find_row('2025-06-02', 1) is None
+        with open(index.index_path(DAY), encoding='utf-8') as f:
+            assert len(f.readlines()) == 50
+        journal.close()
+
+
+def test_missing_or_partial_sidecar_is_rebuilt_lazily():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal, _ = _journal(tmp)
+        for n in range(1, 11):
+            journal.append(_row(n), date_str=DAY)
+        journal.close()
+
+        # Lose the sidecar entirely, then keep only half of a fresh one
+        fresh = OrderOffsetIndex(logger, tmp)
+        os.remove(fresh.index_path(DAY))
+        assert fresh.find_row(DAY, 10) == _row(10)
+        with open(fresh.index_path(DAY), encoding='utf-8') as f:
+            lines = f.readlines()
+        assert len(lines) == 10
+        fresh.close()
+        with open(fresh.index_path(DAY), 'w', encoding='utf-8') as f:
+            f.writelines(lines[:5])
+
+        caught_up = OrderOffsetIndex(logger, tmp)
+        assert caught_up.find_row(DAY, 9) == _row(9)
+        caught_up.close()
+
+
+def test_rewritten_csv_is_detected_and_reindexed():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal, index = _journal(tmp)
+        for n in range(1, 4):
+            journal.append(_row(n), date_str=DAY)
+        assert index.find_row(DAY, 2)['payment_method'] == 'Cash'
+
+        # Rewrite behind the index's back with rows of a different length
+        path = index.csv_path(DAY)
+        with journal.locked():
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            for r in rows:
+                r['payment_method'] = 'Mixed payment'
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(rows)
+
+        assert index.find_row(DAY, 3)['payment_method'] == 'Mixed payment'
+        journal.append(_row(4), date_str=DAY)
+        assert index.find_row(DAY, 4) == _row(4)
+        journal.close()
+
+
+def test_rows_written_before_the_sidecar_existed_are_indexed():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Upgrade day: the CSV already has rows but there is no .idx yet
+        path = os.path.join(tmp, f'orders_{DAY}.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(_row(n) for n in range(1, 4))
+
+        journal, index = _journal(tmp)
+        journal.append(_row(4), date_str=DAY)
+        journal.close()
+        with open(index.index_path(DAY), encoding='utf-8') as f:
+            assert [line.split()[0] for line in f] == ['1', '2', '3', '4']
+
+        fresh = OrderOffsetIndex(logger, tmp)
+        for n in range(1, 5):
+            assert fresh.find_row(DAY, n) == _row(n)
+        fresh.close()
+
+        # A sidecar whose first entry skips the earlier rows is rejected and rebuilt
+        with open(index.index_path(DAY), encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(index.index_path(DAY), 'w', encoding='utf-8') as f:
+            f.writelines(lines[3:])
+        rebuilt = OrderOffsetIndex(logger, tmp)
+        assert rebuilt.find_row(DAY, 1) == _row(1)
+        rebuilt.close()
+        with open(index.index_path(DAY), encoding='utf-8') as f:
+            assert len(f.readlines()) == 4
+
+
+def test_appends_after_invalidate_keep_earlier_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal, index = _journal(tmp)
+        for n in range(1, 4):
+            journal.append(_row(n), date_str=DAY)
+        index.invalidate(DAY)
+        journal.append(_row(4), date_str=DAY)
+        journal.close()
+
+        fresh = OrderOffsetIndex(logger, tmp)
+        assert [fresh.find_row(DAY, n)['order_number'] for n in range(1, 5)] == ['1', '2', '3', '4']
+        fresh.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
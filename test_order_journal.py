@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only order journal
+Checks CSV compatibility, day rotation and fsync grouping under each policy
+"""
+
+import os
+import sys
+import csv
+import time
+import logging
+import tempfile
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.order_journal import OrderJournal, FSYNC_NONE, FSYNC_BATCHED, FSYNC_EVERY
+
+logger = logging.getLogger("test_order_journal")
+
+FIELDNAMES = ['order_number', 'table_number', 'timestamp', 'items_summary',
+              'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
+
+
+def _row(number, **extra):
+    row = {
+        'order_number': number,
+        'table_number': '',
+        'timestamp': '2025-06-01 12:00:00',
+        'items_summary': '1x Coffee, "large" [Unit EUR 2.50]',
+        'universal_comment': 'line one\nline two',
+        'order_total': '2.50',
+        'payment_method': 'Cash',
+        'printed_status': 'All Copies Printed',
+        'items_json': '[{"name": "Coffee"}]',
+    }
+    row.update(extra)
+    return row
+
+
+def _read(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_are_visible_immediately_and_match_csv_format():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_NONE)
+        journal.append(_row(1), date_str='2025-06-01')
+        journal.append(_row(2), date_str='2025-06-01')
+
+        # Readers see the rows while the file is still open
+        rows = _read(journal.path_for('2025-06-01'))
+        assert [r['order_number'] for r in rows] == ['1', '2']
+        assert rows[0]['universal_comment'] == 'line one\nline two'
+        assert rows[0]['items_summary'] == '1x Coffee, "large" [Unit EUR 2.50]'
+        journal.close()
+
+
+def test_day_rotation_and_reopen_keep_single_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_BATCHED, commit_window_ms=10)
+        journal.append(_row(1), date_str='2025-06-01')
+        journal.append(_row(1), date_str='2025-06-02')
+        journal.close()
+
+        reopened = OrderJournal(logger, tmp, FIELDNAMES)
+        reopened.append(_row(2), date_str='2025-06-02')
+        reopened.close()
+
+        assert len(_read(os.path.join(tmp, 'orders_2025-06-01.csv'))) == 1
+        with open(os.path.join(tmp, 'orders_2025-06-02.csv'), encoding='utf-8') as f:
+            assert f.read().count('order_number,table_number') == 1
+        assert [r['order_number'] for r in _read(os.path.join(tmp, 'orders_2025-06-02.csv'))] == ['1', '2']
+
+
+def test_locked_allows_in_place_rewrite():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_NONE)
+        journal.append(_row(1), date_str='2025-06-01')
+        path = journal.path_for('2025-06-01')
+        with journal.locked():
+            rows = _read(path)
+            rows[0]['payment_method'] = 'Card'
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(rows)
+        journal.append(_row(2), date_str='2025-06-01')
+        journal.close()
+        assert [(r['order_number'], r['payment_method']) for r in _read(path)] == [('1', 'Card'), ('2', 'Cash')]
+
+
+def test_every_policy_syncs_each_row_with_grouped_fsyncs():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_EVERY)
+        threads = [threading.Thread(target=lambda n=n: journal.append(_row(n), date_str='2025-06-01'))
+                   for n in range(40)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = journal.stats()
+        assert stats['rows_synced'] == stats['rows_written'] == 40
+        assert stats['fsync_calls'] <= 40
+        assert len(_read(journal.path_for('2025-06-01'))) == 40
+        journal.close()
+
+
+def test_batched_policy_syncs_within_commit_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_BATCHED, commit_window_ms=20)
+        for n in range(10):
+            journal.append(_row(n), date_str='2025-06-01')
+        deadline = time.time() + 2
+        while journal.stats()['rows_synced'] < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = journal.stats()
+        assert stats['rows_synced'] == 10
+        assert stats['fsync_calls'] < 10
+        journal.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the order outcome overlay
+Checks last-entry-wins merging, incremental reloads and end-of-day compaction
+"""
+
+import os
+import sys
+import csv
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.order_overlay import OrderOutcomeOverlay
+from pospal_services.order_index import OrderOffsetIndex
+from pospal_services.order_journal import OrderJournal, FSYNC_NONE
+
+logger = logging.getLogger("test_order_overlay")
+
+FIELDNAMES = ['order_number', 'table_number', 'timestamp', 'items_summary',
+              'universal_comment', 'order_total', 'payment_method', 'printed_status', 'items_json']
+DAY = '2025-06-01'
+
+
+def _rows():
+    return [
+        {'order_number': str(n), 'table_number': '3', 'timestamp': f'{DAY} 12:00:0{n}', 'items_summary': '',
+         'universal_comment': '', 'order_total': '4.00', 'payment_method': 'Pending', 'printed_status': '',
+         'items_json': '[]'}
+        for n in range(1, 4)
+    ]
+
+
+def test_apply_merges_latest_entry_per_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        overlay = OrderOutcomeOverlay(logger, tmp)
+        overlay.record_payment(DAY, 1, 'Cash')
+        assert [r['payment_method'] for r in overlay.apply(DAY, _rows())] == ['Cash', 'Pending', 'Pending']
+
+        # New entries appended after the first read are picked up incrementally
+        overlay.record_payment(DAY, 1, 'Card')
+        overlay.record_payment(DAY, '2', 'Mixed')
+        assert [r['payment_method'] for r in overlay.apply(DAY, _rows())] == ['Card', 'Mixed', 'Pending']
+        assert set(overlay.entries_for_date(DAY)['1']) == {'order_number', 'payment_method', 'timestamp'}
+        assert overlay.apply('2025-06-02', _rows())[0]['payment_method'] == 'Pending'
+
+        # A torn final line is ignored until it is complete
+        with open(overlay.path_for(DAY), 'a', encoding='utf-8') as f:
+            f.write('{"order_number": "3", "payment_me')
+        assert overlay.apply_row(DAY, _rows()[2])['payment_method'] == 'Pending'
+
+
+def test_compact_folds_overlay_into_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, f'orders_{DAY}.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(_rows())
+
+        overlay = OrderOutcomeOverlay(logger, tmp)
+        overlay.record_payment(DAY, 2, 'Card')
+        overlay.record_payment(DAY, 3, 'Cash')
+        assert overlay.pending_dates() == [DAY]
+
+        assert overlay.compact(DAY, csv_path) == 2
+        assert overlay.pending_dates() == []
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            assert [r['payment_method'] for r in csv.DictReader(f)] == ['Pending', 'Card', 'Cash']
+        assert overlay.entries_for_date(DAY) == {}
+
+
+def test_print_outcome_merges_with_payment_entry():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, f'orders_{DAY}.csv')
+        rows = _rows()
+        for row in rows:
+            row['printed_status'] = 'Print Queued'
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        overlay = OrderOutcomeOverlay(logger, tmp)
+        overlay.record_payment(DAY, 1, 'Card')
+        overlay.record_printed_status(DAY, 1, 'All Copies Printed')
+        overlay.record_printed_status(DAY, 2, 'All Print Attempts Failed')
+        merged = overlay.apply(DAY, _rows())
+        assert [(r['payment_method'], r['printed_status']) for r in merged[:2]] == [
+            ('Card', 'All Copies Printed'), ('Pending', 'All Print Attempts Failed')]
+
+        assert overlay.compact(DAY, csv_path) == 2
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            assert [r['printed_status'] for r in csv.DictReader(f)] == [
+                'All Copies Printed', 'All Print Attempts Failed', 'Print Queued']
+
+
+def test_orders_written_before_the_index_can_be_resolved():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, f'orders_{DAY}.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(_rows()[:2])
+
+        # First journal append after upgrade: the day had no .idx yet
+        index = OrderOffsetIndex(logger, tmp)
+        journal = OrderJournal(logger, tmp, FIELDNAMES, fsync_policy=FSYNC_NONE, index=index)
+        journal.append(_rows()[2], date_str=DAY)
+        journal.close()
+
+        # Table clear: every order is located through the index and its payment recorded
+        lookup = OrderOffsetIndex(logger, tmp)
+        overlay = OrderOutcomeOverlay(logger, tmp)
+        for number in ('1', '2', '3'):
+            assert lookup.find_row(DAY, number) is not None
+            overlay.record_payment(DAY, number, 'Card')
+        assert [overlay.apply_row(DAY, lookup.find_row(DAY, n))['payment_method'] for n in '123'] == ['Card'] * 3
+        lookup.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
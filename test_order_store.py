@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite order store
+Covers CSV-shaped reads, indexed lookups, the CSV importer, CSV export and shutdown
+"""
+
+import os
+import sys
+import csv
+import json
+import logging
+import sqlite3
+import tempfile
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.order_store import SQLiteOrderStore, ORDER_FIELDNAMES
+
+logger = logging.getLogger("test_order_store")
+
+
+def _row(number, table='', timestamp='2025-06-01 12:00:00', total='5.00', payment='Cash'):
+    items = [{"name": "Coffee", "quantity": 2, "basePrice": 2.5, "itemPriceWithModifiers": 2.5,
+              "generalSelectedOptions": [{"name": "Oat milk", "priceChange": 0.0}]}]
+    return {
+        'order_number': str(number),
+        'table_number': table,
+        'timestamp': timestamp,
+        'items_summary': '2x Coffee [Unit EUR 2.50]',
+        'universal_comment': '',
+        'order_total': total,
+        'payment_method': payment,
+        'printed_status': 'All Copies Printed',
+        'items_json': json.dumps(items),
+    }
+
+
+def test_rows_round_trip_in_csv_shape():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteOrderStore(logger, os.path.join(tmp, 'orders.db'))
+        assert store.record_order('2025-06-01', _row(1, table='4'))
+        assert not store.record_order('2025-06-01', _row(1, table='4'))  # duplicate ignored
+
+        row = store.get_order('2025-06-01', 1)
+        assert row == _row(1, table='4')
+        assert store.get_order('2025-06-02', 1) is None
+        lines = store._connect().execute("SELECT name, quantity, unit_price FROM order_lines").fetchall()
+        assert [tuple(l) for l in lines] == [('Coffee', 2, 2.5)]
+        store.close()
+
+
+def test_table_time_range_and_summary_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteOrderStore(logger, os.path.join(tmp, 'orders.db'))
+        store.record_order('2025-06-01', _row(1, table='4', timestamp='2025-06-01 09:00:00', payment='Card'))
+        store.record_order('2025-06-01', _row(2, table='', timestamp='2025-06-01 13:00:00', total='3.50'))
+        store.record_order('2025-06-02', _row(1, table='4', timestamp='2025-06-02 10:00:00', payment='Pending'))
+
+        assert [r['timestamp'] for r in store.orders_for_table('4', '2025-06-01', '2025-06-02')] == \
+            ['2025-06-01 09:00:00', '2025-06-02 10:00:00']
+        assert [r['order_number'] for r in store.orders_between('2025-06-01 12:00:00', '2025-06-02 00:00:00')] == ['2']
+        assert store.daily_summary('2025-06-01') == {
+            'total_orders': 2, 'grand_total': 8.5, 'cash_total': 3.5, 'card_total': 5.0
+        }
+
+        assert store.update_payment_method(1, 'Card', since_date='2025-06-01') == '2025-06-02'
+        assert store.get_order('2025-06-02', 1)['payment_method'] == 'Card'
+        assert store.update_payment_method(99, 'Card', since_date='2025-06-01') is None
+        store.close()
+
+
+def test_import_is_one_shot_and_export_matches_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'orders_2025-06-01.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=ORDER_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows([_row(1), _row(2, table='7')])
+
+        store = SQLiteOrderStore(logger, os.path.join(tmp, 'orders.db'))
+        assert store.import_csv_files(tmp) == 2
+        assert store.import_csv_files(tmp) == 0
+        assert store.dates() == ['2025-06-01']
+
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            assert store.export_csv('2025-06-01') == f.read()
+        store.close()
+
+
+def test_changed_csv_is_reimported_without_duplicates():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'orders_2025-06-01.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=ORDER_FIELDNAMES)
+            writer.writeheader()
+            writer.writerow(_row(1))
+
+        store = SQLiteOrderStore(logger, os.path.join(tmp, 'orders.db'))
+        assert store.import_csv_files(tmp) == 1
+
+        # Orders appended while the store was off (or a failed store write) arrive on the next import
+        with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+            csv.DictWriter(f, fieldnames=ORDER_FIELDNAMES).writerows([_row(2), _row(3)])
+        assert store.import_csv_files(tmp) == 2
+        assert store.import_csv_files(tmp) == 0
+        assert [r['order_number'] for r in store.orders_for_date('2025-06-01')] == ['1', '2', '3']
+        store.close()
+
+
+def test_close_closes_every_thread_connection():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteOrderStore(logger, os.path.join(tmp, 'orders.db'))
+        store.record_order('2025-06-01', _row(1))
+        opened = []
+        worker = threading.Thread(target=lambda: opened.append(store._connect()))
+        worker.start()
+        worker.join()
+        main_conn = store._connect()
+        store.close()
+
+        for conn in (main_conn, opened[0]):
+            try:
+                conn.execute("SELECT 1")
+                assert False, "connection left open"
+            except sqlite3.ProgrammingError:
+                pass
+        assert store.get_order('2025-06-01', 1) is not None  # reopens lazily
+        store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the background print job queue
+Covers per-printer workers, SSE publishing and journal recovery after a restart
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.print_queue import (
+    PrintJobQueue,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_INTERRUPTED,
+    PRINTED_INTERRUPTED,
+)
+
+logger = logging.getLogger("test_print_queue")
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_submit_returns_immediately_and_completes():
+    """Submitting must not wait for the handler; the job finishes on its worker"""
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        events = []
+
+        def handler(job, progress):
+            release.wait(5)
+            progress("Copy 1 of 1 printed", copies_done=1)
+            return {"status": JOB_STATUS_COMPLETED, "printed": "All Copies Printed"}
+
+        queue = PrintJobQueue(logger, os.path.join(tmp, "print_jobs.jsonl"), handler,
+                              publish=lambda name, payload: events.append(name))
+        queue.start()
+        started = time.time()
+        job = queue.submit("Kitchen", "kitchen", {"order": {"number": 7}}, order_number=7)
+        assert time.time() - started < 0.5
+        assert job["status"] == JOB_STATUS_QUEUED
+
+        release.set()
+        assert _wait_for(lambda: queue.get(job["job_id"])["status"] == JOB_STATUS_COMPLETED)
+        assert queue.find_for_order(job["order_date"], 7)["printed"] == "All Copies Printed"
+        assert "print_job_queued" in events and "print_job_completed" in events
+        queue.stop()
+
+
+def test_handler_exception_marks_job_failed():
+    with tempfile.TemporaryDirectory() as tmp:
+        def handler(job, progress):
+            raise RuntimeError("printer exploded")
+
+        events = []
+        queue = PrintJobQueue(logger, os.path.join(tmp, "print_jobs.jsonl"), handler,
+                              publish=lambda name, payload: events.append(name))
+        queue.start()
+        job = queue.submit("Kitchen", "kitchen", {}, order_number=1)
+        assert _wait_for(lambda: queue.get(job["job_id"])["status"] == JOB_STATUS_FAILED)
+        assert "printer exploded" in queue.get(job["job_id"])["error"]
+        assert "print_job_failed" in events
+        queue.stop()
+
+
+def test_unfinished_jobs_resume_after_restart():
+    """A job still queued when the process stops is printed by the next instance"""
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "print_jobs.jsonl")
+
+        # Jobs accepted while the queue is shutting down are journaled but never dispatched
+        first = PrintJobQueue(logger, journal, lambda job, progress: None)
+        first.start()
+        first.stop()
+        job = first.submit("Kitchen", "kitchen", {"order": {"number": 3}}, order_number=3)
+        first.stop()
+
+        printed = []
+
+        def handler(job, progress):
+            printed.append(job["payload"]["order"]["number"])
+            return {"status": JOB_STATUS_COMPLETED, "printed": "All Copies Printed"}
+
+        second = PrintJobQueue(logger, journal, handler)
+        second.start()
+        assert _wait_for(lambda: printed == [3])
+        assert _wait_for(lambda: second.get(job["job_id"])["status"] == JOB_STATUS_COMPLETED)
+        second.stop()
+
+
+def test_jobs_for_different_printers_run_in_parallel():
+    with tempfile.TemporaryDirectory() as tmp:
+        active = set()
+        overlap = []
+        lock = threading.Lock()
+
+        def handler(job, progress):
+            with lock:
+                active.add(job["printer"])
+                if len(active) > 1:
+                    overlap.append(True)
+            time.sleep(0.2)
+            with lock:
+                active.discard(job["printer"])
+            return {"status": JOB_STATUS_COMPLETED}
+
+        queue = PrintJobQueue(logger, os.path.join(tmp, "print_jobs.jsonl"), handler)
+        queue.start()
+        jobs = [queue.submit(name, "kitchen", {}) for name in ("Bar", "Grill")]
+        assert _wait_for(lambda: all(queue.get(j["job_id"])["status"] == JOB_STATUS_COMPLETED for j in jobs))
+        assert overlap
+        queue.stop()
+
+
+def test_job_interrupted_while_printing_waits_for_confirmation():
+    """A restart must not reprint a ticket that may already be on paper"""
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "print_jobs.jsonl")
+        entered = threading.Event()
+        first = PrintJobQueue(logger, journal, lambda job, progress: entered.set() or time.sleep(5))
+        first.start()
+        job = first.submit("Kitchen", "kitchen", {}, order_number=9)
+        assert entered.wait(5)
+        first.stop(timeout=0.1)   # "crash" while the handler is printing
+
+        printed, outcomes = [], []
+
+        def handler(job, progress):
+            printed.append(job["job_id"])
+            return {"status": JOB_STATUS_COMPLETED, "printed": "All Copies Printed"}
+
+        second = PrintJobQueue(logger, journal, handler, on_finished=outcomes.append)
+        second.start()
+        time.sleep(0.2)
+        interrupted = second.get(job["job_id"])
+        assert printed == [] and interrupted["status"] == JOB_STATUS_INTERRUPTED
+        assert interrupted["printed"] == PRINTED_INTERRUPTED
+        assert [j["job_id"] for j in second.list_jobs()] == [job["job_id"]]
+
+        assert second.resolve(job["job_id"], reprint=True)["status"] == JOB_STATUS_QUEUED
+        assert _wait_for(lambda: second.get(job["job_id"])["status"] == JOB_STATUS_COMPLETED)
+        assert printed == [job["job_id"]] and outcomes[-1]["printed"] == "All Copies Printed"
+        assert second.resolve(job["job_id"], reprint=True) is None
+        second.stop()
+
+
+def test_finished_jobs_are_evicted_at_runtime():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = os.path.join(tmp, "print_jobs.jsonl")
+        outcomes = []
+        queue = PrintJobQueue(logger, journal,
+                              lambda job, progress: {"status": JOB_STATUS_COMPLETED, "printed": "All Copies Printed"},
+                              retention_seconds=0, on_finished=outcomes.append, prune_interval=0)
+        queue.start()
+        jobs = [queue.submit("Kitchen", "kitchen", {}, order_number=n) for n in range(1, 21)]
+        assert _wait_for(lambda: len(outcomes) == 20)
+        assert [o["order_number"] for o in outcomes] == list(range(1, 21))
+        time.sleep(0.05)
+        queue.prune(force=True)
+        assert queue.get(jobs[0]["job_id"]) is None
+        assert queue.find_for_order(jobs[0]["order_date"], 1) is None
+        assert queue.stats()["jobs_by_status"] == {}
+        queue.stop()
+        with open(journal, "r", encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == []
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable printer backends
+Covers printer-name parsing, the raw TCP (port 9100) transport and the file/loopback target
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.printer_backends import (
+    create_printer_backend,
+    is_direct_printer,
+    RawSocketBackend,
+    FileBackend,
+    Win32SpoolerBackend,
+    DEFAULT_RAW_PORT,
+    PRINTER_STATUS_OFFLINE,
+)
+
+
+class _FakeWin32Print:
+    def __init__(self):
+        self.calls = []
+
+    def OpenPrinter(self, name):
+        self.calls.append(("open", name))
+        return "handle"
+
+    def StartDocPrinter(self, handle, level, doc):
+        self.calls.append(("start_doc", doc))
+        return 42
+
+    def StartPagePrinter(self, handle):
+        self.calls.append(("start_page",))
+
+    def WritePrinter(self, handle, data):
+        self.calls.append(("write", data))
+
+    def EndPagePrinter(self, handle):
+        self.calls.append(("end_page",))
+
+    def EndDocPrinter(self, handle):
+        self.calls.append(("end_doc",))
+
+    def ClosePrinter(self, handle):
+        self.calls.append(("close",))
+
+
+def test_printer_names_select_backends():
+    raw = create_printer_backend("tcp://192.168.1.50")
+    assert isinstance(raw, RawSocketBackend)
+    assert (raw.host, raw.port) == ("192.168.1.50", DEFAULT_RAW_PORT)
+    raw = create_printer_backend("TCP://kitchen-printer:9101/")
+    assert (raw.host, raw.port) == ("kitchen-printer", 9101)
+
+    assert isinstance(create_printer_backend("file:///tmp/out"), FileBackend)
+    assert isinstance(create_printer_backend("EPSON TM-T20", win32print_module=_FakeWin32Print()), Win32SpoolerBackend)
+    assert is_direct_printer("tcp://10.0.0.2") and not is_direct_printer("EPSON TM-T20")
+
+
+def test_spooler_backend_waits_through_job_waiter():
+    fake = _FakeWin32Print()
+    waited = []
+    backend = create_printer_backend(
+        "EPSON TM-T20", win32print_module=fake, status_reader=lambda handle, name: 0,
+        job_waiter=lambda job, name, timeout_seconds: waited.append(job) or (True, None))
+    with backend:
+        assert backend.status() == 0
+        job = backend.submit("Order_1", b"\x1b@hello")
+        assert backend.wait(job) == (True, None)
+    assert waited == [42]
+    assert ("write", b"\x1b@hello") in fake.calls and fake.calls[-1] == ("close",)
+
+
+def test_raw_socket_backend_delivers_bytes():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    received = bytearray()
+
+    def accept():
+        conn, _ = server.accept()
+        with conn:
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                received.extend(chunk)
+
+    thread = threading.Thread(target=accept)
+    thread.start()
+    payload = b"\x1b@" + b"Souvlaki x2\n" * 200 + b"\x1dV\x00"
+    with create_printer_backend(f"tcp://127.0.0.1:{port}") as backend:
+        assert backend.status() == 0
+        job = backend.submit("Order_7", payload)
+        assert backend.wait(job) == (True, None)
+    thread.join(5)
+    server.close()
+    assert bytes(received) == payload
+
+    # Nothing listening: reported offline rather than raising
+    assert RawSocketBackend("tcp://127.0.0.1", "127.0.0.1", port, timeout=0.5).status() == PRINTER_STATUS_OFFLINE
+
+
+def test_file_backend_directory_and_append():
+    with tempfile.TemporaryDirectory() as tmp:
+        with create_printer_backend(f"file://{tmp}") as backend:
+            first = backend.submit("Order 1", b"one")
+            second = backend.submit("Order 1", b"two")
+        assert first != second
+        assert sorted(open(path, "rb").read() for path in (first, second)) == [b"one", b"two"]
+
+        log_path = os.path.join(tmp, "printer.bin")
+        backend = create_printer_backend(f"file://{log_path}")
+        assert backend.status() == 0
+        backend.submit("a", b"A")
+        backend.submit("b", b"B")
+        with open(log_path, "rb") as f:
+            assert f.read() == b"AB"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
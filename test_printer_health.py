@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the background printer health prober
+Covers cached snapshots, failure back-off, change publishing and slow printers
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.printer_health import PrinterHealthProber
+
+logger = logging.getLogger("test_printer_health")
+
+
+class _FakePrinters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.online = {"Kitchen": True, "Bar": True}
+        self.delay = {}
+        self.calls = {}
+
+    def probe(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            online, delay = self.online.get(name), self.delay.get(name, 0.0)
+        time.sleep(delay)
+        if online is None:
+            raise OSError(f"{name} not found")
+        return {"online": online, "status_code": 0 if online else 0x80}
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_snapshot_is_served_from_cache_and_changes_are_published():
+    printers = _FakePrinters()
+    published = []
+    prober = PrinterHealthProber(logger, printers.probe, lambda: {"kitchen": "Kitchen", "table": "Bar"},
+                                 publish_fn=published.append, interval_seconds=0.3, failure_interval_seconds=0.05)
+    prober.start()
+    try:
+        assert _wait_for(lambda: len(prober.snapshot()["printers"]) == 2)
+        calls_before = dict(printers.calls)
+        started = time.perf_counter()
+        for _ in range(200):
+            entry = prober.get("Kitchen")
+        assert (time.perf_counter() - started) / 200 < 0.005
+        assert entry["online"] and entry["roles"] == ["kitchen"] and entry["fresh"]
+        assert printers.calls["Kitchen"] - calls_before["Kitchen"] <= 1
+
+        printers.online["Bar"] = False
+        assert _wait_for(lambda: not prober.get("Bar")["online"])
+        assert [(e["printer_name"], e["online"]) for e in published][-1] == ("Bar", False)
+
+        # Failing printers are re-probed on the faster schedule
+        bar_calls, kitchen_calls = printers.calls["Bar"], printers.calls["Kitchen"]
+        time.sleep(0.35)
+        assert printers.calls["Bar"] - bar_calls >= 3
+        assert printers.calls["Kitchen"] - kitchen_calls <= 2
+        assert prober.get("Bar")["consecutive_failures"] >= 3
+    finally:
+        prober.stop()
+
+
+def test_slow_printer_does_not_delay_others_and_adhoc_names_are_probed():
+    printers = _FakePrinters()
+    printers.delay["Bar"] = 1.0
+    prober = PrinterHealthProber(logger, printers.probe, lambda: {"kitchen": "Kitchen", "table": "Bar"},
+                                 interval_seconds=5.0)
+    prober.start()
+    try:
+        assert _wait_for(lambda: prober.get("Kitchen") is not None, timeout=0.5)
+        assert prober.get("Bar") is None
+
+        assert prober.track("Unknown") is None
+        assert _wait_for(lambda: prober.get("Unknown") is not None, timeout=0.5)
+        unknown = prober.get("Unknown")
+        assert not unknown["online"] and "not found" in unknown["error"]
+
+        # A status seen by the print path updates the snapshot without a probe
+        prober.observe("Kitchen", 0x80, online=False)
+        assert prober.get("Kitchen")["source"] == "print" and prober.get("Kitchen")["status_code"] == 0x80
+    finally:
+        prober.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
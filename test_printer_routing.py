@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for printer failover routing
+Covers health-based ordering, circuit-breaker trips, half-open recovery and last-resort attempts
+"""
+
+import os
+import sys
+import time
+import logging
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.printer_routing import (
+    PrinterFailoverRouter,
+    BREAKER_CLOSED,
+    BREAKER_OPEN,
+    BREAKER_HALF_OPEN,
+)
+
+logger = logging.getLogger("test_printer_routing")
+
+PAPER_OUT = 0x00000010
+OFFLINE = 0x00000080
+
+
+def test_unhealthy_primary_is_tried_last():
+    health = {
+        "Kitchen": {"online": True, "status_code": PAPER_OUT, "fresh": True},
+        "Bar": {"online": True, "status_code": 0, "fresh": True},
+        "Spare": {"online": False, "status_code": OFFLINE, "fresh": True},
+    }
+    router = PrinterFailoverRouter(logger, health_lookup=health.get, fatal_flags=PAPER_OUT | OFFLINE)
+    assert router.route(["Kitchen", "Bar", "Spare", "Bar", ""]) == ["Bar", "Kitchen", "Spare"]
+    assert router.unhealthy_reason("Kitchen") == "status 0x0010"
+    assert router.unhealthy_reason("Spare") == "offline"
+
+    # Stale or missing snapshots do not count against a printer
+    health["Kitchen"]["fresh"] = False
+    assert router.route(["Kitchen", "Bar", "Unknown"]) == ["Kitchen", "Bar", "Unknown"]
+
+
+def test_breaker_opens_then_half_opens_and_closes():
+    router = PrinterFailoverRouter(logger, failure_threshold=2, cooldown_seconds=0.2)
+    router.record_failure("Kitchen", "timeout")
+    assert router.breaker_state("Kitchen") == BREAKER_CLOSED
+    assert router.route(["Kitchen", "Bar"]) == ["Kitchen", "Bar"]
+
+    router.record_failure("Kitchen", "timeout")
+    assert router.breaker_state("Kitchen") == BREAKER_OPEN
+    assert router.route(["Kitchen", "Bar"]) == ["Bar", "Kitchen"]
+    assert router.snapshot()["Kitchen"]["last_error"] == "timeout"
+
+    time.sleep(0.25)
+    assert router.breaker_state("Kitchen") == BREAKER_HALF_OPEN
+    assert router.route(["Kitchen", "Bar"]) == ["Kitchen", "Bar"]
+
+    # A failed trial re-opens immediately; a success closes the circuit
+    router.record_failure("Kitchen", "still jammed")
+    assert router.breaker_state("Kitchen") == BREAKER_OPEN
+    router.record_success("Kitchen")
+    assert router.breaker_state("Kitchen") == BREAKER_CLOSED and router.snapshot() == {}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled receipt template cache
+Covers compile-once behaviour, key changes, LRU eviction and byte-for-byte
+equality with golden bytes from the builder before templates were compiled
+"""
+
+import os
+import sys
+import copy
+import json
+import logging
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.receipt_templates import ReceiptTemplateCache, CompiledReceiptTemplate
+
+PROFILE = {
+    "name": "Taverna Nikos", "address": "Odos Ermou 12\nAthens 10563", "phone": "210 1234567",
+    "email": "info@nikos.gr", "website": "nikos.gr", "tax_id": "EL123456789",
+    "footer": "Thank you for visiting!\nCome again soon", "footer_kitchen": "KITCHEN COPY",
+    "logo": "*** TAVERNA NIKOS ***", "qr_payload": "https://pay.example/t/4", "updated_at": "golden",
+}
+ITEMS = [
+    {"name": "Souvlaki pita with extra tzatziki and fries on the side", "quantity": 2, "basePrice": 3.5,
+     "itemPriceWithModifiers": 4.0, "generalSelectedOptions": [{"name": "Extra sauce", "priceChange": 0.5}],
+     "comment": "well done please"},
+    {"name": "Χωριάτικη σαλάτα", "quantity": 1, "basePrice": 6.0, "itemPriceWithModifiers": 6.0},
+]
+
+def _template(key, name=b"Taverna"):
+    return CompiledReceiptTemplate(
+        key, b"\x1ba\x01" + name + b"\n", {"section_items": b"--\nItems\n"}, b"",
+        {"customer": b"\nThanks\n", "kitchen": b"\n"}, {"section_items": "Items"}
+    )
+
+
+def test_templates_compile_once_per_key():
+    cache = ReceiptTemplateCache()
+    compiles = []
+
+    def compile_for(key):
+        compiles.append(key)
+        return _template(key)
+
+    key = ("2026-10-16T10:00:00", "en", 42, 56)
+    first = cache.get(key, lambda: compile_for(key))
+    for _ in range(100):
+        assert cache.get(key, lambda: compile_for(key)) is first
+    assert compiles == [key]
+
+    # A saved profile has a new updated_at and therefore a new template
+    updated = ("2026-10-16T11:00:00", "en", 42, 56)
+    assert cache.get(updated, lambda: compile_for(updated)) is not first
+    assert cache.stats() == {"hits": 100, "compiles": 2, "entries": 2}
+
+
+def test_lru_eviction_and_fallbacks():
+    cache = ReceiptTemplateCache(max_entries=2)
+    for lang in ("en", "el", "en", "de"):
+        cache.get(("v1", lang), lambda: _template(("v1", lang)))
+    assert cache.peek(("v1", "el")) is None
+    assert cache.peek(("v1", "en")) is not None and cache.peek(("v1", "de")) is not None
+
+    template = cache.peek(("v1", "en"))
+    assert template.footer("table") == b"\nThanks\n"
+    assert template.heading("section_qr") == b""
+
+
+def _import_app():
+    # Rendering needs no printer; stand in for pywin32 where it is missing
+    sys.path.insert(0, os.path.join(current_dir, "benchmarks"))
+    from _pywin32 import install_standins
+    install_standins()
+    import app
+    app.app.logger.setLevel(logging.WARNING)
+    return app
+
+
+GOLDEN_PATH = os.path.join(current_dir, "test_receipt_templates_golden.json")
+GOLDEN_PROFILES = {
+    "taverna": PROFILE,
+    "kafeneio": {"name": "Καφενείο", "footer_table": "Γεια σας", "updated_at": "golden"},
+}
+
+
+def _golden_receipt(language, profile, kind):
+    """A fixed receipt payload (no clock or random ids) in the shape of build_simple_customer_receipt_payload."""
+    stamp = "2026-10-16T12:30:00"
+    payment = {"payment_id": "golden-0009", "amount": 14.0, "method": "Card", "timestamp": stamp, "note": ""}
+    return {
+        "table_id": "4", "table_name": "4", "payment": payment, "total_payments": 1,
+        "bill_total": 14.0, "amount_paid_total": 14.0, "amount_remaining": 0.0, "payment_status": "paid",
+        "payments": [payment],
+        "orders": [{"order_number": 9, "timestamp": stamp, "items": copy.deepcopy(ITEMS), "universal_comment": ""}],
+        "timestamp": stamp, "bill_date": "2026-10-16", "bill_time": "12:30", "seats": None,
+        "mode": "simple", "channel_label": "Simple Sale", "language": language, "receipt_kind": kind,
+        "business_profile": profile, "include_payment_details": kind == "customer",
+    }
+
+
+def _golden_cases():
+    for language in ("en", "el"):
+        for profile_name, profile in GOLDEN_PROFILES.items():
+            for kind in ("customer", "kitchen", "table"):
+                yield f"{language}-{profile_name}-{kind}", _golden_receipt(language, profile, kind)
+
+
+def test_compiled_receipts_match_the_pre_template_golden_bytes():
+    """
+    test_receipt_templates_golden.json holds the ESC/POS bytes that the receipt
+    builder produced before headers and footers were compiled (baseline commit,
+    42/56-column layout) for the payloads from _golden_cases().
+    """
+    app = _import_app()
+    with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    assert sorted(golden) == sorted(case for case, _ in _golden_cases())
+    assert (app.RECEIPT_NORMAL_LINE_WIDTH, app.RECEIPT_SMALL_LINE_WIDTH) == (42, 56)
+
+    for case, receipt in _golden_cases():
+        # Twice: the first build compiles the template, the second is served from the cache
+        for _ in range(2):
+            rendered = bytes(app.build_customer_receipt_content(copy.deepcopy(receipt), cut_after=True))
+            assert rendered.hex() == golden[case], case
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio SSE gateway
+Streams events published on the shared bus and replays them after reconnects
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.event_bus import EventBus
+from pospal_services.sse_gateway import SSEGateway
+
+logger = logging.getLogger("test_sse_gateway")
+
+
+def _open(port, path="/api/events", headers=""):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    return sock
+
+
+def _read_until(sock, marker):
+    data = b""
+    while marker.encode() not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode()
+
+
+def test_streams_share_the_bus_and_replay_on_reconnect():
+    bus = EventBus(logger)
+    gateway = SSEGateway(logger, bus, host="127.0.0.1", port=0,
+                         initial_events=lambda: [("settings", json.dumps({"language": "el"}))])
+    assert gateway.start()
+    try:
+        streams = [_open(gateway.port) for _ in range(20)]
+        for sock in streams:
+            head = _read_until(sock, '"language": "el"')
+            assert "text/event-stream" in head and "Access-Control-Allow-Origin" not in head
+        deadline = time.time() + 5
+        while gateway.stats()["connections"] < 20 and time.time() < deadline:
+            time.sleep(0.01)
+
+        first_id = bus.publish("table_order_added", {"table_id": "7"})
+        for sock in streams:
+            assert f"id: {first_id}\nevent: table_order_added" in _read_until(sock, '"7"}')
+        streams[0].close()
+
+        bus.publish("table_cleared", {"table_id": "7"})
+        replay = _open(gateway.port, headers=f"Last-Event-ID: {first_id}\r\n")
+        assert "event: table_cleared" in _read_until(replay, "table_cleared")
+        replay.close()
+
+        ping = _open(gateway.port, path="/ping")
+        assert '"status": "ok"' in _read_until(ping, "}")
+        ping.close()
+    finally:
+        gateway.stop()
+    assert not gateway.running
+    # Streams still open at shutdown are ended by the server
+    assert "event: table_cleared" in _read_until(streams[1], "__closed__")
+
+
+def test_only_the_main_app_origin_may_read_the_stream():
+    gateway = SSEGateway(logger, EventBus(logger), host="127.0.0.1", port=0, app_port=5000)
+    assert gateway.start()
+    try:
+        def head_for(origin):
+            sock = _open(gateway.port, path="/ping", headers=f"Origin: {origin}\r\n")
+            try:
+                return _read_until(sock, "}")
+            finally:
+                sock.close()
+
+        allowed = head_for("http://localhost:5000")
+        assert "Access-Control-Allow-Origin: http://localhost:5000\r\n" in allowed and "Vary: Origin" in allowed
+        for origin in ("http://evil.example:5000", "http://localhost:8080", "https://localhost:5000", "null"):
+            head = head_for(origin)
+            assert "Access-Control-Allow-Origin" not in head and "Vary: Origin" in head
+    finally:
+        gateway.stop()
+
+
+def test_busy_port_is_reported():
+    holder = socket.socket()
+    holder.bind(("127.0.0.1", 0))
+    holder.listen(1)
+    try:
+        gateway = SSEGateway(logger, EventBus(logger), host="127.0.0.1", port=holder.getsockname()[1])
+        assert gateway.start() is False
+        assert gateway.error
+    finally:
+        holder.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only table history store
+Covers day sealing with a footer index, multi-day range reads and legacy import
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.table_history import TableHistoryStore, TRAILER_PREFIX
+
+logger = logging.getLogger("test_table_history")
+
+
+def _session(i, table_id):
+    return {"table_id": table_id, "opened_at": "12:00:00", "closed_at": f"13:{i % 60:02d}:00",
+            "orders": [i], "total": 10.5, "payments": []}
+
+
+def test_days_are_sealed_and_range_reads_use_the_footer():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TableHistoryStore(logger, tmp)
+        for i in range(30):
+            store.append(_session(i, str(i % 3)), date_str="2026-10-01")
+        for i in range(5):
+            store.append(_session(i, "1"), date_str="2026-10-03")   # moving on seals 10-01
+
+        path = store.path_for("2026-10-01")
+        with open(path, "rb") as f:
+            assert f.read().splitlines()[-1].startswith(TRAILER_PREFIX)
+        summary = store.day_summary("2026-10-01")
+        assert summary["count"] == 30 and summary["total"] == 315.0 and summary["tables"]["1"] == 10
+
+        rows = list(store.iter_range("2026-09-30", "2026-10-03", table_id="1"))
+        assert [d for d, _ in rows] == ["2026-10-01"] * 10 + ["2026-10-03"] * 5
+        assert [s["orders"][0] for _, s in rows[:3]] == [1, 4, 7]
+        assert len(store.load_day("2026-10-01")) == 30
+        assert store.load_day("2026-10-02") == []
+
+        # A late write to a sealed day is still found, and re-sealing indexes it
+        store.append(_session(99, "1"), date_str="2026-10-01")
+        assert len(store.load_day("2026-10-01", table_id="1")) == 11
+        store.close()
+        assert store.seal("2026-10-01")
+        assert store.day_summary("2026-10-01")["count"] == 31
+        assert len(store.load_day("2026-10-01")) == 31
+
+
+def test_legacy_day_file_is_imported_and_torn_lines_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TableHistoryStore(logger, tmp)
+        legacy = store.legacy_path_for("2026-09-01")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({"date": "2026-09-01", "sessions": [_session(1, "4"), _session(2, "5")]}, f, indent=2)
+
+        assert [s["table_id"] for s in store.load_day("2026-09-01")] == ["4", "5"]
+        assert os.path.exists(legacy + ".migrated") and not os.path.exists(legacy)
+        assert store.day_summary("2026-09-01")["count"] == 2   # past day: sealed on first read
+
+        with open(store.path_for("2026-10-05"), "wb") as f:
+            f.write(json.dumps(_session(1, "2")).encode() + b"\n" + b'{"table_id": "3", "tot')
+        store.append(_session(2, "3"), date_str="2026-10-05")
+        assert [s["orders"][0] for s in store.load_day("2026-10-05")] == [1, 2]
+        store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
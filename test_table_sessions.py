@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory table session store
+Covers per-table locking, snapshot copies and journal recovery
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+import threading
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.table_sessions import TableSessionStore
+
+logger = logging.getLogger("test_table_sessions")
+
+
+def _store(tmp, **kwargs):
+    return TableSessionStore(
+        logger,
+        os.path.join(tmp, "table_sessions.json"),
+        os.path.join(tmp, "table_sessions.journal"),
+        **kwargs
+    )
+
+
+def test_per_table_updates_are_not_lost():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp, flush_interval=0.01)
+        store.start()
+
+        def add_orders(table_id):
+            for n in range(25):
+                with store.lock(table_id):
+                    session = store.get(table_id) or {"orders": [], "total_amount": 0.0}
+                    session["orders"].append(n)
+                    session["total_amount"] += 2.0
+                    store.put(table_id, session)
+
+        threads = [threading.Thread(target=add_orders, args=(str(t % 3),)) for t in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for table_id in ("0", "1", "2"):
+            assert len(store.get(table_id)["orders"]) == 50
+            assert store.peek(table_id, "total_amount") == 100.0
+        store.close()
+
+        with open(os.path.join(tmp, "table_sessions.json"), encoding="utf-8") as f:
+            assert len(json.load(f)["1"]["orders"]) == 50
+        assert os.path.getsize(os.path.join(tmp, "table_sessions.journal")) == 0
+
+
+def test_snapshot_is_a_private_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        store.put("1", {"total_amount": 5.0, "orders": [{"number": 1}]})
+        store.put("2", {"total_amount": 7.0})
+
+        sessions = store.snapshot()
+        sessions["1"]["orders"].append({"number": 2})
+        del sessions["2"]
+        assert store.get("1") == {"total_amount": 5.0, "orders": [{"number": 1}]}
+        assert sorted(store.table_ids()) == ["1", "2"]
+
+        store.delete("1")
+        assert store.get("1") is None
+        assert store.table_ids() == ["2"]
+
+
+def test_recovers_from_journal_without_clean_shutdown():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "table_sessions.json"), "w", encoding="utf-8") as f:
+            json.dump({"4": {"total_amount": 1.0}, "5": {"total_amount": 2.0}}, f, indent=2)
+
+        first = _store(tmp, flush_interval=0.01)
+        first.start()
+        first.put("4", {"total_amount": 3.5})
+        first.delete("5")
+        first.flush()
+
+        # Torn write from a power cut
+        with open(os.path.join(tmp, "table_sessions.journal"), "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "table": "6", "sess')
+
+        second = _store(tmp)
+        assert second.snapshot() == {"4": {"total_amount": 3.5}}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the rendered-ticket blob store
+Covers round trips, de-duplication, per-day indexes and damaged files
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from datetime import date
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.ticket_store import TicketBlobStore
+
+logger = logging.getLogger("test_ticket_store")
+
+TICKET = b"\x1b@\x1bt\x13Order #12\nSouvlaki x2\n\n\x1dV\x01"
+
+
+def test_round_trip_across_days_and_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TicketBlobStore(logger, tmp)
+        store.store("2026-10-15", 12, TICKET)
+        store.store("2026-10-16", 12, TICKET + b"!")
+        assert store.load("2026-10-15", "12") == TICKET
+        assert store.load("2026-10-16", 12) == TICKET + b"!"
+        assert store.load("2026-10-16", 13) is None
+
+        reopened = TicketBlobStore(logger, tmp)
+        assert reopened.load("2026-10-15", 12) == TICKET
+        assert reopened.has("2026-10-16", "12") and not reopened.has("2026-10-14", "12")
+
+
+def test_station_tickets_are_kept_per_kind():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TicketBlobStore(logger, tmp)
+        store.store("2026-10-16", 5, TICKET + b"bar", kind="station:bar")
+        store.store("2026-10-16", 5, TICKET + b"grill", kind="station:grill")
+        store.store("2026-10-16", 6, TICKET)
+        assert store.kinds("2026-10-16", "5") == ["station:bar", "station:grill"]
+        assert store.load("2026-10-16", 5) is None
+        assert store.load("2026-10-16", 5, kind="station:grill") == TICKET + b"grill"
+        assert TicketBlobStore(logger, tmp).kinds("2026-10-16", 5) == ["station:bar", "station:grill"]
+
+
+def test_identical_tickets_share_one_blob():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TicketBlobStore(logger, tmp)
+        first = store.store("2026-10-16", 1, TICKET)
+        second = store.store("2026-10-16", 2, TICKET)
+        assert first == second
+        blobs = [name for _, _, files in os.walk(store.blob_dir) for name in files]
+        assert len(blobs) == 1
+        assert os.path.getsize(store.blob_path(first)) < len(TICKET) * 2
+
+        # The newest entry for an order wins
+        store.store("2026-10-16", 1, b"reprinted")
+        assert store.load("2026-10-16", 1) == b"reprinted"
+
+
+def test_prune_drops_old_days_and_unreferenced_blobs():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TicketBlobStore(logger, tmp)
+        old = store.store("2026-06-01", 1, TICKET + b"old")
+        shared = store.store("2026-06-01", 2, TICKET)
+        store.store("2026-10-16", 2, TICKET)
+        recent = store.store("2026-10-15", 3, TICKET + b"recent")
+
+        assert store.prune(30, today=date(2026, 10, 16), grace_seconds=0) == {"days": 1, "blobs": 1}
+        assert not os.path.exists(store.index_path("2026-06-01"))
+        assert not os.path.exists(store.blob_path(old))
+        assert os.path.exists(store.blob_path(shared)) and os.path.exists(store.blob_path(recent))
+        assert store.load("2026-06-01", 1) is None
+        assert store.load("2026-10-16", 2) == TICKET
+
+        # Blobs inside the grace period survive even if not indexed yet
+        orphan = store.store("2026-05-01", 9, b"orphan")
+        os.remove(store.index_path("2026-05-01"))
+        assert store.prune(30, today=date(2026, 10, 16))["blobs"] == 0
+        assert os.path.exists(store.blob_path(orphan))
+
+
+def test_torn_index_line_and_damaged_blob():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TicketBlobStore(logger, tmp)
+        digest = store.store("2026-10-16", 5, TICKET)
+        with open(store.index_path("2026-10-16"), "a", encoding="utf-8") as f:
+            f.write('{"order_number": "6", "sha')
+
+        reopened = TicketBlobStore(logger, tmp)
+        assert reopened.load("2026-10-16", 5) == TICKET
+        reopened.store("2026-10-16", 7, b"seven")
+        assert TicketBlobStore(logger, tmp).load("2026-10-16", 7) == b"seven"
+
+        with open(store.blob_path(digest), "wb") as f:
+            f.write(b"garbage")
+        assert reopened.load("2026-10-16", 5) is None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory usage counters
+Covers legacy file conversion, the rolling per-day window and deferred flushing
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+from datetime import datetime
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.usage_counters import UsageCounters, USAGE_COUNTERS_VERSION
+
+logger = logging.getLogger("test_usage_counters")
+
+
+def test_legacy_file_is_converted_and_old_days_roll_off():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "usage_analytics.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "total_orders": 4, "total_revenue": 40.0,
+                "first_order_date": "2026-01-01", "last_order_date": "2026-01-10",
+                "orders_by_day": {"2026-01-01": 1, "2026-01-09": 1, "2026-01-10": 2},
+                "revenue_by_day": {"2026-01-01": 10.0, "2026-01-09": 10.0, "2026-01-10": 20.0},
+            }, f, indent=2)
+
+        counters = UsageCounters(logger, path, retained_days=7)
+        snapshot = counters.snapshot()
+        assert snapshot["total_orders"] == 4 and snapshot["total_revenue"] == 40.0
+        assert snapshot["orders_by_day"] == {"2026-01-09": 1, "2026-01-10": 2}
+
+        counters.record_order(12.5, when=datetime(2026, 1, 12, 18, 0))
+        counters.record_order(7.5, when=datetime(2026, 1, 20, 9, 0))
+        snapshot = counters.snapshot()
+        assert snapshot["total_orders"] == 6 and snapshot["total_revenue"] == 60.0
+        assert snapshot["orders_by_day"] == {"2026-01-20": 1}
+        assert snapshot["first_order_date"] == "2026-01-01" and snapshot["last_order_date"] == "2026-01-20"
+
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        assert stored["version"] == USAGE_COUNTERS_VERSION and "orders_by_day" not in stored
+        assert stored["days"]["start"] == "2026-01-14" and len(stored["days"]["orders"]) == 7
+
+        reloaded = UsageCounters(logger, path, retained_days=7).snapshot()
+        assert reloaded == snapshot
+
+
+def test_flusher_batches_writes_and_close_persists():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "usage_analytics.json")
+        counters = UsageCounters(logger, path, flush_interval=0.2)
+        counters.start()
+        try:
+            for _ in range(100):
+                counters.record_order(2.0)
+            assert not os.path.exists(path)
+            time.sleep(0.4)
+            with open(path, "r", encoding="utf-8") as f:
+                assert json.load(f)["total_orders"] == 100
+            counters.record_order(3.0)
+        finally:
+            counters.close()
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        assert stored["total_orders"] == 101 and stored["total_revenue"] == 203.0
+        today = (datetime.now().date() - datetime.fromisoformat(stored["days"]["start"]).date()).days
+        assert stored["days"]["orders"][today] == 101
+        assert not os.path.exists(path + ".tmp")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")
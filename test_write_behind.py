@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared write-behind flusher
+Covers synchronous flushes before start(), coalescing, stop() and atomic writes
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from pospal_services.write_behind import WriteBehindFlusher, write_atomic
+
+logger = logging.getLogger("test_write_behind")
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_schedule_flushes_at_once_until_started():
+    calls = []
+    flusher = WriteBehindFlusher(logger, lambda: calls.append(1), 0.05, name="TestFlusher", log_tag="TEST")
+    flusher.schedule()
+    flusher.schedule()
+    assert len(calls) == 2 and not flusher.running
+
+
+def test_started_flusher_coalesces_and_survives_errors():
+    calls = []
+
+    def flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+
+    flusher = WriteBehindFlusher(logger, flush, 0.05, name="TestFlusher", log_tag="TEST")
+    flusher.start()
+    try:
+        for _ in range(20):
+            flusher.schedule()
+        assert _wait_for(lambda: len(calls) == 1)
+        time.sleep(0.1)
+        assert len(calls) == 1  # twenty changes, one flush
+
+        flusher.schedule()
+        assert _wait_for(lambda: len(calls) == 2)  # the loop kept running after the failed flush
+    finally:
+        flusher.stop()
+    assert not flusher.running
+
+
+def test_write_atomic_replaces_without_leaving_a_temp_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nested", "state.json")
+        write_atomic(path, '{"a": 1}')
+        write_atomic(path, '{"a": 2}', fsync=False)
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == '{"a": 2}'
+        assert os.listdir(os.path.dirname(path)) == ["state.json"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"[SUCCESS] {name}")